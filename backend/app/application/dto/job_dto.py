@@ -0,0 +1,34 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+class JobSubmissionResponse(BaseModel):
+    job_id: int
+    status: str
+    status_url: str
+    events_url: str
+
+class JobStatusResponse(BaseModel):
+    job_id: int
+    kind: str
+    status: str      # pending, running, done, failed
+    stage: str       # queued, searched, downloaded, processed, saved
+    attempts: int
+    max_attempts: int
+    downloaded_bytes: int = 0
+    total_bytes: int = 0
+    progress: Optional[dict] = None  # Counters of long batch jobs (e.g. FIWARE backfill)
+    result: Optional[dict] = None  # Calculate response, once done
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class FiwareBackfillRequest(BaseModel):
+    data_types: Optional[List[str]] = None  # NDVI, SOIL_MOISTURE; all when omitted
+    history: bool = True                     # Also load QuantumLeap parcel history
+    batch_size: Optional[int] = None         # Default FIWARE_BACKFILL_BATCH_SIZE
+    concurrency: Optional[int] = None        # Default FIWARE_BACKFILL_CONCURRENCY
@@ -0,0 +1,73 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Pipeline metrics Data Transfer Objects.
+"""
+from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class StageMetricsDTO(BaseModel):
+    """Aggregated metrics of one pipeline stage within a run."""
+    stage: str
+    count: int
+    errors: int
+    total_seconds: float
+    avg_seconds: float
+    max_seconds: float
+    total_bytes: int
+    throughput_mb_per_second: Optional[float] = None
+    items: int
+    peak_rss_mb: Optional[float] = None
+    share_of_time: float  # Fraction of the run's measured time spent in this stage
+
+
+class PipelineRunReportDTO(BaseModel):
+    """Per-stage report of a pipeline run (e.g. 'ndvi_sync:2025-01-31')."""
+    run_id: str
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    total_seconds: float
+    total_bytes: int
+    slowest_stage: Optional[str] = None
+    stages: List[StageMetricsDTO]
+
+
+class PipelineRunListDTO(BaseModel):
+    """Most recent pipeline runs."""
+    runs: List[PipelineRunReportDTO]
+
+
+class PlannedProductDTO(BaseModel):
+    """A catalogue product a sync would download, with the number of farms needing it."""
+    uuid: str
+    title: str
+    acquisition_date: str
+    size_bytes: Optional[int] = None
+    cloud_cover: Optional[float] = None
+    farms: int
+
+
+class SyncPlanDTO(BaseModel):
+    """Dry-run estimate of a sync of every due farm."""
+    data_type: str
+    generated_at: datetime
+    farms_total: int
+    farms_planned: int
+    farms_skipped_not_due: int
+    farms_without_catalogue: int   # No cached search: products estimated from the revisit cadence
+    product_jobs: int              # (farm, product) pairs to download and process
+    estimated_uncatalogued_products: int
+    unique_products: int
+    products: List[PlannedProductDTO]
+    download_bytes: int            # As scheduled: every farm job downloads its products
+    unique_download_bytes: int     # If each product were downloaded once
+    estimated_search_seconds: float
+    estimated_download_seconds: float
+    estimated_cpu_seconds: float   # Unzip, band decode, index computation
+    estimated_total_seconds: float
+    concurrency: int
+    estimated_completion_at: datetime
+    history_source: str            # 'metrics' (past runs) or 'defaults'
@@ -0,0 +1,172 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Asynchronous NDVI / Soil Moisture calculations.
+
+The API enqueues a job and returns immediately; the satellite worker runs the
+regular calculate use case with a JobProgress, so clients can follow the stage
+and downloaded bytes and fetch the result when the job is done.
+"""
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.application.dto.job_dto import JobStatusResponse, JobSubmissionResponse
+from app.application.dto.ndvi_dto import NDVIRequest
+from app.application.dto.soil_moisture_dto import SoilMoistureRequest
+from app.application.use_cases.ndvi_use_cases import CalculateNDVIUseCase
+from app.application.use_cases.soil_moisture_use_cases import CalculateSoilMoistureUseCase
+from app.infrastructure.config.settings import get_settings
+from app.domain.entities.user import User
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.pipeline.job_queue import (
+    JobQueue,
+    JobProgress,
+    PermanentJobError,
+    STATUS_DONE
+)
+from app.infrastructure.pipeline.work_scheduler import PRIORITY_INTERACTIVE
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Job kinds
+NDVI_CALCULATE_JOB = 'ndvi_calculate'
+SOIL_MOISTURE_CALCULATE_JOB = 'soil_moisture_calculate'
+
+# Attempts for interactive jobs (downloads already retry internally)
+CALCULATE_MAX_ATTEMPTS = 2
+
+
+def normalize_payload(payload: dict) -> dict:
+    """Round bbox to ~0.1 m and drop the time part of dates, so equivalent requests compare equal."""
+    normalized = dict(payload)
+    if normalized.get('bbox'):
+        normalized['bbox'] = [round(float(v), 6) for v in normalized['bbox']]
+    for key in ('date', 'start_date', 'end_date'):
+        if isinstance(normalized.get(key), str):
+            normalized[key] = normalized[key].split('T')[0]
+    return normalized
+
+
+def calculation_dedupe_key(kind: str, payload: dict, user_id: Optional[int] = None) -> str:
+    """
+    Identical requests of one user (same kind and normalized payload) share one
+    pending job. Jobs are private to their submitter; identical work of different
+    users is still computed once, by the single-flight group.
+    """
+    normalized = normalize_payload(payload)
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f"{kind}:{user_id}:{digest}"
+
+
+class SubmitCalculationJobUseCase:
+    """Enqueue a calculate request, reusing an identical pending or running job."""
+
+    def __init__(self, queue: Optional[JobQueue] = None):
+        self.queue = queue or JobQueue()
+
+    async def execute(self, kind: str, req: BaseModel, user_id: Optional[int] = None) -> JobSubmissionResponse:
+        bbox = getattr(req, 'bbox', None)
+        if bbox is None or len(bbox) != 4:
+            raise HTTPException(status_code=400, detail='bbox must be [minx,miny,maxx,maxy]')
+
+        payload = req.model_dump()
+        job_id = await self.queue.enqueue(
+            kind,
+            farm_id=payload.get('farm_id'),
+            payload=payload,
+            dedupe_key=calculation_dedupe_key(kind, payload, user_id),
+            max_attempts=CALCULATE_MAX_ATTEMPTS,
+            priority=PRIORITY_INTERACTIVE,
+            user_id=user_id
+        )
+        job = await self.queue.get(job_id)
+        return JobSubmissionResponse(
+            job_id=job_id,
+            status=job.status,
+            status_url=f"{settings.API_V1_STR}/jobs/{job_id}",
+            events_url=f"{settings.API_V1_STR}/jobs/{job_id}/events"
+        )
+
+
+class GetJobStatusUseCase:
+    """
+    Status, progress and (once done) result of a job. Users only see the jobs
+    they submitted and the syncs of their own farms; superusers see every job.
+    """
+
+    def __init__(self, queue: Optional[JobQueue] = None):
+        self.queue = queue or JobQueue()
+
+    async def _can_read(self, job, user: User) -> bool:
+        if user.is_superuser:
+            return True
+        if job.user_id is not None:
+            return job.user_id == user.id
+        if job.farm_id is None:
+            return False
+        async with self.queue.session_factory() as session:
+            farm = await session.get(FarmModel, job.farm_id)
+        return farm is not None and farm.user_id == user.id
+
+    async def execute(self, job_id: int, user: User) -> JobStatusResponse:
+        job = await self.queue.get(job_id)
+        # Someone else's job is reported as missing, not forbidden: IDs are not a way to probe
+        if job is None or not await self._can_read(job, user):
+            raise HTTPException(status_code=404, detail='Job not found')
+
+        state = job.state or {}
+        download = state.get('download', {})
+        return JobStatusResponse(
+            job_id=job.id,
+            kind=job.kind,
+            status=job.status,
+            stage=job.stage,
+            attempts=job.attempts,
+            max_attempts=job.max_attempts,
+            downloaded_bytes=download.get('bytes', 0),
+            total_bytes=download.get('total', 0),
+            progress=state.get('progress'),
+            result=state.get('result') if job.status == STATUS_DONE else None,
+            error=job.last_error,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+            finished_at=job.finished_at
+        )
+
+
+async def _run_calculation(run, progress: JobProgress):
+    """Run a calculate use case, mapping client errors to permanent job failures."""
+    try:
+        response = await run()
+    except HTTPException as e:
+        if e.status_code < 500:
+            raise PermanentJobError(str(e.detail))
+        raise RuntimeError(str(e.detail))
+    progress.state['result'] = response.model_dump()
+
+
+async def run_ndvi_calculate_job(job, progress: JobProgress):
+    """Job handler for an asynchronous /ndvi/calculate request."""
+    req = NDVIRequest(**job.payload)
+    async with AsyncSessionLocal() as db:
+        await _run_calculation(lambda: CalculateNDVIUseCase().execute(req, db, progress=progress), progress)
+
+
+async def run_soil_moisture_calculate_job(job, progress: JobProgress):
+    """Job handler for an asynchronous /soil-moisture/calculate request."""
+    req = SoilMoistureRequest(**job.payload)
+    await _run_calculation(lambda: CalculateSoilMoistureUseCase().execute(req, progress=progress), progress)
+
+
+CALCULATION_JOB_HANDLERS = {
+    NDVI_CALCULATE_JOB: run_ndvi_calculate_job,
+    SOIL_MOISTURE_CALCULATE_JOB: run_soil_moisture_calculate_job,
+}
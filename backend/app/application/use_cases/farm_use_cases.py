@@ -1,14 +1,49 @@
 # Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
+import logging
 from typing import List, Optional
 from app.domain.entities.farm import FarmArea, Coordinate
 from app.application.dto.farm_dto import FarmAreaCreateDTO, FarmAreaUpdateDTO
 from app.domain.repositories.farm_repository import FarmRepository
+from app.infrastructure.pipeline.job_queue import JobQueue, NDVI_SYNC_JOB, SOIL_MOISTURE_SYNC_JOB
+from app.infrastructure.pipeline.work_scheduler import PRIORITY_RESYNC
+
+logger = logging.getLogger(__name__)
+
+def _farm_bbox(farm: FarmArea) -> List[float]:
+    lats = [c.lat for c in farm.coordinates]
+    lngs = [c.lng for c in farm.coordinates]
+    return [min(lngs), min(lats), max(lngs), max(lats)]
+
+async def enqueue_farm_backfill(queue: JobQueue, farm: FarmArea) -> List[int]:
+    """
+    One-time full look-back sync for a new farm or a farm whose polygon changed:
+    the sync watermark only holds for the geometry it was computed on.
+    """
+    if not farm.coordinates:
+        return []
+    try:
+        return [
+            await queue.enqueue(
+                kind,
+                farm_id=farm.id,
+                payload={'bbox': _farm_bbox(farm), 'backfill': True},
+                run_id=f"backfill:{farm.id}",
+                dedupe_key=f"{kind}:backfill:{farm.id}",
+                priority=PRIORITY_RESYNC
+            )
+            for kind in (NDVI_SYNC_JOB, SOIL_MOISTURE_SYNC_JOB)
+        ]
+    except Exception as e:
+        # The farm is saved; the nightly sync still covers it
+        logger.warning(f"Could not enqueue backfill for farm {farm.id}: {e}")
+        return []
 
 class CreateFarmAreaUseCase:
-    def __init__(self, farm_repository: FarmRepository):
+    def __init__(self, farm_repository: FarmRepository, queue: Optional[JobQueue] = None):
         self.farm_repository = farm_repository
+        self.queue = queue or JobQueue()
 
     async def execute(self, user_id: int, dto: FarmAreaCreateDTO) -> FarmArea:
         coordinates = [Coordinate(lat=c.lat, lng=c.lng) for c in dto.coordinates]
@@ -22,7 +57,9 @@ class CreateFarmAreaUseCase:
             user_id=user_id
         )
         
-        return await self.farm_repository.save(farm)
+        farm = await self.farm_repository.save(farm)
+        await enqueue_farm_backfill(self.queue, farm)
+        return farm
 
 class GetUserFarmsUseCase:
     def __init__(self, farm_repository: FarmRepository):
@@ -32,15 +69,17 @@ class GetUserFarmsUseCase:
         return await self.farm_repository.get_by_user_id(user_id)
 
 class UpdateFarmAreaUseCase:
-    def __init__(self, farm_repository: FarmRepository):
+    def __init__(self, farm_repository: FarmRepository, queue: Optional[JobQueue] = None):
         self.farm_repository = farm_repository
+        self.queue = queue or JobQueue()
 
     async def execute(self, farm_id: int, user_id: int, dto: FarmAreaUpdateDTO) -> Optional[FarmArea]:
         coordinates = None
         if dto.coordinates is not None:
             coordinates = [Coordinate(lat=c.lat, lng=c.lng) for c in dto.coordinates]
         
-        return await self.farm_repository.update(
+        previous = await self.farm_repository.get_by_id(farm_id) if coordinates is not None else None
+        farm = await self.farm_repository.update(
             farm_id=farm_id,
             user_id=user_id,
             name=dto.name,
@@ -49,6 +88,12 @@ class UpdateFarmAreaUseCase:
             area_size=dto.area_size,
             crop_type=dto.crop_type
         )
+        # Only a changed polygon invalidates the sync watermark
+        if farm and farm.coordinates and previous and (
+            not previous.coordinates or _farm_bbox(farm) != _farm_bbox(previous)
+        ):
+            await enqueue_farm_backfill(self.queue, farm)
+        return farm
 
 class DeleteFarmAreaUseCase:
     def __init__(self, farm_repository: FarmRepository):
@@ -56,3 +101,30 @@ class DeleteFarmAreaUseCase:
 
     async def execute(self, farm_id: int, user_id: int) -> bool:
         return await self.farm_repository.delete(farm_id, user_id)
+
+class ResyncFarmUseCase:
+    """Enqueue NDVI and Soil Moisture syncs for one farm at user-triggered priority."""
+
+    def __init__(self, farm_repository: FarmRepository, queue: Optional[JobQueue] = None):
+        self.farm_repository = farm_repository
+        self.queue = queue or JobQueue()
+
+    async def execute(self, farm_id: int, user_id: int) -> Optional[List[int]]:
+        farm = await self.farm_repository.get_by_id(farm_id)
+        if not farm or farm.user_id != user_id or not farm.coordinates:
+            return None
+
+        bbox = _farm_bbox(farm)
+
+        # Shares the dedupe key of the nightly job, which is promoted if still pending
+        return [
+            await self.queue.enqueue(
+                kind,
+                farm_id=farm_id,
+                payload={'bbox': bbox},
+                run_id=f"resync:{farm_id}",
+                dedupe_key=f"{kind}:{farm_id}",
+                priority=PRIORITY_RESYNC
+            )
+            for kind in (NDVI_SYNC_JOB, SOIL_MOISTURE_SYNC_JOB)
+        ]
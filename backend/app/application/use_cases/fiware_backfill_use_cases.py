@@ -0,0 +1,48 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Backfill of historical farms and satellite data to FIWARE, run as a queue job.
+"""
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.application.dto.job_dto import FiwareBackfillRequest, JobSubmissionResponse
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.models.fiware_outbox_model import RECORD_ATTRIBUTES
+from app.infrastructure.pipeline.fiware_backfill import FIWARE_BACKFILL_JOB
+from app.infrastructure.pipeline.job_queue import JobQueue
+
+settings = get_settings()
+
+# The job resumes from its checkpoint, so a few attempts cover Orion outages
+BACKFILL_MAX_ATTEMPTS = 10
+
+
+class SubmitFiwareBackfillUseCase:
+    """Enqueue the backfill job; a backfill already pending or running is returned instead."""
+
+    def __init__(self, queue: Optional[JobQueue] = None):
+        self.queue = queue or JobQueue()
+
+    async def execute(self, req: FiwareBackfillRequest) -> JobSubmissionResponse:
+        if not settings.FIWARE_ENABLED:
+            raise HTTPException(status_code=503, detail='FIWARE integration is disabled')
+        unknown = set(req.data_types or []) - set(RECORD_ATTRIBUTES)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown data types: {', '.join(sorted(unknown))}")
+
+        job_id = await self.queue.enqueue(
+            FIWARE_BACKFILL_JOB,
+            payload=req.model_dump(),
+            dedupe_key=FIWARE_BACKFILL_JOB,
+            max_attempts=BACKFILL_MAX_ATTEMPTS
+        )
+        job = await self.queue.get(job_id)
+        return JobSubmissionResponse(
+            job_id=job_id,
+            status=job.status,
+            status_url=f"{settings.API_V1_STR}/jobs/{job_id}",
+            events_url=f"{settings.API_V1_STR}/jobs/{job_id}/events"
+        )
@@ -5,8 +5,8 @@ import logging
 import random
 import datetime
 import os
-import shutil
 import uuid
+from typing import Optional
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
@@ -17,110 +17,269 @@ from app.infrastructure.image_processing.ndvi_processing import find_band_paths,
 from app.infrastructure.image_processing.utils import convert_tiff_to_base64_png
 from app.infrastructure.config.settings import get_settings
 from app.infrastructure.repositories.satellite_repository_impl import SatelliteRepositoryImpl
+from app.infrastructure.repositories.sync_state_repository_impl import SyncStateRepositoryImpl
+from app.infrastructure.repositories.catalogue_cache_repository_impl import CatalogueCacheRepositoryImpl
 from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.pipeline.job_queue import (
+    JobProgress,
+    stage_reached,
+    STAGE_SEARCHED,
+    STAGE_DOWNLOADED,
+    STAGE_PROCESSED,
+    STAGE_SAVED,
+    STAGE_SYNCED
+)
+from app.infrastructure.pipeline.overpass import search_start_date
+from app.infrastructure.pipeline.metrics import stage, STAGE_DB_WRITE
+from app.infrastructure.pipeline.disk_budget import DiskSpaceError, remove_product_files
+from app.infrastructure.pipeline.single_flight import satellite_flights, flight_key
+from app.infrastructure.pipeline.work_scheduler import work_scheduler, PRIORITY_INTERACTIVE, PRIORITY_BATCH
 
 settings = get_settings()
 
+# Sentinel-2 revisits every 5 days. 10 images * 5 days = 50 days. Let's do 60 to be safe.
+NDVI_LOOKBACK_DAYS = 60
+NDVI_MAX_PRODUCTS_PER_SYNC = 10
+NDVI_MAX_CLOUD_COVER = 30
+
+
+def select_ndvi_products(products: dict) -> list:
+    """Products a farm sync processes: the 10 most recent with < 30% cloud cover."""
+    # Sort by ingestion date descending
+    sorted_products = sorted(
+        products.values(),
+        key=lambda x: x['ingestiondate'],
+        reverse=True
+    )
+
+    # Filter by cloud cover < 30% to get usable images
+    low_cloud_products = [p for p in sorted_products if p.get('cloud_cover', 100) < NDVI_MAX_CLOUD_COVER]
+
+    # Take top 10 low-cloud images
+    return low_cloud_products[:NDVI_MAX_PRODUCTS_PER_SYNC]
+
 class CalculateNDVIUseCase:
-    async def sync_latest_data_for_farm(self, farm_id: int, bbox: list, db: AsyncSession):
+    async def sync_latest_data_for_farm(self, farm_id: int, bbox: list, db: AsyncSession,
+                                        progress: Optional[JobProgress] = None, backfill: bool = False):
         """
         Background task to sync latest NDVI data for a farm.
         Syncs up to 10 most recent images (approx last 2 months).
+
+        The search starts from the farm's sync watermark (last acquisition
+        processed) minus a small overlap; `backfill` ignores the watermark,
+        searches the full look-back window and recomputes every product in it,
+        replacing data already saved (computed on the farm's previous polygon).
+
+        When run from the job queue, `progress` carries the stage reached by
+        each product, so a resumed job skips searches, downloads and
+        computations it already finished. Errors propagate to the caller,
+        which decides whether to retry.
         """
-        today = datetime.date.today()
-        # Sentinel-2 revisits every 5 days. 10 images * 5 days = 50 days. Let's do 60 to be safe.
-        start_date = (today - datetime.timedelta(days=60)).strftime('%Y-%m-%d')
-        end_date = today.strftime('%Y-%m-%d')
-        
-        logger.info(f"Syncing top 10 recent NDVI images for farm {farm_id} from {start_date} to {end_date}")
-        
-        try:
+        progress = progress or JobProgress()
+        state = progress.state
+        priority = progress.priority if progress.priority is not None else PRIORITY_BATCH
+
+        sync_states = SyncStateRepositoryImpl(db)
+        if 'products' not in state:
+            today = datetime.date.today()
+            sync_state = None if backfill else await sync_states.get_state(farm_id, 'NDVI')
+            start_date = search_start_date(
+                sync_state.last_processed_date if sync_state else None,
+                today, NDVI_LOOKBACK_DAYS, settings.SYNC_WATERMARK_OVERLAP_DAYS
+            ).strftime('%Y-%m-%d')
+            end_date = today.strftime('%Y-%m-%d')
+
+            logger.info(f"Syncing top 10 recent NDVI images for farm {farm_id} from {start_date} to {end_date}")
+
             # search products
-            api, products = await search_sentinel_products(bbox, start_date, end_date)
-            if not products:
-                logger.info(f"No products found for farm {farm_id}")
-                return
-
-            # Sort by ingestion date descending
-            sorted_products = sorted(
-                products.values(), 
-                key=lambda x: x['ingestiondate'], 
-                reverse=True
+            _, products = await search_sentinel_products(bbox, start_date, end_date)
+
+            # Remember what the catalogue holds so the scheduler can skip quiet days
+            # and sync plans can be made without searching again
+            checked_at = datetime.datetime.utcnow()
+            await sync_states.record_check(
+                farm_id, 'NDVI', 'SENTINEL-2',
+                [datetime.date.fromisoformat(p['ingestiondate'][:10]) for p in products.values()],
+                checked_at
             )
-            
-            # Filter by cloud cover < 30% to get usable images
-            low_cloud_products = [p for p in sorted_products if p.get('cloud_cover', 100) < 30]
-            
-            if not low_cloud_products:
+            await CatalogueCacheRepositoryImpl(db).put(
+                farm_id, 'NDVI', 'SENTINEL-2', datetime.date.fromisoformat(start_date), today,
+                list(products.values()), checked_at
+            )
+
+            state['products'] = select_ndvi_products(products)
+            if products and not state['products']:
                 logger.info(f"No low-cloud products found for farm {farm_id} (all have > 30% cloud)")
-                return
-            
-            # Take top 10 low-cloud images
-            recent_products = low_cloud_products[:10]
+            state['stages'] = {p['uuid']: STAGE_SEARCHED for p in state['products']}
+            state['results'] = {}
+            await progress.checkpoint(STAGE_SEARCHED)
 
-            for product_info in recent_products:
-                acquisition_date_str = product_info['ingestiondate'].split('T')[0]
-                acquisition_date = datetime.datetime.strptime(acquisition_date_str, '%Y-%m-%d').date()
-                
-                # Check if already exists
-                repo = SatelliteRepositoryImpl(db)
-                existing = await repo.get_existing_record(farm_id, 'NDVI', acquisition_date)
-                if existing:
-                    # print(f"Data for farm {farm_id} on {acquisition_date} already exists.")
-                    continue
+        if not state['products']:
+            logger.info(f"No products found for farm {farm_id}")
+            return
 
-                logger.info(f"Downloading and processing product for farm {farm_id}: {product_info['title']}")
+        repo = SatelliteRepositoryImpl(db)
+        acquisition_dates = {
+            p['uuid']: datetime.date.fromisoformat(p['ingestiondate'][:10]) for p in state['products']
+        }
 
-                # Download
-                out = await download_product(api, product_info, out_dir=settings.OUTPUT_DIR)
-                
-                # find bands
-                red_path, nir_path = find_band_paths(out)
-                
-                # Generate output path
-                out_tif = os.path.join(settings.OUTPUT_DIR, f'ndvi_{uuid.uuid4().hex}.tif')
-                
-                # Compute (with bbox crop)
-                out_tif, mean_val, min_val, max_val = compute_ndvi(red_path, nir_path, out_tif, bbox=bbox)
-                
-                # Save to DB
-                new_record = SatelliteDataModel(
-                    farm_id=farm_id,
-                    acquisition_date=acquisition_date,
-                    data_type='NDVI',
-                    satellite_platform='SENTINEL-2',
-                    mean_value=mean_val,
-                    min_value=min_val,
-                    max_value=max_val,
-                    cloud_cover=product_info['cloud_cover']
-                )
-                await repo.save_data(new_record)
-                logger.info(f"Saved NDVI data for farm {farm_id} on {acquisition_date}")
-                
-                # Clean up downloaded files to save space
-                try:
-                    # 1. Remove the extracted .SAFE directory
-                    if os.path.exists(out) and os.path.isdir(out):
-                        shutil.rmtree(out)
-                        # print(f"Deleted temp folder: {out}")
-
-                    # 2. Remove the original .zip file
-                    zip_path = os.path.join(settings.OUTPUT_DIR, f"{product_info['title']}.zip")
-                    if os.path.exists(zip_path):
-                        os.remove(zip_path)
-                        # print(f"Deleted temp zip: {zip_path}")
-                        
-                    # 3. Remove the generated .tif file
-                    if os.path.exists(out_tif):
-                        os.remove(out_tif)
-                        # print(f"Deleted temp result: {out_tif}")
-                except Exception as cleanup_error:
-                    logger.warning(f"Error cleaning up files for farm {farm_id}: {cleanup_error}") 
+        # One query for the records already saved (overlap with the previous sync);
+        # a backfill replaces them instead
+        pending = [
+            acquisition_dates[p['uuid']] for p in state['products']
+            if not stage_reached(state['stages'][p['uuid']], STAGE_SAVED)
+        ]
+        existing_dates = await repo.get_existing_dates(
+            farm_id, 'NDVI', min(pending), max(pending)
+        ) if pending and not backfill else set()
 
-        except Exception as e:
-            logger.error(f"Error syncing farm {farm_id}: {e}")
+        for product_info in state['products']:
+            product_id = product_info['uuid']
+            if stage_reached(state['stages'][product_id], STAGE_SYNCED):
+                continue
+
+            acquisition_date_str = product_info['ingestiondate'].split('T')[0]
+            acquisition_date = acquisition_dates[product_id]
+            result = state['results'].get(product_id)
+
+            # Saved by an earlier attempt that stopped before cleaning up, or already exists
+            if state['stages'][product_id] == STAGE_SAVED or acquisition_date in existing_dates:
+                await self._finish_product(product_info, result, state, progress)
+                continue
+
+            if result is None:
+                # Heavy work waits for a slot of this job's priority class
+                async with work_scheduler.slot(priority):
+                    logger.info(f"Downloading and processing product for farm {farm_id}: {product_info['title']}")
+
+                    # Download (an extracted .SAFE from an interrupted attempt is reused)
+                    out = await download_product(
+                        None, product_info, out_dir=settings.OUTPUT_DIR, on_progress=progress.report_download
+                    )
+                    state['stages'][product_id] = STAGE_DOWNLOADED
+                    await progress.checkpoint(STAGE_DOWNLOADED)
+
+                    # find bands
+                    red_path, nir_path = find_band_paths(out)
 
-    async def execute(self, req: NDVIRequest, db: AsyncSession) -> NDVIResponse:
+                    # Generate output path
+                    out_tif = os.path.join(settings.OUTPUT_DIR, f'ndvi_{uuid.uuid4().hex}.tif')
+
+                    # Compute (with bbox crop)
+                    out_tif, mean_val, min_val, max_val = compute_ndvi(red_path, nir_path, out_tif, bbox=bbox)
+                    result = {
+                        'acquisition_date': acquisition_date_str,
+                        'safe_path': out,
+                        'out_paths': [out_tif],
+                        'mean': mean_val,
+                        'min': min_val,
+                        'max': max_val
+                    }
+                    state['results'][product_id] = result
+                    state['stages'][product_id] = STAGE_PROCESSED
+                    await progress.checkpoint(STAGE_PROCESSED)
+
+            # Save to DB
+            new_record = SatelliteDataModel(
+                farm_id=farm_id,
+                acquisition_date=acquisition_date,
+                data_type='NDVI',
+                satellite_platform='SENTINEL-2',
+                mean_value=result['mean'],
+                min_value=result['min'],
+                max_value=result['max'],
+                cloud_cover=product_info['cloud_cover']
+            )
+            with stage(STAGE_DB_WRITE, items=1):
+                if backfill:
+                    await repo.upsert_many([new_record])
+                else:
+                    await repo.save_data(new_record)
+            state['stages'][product_id] = STAGE_SAVED
+            await progress.checkpoint(STAGE_SAVED)
+            logger.info(f"Saved NDVI data for farm {farm_id} on {acquisition_date}")
+
+            await self._finish_product(product_info, result, state, progress)
+
+        # Every product is saved: the next search starts from the newest one
+        await sync_states.advance_watermark(farm_id, 'NDVI', 'SENTINEL-2', max(acquisition_dates.values()))
+
+    @staticmethod
+    async def _finish_product(product_info: dict, result: Optional[dict], state: dict, progress: JobProgress):
+        """
+        Mark a saved (or already stored) product synced, first removing the files
+        this job produced for it, in this or an earlier attempt, to save space.
+        """
+        if result is not None:
+            remove_product_files(
+                settings.OUTPUT_DIR, product_info['title'], result['safe_path'], result.get('out_paths', [])
+            )
+        state['stages'][product_info['uuid']] = STAGE_SYNCED
+        await progress.checkpoint()
+
+    async def _compute_best_product(self, bbox: list, start_date_str: str, end_date_str: str,
+                                    progress: JobProgress) -> dict:
+        """Search, download and compute NDVI for the lowest-cloud product of a date range."""
+        # search products
+        api, products = await search_sentinel_products(bbox, start_date_str, end_date_str)
+        if not products:
+            raise HTTPException(status_code=404, detail='No Sentinel-2 product found for this bbox/date range')
+        await progress.checkpoint(STAGE_SEARCHED)
+        
+        # pick best product (lowest cloud cover)
+        best_product_uuid = None
+        best_product_info = None
+        min_cloud_cover = 101.0
+
+        for uuid_val, info in products.items():
+            if info['cloud_cover'] < min_cloud_cover:
+                min_cloud_cover = info['cloud_cover']
+                best_product_uuid = uuid_val
+                best_product_info = info
+        
+        if not best_product_info:
+             # Fallback to first if something goes wrong
+             best_product_uuid, best_product_info = next(iter(products.items()))
+
+        logger.info(f"Selected product: {best_product_info['title']} with cloud cover {best_product_info['cloud_cover']}%")
+
+        # Download
+        out = await download_product(
+            api, best_product_info, out_dir=settings.OUTPUT_DIR, on_progress=progress.report_download
+        )
+        await progress.checkpoint(STAGE_DOWNLOADED)
+        
+        # find bands
+        red_path, nir_path = find_band_paths(out)
+        
+        # Generate output path
+        out_tif = os.path.join(settings.OUTPUT_DIR, f'ndvi_{uuid.uuid4().hex}.tif')
+        
+        # Compute (with bbox crop)
+        out_tif, mean_val, min_val, max_val = compute_ndvi(red_path, nir_path, out_tif, bbox=bbox)
+        await progress.checkpoint(STAGE_PROCESSED)
+
+        # Convert to Base64 PNG
+        img_base64 = convert_tiff_to_base64_png(out_tif, colormap='RdYlGn', vmin=-1, vmax=1)
+
+        return {
+            'products': products,
+            'best_product_uuid': best_product_uuid,
+            'best_product_info': best_product_info,
+            'out_tif': out_tif,
+            'mean': mean_val,
+            'min': min_val,
+            'max': max_val,
+            'image_base64': img_base64
+        }
+
+    async def execute(self, req: NDVIRequest, db: AsyncSession,
+                      progress: Optional[JobProgress] = None) -> NDVIResponse:
+        """
+        Calculate NDVI for a bbox and date range (DB first, then Sentinel-2).
+        `progress` receives stage and download updates when run as a job.
+        """
+        progress = progress or JobProgress()
         # validate bbox
         if len(req.bbox) != 4:
             raise HTTPException(status_code=400, detail='bbox must be [minx,miny,maxx,maxy]')
@@ -166,42 +325,23 @@ class CalculateNDVIUseCase:
                     )
             
             # --- NO DATA IN DB - DOWNLOAD FROM SENTINEL ---
-            # search products
-            api, products = await search_sentinel_products(req.bbox, start_date_str, end_date_str)
-            if not products:
-                raise HTTPException(status_code=404, detail='No Sentinel-2 product found for this bbox/date range')
-            
-            # pick best product (lowest cloud cover)
-            best_product_uuid = None
-            best_product_info = None
-            min_cloud_cover = 101.0
-
-            for uuid_val, info in products.items():
-                if info['cloud_cover'] < min_cloud_cover:
-                    min_cloud_cover = info['cloud_cover']
-                    best_product_uuid = uuid_val
-                    best_product_info = info
-            
-            if not best_product_info:
-                 # Fallback to first if something goes wrong
-                 best_product_uuid, best_product_info = next(iter(products.items()))
-
-            logger.info(f"Selected product: {best_product_info['title']} with cloud cover {best_product_info['cloud_cover']}%")
+            # Identical concurrent requests share one search/download/compute,
+            # which waits for a work slot of the request's priority class
+            priority = progress.priority if progress.priority is not None else PRIORITY_INTERACTIVE
 
-            # Download
-            out = await download_product(api, best_product_info, out_dir=settings.OUTPUT_DIR)
-            
-            # find bands
-            red_path, nir_path = find_band_paths(out)
-            
-            # Generate output path
-            out_tif = os.path.join(settings.OUTPUT_DIR, f'ndvi_{uuid.uuid4().hex}.tif')
-            
-            # Compute (with bbox crop)
-            out_tif, mean_val, min_val, max_val = compute_ndvi(red_path, nir_path, out_tif, bbox=req.bbox)
+            async def compute(flight_progress):
+                async with work_scheduler.slot(priority):
+                    return await self._compute_best_product(req.bbox, start_date_str, end_date_str, flight_progress)
 
-            # Convert to Base64 PNG
-            img_base64 = convert_tiff_to_base64_png(out_tif, colormap='RdYlGn', vmin=-1, vmax=1)
+            computed = await satellite_flights.do(
+                flight_key('NDVI', 'SENTINEL-2', req.bbox, start_date_str, end_date_str), compute, progress
+            )
+            products = computed['products']
+            best_product_uuid = computed['best_product_uuid']
+            best_product_info = computed['best_product_info']
+            out_tif = computed['out_tif']
+            mean_val, min_val, max_val = computed['mean'], computed['min'], computed['max']
+            img_base64 = computed['image_base64']
 
             acquisition_date_str = best_product_info['ingestiondate'].split('T')[0]
             acquisition_date = datetime.datetime.strptime(acquisition_date_str, '%Y-%m-%d').date()
@@ -222,6 +362,7 @@ class CalculateNDVIUseCase:
                         cloud_cover=best_product_info['cloud_cover']
                     )
                     await repo.save_data(new_record)
+                await progress.checkpoint(STAGE_SAVED)
             
             # --- GENERATE CHART DATA (FROM DB + CURRENT) ---
             chart_data = []
@@ -285,6 +426,11 @@ class CalculateNDVIUseCase:
                 chart_data=chart_data
             )
             
+        except HTTPException:
+            raise
+        except DiskSpaceError as e:
+            logger.warning(f"Calculation rejected: {e}")
+            raise HTTPException(status_code=503, detail='Server is low on disk space, please retry later')
         except Exception as e:
             logger.error(f"Error in CalculateNDVIUseCase: {e}")
             raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,69 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Pipeline metrics use cases.
+"""
+from typing import List, Optional
+
+from app.application.dto.pipeline_metrics_dto import (
+    PipelineRunListDTO,
+    PipelineRunReportDTO,
+    StageMetricsDTO
+)
+from app.infrastructure.database.models.metrics_model import PipelineStageMetricsModel
+from app.infrastructure.pipeline.metrics import PipelineMetricsStore
+
+
+def build_run_report(run_id: str, rows: List[PipelineStageMetricsModel]) -> PipelineRunReportDTO:
+    """Turn the stage rows of a run into a report, with averages, throughput and time shares."""
+    total_seconds = sum(row.total_seconds for row in rows)
+    stages = [
+        StageMetricsDTO(
+            stage=row.stage,
+            count=row.count,
+            errors=row.errors,
+            total_seconds=round(row.total_seconds, 3),
+            avg_seconds=round(row.total_seconds / row.count, 3) if row.count else 0.0,
+            max_seconds=round(row.max_seconds, 3),
+            total_bytes=row.total_bytes,
+            throughput_mb_per_second=(
+                round(row.total_bytes / 1024 / 1024 / row.total_seconds, 2)
+                if row.total_bytes and row.total_seconds else None
+            ),
+            items=row.items,
+            peak_rss_mb=round(row.peak_rss_mb, 1) if row.peak_rss_mb is not None else None,
+            share_of_time=round(row.total_seconds / total_seconds, 3) if total_seconds else 0.0
+        )
+        for row in rows
+    ]
+    slowest = max(rows, key=lambda row: row.total_seconds, default=None)
+    return PipelineRunReportDTO(
+        run_id=run_id,
+        started_at=min((row.created_at for row in rows if row.created_at), default=None),
+        updated_at=max((row.updated_at for row in rows if row.updated_at), default=None),
+        total_seconds=round(total_seconds, 3),
+        total_bytes=sum(row.total_bytes for row in rows),
+        slowest_stage=slowest.stage if slowest else None,
+        stages=stages
+    )
+
+
+class ListPipelineRunsUseCase:
+    def __init__(self, store: Optional[PipelineMetricsStore] = None):
+        self.store = store or PipelineMetricsStore()
+
+    async def execute(self, limit: int = 20) -> PipelineRunListDTO:
+        runs = await self.store.list_runs(limit)
+        return PipelineRunListDTO(runs=[build_run_report(rows[0].run_id, rows) for rows in runs if rows])
+
+
+class GetPipelineRunReportUseCase:
+    def __init__(self, store: Optional[PipelineMetricsStore] = None):
+        self.store = store or PipelineMetricsStore()
+
+    async def execute(self, run_id: str) -> PipelineRunReportDTO:
+        rows = await self.store.get_run(run_id)
+        if not rows:
+            raise ValueError(f"Pipeline run {run_id} not found")
+        return build_run_report(run_id, rows)
@@ -5,6 +5,7 @@ import logging
 import datetime
 import os
 import uuid
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 from fastapi import HTTPException
@@ -18,9 +19,27 @@ from app.infrastructure.image_processing.soil_moisture_processing import find_s1
 from app.infrastructure.image_processing.utils import convert_tiff_to_base64_png
 from app.infrastructure.config.settings import get_settings
 from app.infrastructure.repositories.satellite_repository_impl import SatelliteRepositoryImpl
+from app.infrastructure.pipeline.job_queue import (
+    JobProgress,
+    STAGE_SEARCHED,
+    STAGE_DOWNLOADED,
+    STAGE_PROCESSED
+)
+from app.infrastructure.pipeline.single_flight import satellite_flights, flight_key
+from app.infrastructure.pipeline.work_scheduler import work_scheduler, PRIORITY_INTERACTIVE
+from app.infrastructure.pipeline.disk_budget import DiskSpaceError
 
 settings = get_settings()
 
+# Sentinel-1 revisit is 6-12 days, search last 14 days (farms without a sync watermark)
+SOIL_MOISTURE_LOOKBACK_DAYS = 14
+
+
+def select_soil_moisture_products(products: dict) -> list:
+    """Products a farm sync processes: only the most recent Sentinel-1 product."""
+    sorted_products = sorted(products.values(), key=lambda x: x['ingestiondate'], reverse=True)
+    return sorted_products[:1]
+
 
 class GetSoilMoistureUseCase:
     """Use case to get soil moisture from database (cached from scheduler)"""
@@ -77,7 +96,13 @@ class GetSoilMoistureUseCase:
             raise HTTPException(status_code=500, detail=str(e))
 
 class CalculateSoilMoistureUseCase:
-    async def execute(self, req: SoilMoistureRequest) -> SoilMoistureResponse:
+    async def execute(self, req: SoilMoistureRequest,
+                      progress: Optional[JobProgress] = None) -> SoilMoistureResponse:
+        """
+        Calculate the soil moisture proxy from the Sentinel-1 product closest to the date.
+        `progress` receives stage and download updates when run as a job.
+        """
+        progress = progress or JobProgress()
         # validate bbox
         if len(req.bbox) != 4:
             raise HTTPException(status_code=400, detail='bbox must be [minx,miny,maxx,maxy]')
@@ -93,51 +118,86 @@ class CalculateSoilMoistureUseCase:
             date_start = (date_obj - datetime.timedelta(days=7)).strftime('%Y-%m-%d')
             date_end = (date_obj + datetime.timedelta(days=7)).strftime('%Y-%m-%d')
 
-            # search products (Sentinel-1)
-            api, products = await search_sentinel_products(req.bbox, date_start, date_end, platformname='SENTINEL-1')
-            if not products:
-                raise HTTPException(status_code=404, detail='No Sentinel-1 product found for this bbox/date range (±7 days)')
-            
-            # pick product closest to requested date
-            target_date = date_obj.date()
-            best_product = None
-            min_diff = None
-            
-            for uuid_val, info in products.items():
-                prod_date_str = info['ingestiondate'].split('T')[0]
-                prod_date = datetime.datetime.strptime(prod_date_str, '%Y-%m-%d').date()
-                diff = abs((prod_date - target_date).days)
-                
-                if min_diff is None or diff < min_diff:
-                    min_diff = diff
-                    best_product = (uuid_val, info)
-            
-            first_uuid, prod = best_product
-            
-            logger.info(f"Selected Sentinel-1 product: {prod['title']} (closest to {req.date}, diff: {min_diff} days)")
-
-            # Download
-            out = await download_product(api, prod, out_dir=settings.OUTPUT_DIR)
-            
-            # find bands (VV polarization)
-            vv_path = find_s1_band_path(out, polarization='vv')
-            
-            # Generate output path
-            out_tif = os.path.join(settings.OUTPUT_DIR, f'soil_moisture_{uuid.uuid4().hex}.tif')
-            
-            # Compute
-            _, mean_val = compute_soil_moisture_proxy(vv_path, out_tif, bbox=req.bbox)
+            # Identical concurrent requests share one search/download/compute,
+            # which waits for a work slot of the request's priority class
+            priority = progress.priority if progress.priority is not None else PRIORITY_INTERACTIVE
 
-            # Convert to Base64 PNG
-            img_base64 = convert_tiff_to_base64_png(out_tif, colormap='Blues', vmin=0, vmax=1)
+            async def compute(flight_progress):
+                async with work_scheduler.slot(priority):
+                    return await self._compute_closest_product(
+                        req.bbox, date_obj, date_start, date_end, flight_progress
+                    )
 
-            return SoilMoistureResponse(
-                status="success", 
-                soil_moisture_map=out_tif, 
-                image_base64=img_base64,
-                mean_value=mean_val
+            # Shared as a plain dict, which other processes can reuse from the database
+            computed = await satellite_flights.do(
+                flight_key('SOIL_MOISTURE', 'SENTINEL-1', req.bbox, date_start, date_end), compute, progress
             )
+            return SoilMoistureResponse(**computed)
             
+        except HTTPException:
+            raise
+        except DiskSpaceError as e:
+            logger.warning(f"Calculation rejected: {e}")
+            raise HTTPException(status_code=503, detail='Server is low on disk space, please retry later')
         except Exception as e:
             logger.error(f"Error in CalculateSoilMoistureUseCase: {e}")
             raise HTTPException(status_code=500, detail=str(e))
+
+    async def _compute_closest_product(self, bbox: list, date_obj: datetime.datetime, date_start: str,
+                                       date_end: str, progress: JobProgress) -> dict:
+        """Search, download and compute the proxy for the product closest to `date_obj`."""
+        # search products (Sentinel-1)
+        api, products = await search_sentinel_products(bbox, date_start, date_end, platformname='SENTINEL-1')
+        if not products:
+            raise HTTPException(status_code=404, detail='No Sentinel-1 product found for this bbox/date range (±7 days)')
+        
+        # pick product closest to requested date
+        target_date = date_obj.date()
+        best_product = None
+        min_diff = None
+        
+        for uuid_val, info in products.items():
+            prod_date_str = info['ingestiondate'].split('T')[0]
+            prod_date = datetime.datetime.strptime(prod_date_str, '%Y-%m-%d').date()
+            diff = abs((prod_date - target_date).days)
+            
+            if min_diff is None or diff < min_diff:
+                min_diff = diff
+                best_product = (uuid_val, info)
+        
+        first_uuid, prod = best_product
+        await progress.checkpoint(STAGE_SEARCHED)
+        
+        logger.info(f"Selected Sentinel-1 product: {prod['title']} (closest to {target_date}, diff: {min_diff} days)")
+
+        # Download
+        out = await download_product(
+            api, prod, out_dir=settings.OUTPUT_DIR, on_progress=progress.report_download
+        )
+        await progress.checkpoint(STAGE_DOWNLOADED)
+        
+        # find bands (VV polarization)
+        vv_path = find_s1_band_path(out, polarization='vv')
+        
+        # Generate output path
+        out_tif = os.path.join(settings.OUTPUT_DIR, f'soil_moisture_{uuid.uuid4().hex}.tif')
+        
+        # Compute
+        _, mean_val, _, _ = compute_soil_moisture_proxy(
+            vv_path, out_tif, bbox=bbox,
+            speckle_filter=settings.SAR_SPECKLE_FILTER or None,
+            speckle_size=settings.SAR_SPECKLE_FILTER_SIZE
+        )
+        if mean_val is None:
+            raise HTTPException(status_code=404, detail='No valid Sentinel-1 pixels over this bbox')
+        await progress.checkpoint(STAGE_PROCESSED)
+
+        # Convert to Base64 PNG
+        img_base64 = convert_tiff_to_base64_png(out_tif, colormap='Blues', vmin=0, vmax=1)
+
+        return SoilMoistureResponse(
+            status="success", 
+            soil_moisture_map=out_tif, 
+            image_base64=img_base64,
+            mean_value=mean_val
+        ).model_dump()
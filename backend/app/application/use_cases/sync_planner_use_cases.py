@@ -0,0 +1,272 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Dry-run sync planner.
+
+Estimates what a sync of every farm would cost before running it: which
+products would be downloaded (deduplicated across farms), how many bytes,
+how much download and CPU time, and when the run would finish at the
+current batch concurrency. It applies the same rules as the scheduler
+(due filter, sync watermark, product selection, already-saved dates) to the
+catalogue searches cached by previous syncs. Farms without a cached search
+are estimated from their revisit cadence, or searched live on request.
+"""
+import asyncio
+import datetime
+import logging
+from typing import Callable, Dict, NamedTuple, Optional
+
+from app.application.dto.pipeline_metrics_dto import PlannedProductDTO, SyncPlanDTO
+from app.application.use_cases.ndvi_use_cases import (
+    NDVI_LOOKBACK_DAYS,
+    NDVI_MAX_PRODUCTS_PER_SYNC,
+    select_ndvi_products
+)
+from app.application.use_cases.soil_moisture_use_cases import (
+    SOIL_MOISTURE_LOOKBACK_DAYS,
+    select_soil_moisture_products
+)
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.external_services.sentinel_client import search_sentinel_products
+from app.infrastructure.pipeline.disk_budget import MB
+from app.infrastructure.pipeline.farm_stream import iter_farm_batches
+from app.infrastructure.pipeline.job_queue import NDVI_SYNC_JOB, SOIL_MOISTURE_SYNC_JOB
+from app.infrastructure.pipeline.metrics import (
+    PipelineMetricsStore,
+    STAGE_SEARCH,
+    STAGE_DOWNLOAD,
+    STAGE_UNZIP,
+    STAGE_DECODE,
+    STAGE_COMPUTE,
+    STAGE_DB_WRITE
+)
+from app.infrastructure.pipeline.overpass import (
+    NOMINAL_REVISIT_DAYS,
+    is_farm_due,
+    search_start_date
+)
+from app.infrastructure.repositories.catalogue_cache_repository_impl import CatalogueCacheRepositoryImpl
+from app.infrastructure.repositories.satellite_repository_impl import SatelliteRepositoryImpl
+from app.infrastructure.repositories.sync_state_repository_impl import SyncStateRepositoryImpl
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Used until past runs have recorded stage metrics
+DEFAULT_SEARCH_SECONDS = 2.0
+DEFAULT_DOWNLOAD_MB_PER_SECOND = 10.0
+DEFAULT_CPU_SECONDS_PER_PRODUCT = 45.0
+
+# Concurrent catalogue searches in live mode
+LIVE_SEARCH_CONCURRENCY = 4
+
+CPU_STAGES = (STAGE_UNZIP, STAGE_DECODE, STAGE_COMPUTE)
+
+
+class _PlanSpec(NamedTuple):
+    kind: str
+    platform: str
+    lookback_days: int
+    max_products: int
+    select: Callable[[dict], list]
+
+
+PLAN_SPECS = {
+    'NDVI': _PlanSpec(NDVI_SYNC_JOB, 'SENTINEL-2', NDVI_LOOKBACK_DAYS, NDVI_MAX_PRODUCTS_PER_SYNC,
+                      select_ndvi_products),
+    'SOIL_MOISTURE': _PlanSpec(SOIL_MOISTURE_SYNC_JOB, 'SENTINEL-1', SOIL_MOISTURE_LOOKBACK_DAYS, 1,
+                               select_soil_moisture_products),
+}
+
+
+def _acquisition_date(product: dict) -> datetime.date:
+    return datetime.date.fromisoformat(product['ingestiondate'][:10])
+
+
+class _CostModel:
+    """Per-farm and per-product costs from past runs of a job kind, or defaults."""
+
+    def __init__(self, totals: dict):
+        def average(stage_name):
+            stats = totals.get(stage_name)
+            return stats.seconds / stats.count if stats and stats.count else None
+
+        download = totals.get(STAGE_DOWNLOAD)
+        cpu = [average(stage_name) for stage_name in CPU_STAGES]
+        self.from_history = download is not None and bool(download.seconds) and all(c is not None for c in cpu)
+
+        self.search_seconds = average(STAGE_SEARCH) or DEFAULT_SEARCH_SECONDS
+        self.db_write_seconds = average(STAGE_DB_WRITE) or 0.0
+        if self.from_history:
+            self.download_bytes_per_second = download.bytes / download.seconds
+            self.cpu_seconds_per_product = sum(cpu)
+        else:
+            self.download_bytes_per_second = DEFAULT_DOWNLOAD_MB_PER_SECOND * MB
+            self.cpu_seconds_per_product = DEFAULT_CPU_SECONDS_PER_PRODUCT
+
+
+class PlanSyncUseCase:
+    """Dry-run plan of a scheduled (or catch-up / backfill) sync of every farm."""
+
+    def __init__(self, session_factory=AsyncSessionLocal, metrics_store: Optional[PipelineMetricsStore] = None,
+                 search=search_sentinel_products):
+        self.session_factory = session_factory
+        self.metrics_store = metrics_store or PipelineMetricsStore(session_factory)
+        self.search = search
+
+    async def execute(self, data_type: str = 'NDVI', catch_up: bool = False, backfill: bool = False,
+                      live: bool = False, workers: int = 1) -> SyncPlanDTO:
+        """
+        `catch_up` plans every farm instead of only the due ones, `backfill`
+        ignores sync watermarks (full look-back, as for newly onboarded farms),
+        `live` searches CDSE for farms without a cached search, and `workers`
+        is the number of worker processes sharing the batch.
+        """
+        if data_type not in PLAN_SPECS:
+            raise ValueError(f"Unknown data type {data_type}, expected one of {', '.join(PLAN_SPECS)}")
+        spec = PLAN_SPECS[data_type]
+        today = datetime.date.today()
+        default_size = settings.DISK_PRODUCT_ESTIMATE_MB * MB
+
+        farms_total = farms_planned = skipped = uncached = 0
+        product_jobs = estimated_products = 0
+        download_bytes = 0
+        products: Dict[str, dict] = {}
+        farms_per_product: Dict[str, int] = {}
+
+        async for farms in iter_farm_batches(self.session_factory):
+            farms = [farm for farm in farms if farm.bbox is not None]
+            farms_total += len(farms)
+            if not farms:
+                continue
+            farm_ids = [farm.id for farm in farms]
+
+            async with self.session_factory() as db:
+                states = await SyncStateRepositoryImpl(db).get_states(data_type, farm_ids=farm_ids)
+                cache = await CatalogueCacheRepositoryImpl(db).get_entries(data_type, farm_ids)
+
+            # Search window of each farm that would be synced, as the sync job computes it
+            windows = {}
+            for farm in farms:
+                state = states.get(farm.id)
+                if not (catch_up or backfill) and not is_farm_due(state, spec.platform, today):
+                    skipped += 1
+                    continue
+                watermark = state.last_processed_date if state and not backfill else None
+                windows[farm.id] = search_start_date(
+                    watermark, today, spec.lookback_days, settings.SYNC_WATERMARK_OVERLAP_DAYS
+                )
+            if not windows:
+                continue
+            farms_planned += len(windows)
+
+            if live:
+                cache.update(await self._search_missing(
+                    spec, data_type, [f for f in farms if f.id in windows and f.id not in cache],
+                    windows, today
+                ))
+
+            async with self.session_factory() as db:
+                existing = await SatelliteRepositoryImpl(db).get_existing_dates_for_farms(
+                    list(windows), data_type, min(windows.values()), today
+                )
+
+            for farm_id, start in windows.items():
+                state = states.get(farm_id)
+                entry = cache.get(farm_id)
+                if entry is None:
+                    uncached += 1
+                    candidates, gap_days = {}, (today - start).days
+                else:
+                    candidates = {
+                        p['uuid']: p for p in entry.products
+                        if start <= _acquisition_date(p) <= today
+                    }
+                    # Parts of the window the cached search did not cover
+                    gap_days = max(0, (entry.search_start - start).days) + \
+                        max(0, (today - entry.fetched_at.date()).days)
+
+                saved = existing.get(farm_id, set())
+                selected = [p for p in spec.select(candidates) if _acquisition_date(p) not in saved]
+                for product in selected:
+                    products.setdefault(product['uuid'], product)
+                    farms_per_product[product['uuid']] = farms_per_product.get(product['uuid'], 0) + 1
+                    download_bytes += product.get('size') or default_size
+                product_jobs += len(selected)
+
+                cadence = (state.cadence_days if state else None) or NOMINAL_REVISIT_DAYS[spec.platform]
+                estimated = max(0, min(spec.max_products - len(selected), int(gap_days // cadence)))
+                estimated_products += estimated
+                download_bytes += estimated * default_size
+
+        unique_download_bytes = sum(p.get('size') or default_size for p in products.values()) + \
+            estimated_products * default_size
+
+        costs = _CostModel(await self.metrics_store.stage_totals(f"{spec.kind}:"))
+        total_products = product_jobs + estimated_products
+        search_seconds = farms_planned * costs.search_seconds
+        download_seconds = download_bytes / costs.download_bytes_per_second
+        cpu_seconds = total_products * costs.cpu_seconds_per_product
+        total_seconds = search_seconds + download_seconds + cpu_seconds + total_products * costs.db_write_seconds
+
+        # Batch jobs run WORK_SLOTS_BATCH at a time in each worker process
+        concurrency = max(1, settings.WORK_SLOTS_BATCH * workers)
+        generated_at = datetime.datetime.utcnow()
+
+        return SyncPlanDTO(
+            data_type=data_type,
+            generated_at=generated_at,
+            farms_total=farms_total,
+            farms_planned=farms_planned,
+            farms_skipped_not_due=skipped,
+            farms_without_catalogue=uncached,
+            product_jobs=product_jobs,
+            estimated_uncatalogued_products=estimated_products,
+            unique_products=len(products),
+            products=[
+                PlannedProductDTO(
+                    uuid=uuid,
+                    title=product['title'],
+                    acquisition_date=product['ingestiondate'][:10],
+                    size_bytes=product.get('size'),
+                    cloud_cover=product.get('cloud_cover'),
+                    farms=farms_per_product[uuid]
+                )
+                for uuid, product in sorted(products.items(), key=lambda item: item[1]['ingestiondate'])
+            ],
+            download_bytes=download_bytes,
+            unique_download_bytes=unique_download_bytes,
+            estimated_search_seconds=round(search_seconds, 1),
+            estimated_download_seconds=round(download_seconds, 1),
+            estimated_cpu_seconds=round(cpu_seconds, 1),
+            estimated_total_seconds=round(total_seconds, 1),
+            concurrency=concurrency,
+            estimated_completion_at=generated_at + datetime.timedelta(seconds=total_seconds / concurrency),
+            history_source='metrics' if costs.from_history else 'defaults'
+        )
+
+    async def _search_missing(self, spec: _PlanSpec, data_type: str, farms: list,
+                              windows: Dict[int, datetime.date], today: datetime.date) -> dict:
+        """Search CDSE for farms without a cached search, caching the results."""
+        semaphore = asyncio.Semaphore(LIVE_SEARCH_CONCURRENCY)
+
+        async def search(farm):
+            async with semaphore:
+                try:
+                    _, found = await self.search(
+                        farm.bbox, windows[farm.id].strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d'),
+                        platformname=spec.platform
+                    )
+                except Exception as e:
+                    logger.warning(f"Live catalogue search failed for farm {farm.id}: {e}")
+                    return None
+                async with self.session_factory() as db:
+                    return await CatalogueCacheRepositoryImpl(db).put(
+                        farm.id, data_type, spec.platform, windows[farm.id], today,
+                        list(found.values()), datetime.datetime.utcnow()
+                    )
+
+        entries = await asyncio.gather(*(search(farm) for farm in farms))
+        return {entry.farm_id: entry for entry in entries if entry is not None}
@@ -0,0 +1,129 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Operations command line.
+
+    python -m app.cli plan-sync --data-type NDVI [--catch-up] [--backfill] [--live] [--workers N] [--json]
+    python -m app.cli fiware-backfill [--data-type NDVI] [--no-history] [--batch-size N] [--concurrency N]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.infrastructure.database.database import init_db
+# Import models to register them with Base
+from app.infrastructure.database import models
+
+
+def _format_bytes(nbytes: int) -> str:
+    return f"{nbytes / 1024 ** 3:.1f} GB"
+
+
+def _format_duration(seconds: float) -> str:
+    hours, rest = divmod(int(seconds), 3600)
+    return f"{hours}h{rest // 60:02d}m"
+
+
+async def plan_sync(args) -> int:
+    from app.application.use_cases.sync_planner_use_cases import PlanSyncUseCase
+
+    await init_db()
+    plan = await PlanSyncUseCase().execute(
+        data_type=args.data_type, catch_up=args.catch_up, backfill=args.backfill,
+        live=args.live, workers=args.workers
+    )
+    if args.json:
+        print(plan.model_dump_json(indent=2))
+        return 0
+
+    print(f"Sync plan for {plan.data_type} ({plan.generated_at:%Y-%m-%d %H:%M} UTC)")
+    print(f"  Farms:            {plan.farms_planned} planned / {plan.farms_total} "
+          f"({plan.farms_skipped_not_due} not due, {plan.farms_without_catalogue} without cached catalogue)")
+    print(f"  Products:         {plan.unique_products} unique, {plan.product_jobs} farm downloads, "
+          f"+{plan.estimated_uncatalogued_products} estimated")
+    print(f"  Download:         {_format_bytes(plan.download_bytes)} "
+          f"({_format_bytes(plan.unique_download_bytes)} if deduplicated)")
+    print(f"  Search time:      {_format_duration(plan.estimated_search_seconds)}")
+    print(f"  Download time:    {_format_duration(plan.estimated_download_seconds)}")
+    print(f"  CPU time:         {_format_duration(plan.estimated_cpu_seconds)}")
+    print(f"  Total work:       {_format_duration(plan.estimated_total_seconds)} "
+          f"at concurrency {plan.concurrency} (estimates from {plan.history_source})")
+    print(f"  Expected finish:  {plan.estimated_completion_at:%Y-%m-%d %H:%M} UTC")
+    return 0
+
+
+async def fiware_backfill(args) -> int:
+    from app.application.use_cases.fiware_backfill_use_cases import BACKFILL_MAX_ATTEMPTS
+    from app.infrastructure.pipeline.fiware_backfill import FIWARE_BACKFILL_JOB, run_fiware_backfill_job
+    from app.infrastructure.pipeline.job_queue import JobProgress, JobQueue
+
+    await init_db()
+    # Run as the backfill queue job, so its checkpoint is shared with the worker and a rerun resumes it
+    queue = JobQueue()
+    payload = {
+        'data_types': args.data_type, 'history': not args.no_history,
+        'batch_size': args.batch_size, 'concurrency': args.concurrency,
+    }
+    job_id = await queue.enqueue(FIWARE_BACKFILL_JOB, payload=payload, dedupe_key=FIWARE_BACKFILL_JOB,
+                                 max_attempts=BACKFILL_MAX_ATTEMPTS)
+    job = await queue.claim(kinds=[FIWARE_BACKFILL_JOB])
+    if job is None:
+        print(f"FIWARE backfill job {job_id} is running in another process")
+        return 1
+
+    def report(counters):
+        total = counters.get('total_rows') or 0
+        percent = 100 * counters['rows'] / total if total else 100
+        eta = counters.get('eta_seconds')
+        print(f"\r{counters['rows']}/{total} rows ({percent:.1f}%), {counters.get('rows_per_second', 0)} rows/s, "
+              f"ETA {_format_duration(eta) if eta is not None else '-'}, {counters['requeued']} requeued",
+              end='', flush=True)
+
+    progress = JobProgress(queue, job.id, job.stage, dict(job.state or {}), priority=job.priority)
+    try:
+        # An unfinished backfill is resumed with its own options
+        counters = await run_fiware_backfill_job(job, progress, on_progress=report)
+    except BaseException as e:
+        await queue.fail(job.id, str(e) or type(e).__name__)
+        print(f"\nBackfill stopped at row ID {progress.state.get('progress', {}).get('last_id')}: {e!r}")
+        return 1
+    await queue.complete(job.id, progress.state)
+    print(f"\nDone: {counters['parcels']} parcels, {counters['records']} records, "
+          f"{counters['history_points']} history points ({counters['requeued']} handed to the outbox)")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m app.cli', description='OpenAgri operations')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan = commands.add_parser('plan-sync', help='Dry-run plan of a satellite sync of every farm')
+    plan.add_argument('--data-type', default='NDVI', choices=['NDVI', 'SOIL_MOISTURE'])
+    plan.add_argument('--catch-up', action='store_true', help='Plan every farm, not only those with a pass due')
+    plan.add_argument('--backfill', action='store_true', help='Ignore sync watermarks (full look-back)')
+    plan.add_argument('--live', action='store_true', help='Search CDSE for farms without a cached search')
+    plan.add_argument('--workers', type=int, default=1, help='Worker processes sharing the batch')
+    plan.add_argument('--json', action='store_true', help='Print the plan as JSON')
+    plan.set_defaults(handler=plan_sync)
+
+    backfill = commands.add_parser('fiware-backfill', help='Publish historical farms and satellite data to FIWARE')
+    backfill.add_argument('--data-type', action='append', choices=['NDVI', 'SOIL_MOISTURE'],
+                          help='Data type to backfill (repeatable; default all)')
+    backfill.add_argument('--no-history', action='store_true', help='Skip the QuantumLeap parcel history')
+    backfill.add_argument('--batch-size', type=int, default=None, help='Entities per batch request')
+    backfill.add_argument('--concurrency', type=int, default=None, help='Batch requests in flight')
+    backfill.set_defaults(handler=fiware_backfill)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    args = build_parser().parse_args(argv)
+    return asyncio.run(args.handler(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,19 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from datetime import date, datetime
+from app.infrastructure.database.models.catalogue_cache_model import CatalogueCacheModel
+
+class CatalogueCacheRepository(ABC):
+    @abstractmethod
+    async def get_entries(self, data_type: str, farm_ids: List[int]) -> Dict[int, CatalogueCacheModel]:
+        """Get the cached search of farms for a data type, keyed by farm ID."""
+        pass
+
+    @abstractmethod
+    async def put(self, farm_id: int, data_type: str, platform: str, search_start: date,
+                  search_end: date, products: List[dict], fetched_at: datetime) -> CatalogueCacheModel:
+        """Replace the cached search of a farm for a data type."""
+        pass
@@ -2,7 +2,7 @@
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import date
 from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
 
@@ -11,6 +11,15 @@ class SatelliteRepository(ABC):
     async def save_data(self, data: SatelliteDataModel) -> SatelliteDataModel:
         pass
 
+    @abstractmethod
+    async def save_many(self, records: List[SatelliteDataModel]) -> List[SatelliteDataModel]:
+        pass
+
+    @abstractmethod
+    async def upsert_many(self, records: List[SatelliteDataModel]) -> List[SatelliteDataModel]:
+        """Save records in one transaction, replacing rows of the same farm, data type and date."""
+        pass
+
     @abstractmethod
     async def get_data_by_farm(self, farm_id: int, data_type: str, start_date: date, end_date: date) -> List[SatelliteDataModel]:
         pass
@@ -18,3 +27,12 @@ class SatelliteRepository(ABC):
     @abstractmethod
     async def get_existing_record(self, farm_id: int, data_type: str, acquisition_date: date) -> Optional[SatelliteDataModel]:
         pass
+
+    @abstractmethod
+    async def get_existing_dates(self, farm_id: int, data_type: str, start_date: date, end_date: date) -> Set[date]:
+        pass
+
+    @abstractmethod
+    async def get_existing_dates_for_farms(self, farm_ids: List[int], data_type: str,
+                                           start_date: date, end_date: date) -> Dict[int, Set[date]]:
+        pass
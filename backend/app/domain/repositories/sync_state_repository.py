@@ -0,0 +1,31 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from datetime import date, datetime
+from app.infrastructure.database.models.sync_state_model import SatelliteSyncStateModel
+
+class SyncStateRepository(ABC):
+    @abstractmethod
+    async def get_states(self, data_type: str,
+                         farm_ids: Optional[List[int]] = None) -> Dict[int, SatelliteSyncStateModel]:
+        """Get sync state of all farms (or of `farm_ids`) for a data type, keyed by farm ID."""
+        pass
+
+    @abstractmethod
+    async def record_check(self, farm_id: int, data_type: str, platform: str,
+                           acquisition_dates: List[date], checked_at: datetime) -> SatelliteSyncStateModel:
+        """Record a catalogue search and the acquisitions it returned."""
+        pass
+
+    @abstractmethod
+    async def get_state(self, farm_id: int, data_type: str) -> Optional[SatelliteSyncStateModel]:
+        """Get sync state of one farm for a data type."""
+        pass
+
+    @abstractmethod
+    async def advance_watermark(self, farm_id: int, data_type: str, platform: str,
+                                processed_date: date) -> SatelliteSyncStateModel:
+        """Move the sync watermark forward to an acquisition whose data is saved."""
+        pass
@@ -51,6 +51,39 @@ class Settings(BaseSettings):
     COPERNICUS_PASSWORD: str = ""
     OUTPUT_DIR: str = "./output"
     MAX_PRODUCTS: int = 20
+    # Sentinel-1 speckle filter applied before dB conversion: "", "boxcar", "lee", "refined_lee"
+    SAR_SPECKLE_FILTER: str = ""
+    SAR_SPECKLE_FILTER_SIZE: int = 7
+
+    # Satellite sync job queue
+    SYNC_WORKER_CONCURRENCY: int = 2
+    JOB_LEASE_SECONDS: int = 600
+    # Run the worker inside the API process (development only; use `python -m app.worker` otherwise)
+    RUN_EMBEDDED_WORKER: bool = False
+    LEADER_LOCK_TTL_SECONDS: int = 60
+    # Serialize identical calculations across processes with a database lock
+    SINGLE_FLIGHT_DB_LOCK: bool = True
+    # Concurrent download/compute slots per process, overall and per priority class
+    # (interactive > user-triggered resync > nightly batch); waiters gain one class per aging period
+    WORK_SLOTS: int = 2
+    WORK_SLOTS_INTERACTIVE: int = 2
+    WORK_SLOTS_RESYNC: int = 1
+    WORK_SLOTS_BATCH: int = 1
+    WORK_PRIORITY_AGING_SECONDS: int = 300
+    # Incremental sync: search from the last processed acquisition minus this overlap
+    # (late catalogue publications); farms without a watermark use the full look-back
+    SYNC_WATERMARK_OVERLAP_DAYS: int = 3
+    # Farms read per batch (and per database session) by the scheduled jobs
+    FARM_BATCH_SIZE: int = 500
+    # Disk admission control for OUTPUT_DIR: bytes in-flight downloads/extractions may reserve,
+    # free space always left on the disk, and how long work waits for room before failing
+    DISK_BUDGET_MB: int = 20000
+    DISK_FREE_FLOOR_MB: int = 2048
+    DISK_RESERVATION_TIMEOUT_SECONDS: int = 900
+    # Size assumed for a product when the catalogue does not report one
+    DISK_PRODUCT_ESTIMATE_MB: int = 1200
+    # Leftover .zip/.SAFE/GeoTIFF files older than this are removed by the janitor
+    JANITOR_MAX_AGE_HOURS: int = 6
 
 
     # Gemini AI
@@ -70,6 +103,32 @@ class Settings(BaseSettings):
     FIWARE_SERVICE: str = "openagri"
     FIWARE_SERVICEPATH: str = "/farms"
     FIWARE_ENABLED: bool = True
+    # Entities per NGSI-LD batch (entityOperations) request
+    FIWARE_BATCH_SIZE: int = 100
+    # Outbox drainer: how often it runs, attempts before an entity is marked failed,
+    # and how long published rows are kept
+    FIWARE_OUTBOX_INTERVAL_SECONDS: int = 30
+    FIWARE_OUTBOX_MAX_ATTEMPTS: int = 10
+    FIWARE_OUTBOX_RETENTION_DAYS: int = 7
+    # Circuit breaker: consecutive failures that open it, seconds before a probe call,
+    # and how long a health check result is reused
+    FIWARE_BREAKER_FAILURE_THRESHOLD: int = 5
+    FIWARE_BREAKER_RESET_SECONDS: int = 30
+    FIWARE_HEALTH_CACHE_SECONDS: int = 10
+    # Orion notifications to this backend keep the local entity cache fresh. URL of
+    # POST /api/v1/fiware/notifications as Orion reaches it (empty: no subscription),
+    # and the shared token Orion sends with each notification (required: without it
+    # there is no subscription and notifications are rejected)
+    FIWARE_NOTIFICATION_URL: str = ""
+    FIWARE_NOTIFICATION_TOKEN: str = ""
+    # Entity cache: entry lifetime, size, and whether it is also stored in the database
+    FIWARE_ENTITY_CACHE_TTL_SECONDS: int = 600
+    FIWARE_ENTITY_CACHE_MAX_ENTITIES: int = 50000
+    FIWARE_ENTITY_CACHE_PERSIST: bool = False
+    # Backfill of historical satellite data (python -m app.cli fiware-backfill):
+    # entities per batch request, and batch requests in flight
+    FIWARE_BACKFILL_BATCH_SIZE: int = 500
+    FIWARE_BACKFILL_CONCURRENCY: int = 4
 
 
 
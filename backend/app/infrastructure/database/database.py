@@ -4,10 +4,15 @@
 """
 Database configuration and session management.
 """
+import logging
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.infrastructure.config.settings import get_settings
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
 # Create async engine
@@ -43,7 +48,47 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+def add_missing_columns(conn):
+    """
+    Add nullable columns introduced after a table was created.
+    `create_all` only creates missing tables, so existing databases would
+    otherwise lack new columns.
+    """
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+
+
+def add_missing_indexes(conn):
+    """Create indexes introduced after a table was created (`create_all` skips existing tables)."""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            try:
+                with conn.begin_nested():
+                    index.create(conn)
+            except SQLAlchemyError as e:
+                # e.g. rows violating a new unique index: the app still starts, without it
+                logger.warning(f"Could not create index {index.name}: {e}")
+
+
 async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+        await conn.run_sync(add_missing_indexes)
@@ -4,3 +4,11 @@
 from .user_model import UserModel
 from .farm_model import FarmModel
 from .satellite_data_model import SatelliteDataModel
+from .sync_state_model import SatelliteSyncStateModel
+from .job_model import SatelliteJobModel
+from .lock_model import AdvisoryLockModel
+from .metrics_model import PipelineStageMetricsModel
+from .catalogue_cache_model import CatalogueCacheModel
+from .fiware_outbox_model import FiwareOutboxModel
+from .entity_cache_model import NgsiEntityCacheModel
+from .flight_result_model import SatelliteFlightResultModel
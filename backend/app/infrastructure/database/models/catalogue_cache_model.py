@@ -0,0 +1,28 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, JSON, UniqueConstraint
+from app.infrastructure.database.database import Base
+
+class CatalogueCacheModel(Base):
+    """
+    Products returned by the last catalogue search of a farm for one data type,
+    so sync plans can be computed without querying CDSE again.
+    """
+    __tablename__ = "catalogue_cache"
+    __table_args__ = (
+        UniqueConstraint("farm_id", "data_type", name="uq_catalogue_cache_farm_data_type"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=False, index=True)
+    data_type = Column(String, nullable=False, index=True)
+    satellite_platform = Column(String, nullable=True)
+
+    # Search window and its result (product dicts as returned by search_sentinel_products)
+    search_start = Column(Date, nullable=False)
+    search_end = Column(Date, nullable=False)
+    products = Column(JSON, nullable=False, default=list)
+
+    fetched_at = Column(DateTime, default=datetime.utcnow)
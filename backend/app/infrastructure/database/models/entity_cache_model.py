@@ -0,0 +1,21 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, JSON
+from app.infrastructure.database.database import Base
+
+class NgsiEntityCacheModel(Base):
+    """
+    Persisted copy of the in-process NGSI-LD entity cache (FIWARE_ENTITY_CACHE_PERSIST),
+    shared by API processes and kept across restarts.
+    """
+    __tablename__ = "ngsi_entity_cache"
+
+    entity_id = Column(String, primary_key=True)
+    entity_type = Column(String, nullable=False, index=True)
+
+    # Normalized NGSI-LD entity as last received from Orion
+    entity = Column(JSON, nullable=False)
+
+    cached_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -5,7 +5,8 @@
 SQLAlchemy Farm model.
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON
+from typing import List, Optional
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, JSON, event
 from sqlalchemy.orm import relationship
 from app.infrastructure.database.database import Base
 
@@ -24,5 +25,59 @@ class FarmModel(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Bounding box and centroid of the polygon, kept in sync with `coordinates`
+    # so the scheduler does not have to load and parse the JSON of every farm
+    bbox_min_lng = Column(Float, nullable=True)
+    bbox_min_lat = Column(Float, nullable=True)
+    bbox_max_lng = Column(Float, nullable=True)
+    bbox_max_lat = Column(Float, nullable=True)
+    centroid_lat = Column(Float, nullable=True)
+    centroid_lng = Column(Float, nullable=True)
+
+    # Content hash of the AgriParcel entity last queued for FIWARE, and whether
+    # the farm must be re-checked against it on its next update
+    fiware_hash = Column(String(64), nullable=True)
+    fiware_dirty = Column(Boolean, nullable=True, default=False)
+    # observedAt of each observation attribute's value last set on the AgriParcel in
+    # Orion: older observations only go to the parcel's QuantumLeap history
+    fiware_observed = Column(JSON, nullable=True)
+
     # Relationship with user
     owner = relationship("UserModel", backref="farms")
+
+    def mark_fiware_dirty(self):
+        """Re-check the farm's AgriParcel against the last published hash when it is next saved."""
+        self.fiware_dirty = True
+
+    @property
+    def bbox(self) -> Optional[List[float]]:
+        """[minx, miny, maxx, maxy], or None without coordinates."""
+        if self.bbox_min_lng is None:
+            return None
+        return [self.bbox_min_lng, self.bbox_min_lat, self.bbox_max_lng, self.bbox_max_lat]
+
+
+def farm_geometry(coordinates: Optional[list]) -> dict:
+    """Precomputed geometry columns for a list of {'lat', 'lng'} points (all None if empty)."""
+    if not coordinates:
+        return dict.fromkeys(
+            ('bbox_min_lng', 'bbox_min_lat', 'bbox_max_lng', 'bbox_max_lat', 'centroid_lat', 'centroid_lng')
+        )
+    lats = [c['lat'] for c in coordinates]
+    lngs = [c['lng'] for c in coordinates]
+    return {
+        'bbox_min_lng': min(lngs),
+        'bbox_min_lat': min(lats),
+        'bbox_max_lng': max(lngs),
+        'bbox_max_lat': max(lats),
+        # Vertex mean: close enough to the area centroid for small farm polygons
+        'centroid_lat': sum(lats) / len(lats),
+        'centroid_lng': sum(lngs) / len(lngs),
+    }
+
+
+@event.listens_for(FarmModel, 'before_insert')
+@event.listens_for(FarmModel, 'before_update')
+def _update_farm_geometry(mapper, connection, target):
+    for column, value in farm_geometry(target.coordinates).items():
+        setattr(target, column, value)
@@ -0,0 +1,204 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Transactional outbox for FIWARE synchronization.
+
+Inserting or updating a farm or a satellite observation also inserts the
+matching NGSI-LD entity into `fiware_outbox`, on the same connection and so
+in the same transaction as the data itself: an observation is never saved
+without its pending publication, and a rolled back write publishes nothing.
+A farm's AgriParcel is only queued when its content hash differs from the
+one last queued (`FarmModel.fiware_hash`), so edits that do not change the
+entity, and values re-saved unchanged, cost no Orion write. If the drainer
+gives up on that row, it clears the hash so the parcel is queued again.
+Queued observations are marked `fiware_queued`, which the backfill skips.
+The drainer in app.infrastructure.pipeline.fiware_outbox publishes the rows.
+"""
+import hashlib
+import json
+from datetime import datetime, time
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Index, event, inspect
+from sqlalchemy.orm.attributes import set_committed_value
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.database import Base
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.external_services.fiware_client import (
+    CONTEXT,
+    create_agriparcel_entity,
+    create_agriparcel_record,
+    _format_datetime
+)
+
+settings = get_settings()
+
+OUTBOX_PENDING = 'pending'
+OUTBOX_PUBLISHED = 'published'
+OUTBOX_FAILED = 'failed'
+# Upsert/delete never sent because a newer change of its entity was published first
+OUTBOX_SUPERSEDED = 'superseded'
+
+OPERATION_UPSERT = 'upsert'
+OPERATION_DELETE = 'delete'
+# Attribute update whose every version matters: each one is a point of the
+# entity's QuantumLeap history, so these rows are never collapsed
+OPERATION_APPEND = 'append'
+
+# Satellite data types published as AgriParcelRecords, with their NGSI-LD attribute
+RECORD_ATTRIBUTES = {
+    'NDVI': 'ndvi',
+    'SOIL_MOISTURE': 'soilMoisture',
+}
+
+# Farm attributes that are part of the AgriParcel entity
+PARCEL_ATTRIBUTES = ('name', 'coordinates', 'crop_type', 'area_size')
+
+
+class FiwareOutboxModel(Base):
+    """An NGSI-LD entity change waiting to be published to Orion."""
+    __tablename__ = "fiware_outbox"
+    __table_args__ = (
+        Index("ix_fiware_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Deterministic URN, so publishing the same row twice is harmless
+    entity_id = Column(String, nullable=False, index=True)
+    entity_type = Column(String, nullable=False)
+    operation = Column(String, nullable=False, default=OPERATION_UPSERT)
+    payload = Column(JSON, nullable=True)
+
+    # 'pending', 'published', 'failed' (gave up after FIWARE_OUTBOX_MAX_ATTEMPTS) or 'superseded'
+    status = Column(String, nullable=False, default=OUTBOX_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    published_at = Column(DateTime, nullable=True)
+
+
+def _enqueue(connection, entity_id: str, entity_type: str, operation: str, payload=None):
+    now = datetime.utcnow()
+    connection.execute(FiwareOutboxModel.__table__.insert().values(
+        entity_id=entity_id,
+        entity_type=entity_type,
+        operation=operation,
+        payload=payload,
+        status=OUTBOX_PENDING,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now
+    ))
+
+
+def parcel_entity(farm: FarmModel) -> dict:
+    entity = create_agriparcel_entity(
+        farm_id=farm.id,
+        name=farm.name,
+        coordinates=farm.coordinates,
+        crop_type=farm.crop_type,
+        area=farm.area_size
+    )
+    if farm.created_at:
+        entity["dateCreated"]["value"] = _format_datetime(farm.created_at)
+    return entity
+
+
+def parcel_content_hash(entity: dict) -> str:
+    """Hash of an AgriParcel's content, ignoring its creation/modification timestamps."""
+    content = {k: v for k, v in entity.items() if k not in ("dateCreated", "dateModified")}
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@event.listens_for(FarmModel, 'after_insert')
+def _publish_new_farm(mapper, connection, target):
+    if not settings.FIWARE_ENABLED or not target.coordinates:
+        return
+    entity = parcel_entity(target)
+    content_hash = parcel_content_hash(entity)
+    _enqueue(connection, entity["id"], entity["type"], OPERATION_UPSERT, entity)
+    # The id is only known now: record the hash with a second statement (updated_at unchanged)
+    connection.execute(
+        FarmModel.__table__.update()
+        .where(FarmModel.__table__.c.id == target.id)
+        .values(fiware_hash=content_hash, fiware_dirty=False, updated_at=target.updated_at)
+    )
+    set_committed_value(target, 'fiware_hash', content_hash)
+    set_committed_value(target, 'fiware_dirty', False)
+
+
+@event.listens_for(FarmModel, 'before_update')
+def _publish_changed_farm(mapper, connection, target):
+    """
+    Publish the AgriParcel of a farm marked dirty or with changed entity
+    attributes, unless its content hash equals the last one published.
+    """
+    if not settings.FIWARE_ENABLED or not target.coordinates:
+        return
+    state = inspect(target)
+    if not target.fiware_dirty and not any(state.attrs[name].history.has_changes() for name in PARCEL_ATTRIBUTES):
+        return
+    target.fiware_dirty = False
+    entity = parcel_entity(target)
+    content_hash = parcel_content_hash(entity)
+    if content_hash == target.fiware_hash:
+        return
+    target.fiware_hash = content_hash
+    _enqueue(connection, entity["id"], entity["type"], OPERATION_UPSERT, entity)
+
+
+@event.listens_for(FarmModel, 'after_delete')
+def _unpublish_farm(mapper, connection, target):
+    if not settings.FIWARE_ENABLED:
+        return
+    _enqueue(connection, f"urn:ngsi-ld:AgriParcel:OpenAgri:{target.id}", "AgriParcel", OPERATION_DELETE)
+
+
+def observation_entities(farm_id: int, data_type: str, value: float, acquisition_date) -> tuple:
+    """
+    The AgriParcelRecord of a satellite observation, and the parcel attribute
+    update (APPEND) that makes it a point of the parcel's QuantumLeap history.
+    Returns (None, None) for data types not published to FIWARE.
+    """
+    record_type = RECORD_ATTRIBUTES.get(data_type)
+    if record_type is None:
+        return None, None
+    record = create_agriparcel_record(
+        farm_id=farm_id,
+        record_type=record_type,
+        value=value,
+        observed_at=datetime.combine(acquisition_date, time(12, 0, 0))  # Default to noon
+    )
+    parcel_id = record["hasAgriParcel"]["object"]
+    return record, {
+        "@context": CONTEXT,
+        "id": parcel_id,
+        "type": "AgriParcel",
+        record_type: record[record_type],
+    }
+
+
+@event.listens_for(SatelliteDataModel, 'before_insert')
+@event.listens_for(SatelliteDataModel, 'before_update')
+def _mark_observation_queued(mapper, connection, target):
+    # Written with the row: the backfill skips observations that go through the outbox
+    if settings.FIWARE_ENABLED and target.data_type in RECORD_ATTRIBUTES:
+        target.fiware_queued = True
+
+
+@event.listens_for(SatelliteDataModel, 'after_insert')
+@event.listens_for(SatelliteDataModel, 'after_update')
+def _publish_observation(mapper, connection, target):
+    if not settings.FIWARE_ENABLED:
+        return
+    record, parcel_update = observation_entities(
+        target.farm_id, target.data_type, target.mean_value, target.acquisition_date
+    )
+    if record is None:
+        return
+    _enqueue(connection, record["id"], record["type"], OPERATION_UPSERT, record)
+    # A point of the parcel's QuantumLeap series, and its current value if it is the newest one
+    _enqueue(connection, parcel_update["id"], "AgriParcel", OPERATION_APPEND, parcel_update)
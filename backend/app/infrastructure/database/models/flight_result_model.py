@@ -0,0 +1,17 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, JSON
+from app.infrastructure.database.database import Base
+
+class SatelliteFlightResultModel(Base):
+    """
+    Latest result of a single-flight computation, keyed by its flight key.
+    Lets a process that waited on another one's computation reuse its result.
+    """
+    __tablename__ = "satellite_flight_results"
+
+    key = Column(String, primary_key=True)
+    result = Column(JSON, nullable=False)
+    completed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -0,0 +1,65 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Index, text
+from app.infrastructure.database.database import Base
+
+class SatelliteJobModel(Base):
+    """
+    Durable satellite sync job.
+    Workers claim jobs with a lease and checkpoint the stage they reached,
+    so a restarted worker resumes a job instead of redoing it.
+    """
+    __tablename__ = "satellite_jobs"
+    __table_args__ = (
+        # At most one pending/running job per dedupe key, even across processes
+        Index(
+            "uq_satellite_jobs_active_dedupe_key", "dedupe_key", unique=True,
+            sqlite_where=text("status IN ('pending', 'running')"),
+            postgresql_where=text("status IN ('pending', 'running')")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Job kind: 'ndvi_sync', 'soil_moisture_sync', ...
+    kind = Column(String, nullable=False, index=True)
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=True, index=True)
+
+    # User who submitted the job (calculations); None for syncs, which belong to the farm's owner
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+
+    # Scheduler run that enqueued the job (e.g. 'ndvi_sync:2025-01-31')
+    run_id = Column(String, nullable=True, index=True)
+
+    # Identical pending/running jobs share a dedupe key
+    dedupe_key = Column(String, nullable=True)
+
+    # Status: 'pending', 'running', 'done', 'failed'
+    status = Column(String, nullable=False, default="pending", index=True)
+
+    # Priority class: 0 interactive, 1 user-triggered resync, 2 nightly batch
+    priority = Column(Integer, nullable=False, default=2, index=True)
+
+    # Last stage reached: 'queued', 'searched', 'downloaded', 'processed', 'saved', 'synced'
+    stage = Column(String, nullable=False, default="queued")
+
+    # Job inputs (bbox, dates, ...) and per-stage outputs (products, paths, results)
+    payload = Column(JSON, nullable=True)
+    state = Column(JSON, nullable=True)
+
+    # Retry bookkeeping
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    available_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_error = Column(String, nullable=True)
+
+    # Lease held by the worker running the job
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,18 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime
+from app.infrastructure.database.database import Base
+
+class AdvisoryLockModel(Base):
+    """
+    Named lock with an expiring lease, shared by all processes using the database.
+    Used for scheduler leader election.
+    """
+    __tablename__ = "advisory_locks"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    acquired_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,34 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint
+from app.infrastructure.database.database import Base
+
+class PipelineStageMetricsModel(Base):
+    """
+    Aggregated timing, byte and memory metrics of one pipeline stage
+    (search, download, unzip, decode, compute, db_write, fiware_sync, ...)
+    over all jobs of a run, e.g. the nightly NDVI run of a given day.
+    """
+    __tablename__ = "pipeline_stage_metrics"
+    __table_args__ = (
+        UniqueConstraint("run_id", "stage", name="uq_pipeline_metrics_run_stage"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, nullable=False, index=True)
+    stage = Column(String, nullable=False)
+
+    count = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
+    total_seconds = Column(Float, nullable=False, default=0.0)
+    max_seconds = Column(Float, nullable=False, default=0.0)
+    total_bytes = Column(Integer, nullable=False, default=0)
+    items = Column(Integer, nullable=False, default=0)
+
+    # Highest process peak RSS (MB) observed at the end of the stage
+    peak_rss_mb = Column(Float, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -2,7 +2,7 @@
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Boolean
 from sqlalchemy.orm import relationship
 from app.infrastructure.database.database import Base
 
@@ -18,7 +18,7 @@ class SatelliteDataModel(Base):
     # Date of the satellite image acquisition
     acquisition_date = Column(Date, nullable=False, index=True)
     
-    # Type of data: 'NDVI', 'SOIL_MOISTURE', etc.
+    # Type of data: 'NDVI', 'SOIL_MOISTURE', 'SAR_VH' (dB), 'SAR_VH_VV_RATIO', etc.
     data_type = Column(String, nullable=False, index=True)
     
     # Satellite source: 'SENTINEL-2', 'SENTINEL-1'
@@ -34,5 +34,9 @@ class SatelliteDataModel(Base):
     
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Set once the observation is queued for FIWARE or loaded by the backfill:
+    # rows saved before FIWARE was enabled have none, and are left to the backfill
+    fiware_queued = Column(Boolean, nullable=True)
+
     # Relationship
     farm = relationship("FarmModel", backref="satellite_data")
@@ -0,0 +1,45 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.infrastructure.database.database import Base
+
+class SatelliteSyncStateModel(Base):
+    """
+    Tracks the observed acquisition cadence of a farm for one data type,
+    so the scheduler only searches the catalogue when a new pass is plausible,
+    and the sync watermark, so searches only cover acquisitions not yet processed.
+    """
+    __tablename__ = "satellite_sync_state"
+    __table_args__ = (
+        UniqueConstraint("farm_id", "data_type", name="uq_sync_state_farm_data_type"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    farm_id = Column(Integer, ForeignKey("farms.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Type of data: 'NDVI', 'SOIL_MOISTURE', etc.
+    data_type = Column(String, nullable=False, index=True)
+
+    # Satellite source: 'SENTINEL-2', 'SENTINEL-1'
+    satellite_platform = Column(String, nullable=True)
+
+    # Most recent acquisition seen in the catalogue for this farm
+    last_acquisition_date = Column(Date, nullable=True)
+
+    # Median interval (days) between observed acquisitions
+    cadence_days = Column(Float, nullable=True)
+
+    # Last time the catalogue was searched for this farm
+    last_checked_at = Column(DateTime, nullable=True)
+
+    # Sync watermark: most recent acquisition whose data is saved
+    last_processed_date = Column(Date, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    farm = relationship("FarmModel", backref="sync_states")
@@ -0,0 +1,100 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Circuit breaker for calls to an external service.
+
+closed     calls go through; `failure_threshold` consecutive failures open the circuit
+open       calls fail fast without touching the network, for `reset_timeout` seconds
+half-open  a single probe call goes through: success closes the circuit, failure re-opens it
+"""
+import time
+from typing import Callable, Optional
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """In-process circuit breaker shared by every client of one service."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock or time.monotonic
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+        # Metrics
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        if self._state == STATE_OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            return STATE_HALF_OPEN
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go out now. Counts rejected calls."""
+        state = self.state
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_HALF_OPEN and not self._probe_in_flight:
+            self._state = STATE_HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.successes += 1
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+        self._state = STATE_CLOSED
+        self._opened_at = None
+
+    def release_probe(self):
+        """End a call that has no outcome (e.g. cancelled) without leaving its probe slot taken."""
+        self._probe_in_flight = False
+
+    def record_failure(self, error: Optional[BaseException | str] = None):
+        self.failures += 1
+        self._consecutive_failures += 1
+        self.last_error = str(error) if error is not None else None
+        was_probe = self._probe_in_flight
+        self._probe_in_flight = False
+        if was_probe or self._state == STATE_HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != STATE_OPEN:
+                self.times_opened += 1
+            self._state = STATE_OPEN
+            self._opened_at = self.clock()
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 otherwise)."""
+        if self._state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self.clock() - self._opened_at))
+
+    def stats(self) -> dict:
+        return {
+            'name': self.name,
+            'state': self.state,
+            'consecutive_failures': self._consecutive_failures,
+            'failure_threshold': self.failure_threshold,
+            'reset_timeout_seconds': self.reset_timeout,
+            'retry_after_seconds': round(self.retry_after(), 1),
+            'successes': self.successes,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'times_opened': self.times_opened,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,282 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Local cache of AgriParcel and AgriParcelRecord entities.
+
+Orion notifies changes of these entities to POST /fiware/notifications (see
+ensure_notification_subscription), which writes them into the cache; reads
+are then served from process memory, and only go to Orion on a miss. Every
+entry expires after FIWARE_ENTITY_CACHE_TTL_SECONDS, which bounds staleness
+when a notification is lost or was received by another API process. With
+FIWARE_ENTITY_CACHE_PERSIST the cache is also stored in the database, where
+all processes share it and a restart finds it warm.
+"""
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete
+
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models.entity_cache_model import NgsiEntityCacheModel
+from app.infrastructure.external_services.fiware_client import EntityPage, FiwareClient
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CACHED_TYPES = ("AgriParcel", "AgriParcelRecord")
+
+# Attributes kept by every projection
+CORE_KEYS = ("@context", "id", "type")
+
+# Entity IDs per query by ID list, which keeps the request URL short
+IDS_PER_QUERY = 100
+
+
+def parcel_id_of(entity: Dict[str, Any]) -> Optional[str]:
+    """The AgriParcel an AgriParcelRecord belongs to."""
+    relationship = entity.get("hasAgriParcel")
+    if isinstance(relationship, dict):
+        return relationship.get("object")
+    return relationship
+
+
+def observed_order(record: Dict[str, Any]) -> Tuple[str, str]:
+    """Sort key of a parcel's records: observation date, then ID (normalized or keyValues entities)."""
+    observed = record.get("dateObserved")
+    if isinstance(observed, dict):
+        observed = observed.get("value")
+    return str(observed or ""), record["id"]
+
+
+def project(entity: Dict[str, Any], attrs: Optional[List[str]] = None, key_values: bool = False) -> Dict[str, Any]:
+    """Apply an `attrs=` projection and `options=keyValues` to a normalized entity, as Orion would."""
+    if attrs:
+        entity = {k: v for k, v in entity.items() if k in CORE_KEYS or k in attrs}
+    if not key_values:
+        return entity
+    simplified = {}
+    for key, value in entity.items():
+        if key not in CORE_KEYS and isinstance(value, dict) and "type" in value:
+            value = value.get("object") if value["type"] == "Relationship" else value.get("value")
+        simplified[key] = value
+    return simplified
+
+
+class EntityCache:
+    """LRU cache of normalized NGSI-LD entities, with per-parcel record indexes."""
+
+    def __init__(self, ttl_seconds: float = 600.0, max_entities: int = 50000,
+                 session_factory=None, clock: Optional[Callable[[], float]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entities = max_entities
+        # Persistence is off without a session factory
+        self.session_factory = session_factory
+        self.clock = clock or time.monotonic
+        self._entities: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # Parcel ID -> (IDs of all its records, loaded at)
+        self._parcels: Dict[str, Tuple[set, float]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, stored_at: float) -> bool:
+        return self.clock() - stored_at < self.ttl_seconds
+
+    def _remember(self, entity: Dict[str, Any], stored_at: Optional[float] = None):
+        entity_id = entity["id"]
+        self._entities[entity_id] = (entity, stored_at if stored_at is not None else self.clock())
+        self._entities.move_to_end(entity_id)
+        while len(self._entities) > self.max_entities:
+            evicted, _ = self._entities.popitem(last=False)
+            self._parcels.pop(evicted, None)
+
+        parcel_id = parcel_id_of(entity)
+        if parcel_id in self._parcels:
+            self._parcels[parcel_id][0].add(entity_id)
+
+    def peek(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Fresh entity from process memory, without touching the database."""
+        cached = self._entities.get(entity_id)
+        if cached is None or not self._fresh(cached[1]):
+            return None
+        self._entities.move_to_end(entity_id)
+        return cached[0]
+
+    async def get(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Fresh cached entity (memory, then the persisted cache), or None."""
+        entity = self.peek(entity_id)
+        if entity is None and self.session_factory is not None:
+            entity = await self._load(entity_id)
+        if entity is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entity
+
+    async def put_many(self, entities: List[Dict[str, Any]], merge: bool = False):
+        """
+        Cache entities. With `merge` (notifications carrying only some
+        attributes) they are merged into the cached version, if any.
+        """
+        stored = []
+        for entity in entities:
+            if entity.get("type") not in CACHED_TYPES or "id" not in entity:
+                continue
+            if merge:
+                cached = self._entities.get(entity["id"])
+                if cached is not None:
+                    entity = {**cached[0], **entity}
+            self._remember(entity)
+            stored.append(entity)
+        if stored and self.session_factory is not None:
+            await self._save(stored)
+
+    async def remove(self, entity_id: str):
+        cached = self._entities.pop(entity_id, None)
+        self._parcels.pop(entity_id, None)
+        if cached is not None:
+            parcel = self._parcels.get(parcel_id_of(cached[0]))
+            if parcel is not None:
+                parcel[0].discard(entity_id)
+        if self.session_factory is not None:
+            async with self.session_factory() as session:
+                await session.execute(delete(NgsiEntityCacheModel).where(NgsiEntityCacheModel.entity_id == entity_id))
+                await session.commit()
+
+    def parcel_records(self, parcel_id: str) -> Optional[List[Dict[str, Any]]]:
+        """All records of a parcel, if they were loaded within the TTL and are all still cached."""
+        indexed = self._parcels.get(parcel_id)
+        if indexed is None or not self._fresh(indexed[1]):
+            return None
+        records = [self._entities.get(record_id) for record_id in indexed[0]]
+        if any(record is None for record in records):
+            return None
+        return [record[0] for record in records]
+
+    async def set_parcel_records(self, parcel_id: str, records: List[Dict[str, Any]]):
+        """Cache the complete list of a parcel's records, as read from Orion."""
+        self._parcels[parcel_id] = (set(), self.clock())
+        await self.put_many(records)
+        self._parcels[parcel_id] = ({record["id"] for record in records}, self.clock())
+
+    def stats(self) -> dict:
+        return {
+            'entities': len(self._entities),
+            'parcels_indexed': len(self._parcels),
+            'hits': self.hits,
+            'misses': self.misses,
+            'persisted': self.session_factory is not None,
+        }
+
+    async def _load(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        async with self.session_factory() as session:
+            row = await session.get(NgsiEntityCacheModel, entity_id)
+        if row is None:
+            return None
+        age = (datetime.utcnow() - row.cached_at).total_seconds()
+        if age >= self.ttl_seconds:
+            return None
+        # Keep the persisted age, so the entry still expires on time
+        self._remember(row.entity, self.clock() - age)
+        return row.entity
+
+    async def _save(self, entities: List[Dict[str, Any]]):
+        now = datetime.utcnow()
+        try:
+            async with self.session_factory() as session:
+                for entity in entities:
+                    await session.merge(NgsiEntityCacheModel(
+                        entity_id=entity["id"], entity_type=entity["type"], entity=entity, cached_at=now
+                    ))
+                await session.commit()
+        except Exception as e:
+            # The memory cache is still up to date
+            logger.warning(f"Could not persist {len(entities)} cached entities: {e}")
+
+    async def purge_expired(self) -> int:
+        """Delete persisted entries older than the TTL. Returns the number deleted."""
+        if self.session_factory is None:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(NgsiEntityCacheModel).where(NgsiEntityCacheModel.cached_at < cutoff)
+            )
+            await session.commit()
+            return result.rowcount
+
+
+class CachedEntityReader:
+    """Reads AgriParcel / AgriParcelRecord entities through the cache, falling back to Orion."""
+
+    def __init__(self, client: Optional[FiwareClient] = None, cache: Optional[EntityCache] = None):
+        self.client = client or FiwareClient()
+        self.cache = cache or entity_cache
+
+    async def get_entity(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        entity = await self.cache.get(entity_id)
+        if entity is not None:
+            return entity
+        entity = await self.client.get_entity(entity_id)
+        if entity is not None:
+            await self.cache.put_many([entity])
+        return entity
+
+    async def parcel_records_page(self, parcel_id: str, offset: int = 0, limit: int = 100,
+                                  attrs: Optional[List[str]] = None, key_values: bool = False) -> EntityPage:
+        """
+        One page of a parcel's AgriParcelRecords, with their total, ordered by
+        observation date whichever way it is served. From the cache when it
+        holds the parcel's whole history. On a miss, a first page holding the
+        whole history is read and indexed; for a longer history, Orion's order
+        being unspecified, only the records' dates are listed to order them,
+        then the page's records are read by ID.
+        """
+        records = self.cache.parcel_records(parcel_id)
+        if records is not None:
+            self.cache.hits += 1
+            return self._local_page(records, offset, limit, attrs, key_values)
+
+        self.cache.misses += 1
+        q = f"hasAgriParcel=={parcel_id}"
+        if offset == 0:
+            # Full entities, so they can be cached; projected locally below
+            page = await self.client.query_page("AgriParcelRecord", q=q, limit=limit, count=True)
+            if page.total is not None and len(page.entities) >= page.total:
+                await self.cache.set_parcel_records(parcel_id, page.entities)
+                return self._local_page(page.entities, offset, limit, attrs, key_values)
+
+        dates = [record async for record in self.client.iter_entities(
+            "AgriParcelRecord", q=q, attrs=["dateObserved"], key_values=True)]
+        ids = [record["id"] for record in sorted(dates, key=observed_order)[offset:offset + limit]]
+        records = []
+        for i in range(0, len(ids), IDS_PER_QUERY):
+            chunk = ids[i:i + IDS_PER_QUERY]
+            records += (await self.client.query_page("AgriParcelRecord", q=q, limit=len(chunk), ids=chunk)).entities
+        await self.cache.put_many(records)
+        return EntityPage(
+            [project(record, attrs, key_values) for record in sorted(records, key=observed_order)],
+            offset,
+            len(dates)
+        )
+
+    @staticmethod
+    def _local_page(records: List[Dict[str, Any]], offset: int, limit: int,
+                    attrs: Optional[List[str]], key_values: bool) -> EntityPage:
+        records = sorted(records, key=observed_order)
+        return EntityPage(
+            [project(record, attrs, key_values) for record in records[offset:offset + limit]],
+            offset,
+            len(records)
+        )
+
+
+entity_cache = EntityCache(
+    ttl_seconds=settings.FIWARE_ENTITY_CACHE_TTL_SECONDS,
+    max_entities=settings.FIWARE_ENTITY_CACHE_MAX_ENTITIES,
+    session_factory=AsyncSessionLocal if settings.FIWARE_ENTITY_CACHE_PERSIST else None
+)
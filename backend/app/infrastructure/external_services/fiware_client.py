@@ -6,10 +6,18 @@ FIWARE Orion Context Broker client for NGSI-LD API.
 Implements Smart Data Models for Agriculture (AgriFood).
 """
 import httpx
+import json
 import logging
-from typing import Dict, Any, Optional, List
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple, NamedTuple, AsyncIterator
 from datetime import datetime, timezone
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from app.infrastructure.config.settings import get_settings
+from app.infrastructure.external_services.circuit_breaker import CircuitBreaker, STATE_OPEN
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -22,18 +30,94 @@ class FiwareClientError(Exception):
         self.status_code = status_code
         super().__init__(message)
 
+
+class BatchResult:
+    """Outcome of a batch entity operation: IDs written, and an error message per failed entity ID."""
+
+    def __init__(self):
+        self.succeeded: List[str] = []
+        self.errors: Dict[str, str] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def merge(self, other: "BatchResult"):
+        self.succeeded.extend(other.succeeded)
+        self.errors.update(other.errors)
+
+
+class EntityPage(NamedTuple):
+    """One page of a query: its entities, their offset, and the total if counted."""
+    entities: List[Dict[str, Any]]
+    offset: int
+    total: Optional[int] = None
+
+
+# Largest page Orion-LD serves per request
+MAX_PAGE_SIZE = 1000
+
+
+class FiwareUnavailableError(FiwareClientError):
+    """Raised without a request while the Orion circuit breaker is open."""
+
+    def __init__(self, message: str = "FIWARE Orion is unavailable (circuit open)"):
+        super().__init__(503, message)
+
+
+# Shared by every FiwareClient of this process
+orion_breaker = CircuitBreaker(
+    "orion",
+    failure_threshold=settings.FIWARE_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.FIWARE_BREAKER_RESET_SECONDS
+)
+
+# Last health check result per Orion URL: (checked at, available)
+_health_cache: Dict[str, Tuple[float, bool]] = {}
+
 # FIWARE Smart Data Models for Agriculture
 CONTEXT = [
     "https://uri.etsi.org/ngsi-ld/v1/ngsi-ld-core-context.jsonld",
     "https://raw.githubusercontent.com/smart-data-models/dataModel.Agrifood/master/context.jsonld"
 ]
 
+# CONTEXT as a Link header, for application/json bodies (the core context is always implied)
+CONTEXT_LINK = f'<{CONTEXT[-1]}>; rel="http://www.w3.org/ns/json-ld#context"; type="application/ld+json"'
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact JSON encoding, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def encode_entities(entities: List[Dict[str, Any]]) -> Tuple[bytes, bool]:
+    """
+    Request body for a list of entities. When they all use CONTEXT, it is
+    left out of every entity, to be sent once as CONTEXT_LINK.
+    
+    Returns:
+        (body, whether the Link header is needed)
+    """
+    if all(entity.get("@context", CONTEXT) == CONTEXT for entity in entities):
+        return dumps([
+            {k: v for k, v in entity.items() if k != "@context"} if "@context" in entity else entity
+            for entity in entities
+        ]), True
+    # application/ld+json: every entity carries its context
+    return dumps([entity if "@context" in entity else {"@context": CONTEXT, **entity} for entity in entities]), False
+
 
 class FiwareClient:
     """Client for FIWARE Orion Context Broker (NGSI-LD)."""
     
-    def __init__(self, orion_url: str = None):
+    def __init__(self, orion_url: str = None, breaker: CircuitBreaker = None,
+                 transport: httpx.AsyncBaseTransport = None):
         self.orion_url = orion_url or settings.ORION_URL
+        self.breaker = breaker or orion_breaker
+        # Custom transport (e.g. an in-process broker in tests); None uses the network
+        self.transport = transport
         service_path = settings.FIWARE_SERVICEPATH or "/"
         if not service_path.startswith("/"):
             service_path = f"/{service_path}"
@@ -43,25 +127,68 @@ class FiwareClient:
             "FIWARE-Service": settings.FIWARE_SERVICE,
             "FIWARE-ServicePath": service_path
         }
-    
-    async def health_check(self) -> bool:
-        """Check if Orion Context Broker is available."""
-        async with httpx.AsyncClient(timeout=5.0) as client:
+        # Bodies without @context (see encode_entities)
+        self.linked_headers = {**self.headers, "Content-Type": "application/json", "Link": CONTEXT_LINK}
+    
+    async def health_check(self, use_cache: bool = True) -> bool:
+        """
+        Check if Orion Context Broker is available. Results are cached for
+        FIWARE_HEALTH_CACHE_SECONDS, and an open circuit answers False at once.
+        """
+        if self.breaker.state == STATE_OPEN:
+            return False
+        now = self.breaker.clock()
+        cached = _health_cache.get(self.orion_url)
+        if use_cache and cached and now - cached[0] < settings.FIWARE_HEALTH_CACHE_SECONDS:
+            return cached[1]
+
+        async with self._client(5.0) as client:
             try:
-                response = await client.get(f"{self.orion_url}/version")
-                return response.status_code == 200
+                response = await self._send(client, "GET", f"{self.orion_url}/version")
+                available = response.status_code == 200
+            except FiwareUnavailableError:
+                available = False
             except Exception as e:
                 logger.error(f"Orion health check failed: {e}")
-                return False
-    
+                available = False
+        _health_cache[self.orion_url] = (self.breaker.clock(), available)
+        return available
+
+    def _client(self, timeout: float) -> httpx.AsyncClient:
+        return httpx.AsyncClient(timeout=timeout, transport=self.transport)
+
+    async def _send(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the circuit breaker: fail fast while it is open,
+        and count transport errors and 5xx responses as failures.
+        """
+        if not self.breaker.allow_request():
+            raise FiwareUnavailableError()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception as e:
+            self.breaker.record_failure(e)
+            raise
+        except BaseException:
+            # Cancelled: says nothing about Orion, but a probe must not block every later call
+            self.breaker.release_probe()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure(f"{response.status_code} from {method} {url}")
+        else:
+            self.breaker.record_success()
+        return response
+
     async def create_entity(self, entity: Dict[str, Any]) -> bool:
         """Create a new entity in Orion."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(30.0) as client:
             try:
-                response = await client.post(
-                    f"{self.orion_url}/ngsi-ld/v1/entities",
-                    json=entity,
-                    headers=self.headers
+                linked = entity.get("@context", CONTEXT) == CONTEXT
+                body = dumps({k: v for k, v in entity.items() if k != "@context"} if linked else entity)
+                response = await self._send(
+                    client, "POST", f"{self.orion_url}/ngsi-ld/v1/entities",
+                    content=body,
+                    headers=self.linked_headers if linked else self.headers
                 )
                 if response.status_code in [201, 204]:
                     logger.info(f"Entity created: {entity.get('id')}")
@@ -83,17 +210,17 @@ class FiwareClient:
         # Remove @context and id for PATCH request
         update_attrs = {k: v for k, v in attrs.items() if k not in ["@context", "id", "type"]}
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(30.0) as client:
             try:
                 headers = {
                     "Content-Type": "application/json",
-                    "Link": f'<{CONTEXT[0]}>; rel="http://www.w3.org/ns/json-ld#context"; type="application/ld+json"',
+                    "Link": CONTEXT_LINK,
                     "FIWARE-Service": self.headers["FIWARE-Service"],
                     "FIWARE-ServicePath": self.headers["FIWARE-ServicePath"],
                 }
-                response = await client.patch(
-                    f"{self.orion_url}/ngsi-ld/v1/entities/{entity_id}/attrs",
-                    json=update_attrs,
+                response = await self._send(
+                    client, "PATCH", f"{self.orion_url}/ngsi-ld/v1/entities/{entity_id}/attrs",
+                    content=dumps(update_attrs),
                     headers=headers
                 )
                 if response.status_code in [200, 204]:
@@ -110,10 +237,10 @@ class FiwareClient:
     
     async def get_entity(self, entity_id: str) -> Optional[Dict[str, Any]]:
         """Get entity by ID."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(30.0) as client:
             try:
-                response = await client.get(
-                    f"{self.orion_url}/ngsi-ld/v1/entities/{entity_id}",
+                response = await self._send(
+                    client, "GET", f"{self.orion_url}/ngsi-ld/v1/entities/{entity_id}",
                     headers=self.headers
                 )
                 if response.status_code == 200:
@@ -129,10 +256,10 @@ class FiwareClient:
     
     async def delete_entity(self, entity_id: str) -> bool:
         """Delete entity by ID."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(30.0) as client:
             try:
-                response = await client.delete(
-                    f"{self.orion_url}/ngsi-ld/v1/entities/{entity_id}",
+                response = await self._send(
+                    client, "DELETE", f"{self.orion_url}/ngsi-ld/v1/entities/{entity_id}",
                     headers=self.headers
                 )
                 if response.status_code in [200, 204]:
@@ -150,37 +277,204 @@ class FiwareClient:
         self, 
         entity_type: str, 
         q: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        offset: int = 0,
+        attrs: Optional[List[str]] = None,
+        key_values: bool = False
     ) -> List[Dict[str, Any]]:
-        """Query entities by type."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        """Query one page of entities by type."""
+        page = await self.query_page(entity_type, q=q, limit=limit, offset=offset, attrs=attrs, key_values=key_values)
+        return page.entities
+
+    async def query_page(
+        self,
+        entity_type: str,
+        q: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0,
+        attrs: Optional[List[str]] = None,
+        key_values: bool = False,
+        count: bool = False,
+        ids: Optional[List[str]] = None
+    ) -> EntityPage:
+        """
+        Query one page of entities by type. `attrs` projects the returned
+        attributes, `key_values` asks for simplified (keyValues) entities,
+        `count` for the total number of matches (NGSILD-Results-Count) and
+        `ids` restricts the query to these entity IDs.
+        """
+        async with self._client(30.0) as client:
+            return await self._query_page(client, entity_type, q, limit, offset, attrs, key_values, count, ids)
+
+    async def iter_entities(
+        self,
+        entity_type: str,
+        q: Optional[str] = None,
+        attrs: Optional[List[str]] = None,
+        key_values: bool = False,
+        page_size: int = MAX_PAGE_SIZE,
+        offset: int = 0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Iterate over every matching entity, following offset/limit pagination
+        over one connection. Only one page is held in memory at a time.
+        """
+        async with self._client(30.0) as client:
+            while True:
+                page = await self._query_page(client, entity_type, q, page_size, offset, attrs, key_values, False)
+                for entity in page.entities:
+                    yield entity
+                if len(page.entities) < page_size:
+                    return
+                offset += len(page.entities)
+
+    async def _query_page(
+        self,
+        client: httpx.AsyncClient,
+        entity_type: str,
+        q: Optional[str],
+        limit: int,
+        offset: int,
+        attrs: Optional[List[str]],
+        key_values: bool,
+        count: bool,
+        ids: Optional[List[str]] = None
+    ) -> EntityPage:
+        params = {"type": entity_type, "limit": min(limit, MAX_PAGE_SIZE), "offset": offset}
+        if ids:
+            params["id"] = ",".join(ids)
+        if q:
+            params["q"] = q
+        if attrs:
+            params["attrs"] = ",".join(attrs)
+        if key_values:
+            params["options"] = "keyValues"
+        if count:
+            params["count"] = "true"
+        try:
+            response = await self._send(
+                client, "GET", f"{self.orion_url}/ngsi-ld/v1/entities",
+                params=params,
+                headers=self.headers
+            )
+            if response.status_code == 200:
+                total = response.headers.get("NGSILD-Results-Count")
+                return EntityPage(response.json(), offset, int(total) if total is not None else None)
+            if response.status_code == 404:
+                return EntityPage([], offset, 0 if count else None)
+            raise FiwareClientError(response.status_code, response.text)
+        except Exception as e:
+            if isinstance(e, FiwareClientError):
+                raise
+            logger.error(f"Error querying entities: {e}")
+            raise FiwareClientError(500, str(e))
+    
+    async def upsert_entities(
+        self,
+        entities: List[Dict[str, Any]],
+        chunk_size: int = None,
+        replace: bool = False
+    ) -> BatchResult:
+        """
+        Create or update entities with NGSI-LD batch upserts, `chunk_size` per request.
+        Existing entities have their attributes merged, or replaced if `replace`.
+        Failures are reported per entity in the result instead of raised.
+        """
+        params = None if replace else {"options": "update"}
+        return await self._batch("upsert", entities, chunk_size, params)
+
+    async def update_entities(
+        self,
+        entities: List[Dict[str, Any]],
+        chunk_size: int = None
+    ) -> BatchResult:
+        """Update attributes of existing entities with NGSI-LD batch updates (missing entities are errors)."""
+        return await self._batch("update", entities, chunk_size, None)
+
+    async def _batch(
+        self,
+        operation: str,
+        entities: List[Dict[str, Any]],
+        chunk_size: Optional[int],
+        params: Optional[Dict[str, str]]
+    ) -> BatchResult:
+        chunk_size = chunk_size or settings.FIWARE_BATCH_SIZE
+        result = BatchResult()
+        async with self._client(60.0) as client:
+            for start in range(0, len(entities), chunk_size):
+                chunk = entities[start:start + chunk_size]
+                result.merge(await self._send_batch(client, operation, chunk, params))
+        if result.errors:
+            logger.warning(
+                f"FIWARE batch {operation}: {len(result.succeeded)} entities written, "
+                f"{len(result.errors)} failed"
+            )
+        return result
+
+    async def _send_batch(
+        self,
+        client: httpx.AsyncClient,
+        operation: str,
+        chunk: List[Dict[str, Any]],
+        params: Optional[Dict[str, str]]
+    ) -> BatchResult:
+        result = BatchResult()
+        entity_ids = [entity["id"] for entity in chunk]
+        body, linked = encode_entities(chunk)
+        try:
+            response = await self._send(
+                client, "POST", f"{self.orion_url}/ngsi-ld/v1/entityOperations/{operation}",
+                content=body,
+                params=params,
+                headers=self.linked_headers if linked else self.headers
+            )
+        except Exception as e:
+            logger.error(f"Error sending FIWARE batch {operation}: {e}")
+            result.errors = {entity_id: str(e) for entity_id in entity_ids}
+            return result
+
+        if response.status_code in [200, 201, 204]:
+            result.succeeded = entity_ids
+        elif response.status_code == 207:
+            # Multi-status: {"success": [ids], "errors": [{"entityId": id, "error": {...}}]}
+            body = response.json()
+            result.succeeded = list(body.get("success", []))
+            for failure in body.get("errors", []):
+                error = failure.get("error")
+                if isinstance(error, dict):
+                    error = error.get("detail") or error.get("title") or str(error)
+                result.errors[failure.get("entityId")] = str(error)
+        else:
+            logger.error(f"FIWARE batch {operation} failed: {response.status_code} - {response.text}")
+            result.errors = {entity_id: f"{response.status_code}: {response.text}" for entity_id in entity_ids}
+        return result
+
+    async def list_subscriptions(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """List the subscriptions of this tenant."""
+        async with self._client(30.0) as client:
             try:
-                params = {"type": entity_type, "limit": limit}
-                if q:
-                    params["q"] = q
-                response = await client.get(
-                    f"{self.orion_url}/ngsi-ld/v1/entities",
-                    params=params,
+                response = await self._send(
+                    client, "GET", f"{self.orion_url}/ngsi-ld/v1/subscriptions",
+                    params={"limit": limit},
                     headers=self.headers
                 )
                 if response.status_code == 200:
                     return response.json()
-                if response.status_code == 404:
-                    return []
                 raise FiwareClientError(response.status_code, response.text)
             except Exception as e:
                 if isinstance(e, FiwareClientError):
                     raise
-                logger.error(f"Error querying entities: {e}")
+                logger.error(f"Error listing subscriptions: {e}")
                 raise FiwareClientError(500, str(e))
-    
+
     async def subscribe_to_entity(
         self,
         entity_type: str,
         notification_url: str,
-        watched_attrs: List[str] = None
+        watched_attrs: List[str] = None,
+        receiver_info: Dict[str, str] = None
     ) -> Optional[str]:
-        """Create a subscription for entity changes."""
+        """Create a subscription for entity changes. `receiver_info` headers are sent with each notification."""
         subscription = {
             "@context": CONTEXT,
             "type": "Subscription",
@@ -195,11 +489,15 @@ class FiwareClient:
         
         if watched_attrs:
             subscription["watchedAttributes"] = watched_attrs
+        if receiver_info:
+            subscription["notification"]["endpoint"]["receiverInfo"] = [
+                {"key": key, "value": value} for key, value in receiver_info.items()
+            ]
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(30.0) as client:
             try:
-                response = await client.post(
-                    f"{self.orion_url}/ngsi-ld/v1/subscriptions",
+                response = await self._send(
+                    client, "POST", f"{self.orion_url}/ngsi-ld/v1/subscriptions",
                     json=subscription,
                     headers=self.headers
                 )
@@ -216,6 +514,32 @@ class FiwareClient:
                 return None
 
 
+class FiwareBatchWriter:
+    """
+    Accumulates entities and upserts them in chunks of `batch_size`.
+    An entity added twice before a flush is sent once (the last version).
+    """
+
+    def __init__(self, client: FiwareClient, batch_size: int = None):
+        self.client = client
+        self.batch_size = batch_size or settings.FIWARE_BATCH_SIZE
+        self.result = BatchResult()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+    async def add(self, entity: Dict[str, Any]):
+        self._pending[entity["id"]] = entity
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> BatchResult:
+        """Send pending entities; returns the accumulated result of every flush."""
+        if self._pending:
+            entities = list(self._pending.values())
+            self._pending = {}
+            self.result.merge(await self.client.upsert_entities(entities, chunk_size=self.batch_size))
+        return self.result
+
+
 # ==================== Smart Data Model Factories ====================
 
 def create_agriparcel_entity(
@@ -241,7 +565,7 @@ def create_agriparcel_entity(
     if polygon_coords[0] != polygon_coords[-1]:
         polygon_coords.append(polygon_coords[0])  # Close the polygon
     
-    now_utc = datetime.now(timezone.utc)
+    now = _format_datetime(datetime.now(timezone.utc))
     entity = {
         "@context": CONTEXT,
         "id": f"urn:ngsi-ld:AgriParcel:OpenAgri:{farm_id}",
@@ -259,11 +583,11 @@ def create_agriparcel_entity(
         },
         "dateCreated": {
             "type": "Property",
-            "value": _format_datetime(now_utc)
+            "value": now
         },
         "dateModified": {
             "type": "Property",
-            "value": _format_datetime(now_utc)
+            "value": now
         }
     }
     
@@ -301,8 +625,7 @@ def create_agriparcel_record(
         observed_at: Timestamp of observation
         unit_code: UN/CEFACT unit code
     """
-    observed_at_utc = _ensure_utc(observed_at)
-    timestamp_str = observed_at_utc.strftime('%Y%m%dT%H%M%S')
+    timestamp_str, observed = _observation_time(observed_at)
     
     entity = {
         "@context": CONTEXT,
@@ -315,11 +638,11 @@ def create_agriparcel_record(
         record_type: {
             "type": "Property",
             "value": value,
-            "observedAt": _format_datetime(observed_at_utc)
+            "observedAt": observed
         },
         "dateObserved": {
             "type": "Property",
-            "value": _format_datetime(observed_at_utc)
+            "value": observed
         }
     }
     
@@ -355,9 +678,7 @@ def create_weather_observed(
     """
     if observed_at is None:
         observed_at = datetime.now(timezone.utc)
-    observed_at_utc = _ensure_utc(observed_at)
-    
-    timestamp_str = observed_at_utc.strftime('%Y%m%dT%H%M%S')
+    timestamp_str, observed = _observation_time(observed_at)
     
     entity = {
         "@context": CONTEXT,
@@ -372,7 +693,7 @@ def create_weather_observed(
         },
         "dateObserved": {
             "type": "Property",
-            "value": _format_datetime(observed_at_utc)
+            "value": observed
         }
     }
     
@@ -494,8 +815,83 @@ def _format_datetime(dt: datetime) -> str:
     return dt_utc.isoformat().replace("+00:00", "Z")
 
 
+@lru_cache(maxsize=16384)
+def _observation_time(observed_at: datetime) -> Tuple[str, str]:
+    """
+    ID suffix and ISO string of an observation time. Cached: satellite
+    observations of every farm share the same few acquisition times.
+    """
+    observed_at_utc = _ensure_utc(observed_at)
+    return observed_at_utc.strftime('%Y%m%dT%H%M%S'), _format_datetime(observed_at_utc)
+
+
 # ==================== Utility Functions ====================
 
+# Observation attributes of AgriParcel entities whose history QuantumLeap keeps
+QUANTUMLEAP_ATTRIBUTES = ["ndvi", "soilMoisture"]
+
+
+async def ensure_quantumleap_subscription(
+    fiware_client: FiwareClient,
+    quantumleap_url: str = None
+) -> Optional[str]:
+    """
+    Subscribe QuantumLeap to the observation attributes of AgriParcel
+    entities, unless a subscription notifying it already exists.
+    
+    Returns:
+        The subscription ID, or None if it could not be created
+    """
+    notify_url = f"{(quantumleap_url or settings.QUANTUMLEAP_URL).rstrip('/')}/v2/notify"
+    for subscription in await fiware_client.list_subscriptions():
+        if subscription.get("notification", {}).get("endpoint", {}).get("uri") == notify_url:
+            return subscription.get("id")
+    return await fiware_client.subscribe_to_entity("AgriParcel", notify_url, QUANTUMLEAP_ATTRIBUTES)
+
+
+# Header carrying FIWARE_NOTIFICATION_TOKEN in notifications to this backend
+NOTIFICATION_TOKEN_HEADER = "X-Notification-Token"
+
+
+async def ensure_notification_subscription(
+    fiware_client: FiwareClient,
+    notification_url: str = None,
+    entity_types: List[str] = None,
+    token: str = None
+) -> List[str]:
+    """
+    Subscribe this backend (POST /fiware/notifications, which keeps the
+    entity cache fresh) to changes of AgriParcel and AgriParcelRecord
+    entities, skipping types already subscribed. Nothing is subscribed
+    without a notification token: the receiver rejects notifications then.
+    
+    Returns:
+        IDs of the subscriptions in place
+    """
+    notification_url = notification_url or settings.FIWARE_NOTIFICATION_URL
+    token = token or settings.FIWARE_NOTIFICATION_TOKEN
+    if not token:
+        logger.warning("FIWARE_NOTIFICATION_TOKEN is not set, not subscribing to Orion notifications")
+        return []
+    entity_types = entity_types or ["AgriParcel", "AgriParcelRecord"]
+    existing = {}
+    for subscription in await fiware_client.list_subscriptions():
+        if subscription.get("notification", {}).get("endpoint", {}).get("uri") != notification_url:
+            continue
+        for selector in subscription.get("entities", []):
+            existing[selector.get("type")] = subscription.get("id")
+
+    receiver_info = {NOTIFICATION_TOKEN_HEADER: token}
+    subscription_ids = []
+    for entity_type in entity_types:
+        subscription_id = existing.get(entity_type) or await fiware_client.subscribe_to_entity(
+            entity_type, notification_url, receiver_info=receiver_info
+        )
+        if subscription_id:
+            subscription_ids.append(subscription_id)
+    return subscription_ids
+
+
 async def sync_farm_to_fiware(
     fiware_client: FiwareClient,
     farm_id: int,
@@ -0,0 +1,146 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+QuantumLeap client (time series API, v2).
+
+QuantumLeap stores every notified value of the AgriParcel observation
+attributes (see ensure_quantumleap_subscription) in CrateDB, and can
+aggregate them server side by period.
+"""
+import httpx
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.external_services.fiware_client import FiwareClientError, _format_datetime, dumps
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+AGGREGATION_METHODS = ("count", "sum", "avg", "min", "max")
+AGGREGATION_PERIODS = ("year", "month", "day", "hour", "minute", "second")
+
+
+class TimeSeries(NamedTuple):
+    """Values of one attribute of one entity, with their timestamps."""
+    entity_id: str
+    attribute: str
+    index: List[str]
+    values: List[Optional[float]]
+
+
+class QuantumLeapClient:
+    """Client for the QuantumLeap time series API."""
+
+    def __init__(self, quantumleap_url: str = None, transport: httpx.AsyncBaseTransport = None):
+        self.quantumleap_url = (quantumleap_url or settings.QUANTUMLEAP_URL).rstrip("/")
+        self.transport = transport
+        service_path = settings.FIWARE_SERVICEPATH or "/"
+        if not service_path.startswith("/"):
+            service_path = f"/{service_path}"
+        self.headers = {
+            "Accept": "application/json",
+            "Fiware-Service": settings.FIWARE_SERVICE,
+            "Fiware-ServicePath": service_path
+        }
+
+    async def health_check(self) -> bool:
+        """Check if QuantumLeap is available."""
+        async with httpx.AsyncClient(timeout=5.0, transport=self.transport) as client:
+            try:
+                response = await client.get(f"{self.quantumleap_url}/health")
+                return response.status_code == 200
+            except Exception as e:
+                logger.error(f"QuantumLeap health check failed: {e}")
+                return False
+
+    async def notify(self, entities: List[Dict[str, Any]]):
+        """
+        Store entity versions directly, as an Orion notification would (one
+        time series point per versioned attribute, indexed by its observedAt).
+        Used to load history that Orion never notified.
+        """
+        body = {
+            "id": f"urn:ngsi-ld:Notification:OpenAgri:{uuid.uuid4().hex}",
+            "type": "Notification",
+            "notifiedAt": _format_datetime(datetime.utcnow()),
+            "data": [{k: v for k, v in entity.items() if k != "@context"} for entity in entities]
+        }
+        async with httpx.AsyncClient(timeout=60.0, transport=self.transport) as client:
+            try:
+                response = await client.post(
+                    f"{self.quantumleap_url}/v2/notify",
+                    content=dumps(body),
+                    headers={**self.headers, "Content-Type": "application/json"}
+                )
+                if response.status_code not in (200, 201, 204):
+                    raise FiwareClientError(response.status_code, response.text)
+            except Exception as e:
+                if isinstance(e, FiwareClientError):
+                    raise
+                logger.error(f"Error notifying QuantumLeap: {e}")
+                raise FiwareClientError(500, str(e))
+
+    async def get_attribute_series(
+        self,
+        entity_id: str,
+        attribute: str,
+        entity_type: str = None,
+        from_date: datetime = None,
+        to_date: datetime = None,
+        last_n: int = None,
+        aggr_method: str = None,
+        aggr_period: str = None
+    ) -> TimeSeries:
+        """
+        Time series of one attribute of an entity. With `aggr_method` the
+        values are aggregated by QuantumLeap, per `aggr_period` if given
+        (a single value over the whole range otherwise). An entity without
+        history returns an empty series.
+        """
+        if aggr_method is not None and aggr_method not in AGGREGATION_METHODS:
+            raise ValueError(f"Unknown aggregation method {aggr_method}")
+        if aggr_period is not None and aggr_period not in AGGREGATION_PERIODS:
+            raise ValueError(f"Unknown aggregation period {aggr_period}")
+
+        params: Dict[str, Any] = {}
+        if entity_type:
+            params["type"] = entity_type
+        if from_date:
+            params["fromDate"] = _format_datetime(from_date)
+        if to_date:
+            params["toDate"] = _format_datetime(to_date)
+        if last_n:
+            params["lastN"] = last_n
+        if aggr_method:
+            params["aggrMethod"] = aggr_method
+        if aggr_period:
+            params["aggrPeriod"] = aggr_period
+
+        async with httpx.AsyncClient(timeout=30.0, transport=self.transport) as client:
+            try:
+                response = await client.get(
+                    f"{self.quantumleap_url}/v2/entities/{entity_id}/attrs/{attribute}",
+                    params=params,
+                    headers=self.headers
+                )
+                if response.status_code == 200:
+                    body = response.json()
+                    return TimeSeries(entity_id, attribute, body.get("index", []), body.get("values", []))
+                if response.status_code == 404:
+                    return TimeSeries(entity_id, attribute, [], [])
+                raise FiwareClientError(response.status_code, response.text)
+            except Exception as e:
+                if isinstance(e, FiwareClientError):
+                    raise
+                logger.error(f"Error querying QuantumLeap: {e}")
+                raise FiwareClientError(500, str(e))
+
+    async def get_parcel_series(self, farm_id: int, attribute: str, **kwargs) -> TimeSeries:
+        """Time series of an observation attribute ('ndvi', 'soilMoisture') of a farm's AgriParcel."""
+        return await self.get_attribute_series(
+            f"urn:ngsi-ld:AgriParcel:OpenAgri:{farm_id}", attribute, entity_type="AgriParcel", **kwargs
+        )
@@ -8,7 +8,7 @@ import zipfile
 
 logger = logging.getLogger(__name__)
 import asyncio
-from typing import List, Optional, Tuple, Dict, Any
+from typing import List, Optional, Tuple, Dict, Any, Callable, Awaitable
 from concurrent.futures import ThreadPoolExecutor
 
 try:
@@ -17,6 +17,8 @@ except ImportError:
     import requests as httpx  # Fallback, though we should ensure httpx is installed
 
 from app.infrastructure.config.settings import get_settings
+from app.infrastructure.pipeline.metrics import stage, STAGE_SEARCH, STAGE_DOWNLOAD, STAGE_UNZIP
+from app.infrastructure.pipeline.disk_budget import disk_budget, estimate_product_bytes
 
 settings = get_settings()
 
@@ -90,13 +92,16 @@ async def search_sentinel_products(bbox: List[float], date_start: str, date_end:
     
     logger.info(f"Searching CDSE: {url} with params {params}")
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params, headers=headers, timeout=30.0)
-        
-        if response.status_code != 200:
-            raise RuntimeError(f"Search failed: {response.status_code} {response.text}")
+    with stage(STAGE_SEARCH) as timed:
+        async with httpx.AsyncClient() as client:
+            response = await client.get(url, params=params, headers=headers, timeout=30.0)
             
-        results = response.json()
+            if response.status_code != 200:
+                raise RuntimeError(f"Search failed: {response.status_code} {response.text}")
+                
+            results = response.json()
+            timed.bytes = len(response.content)
+            timed.items = len(results.get('value', []))
         
     products = {}
     for item in results.get('value', []):
@@ -112,7 +117,8 @@ async def search_sentinel_products(bbox: List[float], date_start: str, date_end:
             'uuid': item['Id'],
             'title': item['Name'],
             'ingestiondate': item['ContentDate']['Start'],
-            'cloud_cover': cloud_cover
+            'cloud_cover': cloud_cover,
+            'size': item.get('ContentLength')
         }
         
     return None, products
@@ -130,23 +136,39 @@ DOWNLOAD_BASE_DELAY = 30  # Base delay in seconds for exponential backoff
 DOWNLOAD_RATE_LIMIT_DELAY = 60  # Extra delay when hitting 429 rate limit
 
 
-async def download_product(api: Any, product_info: dict, out_dir: Optional[str]=None) -> str:
-    """Download product from CDSE and unzip it with retry mechanism."""
+async def download_product(api: Any, product_info: dict, out_dir: Optional[str]=None,
+                           on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None) -> str:
+    """
+    Download product from CDSE and unzip it with retry mechanism.
+    `on_progress(downloaded_bytes, total_bytes)` is awaited after each chunk.
+    """
     out_dir = out_dir or settings.OUTPUT_DIR
     uuid = product_info['uuid']
     title = product_info['title']
     logger.info(f"Downloading {title} ({uuid}) ...")
     
-    # Download URL
-    url = f"https://zipper.dataspace.copernicus.eu/odata/v1/Products({uuid})/$value"
-    
-    local_zip = os.path.join(out_dir, f"{title}.zip")
     extract_path = os.path.join(out_dir, title + ".SAFE")
     
     if os.path.exists(extract_path):
         logger.info(f"Product already exists at {extract_path}")
         return extract_path
 
+    # Wait for room for the .zip and the extracted .SAFE (DiskSpaceError if there is none)
+    async with disk_budget.reserve(estimate_product_bytes(product_info), key=title):
+        return await _download_and_extract(product_info, out_dir, on_progress)
+
+
+async def _download_and_extract(product_info: dict, out_dir: str,
+                                on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None) -> str:
+    uuid = product_info['uuid']
+    title = product_info['title']
+
+    # Download URL
+    url = f"https://zipper.dataspace.copernicus.eu/odata/v1/Products({uuid})/$value"
+    
+    local_zip = os.path.join(out_dir, f"{title}.zip")
+    extract_path = os.path.join(out_dir, title + ".SAFE")
+
     # Download with retry and exponential backoff
     for attempt in range(1, DOWNLOAD_MAX_RETRIES + 1):
         try:
@@ -162,7 +184,8 @@ async def download_product(api: Any, product_info: dict, out_dir: Optional[str]=
                 if existing_size > 100 * 1024 * 1024:
                     try:
                         loop = asyncio.get_event_loop()
-                        await loop.run_in_executor(None, _unzip_file, local_zip, out_dir)
+                        with stage(STAGE_UNZIP, nbytes=existing_size):
+                            await loop.run_in_executor(None, _unzip_file, local_zip, out_dir)
                         if os.path.exists(extract_path):
                             return extract_path
                     except Exception:
@@ -179,25 +202,29 @@ async def download_product(api: Any, product_info: dict, out_dir: Optional[str]=
             # Use longer timeout for large files
             timeout = httpx.Timeout(connect=30.0, read=300.0, write=30.0, pool=30.0)
             
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                async with client.stream('GET', url, headers=headers) as response:
-                    response.raise_for_status()
-                    
-                    # Get expected size
-                    total_size = int(response.headers.get('content-length', 0))
-                    downloaded = 0
-                    
-                    with open(local_zip, 'wb') as f:
-                        async for chunk in response.aiter_bytes(chunk_size=65536):  # Larger chunks
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                    
-                    # Verify download completed
-                    if total_size > 0 and downloaded < total_size:
-                        raise RuntimeError(f"Incomplete download: {downloaded}/{total_size} bytes")
-                    
-                    logger.info(f"Download complete: {downloaded} bytes")
-                    break  # Success, exit retry loop
+            with stage(STAGE_DOWNLOAD) as timed:
+                async with httpx.AsyncClient(timeout=timeout) as client:
+                    async with client.stream('GET', url, headers=headers) as response:
+                        response.raise_for_status()
+                        
+                        # Get expected size
+                        total_size = int(response.headers.get('content-length', 0))
+                        downloaded = 0
+                        
+                        with open(local_zip, 'wb') as f:
+                            async for chunk in response.aiter_bytes(chunk_size=65536):  # Larger chunks
+                                f.write(chunk)
+                                downloaded += len(chunk)
+                                timed.bytes = downloaded
+                                if on_progress:
+                                    await on_progress(downloaded, total_size)
+                        
+                        # Verify download completed
+                        if total_size > 0 and downloaded < total_size:
+                            raise RuntimeError(f"Incomplete download: {downloaded}/{total_size} bytes")
+                        
+                        logger.info(f"Download complete: {downloaded} bytes")
+            break  # Success, exit retry loop
                     
         except httpx.HTTPStatusError as e:
             logger.warning(f"Download attempt {attempt} failed: {e}")
@@ -242,7 +269,8 @@ async def download_product(api: Any, product_info: dict, out_dir: Optional[str]=
     
     # Run unzip in a thread pool to avoid blocking the event loop
     loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, _unzip_file, local_zip, out_dir)
+    with stage(STAGE_UNZIP, nbytes=os.path.getsize(local_zip)):
+        await loop.run_in_executor(None, _unzip_file, local_zip, out_dir)
         
     possible_path = os.path.join(out_dir, title + ".SAFE")
     if os.path.exists(possible_path):
@@ -2,11 +2,13 @@
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
 import os
+import time
 import rasterio
 import numpy as np
 from rasterio.warp import calculate_default_transform
 from rasterio.enums import Resampling
 from typing import Tuple
+from app.infrastructure.pipeline.metrics import stage, record_stage, STAGE_DECODE, STAGE_COMPUTE
 
 def find_band_paths(safe_path: str) -> Tuple[str, str]:
     """Given a Sentinel-2 SAFE folder or zip, find paths to B04 (red) and B08 (nir).
@@ -56,16 +58,19 @@ def compute_ndvi(red_path: str, nir_path: str, out_path: str, bbox: list = None,
             window = from_bounds(minx, miny, maxx, maxy, r_red.transform)
         
         # Read arrays (with optional window for cropping)
-        if r_red.crs != r_nir.crs or r_red.transform != r_nir.transform or r_red.width != r_nir.width or r_red.height != r_nir.height:
-            nir_arr = r_nir.read(1, out_shape=(r_red.count, r_red.height, r_red.width), resampling=resampling)
-            red_arr = r_red.read(1).astype('float32')
-        else:
-            if window:
-                nir_arr = r_nir.read(1, window=window).astype('float32')
-                red_arr = r_red.read(1, window=window).astype('float32')
-            else:
-                nir_arr = r_nir.read(1).astype('float32')
+        with stage(STAGE_DECODE) as timed:
+            if r_red.crs != r_nir.crs or r_red.transform != r_nir.transform or r_red.width != r_nir.width or r_red.height != r_nir.height:
+                nir_arr = r_nir.read(1, out_shape=(r_red.count, r_red.height, r_red.width), resampling=resampling)
                 red_arr = r_red.read(1).astype('float32')
+            else:
+                if window:
+                    nir_arr = r_nir.read(1, window=window).astype('float32')
+                    red_arr = r_red.read(1, window=window).astype('float32')
+                else:
+                    nir_arr = r_nir.read(1).astype('float32')
+                    red_arr = r_red.read(1).astype('float32')
+            timed.bytes = nir_arr.nbytes + red_arr.nbytes
+        compute_started = time.perf_counter()
 
         # Ensure float32 for division
         if nir_arr.dtype != 'float32':
@@ -100,5 +105,6 @@ def compute_ndvi(red_path: str, nir_path: str, out_path: str, bbox: list = None,
     mean_val = float(np.mean(valid_ndvi)) if valid_ndvi.size > 0 else 0.0
     min_val = float(np.min(valid_ndvi)) if valid_ndvi.size > 0 else 0.0
     max_val = float(np.max(valid_ndvi)) if valid_ndvi.size > 0 else 0.0
+    record_stage(STAGE_COMPUTE, time.perf_counter() - compute_started, nbytes=ndvi.nbytes)
 
     return out_path, mean_val, min_val, max_val
@@ -0,0 +1,200 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Sentinel-1 GRD access layer.
+
+GRD measurement TIFFs are georeferenced through GCPs, not an affine transform,
+so windows computed from `src.transform` are meaningless. A `SarProduct` wraps
+the measurement in a GCP-based WarpedVRT and reads only the farm footprint in
+the target CRS. The warp grid (solved from the GCPs once per product) is
+cached while the product is on disk; the file handles are not: every reader
+opens its own, so concurrent jobs never share or close each other's datasets.
+"""
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import rasterio
+from affine import Affine
+from rasterio.crs import CRS
+from rasterio.enums import Resampling
+from rasterio.errors import WindowError
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import calculate_default_transform, transform_bounds
+from rasterio.windows import Window, from_bounds
+
+logger = logging.getLogger(__name__)
+
+# Products whose warp grid is kept (a few numbers each, no file handles)
+MAX_CACHED_WARPS = 64
+
+
+def utm_crs_for(lon: float, lat: float) -> CRS:
+    """Return the WGS84 UTM zone CRS containing a point."""
+    zone = int(math.floor((lon + 180) / 6)) + 1
+    epsg = (32600 if lat >= 0 else 32700) + zone
+    return CRS.from_epsg(epsg)
+
+
+class GcpWarp(NamedTuple):
+    """Target grid of a GCP-georeferenced measurement."""
+    src_crs: CRS
+    dst_crs: CRS
+    transform: Affine
+    width: int
+    height: int
+
+
+def plan_gcp_warp(src, dst_crs: Optional[CRS] = None) -> Optional[GcpWarp]:
+    """
+    Solve the target grid of a measurement georeferenced by GCPs, or None if it
+    has an affine transform. `dst_crs` defaults to the UTM zone of the scene centre.
+    """
+    gcps, gcp_crs = src.gcps
+    if not gcps or (src.crs is not None and src.transform != Affine.identity()):
+        return None
+    if dst_crs is None:
+        lon = float(np.mean([g.x for g in gcps]))
+        lat = float(np.mean([g.y for g in gcps]))
+        dst_crs = utm_crs_for(lon, lat)
+    transform, width, height = calculate_default_transform(
+        gcp_crs, dst_crs, src.width, src.height, gcps=gcps
+    )
+    return GcpWarp(gcp_crs, dst_crs, transform, width, height)
+
+
+class SarProduct:
+    """
+    A Sentinel-1 measurement opened for farm-window reads.
+    If the TIFF carries GCPs, reads go through a WarpedVRT in `dst_crs`
+    (default: the UTM zone of the scene centre, to keep 10 m pixels).
+    A precomputed `warp` skips solving the grid. Use as a context manager,
+    or call close().
+    """
+
+    def __init__(self, measurement_path: str, dst_crs: Optional[CRS] = None,
+                 resampling: Resampling = Resampling.bilinear, warp: Optional[GcpWarp] = None):
+        self.path = measurement_path
+        self.src = rasterio.open(measurement_path)
+        self.vrt = None
+
+        self.warp = warp or plan_gcp_warp(self.src, dst_crs)
+        if self.warp is not None:
+            self.vrt = WarpedVRT(
+                self.src,
+                src_crs=self.warp.src_crs,
+                crs=self.warp.dst_crs,
+                transform=self.warp.transform,
+                width=self.warp.width,
+                height=self.warp.height,
+                src_nodata=0,
+                nodata=0,
+                resampling=resampling
+            )
+
+    @property
+    def dataset(self):
+        """Georeferenced view of the measurement (VRT for GCP products)."""
+        return self.vrt if self.vrt is not None else self.src
+
+    def window_for_bbox(self, bbox: List[float]) -> Window:
+        """
+        Pixel window covering a [min_lon, min_lat, max_lon, max_lat] bbox,
+        clipped to the dataset extent.
+        """
+        ds = self.dataset
+        left, bottom, right, top = bbox
+        if ds.crs and ds.crs.to_epsg() != 4326:
+            left, bottom, right, top = transform_bounds(4326, ds.crs, left, bottom, right, top)
+
+        window = from_bounds(left, bottom, right, top, ds.transform)
+        window = window.round_offsets(op='floor').round_lengths(op='ceil')
+        full = Window(0, 0, ds.width, ds.height)
+        try:
+            return window.intersection(full)
+        except WindowError:
+            raise ValueError(f"bbox {bbox} does not intersect {self.path}")
+
+    def read(self, bbox: Optional[List[float]] = None, window: Optional[Window] = None,
+             out_dtype: str = 'float32') -> Tuple[np.ndarray, Affine]:
+        """
+        Read band 1 for a bbox (or explicit window) in the target CRS.
+        Returns the array and its affine transform.
+        """
+        ds = self.dataset
+        if window is None and bbox:
+            window = self.window_for_bbox(bbox)
+        if window is None:
+            return ds.read(1, out_dtype=out_dtype), ds.transform
+        return ds.read(1, window=window, out_dtype=out_dtype), ds.window_transform(window)
+
+    def profile(self, window: Optional[Window] = None) -> dict:
+        """GeoTIFF profile for a single float32 band covering `window`."""
+        ds = self.dataset
+        profile = {
+            'driver': 'GTiff',
+            'crs': ds.crs,
+            'transform': ds.transform,
+            'width': ds.width,
+            'height': ds.height,
+            'count': 1,
+            'dtype': rasterio.float32,
+            'compress': 'lzw',
+        }
+        if window is not None:
+            profile.update(
+                transform=ds.window_transform(window),
+                width=int(window.width),
+                height=int(window.height)
+            )
+        return profile
+
+    def close(self):
+        if self.vrt is not None:
+            self.vrt.close()
+        self.src.close()
+
+    def __enter__(self) -> "SarProduct":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_warps: "OrderedDict[str, Optional[GcpWarp]]" = OrderedDict()
+_warps_lock = threading.Lock()
+
+
+def open_sar_product(measurement_path: str) -> SarProduct:
+    """
+    Open a measurement for reading with its own file handles, reusing the
+    cached warp grid (solved on first use). The caller closes the product.
+    """
+    with _warps_lock:
+        cached = measurement_path in _warps
+        if cached:
+            _warps.move_to_end(measurement_path)
+            warp = _warps[measurement_path]
+    if cached:
+        return SarProduct(measurement_path, warp=warp)
+
+    product = SarProduct(measurement_path)
+    if product.warp is not None:
+        logger.info(f"Solved GCP warp for {measurement_path} "
+                    f"({product.warp.width}x{product.warp.height} in {product.warp.dst_crs})")
+    with _warps_lock:
+        _warps[measurement_path] = product.warp
+        while len(_warps) > MAX_CACHED_WARPS:
+            _warps.popitem(last=False)
+    return product
+
+
+def release_sar_products(safe_path: str):
+    """Forget the cached warps of products under a SAFE folder (call before deleting it)."""
+    with _warps_lock:
+        for path in [p for p in _warps if p.startswith(safe_path)]:
+            del _warps[path]
@@ -3,14 +3,17 @@
 
 import logging
 import os
+import time
 import rasterio
 
 logger = logging.getLogger(__name__)
 import numpy as np
-from rasterio.enums import Resampling
-from rasterio.warp import transform_bounds
-from rasterio.windows import from_bounds
-from typing import Tuple, List
+from contextlib import ExitStack
+from rasterio.windows import Window
+from typing import Dict, Optional, Tuple, List
+from app.infrastructure.image_processing.sar_access import open_sar_product
+from app.infrastructure.image_processing.speckle_filter import apply_speckle_filter
+from app.infrastructure.pipeline.metrics import record_stage, STAGE_DECODE, STAGE_COMPUTE
 
 def find_s1_band_path(safe_path: str, polarization: str = 'vv') -> str:
     """
@@ -25,7 +28,225 @@ def find_s1_band_path(safe_path: str, polarization: str = 'vv') -> str:
     
     raise FileNotFoundError(f'Could not find {polarization} band in SAFE product')
 
-def compute_soil_moisture_proxy(vv_path: str, out_path: str, bbox: List[float] = None) -> Tuple[str, float]:
+# Sentinel-1 GRD calibration (simplified)
+# For Level-1 GRD raw products, DN values are typically 0-2000 range
+# Calibration constant adjusted so typical land DN (~130) gives moderate moisture
+# Reference: Land typically ranges from -25dB (very dry) to -5dB (very wet/water)
+CALIBRATION_CONSTANT = 3e5  # Calibrated for raw GRD products
+
+# Normalization range for soil moisture visualization
+# Wet soil has higher backscatter (closer to 0 dB or positive)
+# Dry soil has lower backscatter (around -20 dB)
+MIN_DB = -20.0  # Very dry soil
+MAX_DB = -5.0   # Very wet soil / standing water
+
+# Satellite data types produced from one Sentinel-1 product
+SOIL_MOISTURE = 'SOIL_MOISTURE'
+SAR_VH = 'SAR_VH'
+SAR_VH_VV_RATIO = 'SAR_VH_VV_RATIO'
+
+# Rows processed per block; bounds memory when the window is the full scene
+BLOCK_ROWS = 512
+
+
+class _RunningStats:
+    """NaN-aware mean/min/max accumulated block by block."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, block: np.ndarray, valid: np.ndarray):
+        n = int(np.count_nonzero(valid))
+        if n == 0:
+            return
+        self.count += n
+        self.total += float(np.add.reduce(block, axis=None, where=valid, dtype=np.float64, initial=0.0))
+        self.min = min(self.min, float(np.minimum.reduce(block, axis=None, where=valid, initial=np.inf)))
+        self.max = max(self.max, float(np.maximum.reduce(block, axis=None, where=valid, initial=-np.inf)))
+
+    def result(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """(mean, min, max), or Nones if no pixel was valid (not a real 0.0 reading)."""
+        if self.count == 0:
+            return None, None, None
+        return self.total / self.count, self.min, self.max
+
+
+def dn_to_sigma0(block: np.ndarray, invalid: np.ndarray) -> np.ndarray:
+    """
+    Convert a float32 DN block to linear sigma0 in place (sigma0 = DN^2 / A).
+    `invalid` (preallocated bool buffer) is set where DN <= 0.
+    """
+    np.less_equal(block, 0, out=invalid)
+    np.square(block, out=block)
+    block *= np.float32(1.0 / CALIBRATION_CONSTANT)
+    return block
+
+
+def sigma0_to_db(block: np.ndarray) -> np.ndarray:
+    """Convert linear sigma0 to dB in place: 10 * log10(sigma0)."""
+    block += np.float32(1e-10)
+    np.log10(block, out=block)
+    block *= np.float32(10.0)
+    return block
+
+
+def db_to_moisture_index(block: np.ndarray) -> np.ndarray:
+    """Normalize VV backscatter (dB) to the 0..1 soil moisture index in place."""
+    block -= np.float32(MIN_DB)
+    block *= np.float32(1.0 / (MAX_DB - MIN_DB))
+    np.clip(block, 0, 1, out=block)
+    return block
+
+
+def compute_sar_indices(
+    vv_path: str,
+    out_paths: Dict[str, str],
+    vh_path: Optional[str] = None,
+    bbox: List[float] = None,
+    speckle_filter: Optional[str] = None,
+    speckle_size: int = 7
+) -> Dict[str, Tuple[str, float, float, float]]:
+    """
+    Compute Sentinel-1 indices for a farm window in a single pass over the product.
+
+    Products (keys of `out_paths`):
+    - SOIL_MOISTURE: 0..1 moisture index from VV backscatter
+    - SAR_VH: VH backscatter in dB (needs vh_path)
+    - SAR_VH_VV_RATIO: linear VH/VV cross-ratio, a radar vegetation index
+      for rice paddies (needs vh_path)
+
+    The VV window is computed once and reused for VH (both measurements share
+    the same GCP grid). The window is streamed in blocks of BLOCK_ROWS rows
+    through preallocated float32 buffers, so memory stays bounded even for a
+    full scene.
+
+    If `speckle_filter` is set ('boxcar', 'lee' or 'refined_lee'), linear
+    sigma0 is filtered before the dB conversion. Blocks are then read with
+    speckle_size // 2 rows of context on each side so block edges match a
+    filter over the whole window.
+
+    Returns:
+        {data_type: (out_path, mean, min, max)} over valid pixels; the
+        statistics are None if the window has no valid pixel
+    """
+    wants_vh = SAR_VH in out_paths or SAR_VH_VV_RATIO in out_paths
+    if wants_vh and not vh_path:
+        raise ValueError('vh_path is required for VH products')
+
+    with ExitStack() as stack:
+        # Own handles for this call, closed on exit with the outputs
+        vv_product = stack.enter_context(open_sar_product(vv_path))
+        vh_product = stack.enter_context(open_sar_product(vh_path)) if wants_vh else None
+        vv_ds = vv_product.dataset
+        vh_ds = vh_product.dataset if vh_product else None
+
+        # Read only the farm footprint (through the GCP warp for GRD products).
+        # A bbox outside the product raises: the full swath is never read instead.
+        if bbox:
+            window = vv_product.window_for_bbox(bbox)
+        else:
+            window = Window(0, 0, vv_ds.width, vv_ds.height)
+
+        if vh_ds is not None and (vh_ds.transform != vv_ds.transform or vh_ds.shape != vv_ds.shape):
+            raise ValueError('VV and VH measurements are not on the same grid')
+
+        width = int(window.width)
+        height = int(window.height)
+        block_rows = min(BLOCK_ROWS, height)
+        shape = (block_rows, width)
+
+        # Context rows read above and below each block for the speckle filter
+        halo = speckle_size // 2 if speckle_filter else 0
+        read_shape = (block_rows + 2 * halo, width)
+
+        # Preallocated buffers, reused for every block
+        vv_buf = np.empty(read_shape, dtype=np.float32)
+        vv_invalid = np.empty(read_shape, dtype=bool)
+        vh_buf = np.empty(read_shape, dtype=np.float32) if vh_ds is not None else None
+        vh_invalid = np.empty(read_shape, dtype=bool) if vh_ds is not None else None
+        ratio_buf = np.empty(shape, dtype=np.float32) if SAR_VH_VV_RATIO in out_paths else None
+        ratio_invalid = np.empty(shape, dtype=bool) if ratio_buf is not None else None
+        valid = np.empty(shape, dtype=bool)
+
+        # Decode (band reads) and compute time, summed over blocks
+        decode = {'seconds': 0.0, 'bytes': 0}
+
+        def read_sigma0(ds, buf, invalid, row, rows):
+            """Read rows (plus halo) as linear sigma0 and return the block's own rows."""
+            first = max(0, row - halo)
+            last = min(height, row + rows + halo)
+            n = last - first
+            read_started = time.perf_counter()
+            ds.read(1, window=Window(window.col_off, window.row_off + first, width, n), out=buf[:n])
+            decode['seconds'] += time.perf_counter() - read_started
+            decode['bytes'] += buf[:n].nbytes
+            dn_to_sigma0(buf[:n], invalid[:n])
+            if speckle_filter:
+                np.copyto(buf[:n], np.float32(np.nan), where=invalid[:n])
+                buf[:n] = apply_speckle_filter(buf[:n], speckle_filter, size=speckle_size)
+            offset = row - first
+            return buf[offset:offset + rows], invalid[offset:offset + rows]
+
+        stats = {data_type: _RunningStats() for data_type in out_paths}
+        profile = vv_product.profile(window)
+        started = time.perf_counter()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            outputs = {
+                data_type: stack.enter_context(rasterio.open(path, 'w', **profile))
+                for data_type, path in out_paths.items()
+            }
+
+            for row in range(0, height, block_rows):
+                rows = min(block_rows, height - row)
+                dst_window = Window(0, row, width, rows)
+                blocks = {}
+
+                vv, vv_block_invalid = read_sigma0(vv_ds, vv_buf, vv_invalid, row, rows)
+
+                if vh_ds is not None:
+                    vh, vh_block_invalid = read_sigma0(vh_ds, vh_buf, vh_invalid, row, rows)
+
+                    if ratio_buf is not None:
+                        # Calibration constants cancel out in the linear ratio
+                        ratio = np.divide(vh, vv, out=ratio_buf[:rows])
+                        np.logical_or(vv_block_invalid, vh_block_invalid, out=ratio_invalid[:rows])
+                        np.copyto(ratio, np.float32(np.nan), where=ratio_invalid[:rows])
+                        blocks[SAR_VH_VV_RATIO] = (ratio, ratio_invalid[:rows])
+
+                    sigma0_to_db(vh)
+                    np.copyto(vh, np.float32(np.nan), where=vh_block_invalid)
+                    blocks[SAR_VH] = (vh, vh_block_invalid)
+
+                sigma0_to_db(vv)
+                db_to_moisture_index(vv)
+                np.copyto(vv, np.float32(np.nan), where=vv_block_invalid)
+                blocks[SOIL_MOISTURE] = (vv, vv_block_invalid)
+
+                for data_type, dst in outputs.items():
+                    block, block_invalid = blocks[data_type]
+                    np.logical_not(block_invalid, out=valid[:rows])
+                    stats[data_type].update(block, valid[:rows])
+                    dst.write(block, 1, window=dst_window)
+
+    record_stage(STAGE_DECODE, decode['seconds'], nbytes=decode['bytes'])
+    record_stage(
+        STAGE_COMPUTE, time.perf_counter() - started - decode['seconds'],
+        nbytes=width * height * 4 * len(out_paths)
+    )
+
+    return {
+        data_type: (out_paths[data_type],) + stats[data_type].result()
+        for data_type in out_paths
+    }
+
+
+def compute_soil_moisture_proxy(vv_path: str, out_path: str, bbox: List[float] = None,
+                                speckle_filter: Optional[str] = None,
+                                speckle_size: int = 7) -> Tuple[str, Optional[float], Optional[float], Optional[float]]:
     """
     Compute a simple Soil Moisture proxy from Sentinel-1 VV band.
     
@@ -38,72 +259,13 @@ def compute_soil_moisture_proxy(vv_path: str, out_path: str, bbox: List[float] =
     - Moist soil: -15 to -10 dB
     - Wet soil: -10 to -5 dB
     - Water: -5 to 0 dB (or positive for specular reflection)
+    
+    Returns:
+        (out_path, mean, min, max) of the index over valid pixels
+        (None statistics if there is none)
     """
-    mean_val = 0.0
-    with rasterio.open(vv_path) as src:
-        # Calculate window if bbox is provided
-        window = None
-        transform = src.transform
-        
-        if bbox:
-            try:
-                # Transform bbox (WGS84) to source CRS
-                # bbox is [min_lon, min_lat, max_lon, max_lat]
-                left, bottom, right, top = bbox
-                
-                if src.crs and src.crs.to_epsg() != 4326:
-                    left, bottom, right, top = transform_bounds(4326, src.crs, left, bottom, right, top)
-                
-                window = from_bounds(left, bottom, right, top, src.transform)
-                transform = src.window_transform(window)
-            except Exception as e:
-                logger.warning(f"Error calculating window from bbox: {e}. Reading full image.")
-                window = None
-
-        # Read data (only the window if specified)
-        if window:
-            dn = src.read(1, window=window).astype('float64')
-        else:
-            dn = src.read(1).astype('float64')
-        
-        # Avoid log of zero and negative values
-        dn = np.where(dn > 0, dn, np.nan)
-        
-        # Sentinel-1 GRD calibration (simplified)
-        # For Level-1 GRD raw products, DN values are typically 0-2000 range
-        # Calibration constant adjusted so typical land DN (~130) gives moderate moisture
-        # Reference: Land typically ranges from -25dB (very dry) to -5dB (very wet/water)
-        calibration_constant = 3e5  # Calibrated for raw GRD products
-        sigma0_linear = (dn ** 2) / calibration_constant
-        
-        # Convert to dB: sigma0_dB = 10 * log10(sigma0_linear)
-        sigma0_db = 10 * np.log10(sigma0_linear + 1e-10)
-        
-        # Normalize for soil moisture visualization
-        # Wet soil has higher backscatter (closer to 0 dB or positive)
-        # Dry soil has lower backscatter (around -20 dB)
-        min_db = -20.0  # Very dry soil
-        max_db = -5.0   # Very wet soil / standing water
-        
-        soil_moisture_index = (sigma0_db - min_db) / (max_db - min_db)
-        soil_moisture_index = np.clip(soil_moisture_index, 0, 1)
-        
-        # Calculate mean (ignoring NaNs)
-        mean_val = float(np.nanmean(soil_moisture_index))
-
-        # Write output
-        profile = src.meta.copy()
-        profile.update(
-            driver='GTiff',
-            height=dn.shape[0],
-            width=dn.shape[1],
-            transform=transform,
-            count=1,
-            dtype=rasterio.float32,
-            compress='lzw'
-        )
-        
-        with rasterio.open(out_path, 'w', **profile) as dst:
-            dst.write(soil_moisture_index, 1)
-            
-    return out_path, mean_val
+    results = compute_sar_indices(
+        vv_path, {SOIL_MOISTURE: out_path}, bbox=bbox,
+        speckle_filter=speckle_filter, speckle_size=speckle_size
+    )
+    return results[SOIL_MOISTURE]
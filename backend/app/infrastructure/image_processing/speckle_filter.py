@@ -0,0 +1,144 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Speckle filters for Sentinel-1 farm windows.
+
+All filters work on linear sigma0 (before dB conversion) and use summed-area
+tables for the local statistics, so the cost is linear in the number of pixels
+and independent of the kernel size. NaN pixels are ignored in the statistics
+and stay NaN in the output.
+"""
+from typing import Tuple
+
+import numpy as np
+
+FILTERS = ('boxcar', 'lee', 'refined_lee')
+
+# Equivalent number of looks of Sentinel-1 IW GRD high resolution products
+DEFAULT_LOOKS = 4.4
+
+
+def _summed_area_table(arr: np.ndarray) -> np.ndarray:
+    """Zero-padded 2D cumulative sum in float64 (shape + 1 on each axis)."""
+    sat = np.zeros((arr.shape[0] + 1, arr.shape[1] + 1), dtype=np.float64)
+    np.cumsum(arr, axis=0, dtype=np.float64, out=sat[1:, 1:])
+    np.cumsum(sat[1:, 1:], axis=1, out=sat[1:, 1:])
+    return sat
+
+
+def _window_sums(sat: np.ndarray, shape: Tuple[int, int], top: int, bottom: int,
+                 left: int, right: int) -> np.ndarray:
+    """
+    Sum over the window [r - top, r + bottom] x [c - left, c + right] for every
+    pixel, clipped at the image border. Four lookups per pixel.
+    """
+    rows, cols = shape
+    r = np.arange(rows)
+    c = np.arange(cols)
+    r0 = np.clip(r - top, 0, rows)[:, None]
+    r1 = np.clip(r + bottom + 1, 0, rows)[:, None]
+    c0 = np.clip(c - left, 0, cols)[None, :]
+    c1 = np.clip(c + right + 1, 0, cols)[None, :]
+    return sat[r1, c1] - sat[r0, c1] - sat[r1, c0] + sat[r0, c0]
+
+
+class _LocalStats:
+    """Per-pixel NaN-aware mean/variance over rectangular windows, via SATs."""
+
+    def __init__(self, img: np.ndarray):
+        self.shape = img.shape
+        self.valid = ~np.isnan(img)
+        filled = np.where(self.valid, img, 0.0)
+        self.sat_n = _summed_area_table(self.valid)
+        self.sat_s = _summed_area_table(filled)
+        self.sat_s2 = _summed_area_table(filled * filled)
+
+    def mean_var(self, top: int, bottom: int, left: int, right: int) -> Tuple[np.ndarray, np.ndarray]:
+        n = _window_sums(self.sat_n, self.shape, top, bottom, left, right)
+        s = _window_sums(self.sat_s, self.shape, top, bottom, left, right)
+        s2 = _window_sums(self.sat_s2, self.shape, top, bottom, left, right)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = s / n
+            var = np.maximum(s2 / n - mean * mean, 0.0)
+        return mean, var
+
+
+def _lee_weight(mean: np.ndarray, var: np.ndarray, looks: float) -> np.ndarray:
+    """Lee weight k = var_x / var_z with the multiplicative speckle model."""
+    cu2 = 1.0 / looks
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var_x = (var - mean * mean * cu2) / (1.0 + cu2)
+        k = np.clip(var_x / var, 0.0, 1.0)
+    return np.nan_to_num(k, nan=0.0)
+
+
+def boxcar_filter(img: np.ndarray, size: int = 5) -> np.ndarray:
+    """Mean over a size x size window."""
+    half = size // 2
+    mean, _ = _LocalStats(img).mean_var(half, half, half, half)
+    return np.where(np.isnan(img), np.nan, mean).astype(img.dtype, copy=False)
+
+
+def lee_filter(img: np.ndarray, size: int = 7, looks: float = DEFAULT_LOOKS) -> np.ndarray:
+    """Classic Lee filter: mean + k * (pixel - mean) over a size x size window."""
+    half = size // 2
+    mean, var = _LocalStats(img).mean_var(half, half, half, half)
+    k = _lee_weight(mean, var, looks)
+    out = mean + k * (img - mean)
+    return out.astype(img.dtype, copy=False)
+
+
+def refined_lee_filter(img: np.ndarray, size: int = 7, looks: float = DEFAULT_LOOKS) -> np.ndarray:
+    """
+    Edge-preserving Lee variant.
+
+    For every pixel, local statistics are taken from the most homogeneous of
+    eight half-windows (left, right, top, bottom and the four quadrants, all
+    including the centre pixel), so averaging does not cross field borders.
+    Each half-window is a rectangle, so it costs one SAT lookup like the
+    boxcar. This approximates the directional windows of the refined Lee filter.
+    """
+    half = size // 2
+    stats = _LocalStats(img)
+    sub_windows = (
+        (half, half, half, 0),   # left
+        (half, half, 0, half),   # right
+        (half, 0, half, half),   # top
+        (0, half, half, half),   # bottom
+        (half, 0, half, 0),      # top-left
+        (half, 0, 0, half),      # top-right
+        (0, half, half, 0),      # bottom-left
+        (0, half, 0, half),      # bottom-right
+    )
+
+    best_mean = None
+    best_var = None
+    for top, bottom, left, right in sub_windows:
+        mean, var = stats.mean_var(top, bottom, left, right)
+        # Compare homogeneity with the coefficient of variation
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cv = np.nan_to_num(var / (mean * mean), nan=np.inf)
+        if best_mean is None:
+            best_mean, best_var, best_cv = mean, var, cv
+            continue
+        better = cv < best_cv
+        best_mean = np.where(better, mean, best_mean)
+        best_var = np.where(better, var, best_var)
+        best_cv = np.where(better, cv, best_cv)
+
+    k = _lee_weight(best_mean, best_var, looks)
+    out = best_mean + k * (img - best_mean)
+    return out.astype(img.dtype, copy=False)
+
+
+def apply_speckle_filter(img: np.ndarray, method: str, size: int = 7,
+                         looks: float = DEFAULT_LOOKS) -> np.ndarray:
+    """Apply a speckle filter by name ('boxcar', 'lee' or 'refined_lee')."""
+    if method == 'boxcar':
+        return boxcar_filter(img, size=size)
+    if method == 'lee':
+        return lee_filter(img, size=size, looks=looks)
+    if method == 'refined_lee':
+        return refined_lee_filter(img, size=size, looks=looks)
+    raise ValueError(f"Unknown speckle filter '{method}', expected one of {FILTERS}")
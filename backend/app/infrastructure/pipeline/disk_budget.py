@@ -0,0 +1,207 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Disk-space admission control for OUTPUT_DIR.
+
+Downloads and extractions reserve their expected size before writing. A
+reservation is admitted while the bytes reserved by in-flight work stay
+within the configured budget and the disk keeps the configured free-space
+floor; otherwise it waits for other work to finish, and fails with
+DiskSpaceError after a timeout (or at once if it can never fit). Failed
+cleanups are reclaimed later by `clean_orphaned_files`.
+"""
+import asyncio
+import fnmatch
+import logging
+import os
+import shutil
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Iterable, List, Optional
+
+from app.infrastructure.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+MB = 1024 * 1024
+
+# Pipeline artifacts the janitor may reclaim
+ORPHAN_PATTERNS = [
+    '*.zip',
+    '*.SAFE',
+    'ndvi_*.tif',
+    'soil_moisture_*.tif',
+    'sar_vh_*.tif',
+]
+
+# A .zip and its extracted .SAFE are on disk at the same time
+EXTRACTION_FACTOR = 2.2
+
+
+class DiskSpaceError(RuntimeError):
+    """Raised when work cannot be admitted without overflowing OUTPUT_DIR."""
+
+
+def estimate_product_bytes(product_info: dict) -> int:
+    """Bytes needed to download and extract a product (catalogue size, or a configured default)."""
+    size = product_info.get('size') or settings.DISK_PRODUCT_ESTIMATE_MB * MB
+    return int(size * EXTRACTION_FACTOR)
+
+
+class DiskBudget:
+    """Tracks bytes reserved by in-flight downloads and extractions in one directory."""
+
+    def __init__(self, directory: str, budget_bytes: int, free_floor_bytes: int,
+                 timeout_seconds: float = 900.0,
+                 free_bytes: Optional[Callable[[str], int]] = None):
+        self.directory = directory
+        self.budget_bytes = budget_bytes
+        self.free_floor_bytes = free_floor_bytes
+        self.timeout_seconds = timeout_seconds
+        self._free_bytes = free_bytes or (lambda path: shutil.disk_usage(path).free)
+        self._reservations: Dict[int, int] = {}
+        self._keys: Dict[int, str] = {}
+        self._next_id = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def reserved_bytes(self) -> int:
+        return sum(self._reservations.values())
+
+    def active_keys(self) -> List[str]:
+        """Keys (product titles) of in-flight reservations; the janitor leaves their files alone."""
+        return list(self._keys.values())
+
+    def _fits(self, nbytes: int) -> bool:
+        reserved = self.reserved_bytes
+        if reserved + nbytes > self.budget_bytes:
+            return False
+        # In-flight work may not have written its reservation yet: count it as used
+        return self._free_bytes(self.directory) - reserved - nbytes >= self.free_floor_bytes
+
+    def stats(self) -> dict:
+        return {
+            'reserved_bytes': self.reserved_bytes,
+            'budget_bytes': self.budget_bytes,
+            'free_bytes': self._free_bytes(self.directory),
+            'free_floor_bytes': self.free_floor_bytes,
+            'in_flight': len(self._reservations),
+        }
+
+    async def acquire(self, nbytes: int, key: Optional[str] = None) -> int:
+        """Reserve `nbytes`, waiting for room up to the timeout. Returns a reservation ID."""
+        if nbytes > self.budget_bytes:
+            raise DiskSpaceError(
+                f"{nbytes // MB} MB needed in {self.directory}, budget is {self.budget_bytes // MB} MB"
+            )
+
+        deadline = time.monotonic() + self.timeout_seconds
+        async with self._changed:
+            waited = False
+            while not self._fits(nbytes):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DiskSpaceError(
+                        f"Not enough space in {self.directory} for {nbytes // MB} MB "
+                        f"({self.reserved_bytes // MB} MB reserved, "
+                        f"{self._free_bytes(self.directory) // MB} MB free, "
+                        f"floor {self.free_floor_bytes // MB} MB)"
+                    )
+                if not waited:
+                    logger.info(f"Waiting for disk space: {nbytes // MB} MB in {self.directory}")
+                    waited = True
+                try:
+                    # Also re-check periodically: space may be freed outside the pipeline
+                    await asyncio.wait_for(self._changed.wait(), timeout=min(remaining, 30.0))
+                except asyncio.TimeoutError:
+                    pass
+
+            reservation_id = self._next_id
+            self._next_id += 1
+            self._reservations[reservation_id] = nbytes
+            if key:
+                self._keys[reservation_id] = key
+            return reservation_id
+
+    async def release(self, reservation_id: int):
+        async with self._changed:
+            self._reservations.pop(reservation_id, None)
+            self._keys.pop(reservation_id, None)
+            self._changed.notify_all()
+
+    @asynccontextmanager
+    async def reserve(self, nbytes: int, key: Optional[str] = None):
+        """Hold a reservation of `nbytes` for the duration of the block."""
+        reservation_id = await self.acquire(nbytes, key)
+        try:
+            yield
+        finally:
+            await self.release(reservation_id)
+
+
+def remove_product_files(directory: str, title: str, safe_path: Optional[str] = None,
+                         out_paths: Iterable[str] = ()):
+    """
+    Remove a product's .zip, its extracted .SAFE and the GeoTIFFs computed from
+    it, once its results are saved. Files already gone are skipped; failures are
+    logged and left to the janitor.
+    """
+    for path in [safe_path, os.path.join(directory, f"{title}.zip"), *out_paths]:
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not remove {path}: {e}")
+
+
+def clean_orphaned_files(directory: str, max_age_seconds: float,
+                         active_keys: Optional[List[str]] = None,
+                         now: Optional[float] = None) -> int:
+    """
+    Remove pipeline artifacts (.zip, .SAFE, index GeoTIFFs) older than
+    `max_age_seconds`, except those whose name contains an active key.
+    Returns the number of bytes reclaimed.
+    """
+    now = now if now is not None else time.time()
+    active_keys = active_keys or []
+    reclaimed = 0
+    if not os.path.isdir(directory):
+        return 0
+
+    for entry in os.scandir(directory):
+        if not any(fnmatch.fnmatch(entry.name, pattern) for pattern in ORPHAN_PATTERNS):
+            continue
+        if any(key in entry.name for key in active_keys):
+            continue
+        try:
+            if now - entry.stat().st_mtime < max_age_seconds:
+                continue
+            if entry.is_dir():
+                size = sum(
+                    os.path.getsize(os.path.join(root, name))
+                    for root, _, files in os.walk(entry.path) for name in files
+                )
+                shutil.rmtree(entry.path)
+            else:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+            reclaimed += size
+            logger.info(f"Removed orphaned {entry.name} ({size // MB} MB)")
+        except OSError as e:
+            logger.warning(f"Could not remove orphaned {entry.name}: {e}")
+    return reclaimed
+
+
+# Shared by every download/extraction of this process
+disk_budget = DiskBudget(
+    settings.OUTPUT_DIR,
+    budget_bytes=settings.DISK_BUDGET_MB * MB,
+    free_floor_bytes=settings.DISK_FREE_FLOOR_MB * MB,
+    timeout_seconds=settings.DISK_RESERVATION_TIMEOUT_SECONDS
+)
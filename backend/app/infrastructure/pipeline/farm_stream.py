@@ -0,0 +1,99 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Streaming iteration over farms for scheduled jobs.
+
+Farms are read in ID-ordered (keyset) batches, each in its own short-lived
+session, and only the ID and the precomputed bbox/centroid columns are
+selected. Memory stays flat however many farms there are, and no session
+(or SQLite lock) is held while the caller works on a batch.
+"""
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+from sqlalchemy import select, update
+
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models.farm_model import FarmModel, farm_geometry
+
+settings = get_settings()
+
+
+class FarmGeometry(NamedTuple):
+    id: int
+    bbox: Optional[List[float]]       # [minx, miny, maxx, maxy]
+    centroid: Optional[List[float]]   # [lat, lng]
+
+
+async def backfill_farm_geometry(session_factory=AsyncSessionLocal, batch_size: Optional[int] = None) -> int:
+    """
+    Compute the geometry columns of farms saved before they existed.
+    Returns the number of farms updated; a no-op once every farm has them.
+    """
+    batch_size = batch_size or settings.FARM_BATCH_SIZE
+    updated = 0
+    last_id = 0
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(
+                select(FarmModel.id, FarmModel.coordinates)
+                .where(FarmModel.bbox_min_lng.is_(None), FarmModel.id > last_id)
+                .order_by(FarmModel.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return updated
+
+            for row in rows:
+                geometry = farm_geometry(row.coordinates)
+                if geometry['bbox_min_lng'] is None:
+                    continue
+                await session.execute(
+                    update(FarmModel)
+                    .where(FarmModel.id == row.id)
+                    # Not a user edit: keep updated_at as it was
+                    .values(**geometry, updated_at=FarmModel.updated_at)
+                )
+                updated += 1
+            await session.commit()
+        last_id = rows[-1].id
+
+
+async def iter_farm_batches(session_factory=AsyncSessionLocal,
+                            batch_size: Optional[int] = None) -> AsyncIterator[List[FarmGeometry]]:
+    """Yield all farms in ID order, `batch_size` at a time, reading each batch in a fresh session."""
+    batch_size = batch_size or settings.FARM_BATCH_SIZE
+    last_id = 0
+    while True:
+        async with session_factory() as session:
+            result = await session.execute(
+                select(
+                    FarmModel.id,
+                    FarmModel.bbox_min_lng,
+                    FarmModel.bbox_min_lat,
+                    FarmModel.bbox_max_lng,
+                    FarmModel.bbox_max_lat,
+                    FarmModel.centroid_lat,
+                    FarmModel.centroid_lng
+                )
+                .where(FarmModel.id > last_id)
+                .order_by(FarmModel.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+        if not rows:
+            return
+
+        last_id = rows[-1].id
+        yield [
+            FarmGeometry(
+                id=row.id,
+                bbox=None if row.bbox_min_lng is None else [
+                    row.bbox_min_lng, row.bbox_min_lat, row.bbox_max_lng, row.bbox_max_lat
+                ],
+                centroid=None if row.centroid_lat is None else [row.centroid_lat, row.centroid_lng]
+            )
+            for row in rows
+        ]
@@ -0,0 +1,291 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Bulk backfill of historical data to FIWARE.
+
+Farms and satellite observations saved before FIWARE was enabled never went
+through the outbox (no `fiware_hash` / `fiware_queued`). The backfill
+publishes them directly, bypassing the outbox:
+
+1. AgriParcels of farms never queued (no `fiware_hash`), upserted in batches.
+2. `satellite_data` rows not yet queued, read by keyset (ID order, selected columns only)
+   in pages of batch_size * concurrency. A page's AgriParcelRecords are
+   upserted to Orion in batch requests, `concurrency` in flight. Its parcel
+   history points go straight to QuantumLeap's notify endpoint: sending them
+   as parcel updates through Orion would take one request per observation,
+   and would rewind each parcel's current value. The next page is read while
+   the current one is sent.
+
+After each page its rows are marked `fiware_queued`, and the last row ID
+and the counters are checkpointed in the job's state: a restarted job
+resumes where it stopped, and a later backfill job does not publish (or add
+to QuantumLeap's history) rows an earlier one already loaded. Entities Orion
+still rejects after RETRY_ATTEMPTS are handed to the outbox, which keeps
+retrying them. Orion or QuantumLeap being down fails the job (retried by
+the queue from the checkpoint) instead of queueing every row.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.fiware_outbox_model import (
+    FiwareOutboxModel,
+    OPERATION_UPSERT,
+    RECORD_ATTRIBUTES,
+    observation_entities,
+    parcel_content_hash,
+    parcel_entity
+)
+from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.external_services.fiware_client import BatchResult, FiwareClient, FiwareClientError
+from app.infrastructure.external_services.quantumleap_client import QuantumLeapClient
+from app.infrastructure.pipeline.job_queue import JobProgress, STAGE_SYNCED
+from app.infrastructure.pipeline.metrics import stage, STAGE_FIWARE_SYNC
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+FIWARE_BACKFILL_JOB = 'fiware_backfill'
+
+# Inline attempts of a failed request, with exponential backoff from RETRY_BASE_SECONDS
+RETRY_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 1.0
+
+# Minimum interval between progress log lines
+PROGRESS_LOG_SECONDS = 10.0
+
+
+class FiwareBackfill:
+    """Publishes historical farms and satellite observations to Orion and QuantumLeap."""
+
+    def __init__(self, session_factory=AsyncSessionLocal, client: Optional[FiwareClient] = None,
+                 quantumleap: Optional[QuantumLeapClient] = None, batch_size: Optional[int] = None,
+                 concurrency: Optional[int] = None, data_types: Optional[List[str]] = None,
+                 history: bool = True):
+        self.session_factory = session_factory
+        self.client = client or FiwareClient()
+        self.quantumleap = quantumleap or QuantumLeapClient()
+        self.batch_size = batch_size or settings.FIWARE_BACKFILL_BATCH_SIZE
+        self.concurrency = concurrency or settings.FIWARE_BACKFILL_CONCURRENCY
+        self.data_types = data_types or list(RECORD_ATTRIBUTES)
+        # Also load each observation as a point of its parcel's QuantumLeap series
+        self.history = history
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._last_log = 0.0
+
+    async def run(self, progress: Optional[JobProgress] = None,
+                  on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Backfill everything not yet done according to `progress.state`.
+        `on_progress` is called with the counters after each page.
+        Returns the final counters.
+        """
+        progress = progress or JobProgress()
+        counters = progress.state.setdefault('progress', {
+            'last_id': 0, 'parcels': 0, 'rows': 0, 'records': 0, 'history_points': 0, 'requeued': 0,
+        })
+        self._slots = asyncio.Semaphore(self.concurrency)
+        if not await self.client.health_check():
+            raise RuntimeError("FIWARE Orion is not available")
+
+        if not counters.get('parcels_done'):
+            await self._publish_parcels(counters, progress)
+            counters['parcels_done'] = True
+            await progress.checkpoint()
+
+        counters['total_rows'] = counters['rows'] + await self._count_rows(counters['last_id'])
+        started, rows_at_start = time.monotonic(), counters['rows']
+        next_page = asyncio.create_task(self._read_page(counters['last_id']))
+        try:
+            while True:
+                rows = await next_page
+                if not rows:
+                    break
+                next_page = asyncio.create_task(self._read_page(rows[-1].id))
+
+                with stage(STAGE_FIWARE_SYNC, items=len(rows)):
+                    records, points, requeued = await self._publish_rows(rows)
+                counters['last_id'] = rows[-1].id
+                counters['rows'] += len(rows)
+                counters['records'] += records
+                counters['history_points'] += points
+                counters['requeued'] += requeued
+
+                elapsed = time.monotonic() - started
+                rate = (counters['rows'] - rows_at_start) / elapsed if elapsed > 0 else 0.0
+                counters['rows_per_second'] = round(rate, 1)
+                counters['eta_seconds'] = round((counters['total_rows'] - counters['rows']) / rate) if rate else None
+                await progress.checkpoint()
+                self._report(counters, on_progress)
+        finally:
+            next_page.cancel()
+
+        counters['finished'] = True
+        progress.state['result'] = dict(counters)
+        await progress.checkpoint(STAGE_SYNCED)
+        self._report(counters, on_progress, force=True)
+        return counters
+
+    def _report(self, counters: Dict[str, Any], on_progress, force: bool = False):
+        if on_progress is not None:
+            on_progress(counters)
+        now = time.monotonic()
+        if force or now - self._last_log >= PROGRESS_LOG_SECONDS:
+            self._last_log = now
+            logger.info(
+                f"FIWARE backfill: {counters['rows']}/{counters['total_rows']} rows "
+                f"({counters.get('rows_per_second', 0)} rows/s), {counters['records']} records, "
+                f"{counters['history_points']} history points, {counters['requeued']} requeued"
+            )
+
+    # ----- reads -----
+
+    def _rows_query(self):
+        return select(
+            SatelliteDataModel.id,
+            SatelliteDataModel.farm_id,
+            SatelliteDataModel.data_type,
+            SatelliteDataModel.mean_value,
+            SatelliteDataModel.acquisition_date
+        ).where(*self._rows_filter())
+
+    def _rows_filter(self):
+        return SatelliteDataModel.data_type.in_(self.data_types), SatelliteDataModel.fiware_queued.is_(None)
+
+    async def _read_page(self, after_id: int) -> list:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                self._rows_query()
+                .where(SatelliteDataModel.id > after_id)
+                .order_by(SatelliteDataModel.id)
+                .limit(self.batch_size * self.concurrency)
+            )
+            return result.all()
+
+    async def _count_rows(self, after_id: int) -> int:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(func.count(SatelliteDataModel.id))
+                .where(*self._rows_filter(), SatelliteDataModel.id > after_id)
+            )
+            return result.scalar_one()
+
+    # ----- writes -----
+
+    async def _publish_parcels(self, counters: Dict[str, Any], progress: JobProgress):
+        """Upsert the AgriParcels of farms never queued to the outbox, and record their hash."""
+        while True:
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(FarmModel)
+                    .where(FarmModel.fiware_hash.is_(None), FarmModel.id > counters.get('last_farm_id', 0))
+                    .order_by(FarmModel.id)
+                    .limit(self.batch_size)
+                )
+                farms = list(result.scalars().all())
+            if not farms:
+                return
+            entities = {farm.id: parcel_entity(farm) for farm in farms if farm.coordinates}
+
+            failed = (await self._upsert(list(entities.values()))).errors
+            async with self.session_factory() as session:
+                for farm_id, entity in entities.items():
+                    if entity["id"] in failed:
+                        continue
+                    # Core update: no outbox row for this bookkeeping-only change
+                    await session.execute(
+                        update(FarmModel).where(FarmModel.id == farm_id)
+                        .values(fiware_hash=parcel_content_hash(entity), updated_at=FarmModel.updated_at)
+                    )
+                    counters['parcels'] += 1
+                await self._requeue(session, [entity for entity in entities.values() if entity["id"] in failed])
+                await session.commit()
+            counters['last_farm_id'] = farms[-1].id
+            await progress.checkpoint()
+
+    async def _publish_rows(self, rows) -> Tuple[int, int, int]:
+        """Send one page. Returns (records published, history points loaded, entities requeued)."""
+        records, points = [], []
+        for row in rows:
+            record, parcel_update = observation_entities(row.farm_id, row.data_type, row.mean_value,
+                                                         row.acquisition_date)
+            records.append(record)
+            points.append(parcel_update)
+
+        chunks = [records[i:i + self.batch_size] for i in range(0, len(records), self.batch_size)]
+        sends = [self._upsert(chunk) for chunk in chunks]
+        if self.history:
+            sends += [self._notify(points[i:i + self.batch_size]) for i in range(0, len(points), self.batch_size)]
+        results = await asyncio.gather(*sends)
+
+        failed = BatchResult()
+        for result in results[:len(chunks)]:
+            failed.merge(result)
+        rejected = [record for record in records if record["id"] in failed.errors]
+        async with self.session_factory() as session:
+            await self._requeue(session, rejected)
+            # Core update: the rows are loaded (or in the outbox), nothing to queue
+            await session.execute(
+                update(SatelliteDataModel).where(SatelliteDataModel.id.in_([row.id for row in rows]))
+                .values(fiware_queued=True)
+            )
+            await session.commit()
+        return len(records) - len(rejected), len(points) if self.history else 0, len(rejected)
+
+    async def _upsert(self, entities: List[Dict[str, Any]]) -> BatchResult:
+        """Batch upsert, retrying failed entities. Fails if Orion became unavailable."""
+        result = BatchResult()
+        pending = entities
+        for attempt in range(RETRY_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+            async with self._slots:
+                attempt_result = await self.client.upsert_entities(pending, chunk_size=self.batch_size)
+            result.succeeded.extend(attempt_result.succeeded)
+            pending = [entity for entity in pending if entity["id"] in attempt_result.errors]
+            result.errors = {entity["id"]: attempt_result.errors[entity["id"]] for entity in pending}
+            if not pending:
+                break
+        if pending and len(pending) == len(entities) and not await self.client.health_check(use_cache=False):
+            raise RuntimeError("FIWARE Orion became unavailable during the backfill")
+        return result
+
+    async def _notify(self, points: List[Dict[str, Any]]):
+        for attempt in range(RETRY_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+            try:
+                async with self._slots:
+                    await self.quantumleap.notify(points)
+                return
+            except FiwareClientError as e:
+                error = e
+        raise RuntimeError(f"QuantumLeap rejected {len(points)} history points: {error}")
+
+    @staticmethod
+    async def _requeue(session, entities: List[Dict[str, Any]]):
+        """Hand entities Orion rejected to the outbox, whose drainer keeps retrying them."""
+        session.add_all([
+            FiwareOutboxModel(entity_id=entity["id"], entity_type=entity["type"],
+                              operation=OPERATION_UPSERT, payload=entity)
+            for entity in entities
+        ])
+
+
+async def run_fiware_backfill_job(job, progress: JobProgress,
+                                  on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Job handler: backfill historical farms and satellite data to FIWARE."""
+    payload = job.payload or {}
+    return await FiwareBackfill(
+        batch_size=payload.get('batch_size'),
+        concurrency=payload.get('concurrency'),
+        data_types=payload.get('data_types'),
+        history=payload.get('history', True)
+    ).run(progress, on_progress)
@@ -0,0 +1,300 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Drainer of the FIWARE outbox.
+
+Rows written with farm and satellite data (see fiware_outbox_model) are
+published to Orion in batches, oldest first. When several pending upserts
+or deletes target the same entity only the newest is sent. Appends (parcel
+observations kept as QuantumLeap history) are saved newest first by the
+syncs, so they are ordered by observedAt instead: only an observation not
+older than the parcel's current value in Orion (`FarmModel.fiware_observed`)
+is set on the parcel, the others are stored in its QuantumLeap history
+directly, as the backfill does. A failed row is retried with exponential backoff
+and marked 'failed' after FIWARE_OUTBOX_MAX_ATTEMPTS; once a newer upsert or
+delete of its entity is published, an older one still waiting for its retry
+is marked 'superseded' instead, so it never overwrites newer data. Entity IDs are
+deterministic, so a row published twice (e.g. after a crash between the
+request and the commit) leaves Orion unchanged.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.fiware_outbox_model import (
+    FiwareOutboxModel,
+    OUTBOX_PENDING,
+    OUTBOX_PUBLISHED,
+    OUTBOX_FAILED,
+    OUTBOX_SUPERSEDED,
+    OPERATION_APPEND,
+    OPERATION_DELETE,
+    OPERATION_UPSERT,
+    parcel_content_hash
+)
+from app.infrastructure.external_services.fiware_client import (
+    FiwareBatchWriter,
+    FiwareClient,
+    FiwareClientError
+)
+from app.infrastructure.external_services.quantumleap_client import QuantumLeapClient
+from app.infrastructure.pipeline.metrics import stage, STAGE_FIWARE_SYNC
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Backoff of a failed entity: base * 2^(attempts - 1), capped
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+
+def retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS))
+
+
+def _observation(row: FiwareOutboxModel) -> Tuple[str, str]:
+    """(attribute, observedAt) of an append row."""
+    attribute = next(key for key in row.payload if key not in ("@context", "id", "type"))
+    return attribute, row.payload[attribute].get("observedAt") or ""
+
+
+class FiwareOutboxDrainer:
+    """Publishes pending outbox rows to Orion."""
+
+    def __init__(self, session_factory=AsyncSessionLocal, client: Optional[FiwareClient] = None,
+                 quantumleap: Optional[QuantumLeapClient] = None, batch_size: Optional[int] = None,
+                 max_attempts: Optional[int] = None):
+        self.session_factory = session_factory
+        self.client = client or FiwareClient()
+        self.quantumleap = quantumleap or QuantumLeapClient()
+        self.batch_size = batch_size or settings.FIWARE_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.FIWARE_OUTBOX_MAX_ATTEMPTS
+
+    async def drain(self, max_batches: Optional[int] = None) -> Dict[str, int]:
+        """Publish due rows batch by batch until none are left (or `max_batches` were sent)."""
+        totals = {'published': 0, 'retried': 0, 'failed': 0}
+        if not await self.client.health_check():
+            logger.warning("FIWARE Orion is not available, outbox not drained")
+            return totals
+
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            counts = await self.drain_batch()
+            for key, value in counts.items():
+                totals[key] += value
+            batches += 1
+            # Stop when nothing was published: the rest is waiting for a retry, or Orion is failing
+            if sum(counts.values()) < self.batch_size or not counts['published']:
+                break
+        if any(totals.values()):
+            logger.info(
+                f"FIWARE outbox: {totals['published']} published, {totals['retried']} to retry, "
+                f"{totals['failed']} failed"
+            )
+        return totals
+
+    async def drain_batch(self) -> Dict[str, int]:
+        """Publish the oldest `batch_size` due rows. Returns counts by outcome."""
+        now = datetime.utcnow()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(FiwareOutboxModel)
+                .where(FiwareOutboxModel.status == OUTBOX_PENDING, FiwareOutboxModel.next_attempt_at <= now)
+                .order_by(FiwareOutboxModel.id)
+                .limit(self.batch_size)
+            )
+            rows = list(result.scalars().all())
+            if not rows:
+                return {'published': 0, 'retried': 0, 'failed': 0}
+
+            with stage(STAGE_FIWARE_SYNC, items=len(rows)):
+                errors = await self._publish(session, rows)
+
+            counts = {'published': 0, 'retried': 0, 'failed': 0}
+            for row in rows:
+                error = errors.get(row.id)
+                if error is None:
+                    row.status = OUTBOX_PUBLISHED
+                    row.published_at = now
+                    row.last_error = None
+                    counts['published'] += 1
+                    continue
+                row.attempts += 1
+                row.last_error = error[:2000]
+                if row.attempts >= self.max_attempts:
+                    row.status = OUTBOX_FAILED
+                    counts['failed'] += 1
+                    logger.error(f"Giving up publishing {row.entity_id} to FIWARE: {error}")
+                    await self._forget_parcel_hash(session, row)
+                else:
+                    row.next_attempt_at = now + retry_delay(row.attempts)
+                    counts['retried'] += 1
+            await self._supersede_older(session, rows, errors, now)
+            await session.commit()
+            return counts
+
+    @staticmethod
+    async def _forget_parcel_hash(session, row: FiwareOutboxModel):
+        """
+        A farm's hash is recorded when its AgriParcel is queued. If that upsert is
+        given up on, clear it (and mark the farm dirty) so the parcel is queued
+        again on the farm's next save, or by the FIWARE backfill.
+        """
+        if row.entity_type != "AgriParcel" or row.operation != OPERATION_UPSERT or not row.payload:
+            return
+        farm_id = int(row.entity_id.rsplit(':', 1)[-1])
+        # Core update: no outbox row, updated_at unchanged; a newer queued version keeps its hash
+        await session.execute(
+            update(FarmModel)
+            .where(FarmModel.id == farm_id, FarmModel.fiware_hash == parcel_content_hash(row.payload))
+            .values(fiware_hash=None, fiware_dirty=True, updated_at=FarmModel.updated_at)
+        )
+
+    @staticmethod
+    async def _supersede_older(session, rows: List[FiwareOutboxModel], errors: Dict[int, str], now: datetime):
+        """Retire pending upserts/deletes older than the newest one published for their entity."""
+        published: Dict[str, int] = {}
+        for row in rows:
+            if row.operation != OPERATION_APPEND and row.id not in errors:
+                published[row.entity_id] = max(row.id, published.get(row.entity_id, 0))
+        if not published:
+            return
+        result = await session.execute(
+            select(FiwareOutboxModel.id, FiwareOutboxModel.entity_id).where(
+                FiwareOutboxModel.entity_id.in_(list(published)),
+                FiwareOutboxModel.status == OUTBOX_PENDING,
+                FiwareOutboxModel.operation != OPERATION_APPEND
+            )
+        )
+        older = [row_id for row_id, entity_id in result.all() if row_id < published[entity_id]]
+        if older:
+            await session.execute(
+                update(FiwareOutboxModel)
+                .where(FiwareOutboxModel.id.in_(older), FiwareOutboxModel.status == OUTBOX_PENDING)
+                .values(status=OUTBOX_SUPERSEDED, published_at=now)
+            )
+
+    async def _publish(self, session, rows: List[FiwareOutboxModel]) -> Dict[int, str]:
+        """Send the rows' operations; returns an error message per failed row ID."""
+        # Newest upsert/delete per entity; older ones are superseded and share its outcome
+        latest: Dict[str, FiwareOutboxModel] = {}
+        superseded: Dict[str, List[FiwareOutboxModel]] = {}
+        appends: List[FiwareOutboxModel] = []
+        for row in rows:
+            if row.operation == OPERATION_APPEND:
+                appends.append(row)
+            else:
+                latest[row.entity_id] = row
+                superseded.setdefault(row.entity_id, []).append(row)
+
+        errors: Dict[int, str] = {}
+        writer = FiwareBatchWriter(self.client, self.batch_size)
+        for entity_id, row in latest.items():
+            if row.operation == OPERATION_DELETE:
+                try:
+                    # False (404) means already deleted
+                    await self.client.delete_entity(entity_id)
+                except FiwareClientError as e:
+                    errors[row.id] = str(e)
+            else:
+                await writer.add(row.payload)
+        failed = (await writer.flush()).errors
+        for entity_id, row in latest.items():
+            error = errors.get(row.id) or failed.get(entity_id)
+            if error:
+                errors.update((older.id, error) for older in superseded[entity_id])
+
+        if appends:
+            await self._publish_appends(session, appends, errors)
+        return errors
+
+    async def _publish_appends(self, session, appends: List[FiwareOutboxModel], errors: Dict[int, str]):
+        """
+        Set the newest observation of each parcel attribute as the parcel's
+        current value, unless Orion already holds a newer one; store the
+        others in the parcel's QuantumLeap history.
+        """
+        farm_ids = {int(row.entity_id.rsplit(':', 1)[-1]) for row in appends}
+        result = await session.execute(
+            select(FarmModel.id, FarmModel.fiware_observed).where(FarmModel.id.in_(farm_ids))
+        )
+        observed = {farm_id: dict(values or {}) for farm_id, values in result.all()}
+
+        current: Dict[Tuple[str, str], FiwareOutboxModel] = {}
+        history: List[FiwareOutboxModel] = []
+        # The same observation saved again: only its latest value is sent
+        repeated: Dict[int, List[FiwareOutboxModel]] = {}
+        points: Dict[Tuple[str, str, str], FiwareOutboxModel] = {}
+        for row in appends:
+            attribute, observed_at = _observation(row)
+            older = points.get((row.entity_id, attribute, observed_at))
+            if older is not None:
+                repeated[row.id] = repeated.pop(older.id, []) + [older]
+            points[(row.entity_id, attribute, observed_at)] = row
+        for (entity_id, attribute, observed_at), row in sorted(points.items(), key=lambda item: item[0]):
+            farm_id = int(entity_id.rsplit(':', 1)[-1])
+            if observed_at < observed.get(farm_id, {}).get(attribute, ""):
+                history.append(row)
+                continue
+            previous = current.get((entity_id, attribute))
+            if previous is not None:
+                history.append(previous)
+            current[(entity_id, attribute)] = row
+
+        # One request per attribute, so no parcel appears twice in a batch request
+        advanced = set()
+        for attribute in sorted({attribute for _, attribute in current}):
+            sent = {entity_id: row for (entity_id, name), row in current.items() if name == attribute}
+            result = await self.client.upsert_entities([row.payload for row in sent.values()],
+                                                       chunk_size=self.batch_size)
+            for entity_id, row in sent.items():
+                if entity_id in result.errors:
+                    errors[row.id] = result.errors[entity_id]
+                else:
+                    farm_id = int(entity_id.rsplit(':', 1)[-1])
+                    observed.setdefault(farm_id, {})[attribute] = _observation(row)[1]
+                    advanced.add(farm_id)
+        for farm_id in advanced:
+            # Core update: bookkeeping only, no outbox row, updated_at unchanged
+            await session.execute(
+                update(FarmModel).where(FarmModel.id == farm_id)
+                .values(fiware_observed=observed[farm_id], updated_at=FarmModel.updated_at)
+            )
+
+        for i in range(0, len(history), self.batch_size):
+            chunk = history[i:i + self.batch_size]
+            try:
+                await self.quantumleap.notify([row.payload for row in chunk])
+            except FiwareClientError as e:
+                errors.update((row.id, str(e)) for row in chunk)
+
+        for row_id, older in repeated.items():
+            if row_id in errors:
+                errors.update((row.id, errors[row_id]) for row in older)
+
+    async def purge_published(self, older_than: timedelta) -> int:
+        """Delete published (or superseded) rows older than `older_than`. Returns the number deleted."""
+        cutoff = datetime.utcnow() - older_than
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(FiwareOutboxModel)
+                .where(FiwareOutboxModel.status.in_([OUTBOX_PUBLISHED, OUTBOX_SUPERSEDED]),
+                       FiwareOutboxModel.published_at < cutoff)
+            )
+            await session.commit()
+            return result.rowcount
+
+    async def backlog(self) -> Dict[str, int]:
+        """Row counts by status."""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(FiwareOutboxModel.status, func.count(FiwareOutboxModel.id))
+                .group_by(FiwareOutboxModel.status)
+            )
+            return {status: count for status, count in result.all()}
@@ -0,0 +1,475 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Durable job queue for satellite syncs and calculations.
+
+Jobs live in the `satellite_jobs` table. A worker claims a job by taking a
+lease (conditional UPDATE, so two workers never run the same job), renews the
+lease while it runs, and checkpoints the stage it reached together with the
+stage outputs. If the process dies, the lease expires and another worker (or
+the restarted one) claims the job and resumes from the last checkpoint.
+"""
+import asyncio
+import datetime
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update, and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models.job_model import SatelliteJobModel
+from app.infrastructure.pipeline.metrics import PipelineMetricsStore, collect
+from app.infrastructure.pipeline.work_scheduler import (
+    PRIORITY_NAMES,
+    PRIORITY_BATCH,
+    effective_priority
+)
+
+logger = logging.getLogger(__name__)
+
+# Farm sync job kinds
+NDVI_SYNC_JOB = 'ndvi_sync'
+SOIL_MOISTURE_SYNC_JOB = 'soil_moisture_sync'
+
+# Job status
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+# Pipeline stages, in order
+STAGE_QUEUED = 'queued'
+STAGE_SEARCHED = 'searched'
+STAGE_DOWNLOADED = 'downloaded'
+STAGE_PROCESSED = 'processed'
+STAGE_SAVED = 'saved'
+STAGE_SYNCED = 'synced'
+STAGES = [STAGE_QUEUED, STAGE_SEARCHED, STAGE_DOWNLOADED, STAGE_PROCESSED, STAGE_SAVED, STAGE_SYNCED]
+
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_RETRY_DELAY_SECONDS = 60
+DEFAULT_AGING_SECONDS = 300
+
+# Oldest claimable jobs per priority class considered by one claim
+CLAIM_CANDIDATES_PER_CLASS = 5
+
+# Minimum interval between download progress checkpoints
+PROGRESS_INTERVAL_SECONDS = 2.0
+
+
+def stage_reached(current: str, target: str) -> bool:
+    """True if `current` is at or past `target` in the pipeline."""
+    return STAGES.index(current) >= STAGES.index(target)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when a worker checkpoints a job whose lease it no longer holds."""
+
+
+class PermanentJobError(RuntimeError):
+    """Raised by a handler when retrying cannot help (bad input, no data)."""
+
+
+class JobProgress:
+    """
+    Stage and state of a running job.
+    `stage` is the stage of the work in flight; per-product stages needed to
+    resume live in `state`. Without a queue (direct calls outside the worker)
+    checkpoints are no-ops.
+    """
+
+    def __init__(self, queue: "JobQueue" = None, job_id: int = None,
+                 stage: str = STAGE_QUEUED, state: Optional[dict] = None,
+                 priority: Optional[int] = None):
+        self.queue = queue
+        self.job_id = job_id
+        self.priority = priority
+        self.stage = stage
+        self.state = state if state is not None else {}
+        self._last_report = 0.0
+
+    async def report_download(self, downloaded: int, total: int):
+        """Record download progress, checkpointing at most every PROGRESS_INTERVAL_SECONDS."""
+        self.state['download'] = {'bytes': downloaded, 'total': total}
+        now = time.monotonic()
+        if (total and downloaded >= total) or now - self._last_report >= PROGRESS_INTERVAL_SECONDS:
+            self._last_report = now
+            await self.checkpoint()
+
+    async def checkpoint(self, stage: Optional[str] = None):
+        """Persist the current state (and stage, if given)."""
+        if stage:
+            self.stage = stage
+        if self.queue is not None:
+            await self.queue.checkpoint(self.job_id, self.stage, self.state)
+
+
+class JobQueue:
+    """Lease-based job queue backed by the satellite_jobs table."""
+
+    def __init__(self, session_factory=AsyncSessionLocal, worker_id: Optional[str] = None,
+                 lease_seconds: int = DEFAULT_LEASE_SECONDS,
+                 retry_delay_seconds: int = DEFAULT_RETRY_DELAY_SECONDS,
+                 aging_seconds: float = DEFAULT_AGING_SECONDS):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.retry_delay_seconds = retry_delay_seconds
+        self.aging_seconds = aging_seconds
+
+    def _lease_expiry(self, now: datetime.datetime) -> datetime.datetime:
+        return now + datetime.timedelta(seconds=self.lease_seconds)
+
+    @staticmethod
+    def _claimable(now: datetime.datetime):
+        return or_(
+            and_(SatelliteJobModel.status == STATUS_PENDING, SatelliteJobModel.available_at <= now),
+            and_(SatelliteJobModel.status == STATUS_RUNNING, SatelliteJobModel.lease_expires_at < now),
+        )
+
+    async def enqueue(self, kind: str, farm_id: Optional[int] = None, payload: Optional[dict] = None,
+                      run_id: Optional[str] = None, dedupe_key: Optional[str] = None,
+                      max_attempts: int = 3, priority: int = PRIORITY_BATCH,
+                      user_id: Optional[int] = None) -> int:
+        """
+        Add a job. If `dedupe_key` matches a pending or running job,
+        that job's ID is returned instead of creating a new one (a pending
+        job is promoted if the new request is more urgent). A unique index
+        on active dedupe keys makes this hold for concurrent callers too.
+        """
+        async with self.session_factory() as session:
+            if dedupe_key:
+                existing_id = await self._promote_existing(session, dedupe_key, priority)
+                if existing_id is not None:
+                    return existing_id
+
+            job = SatelliteJobModel(
+                kind=kind,
+                farm_id=farm_id,
+                user_id=user_id,
+                run_id=run_id,
+                dedupe_key=dedupe_key,
+                status=STATUS_PENDING,
+                stage=STAGE_QUEUED,
+                payload=payload or {},
+                state={},
+                attempts=0,
+                max_attempts=max_attempts,
+                priority=priority,
+                available_at=datetime.datetime.utcnow()
+            )
+            session.add(job)
+            try:
+                await session.commit()
+            except IntegrityError:
+                if not dedupe_key:
+                    raise
+                # Another process enqueued the same job since our check
+                await session.rollback()
+                existing_id = await self._promote_existing(session, dedupe_key, priority)
+                if existing_id is None:
+                    raise
+                return existing_id
+            return job.id
+
+    @staticmethod
+    async def _promote_existing(session, dedupe_key: str, priority: int) -> Optional[int]:
+        """ID of the active job with `dedupe_key`, promoted to `priority` if more urgent; None if there is none."""
+        result = await session.execute(
+            select(SatelliteJobModel.id).where(
+                SatelliteJobModel.dedupe_key == dedupe_key,
+                SatelliteJobModel.status.in_([STATUS_PENDING, STATUS_RUNNING])
+            ).limit(1)
+        )
+        existing_id = result.scalar_one_or_none()
+        if existing_id is not None:
+            await session.execute(
+                update(SatelliteJobModel)
+                .where(SatelliteJobModel.id == existing_id, SatelliteJobModel.priority > priority)
+                .values(priority=priority)
+            )
+            await session.commit()
+        return existing_id
+
+    async def claim(self, kinds: Optional[Iterable[str]] = None,
+                    priorities: Optional[Iterable[int]] = None) -> Optional[SatelliteJobModel]:
+        """
+        Claim the most urgent runnable job (pending, or running with an expired
+        lease) among the given kinds and priority classes. Urgency is the
+        priority class improved by one level per `aging_seconds` of waiting.
+        Returns the claimed job, or None if there is nothing to do.
+        """
+        now = datetime.datetime.utcnow()
+        classes = list(priorities) if priorities is not None else list(PRIORITY_NAMES)
+        async with self.session_factory() as session:
+            candidates = []
+            for priority in classes:
+                query = select(SatelliteJobModel.id, SatelliteJobModel.available_at).where(
+                    self._claimable(now), SatelliteJobModel.priority == priority
+                )
+                if kinds:
+                    query = query.where(SatelliteJobModel.kind.in_(list(kinds)))
+                result = await session.execute(
+                    query.order_by(SatelliteJobModel.id.asc()).limit(CLAIM_CANDIDATES_PER_CLASS)
+                )
+                for job_id, available_at in result.all():
+                    waited = (now - (available_at or now)).total_seconds()
+                    candidates.append((effective_priority(priority, waited, self.aging_seconds), job_id))
+
+            for _, job_id in sorted(candidates):
+                # Conditional update: only one worker wins the lease
+                claimed = await session.execute(
+                    update(SatelliteJobModel)
+                    .where(SatelliteJobModel.id == job_id, self._claimable(now))
+                    .values(
+                        status=STATUS_RUNNING,
+                        lease_owner=self.worker_id,
+                        lease_expires_at=self._lease_expiry(now),
+                        attempts=SatelliteJobModel.attempts + 1,
+                        started_at=now
+                    )
+                )
+                await session.commit()
+                if claimed.rowcount == 1:
+                    job = await session.get(SatelliteJobModel, job_id)
+                    await session.refresh(job)
+                    return job
+        return None
+
+    async def _update_owned(self, job_id: int, **values) -> bool:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(SatelliteJobModel)
+                .where(SatelliteJobModel.id == job_id, SatelliteJobModel.lease_owner == self.worker_id)
+                .values(**values)
+            )
+            await session.commit()
+            return result.rowcount == 1
+
+    async def heartbeat(self, job_id: int) -> bool:
+        """Renew the lease of a running job. Returns False if the lease was lost."""
+        now = datetime.datetime.utcnow()
+        return await self._update_owned(job_id, lease_expires_at=self._lease_expiry(now))
+
+    async def checkpoint(self, job_id: int, stage: str, state: dict):
+        """Persist stage and state, renewing the lease."""
+        now = datetime.datetime.utcnow()
+        ok = await self._update_owned(
+            job_id, stage=stage, state=dict(state), lease_expires_at=self._lease_expiry(now)
+        )
+        if not ok:
+            raise LeaseLostError(f"Lease on job {job_id} was lost")
+
+    async def complete(self, job_id: int, state: Optional[dict] = None):
+        """Mark a job done. Raises LeaseLostError if another worker holds it by now."""
+        values = dict(
+            status=STATUS_DONE,
+            finished_at=datetime.datetime.utcnow(),
+            lease_owner=None,
+            lease_expires_at=None,
+            last_error=None
+        )
+        if state is not None:
+            values['state'] = dict(state)
+        if not await self._update_owned(job_id, **values):
+            raise LeaseLostError(f"Lease on job {job_id} was lost")
+
+    async def release(self, job_id: int):
+        """
+        Hand a job back without failing it (worker shutdown): it is claimable at
+        once, resumes from its checkpoint, and the interrupted attempt is not counted.
+        """
+        await self._update_owned(
+            job_id,
+            status=STATUS_PENDING,
+            lease_owner=None,
+            lease_expires_at=None,
+            available_at=datetime.datetime.utcnow(),
+            attempts=SatelliteJobModel.attempts - 1
+        )
+
+    async def fail(self, job_id: int, error: str, retry: bool = True):
+        """Record a failure; the job is retried with backoff until max_attempts."""
+        now = datetime.datetime.utcnow()
+        async with self.session_factory() as session:
+            job = await session.get(SatelliteJobModel, job_id)
+            if job is None or job.lease_owner != self.worker_id:
+                return
+            job.last_error = error[:2000]
+            job.lease_owner = None
+            job.lease_expires_at = None
+            if retry and job.attempts < job.max_attempts:
+                job.status = STATUS_PENDING
+                job.available_at = now + datetime.timedelta(seconds=self.retry_delay_seconds * job.attempts)
+            else:
+                job.status = STATUS_FAILED
+                job.finished_at = now
+            await session.commit()
+
+    async def get(self, job_id: int) -> Optional[SatelliteJobModel]:
+        async with self.session_factory() as session:
+            return await session.get(SatelliteJobModel, job_id)
+
+    async def active_file_keys(self) -> List[str]:
+        """
+        Names of the products, and of the files computed from them, that pending
+        or running jobs of any process still use (a retried job resumes from them).
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(SatelliteJobModel.state).where(
+                    SatelliteJobModel.status.in_([STATUS_PENDING, STATUS_RUNNING])
+                )
+            )
+            states = result.scalars().all()
+
+        keys = set()
+        for state in states:
+            if not isinstance(state, dict):
+                continue
+            for product in state.get('products') or []:
+                if isinstance(product, dict) and product.get('title'):
+                    keys.add(product['title'])
+            for product_result in (state.get('results') or {}).values():
+                if not isinstance(product_result, dict):
+                    continue
+                paths = [product_result.get('safe_path'), *product_result.get('out_paths', [])]
+                keys.update(os.path.basename(path) for path in paths if path)
+        return sorted(keys)
+
+
+JobHandler = Callable[[SatelliteJobModel, JobProgress], Awaitable[Any]]
+
+
+class JobWorker:
+    """Claims jobs from a JobQueue and runs them with bounded concurrency."""
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, JobHandler],
+                 concurrency: int = 1, poll_interval: float = 5.0,
+                 class_caps: Optional[Dict[int, int]] = None):
+        self.queue = queue
+        self.handlers = handlers
+        self.metrics = PipelineMetricsStore(queue.session_factory)
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        # Jobs of one priority class never take every slot, so urgent jobs can still be claimed
+        self.class_caps = class_caps or {}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._running: Dict[int, int] = {}
+        self._tasks = set()
+        self._stopping = False
+
+    def _open_classes(self):
+        return [
+            priority for priority in PRIORITY_NAMES
+            if self._running.get(priority, 0) < self.class_caps.get(priority, self.concurrency)
+        ]
+
+    async def run(self):
+        """Poll for jobs until stop() is called."""
+        logger.info(f"Job worker {self.queue.worker_id} started (concurrency={self.concurrency})")
+        while not self._stopping:
+            await self._slots.acquire()
+            try:
+                job = await self.queue.claim(kinds=self.handlers.keys(), priorities=self._open_classes())
+            except Exception as e:
+                logger.error(f"Error claiming job: {e}")
+                job = None
+            if job is None:
+                self._slots.release()
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            task = asyncio.create_task(self._run_job(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def stop(self):
+        self._stopping = True
+
+    async def shutdown(self):
+        """Stop claiming, cancel in-flight jobs and wait until they have handed their leases back."""
+        self.stop()
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_until_idle(self):
+        """Run jobs until none are claimable (used by tests and one-shot runs)."""
+        while True:
+            job = await self.queue.claim(kinds=self.handlers.keys())
+            if job is None:
+                return
+            await self._run_job(job, release_slot=False)
+
+    async def _heartbeat(self, job_id: int, handler: asyncio.Task) -> bool:
+        """
+        Renew the lease while the handler runs. If the lease is lost (another
+        worker claimed the job), cancel the handler and return True.
+        """
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            if not await self.queue.heartbeat(job_id):
+                logger.warning(f"Lost lease on job {job_id}, cancelling it")
+                handler.cancel()
+                return True
+
+    async def _save_metrics(self, run_metrics):
+        try:
+            await self.metrics.save(run_metrics)
+        except Exception as e:
+            logger.warning(f"Could not save pipeline metrics of run {run_metrics.run_id}: {e}")
+
+    async def _run_job(self, job: SatelliteJobModel, release_slot: bool = True):
+        progress = JobProgress(self.queue, job.id, job.stage, dict(job.state or {}), priority=job.priority)
+        self._running[job.priority] = self._running.get(job.priority, 0) + 1
+        # Stage metrics of jobs without a run (interactive calculations) are grouped per kind and day
+        run_id = job.run_id or f"{job.kind}:{datetime.date.today().isoformat()}"
+        heartbeat = None
+        try:
+            with collect(run_id) as run_metrics:
+                if job.stage != STAGE_QUEUED:
+                    logger.info(f"Resuming job {job.id} ({job.kind}) from stage '{job.stage}'")
+                handler = asyncio.create_task(self.handlers[job.kind](job, progress))
+                heartbeat = asyncio.create_task(self._heartbeat(job.id, handler))
+                try:
+                    await handler
+                except asyncio.CancelledError:
+                    lease_lost = heartbeat.done() and not heartbeat.cancelled() and not heartbeat.exception()
+                    if lease_lost and heartbeat.result():
+                        raise LeaseLostError(f"Lease on job {job.id} was lost")
+                    raise
+            await self.queue.complete(job.id, progress.state)
+        except LeaseLostError as e:
+            # The new lease holder runs (and completes) the job
+            logger.warning(f"Job {job.id} ({job.kind}) abandoned: {e}")
+        except asyncio.CancelledError:
+            # Worker shutdown: another worker (or this one, restarted) resumes it at once
+            logger.info(f"Job {job.id} ({job.kind}) interrupted at stage '{progress.stage}', releasing it")
+            await self.queue.release(job.id)
+            raise
+        except PermanentJobError as e:
+            logger.warning(f"Job {job.id} ({job.kind}) failed permanently: {e}")
+            await self.queue.fail(job.id, str(e), retry=False)
+        except Exception as e:
+            logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempts}/{job.max_attempts} failed: {e}")
+            await self.queue.fail(job.id, str(e))
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            await self._save_metrics(run_metrics)
+            self._running[job.priority] -= 1
+            if release_slot:
+                self._slots.release()
@@ -0,0 +1,74 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Database advisory lock with an expiring lease.
+
+Works on any SQL backend (SQLite included): the lock is a row in
+`advisory_locks`, taken by inserting it or by a conditional UPDATE when the
+current lease has expired. The holder renews the lease well before it
+expires; if it dies, another process takes over after the TTL.
+"""
+import datetime
+import logging
+from typing import Optional
+
+from sqlalchemy import update, delete, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models.lock_model import AdvisoryLockModel
+from app.infrastructure.pipeline.job_queue import default_worker_id
+
+logger = logging.getLogger(__name__)
+
+
+class AdvisoryLock:
+    """A named lock held by one owner at a time."""
+
+    def __init__(self, name: str, owner: Optional[str] = None, ttl_seconds: int = 60,
+                 session_factory=AsyncSessionLocal):
+        self.name = name
+        self.owner = owner or default_worker_id()
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+
+    async def acquire(self) -> bool:
+        """Take or renew the lock. Returns True if this owner holds it afterwards."""
+        now = datetime.datetime.utcnow()
+        expires_at = now + datetime.timedelta(seconds=self.ttl_seconds)
+
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(AdvisoryLockModel)
+                .where(
+                    AdvisoryLockModel.name == self.name,
+                    or_(AdvisoryLockModel.owner == self.owner, AdvisoryLockModel.expires_at < now)
+                )
+                .values(owner=self.owner, expires_at=expires_at)
+            )
+            await session.commit()
+            if result.rowcount == 1:
+                return True
+
+            # No row yet (first run): the insert fails if another process won the race
+            session.add(AdvisoryLockModel(
+                name=self.name, owner=self.owner, expires_at=expires_at, acquired_at=now
+            ))
+            try:
+                await session.commit()
+                return True
+            except IntegrityError:
+                await session.rollback()
+                return False
+
+    async def release(self):
+        """Drop the lock if this owner holds it."""
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(AdvisoryLockModel).where(
+                    AdvisoryLockModel.name == self.name,
+                    AdvisoryLockModel.owner == self.owner
+                )
+            )
+            await session.commit()
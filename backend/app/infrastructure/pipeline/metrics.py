@@ -0,0 +1,239 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Per-stage instrumentation of the satellite pipeline.
+
+Code wraps each stage (catalogue search, download, unzip, band decode, index
+computation, DB writes, FIWARE sync) in `stage(name)`. Every stage emits one
+structured `key=value` log line with its duration, byte count and the process
+peak RSS, and is added to the RunMetrics collected for the current context.
+JobWorker collects one RunMetrics per job and merges it into the
+`pipeline_stage_metrics` table under the job's run ID, so a slow nightly run
+can be broken down by stage afterwards.
+"""
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models.metrics_model import PipelineStageMetricsModel
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Stage names
+STAGE_ENQUEUE = 'enqueue'
+STAGE_SEARCH = 'search'
+STAGE_DOWNLOAD = 'download'
+STAGE_UNZIP = 'unzip'
+STAGE_DECODE = 'decode'
+STAGE_COMPUTE = 'compute'
+STAGE_DB_WRITE = 'db_write'
+STAGE_FIWARE_SYNC = 'fiware_sync'
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of the process so far, in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageStats:
+    __slots__ = ('count', 'errors', 'seconds', 'max_seconds', 'bytes', 'items', 'peak_rss_mb')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+        self.items = 0
+        self.peak_rss_mb = None
+
+    def add(self, seconds: float, nbytes: int = 0, items: int = 0,
+            rss_mb: Optional[float] = None, error: bool = False):
+        self.count += 1
+        self.errors += int(error)
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.bytes += nbytes
+        self.items += items
+        if rss_mb is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, rss_mb)
+
+
+class RunMetrics:
+    """Stage statistics collected for one run (or one job of a run)."""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.stages: Dict[str, StageStats] = {}
+
+    def record(self, stage: str, seconds: float, nbytes: int = 0, items: int = 0,
+               rss_mb: Optional[float] = None, error: bool = False):
+        self.stages.setdefault(stage, StageStats()).add(seconds, nbytes, items, rss_mb, error)
+
+
+_current_run: contextvars.ContextVar[Optional[RunMetrics]] = contextvars.ContextVar(
+    'pipeline_run_metrics', default=None
+)
+
+
+@contextmanager
+def collect(run_id: str):
+    """Collect the stages run in this context (and tasks created from it) into a RunMetrics."""
+    run = RunMetrics(run_id)
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+class StageTimer:
+    """Handle yielded by `stage()`; set `bytes` / `items` once they are known."""
+    __slots__ = ('bytes', 'items')
+
+    def __init__(self, nbytes: int = 0, items: int = 0):
+        self.bytes = nbytes
+        self.items = items
+
+
+def record_stage(stage_name: str, seconds: float, nbytes: int = 0, items: int = 0, error: bool = False):
+    """Log a measured stage and add it to the current run, if any."""
+    rss_mb = peak_rss_mb()
+    run = _current_run.get()
+    logger.info(
+        f"pipeline_stage stage={stage_name} run={run.run_id if run else '-'} "
+        f"seconds={seconds:.3f} bytes={nbytes} items={items} "
+        f"peak_rss_mb={rss_mb if rss_mb is None else round(rss_mb, 1)} error={error}"
+    )
+    if run is not None:
+        run.record(stage_name, seconds, nbytes, items, rss_mb, error)
+
+
+@contextmanager
+def stage(stage_name: str, nbytes: int = 0, items: int = 0):
+    """Time a pipeline stage. Works around sync code and around awaits alike."""
+    timer = StageTimer(nbytes, items)
+    started = time.perf_counter()
+    error = False
+    try:
+        yield timer
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record_stage(stage_name, time.perf_counter() - started, timer.bytes, timer.items, error)
+
+
+class PipelineMetricsStore:
+    """Per-run stage metrics in the `pipeline_stage_metrics` table."""
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+
+    async def save(self, run: RunMetrics):
+        """Add a run's stage statistics to the stored totals of its run ID."""
+        if not run.stages:
+            return
+        async with self.session_factory() as session:
+            for stage_name, stats in run.stages.items():
+                if not await self._increment(session, run.run_id, stage_name, stats):
+                    session.add(PipelineStageMetricsModel(
+                        run_id=run.run_id,
+                        stage=stage_name,
+                        count=stats.count,
+                        errors=stats.errors,
+                        total_seconds=stats.seconds,
+                        max_seconds=stats.max_seconds,
+                        total_bytes=stats.bytes,
+                        items=stats.items,
+                        peak_rss_mb=stats.peak_rss_mb
+                    ))
+                    try:
+                        await session.commit()
+                    except IntegrityError:
+                        # Another worker inserted the row first
+                        await session.rollback()
+                        await self._increment(session, run.run_id, stage_name, stats)
+                        await session.commit()
+                else:
+                    await session.commit()
+
+    @staticmethod
+    async def _increment(session, run_id: str, stage_name: str, stats: StageStats) -> bool:
+        model = PipelineStageMetricsModel
+        values = dict(
+            count=model.count + stats.count,
+            errors=model.errors + stats.errors,
+            total_seconds=model.total_seconds + stats.seconds,
+            max_seconds=case((model.max_seconds < stats.max_seconds, stats.max_seconds), else_=model.max_seconds),
+            total_bytes=model.total_bytes + stats.bytes,
+            items=model.items + stats.items,
+        )
+        if stats.peak_rss_mb is not None:
+            values['peak_rss_mb'] = case(
+                (or_(model.peak_rss_mb.is_(None), model.peak_rss_mb < stats.peak_rss_mb), stats.peak_rss_mb),
+                else_=model.peak_rss_mb
+            )
+        result = await session.execute(
+            update(model).where(model.run_id == run_id, model.stage == stage_name).values(**values)
+        )
+        return result.rowcount > 0
+
+    async def get_run(self, run_id: str) -> List[PipelineStageMetricsModel]:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(PipelineStageMetricsModel)
+                .where(PipelineStageMetricsModel.run_id == run_id)
+                .order_by(PipelineStageMetricsModel.id)
+            )
+            return list(result.scalars().all())
+
+    async def list_runs(self, limit: int = 20) -> List[List[PipelineStageMetricsModel]]:
+        """Stage rows of the most recently updated runs, newest first."""
+        last_update = func.max(PipelineStageMetricsModel.updated_at)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(PipelineStageMetricsModel.run_id)
+                .group_by(PipelineStageMetricsModel.run_id)
+                .order_by(last_update.desc())
+                .limit(limit)
+            )
+            run_ids = [row[0] for row in result.all()]
+        return [await self.get_run(run_id) for run_id in run_ids]
+
+    async def stage_totals(self, run_prefix: str) -> Dict[str, StageStats]:
+        """Stage totals over all stored runs whose ID starts with `run_prefix` (e.g. 'ndvi_sync:')."""
+        model = PipelineStageMetricsModel
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(
+                    model.stage,
+                    func.sum(model.count),
+                    func.sum(model.total_seconds),
+                    func.sum(model.total_bytes),
+                    func.sum(model.items)
+                )
+                .where(model.run_id.like(f"{run_prefix}%"))
+                .group_by(model.stage)
+            )
+            totals = {}
+            for stage_name, count, seconds, nbytes, items in result.all():
+                stats = StageStats()
+                stats.count, stats.seconds, stats.bytes, stats.items = count or 0, seconds or 0.0, nbytes or 0, items or 0
+                totals[stage_name] = stats
+            return totals
@@ -0,0 +1,103 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Satellite overpass helpers.
+Decides whether a new acquisition is plausible for a farm, based on the
+cadence observed in previous catalogue searches.
+"""
+import datetime
+import statistics
+from typing import Iterable, Optional
+
+# Nominal revisit (days) over Vietnam
+NOMINAL_REVISIT_DAYS = {
+    'SENTINEL-2': 5.0,
+    'SENTINEL-1': 12.0,
+}
+DEFAULT_REVISIT_DAYS = 5.0
+
+# Products usually appear in the CDSE catalogue 1-3 days after sensing,
+# so keep searching for a few days after each expected pass.
+PUBLICATION_WINDOW_DAYS = 3
+
+
+def estimate_cadence(
+    acquisition_dates: Iterable[datetime.date],
+    platform: str,
+    previous: Optional[float] = None
+) -> float:
+    """
+    Estimate the revisit interval (days) from observed acquisition dates.
+    Falls back to the previous estimate, then to the nominal revisit.
+    """
+    nominal = NOMINAL_REVISIT_DAYS.get(platform, DEFAULT_REVISIT_DAYS)
+    dates = sorted(set(acquisition_dates))
+    gaps = [(b - a).days for a, b in zip(dates, dates[1:])]
+    if not gaps:
+        return previous or nominal
+
+    cadence = float(statistics.median(gaps))
+    # Overlapping orbits can give 2-3 day gaps, a missing satellite doubles them
+    return max(1.0, min(cadence, 2 * nominal))
+
+
+def is_sync_due(
+    last_acquisition_date: Optional[datetime.date],
+    cadence_days: Optional[float],
+    last_checked_at: Optional[datetime.datetime],
+    platform: str,
+    today: Optional[datetime.date] = None
+) -> bool:
+    """
+    Return True if a catalogue search may find a new acquisition today.
+
+    A farm is due when it has never been checked, or when today falls inside
+    the publication window following one of its expected passes.
+    """
+    today = today or datetime.date.today()
+    if last_checked_at is None or last_acquisition_date is None:
+        return True
+    if last_checked_at.date() >= today:
+        return False
+
+    cadence = cadence_days or NOMINAL_REVISIT_DAYS.get(platform, DEFAULT_REVISIT_DAYS)
+    days_since = (today - last_acquisition_date).days
+    if days_since < cadence:
+        return False
+
+    # Expected passes at last + k * cadence; search during the window after each one
+    phase = (days_since - cadence) % cadence
+    return phase < PUBLICATION_WINDOW_DAYS
+
+
+def is_farm_due(state, platform: str, today: Optional[datetime.date] = None) -> bool:
+    """Check whether a new acquisition is plausible for a farm's sync state (None: never synced)."""
+    if state is None:
+        return True
+    return is_sync_due(
+        state.last_acquisition_date,
+        state.cadence_days,
+        state.last_checked_at,
+        platform,
+        today=today
+    )
+
+
+def search_start_date(
+    last_processed_date: Optional[datetime.date],
+    today: datetime.date,
+    lookback_days: int,
+    overlap_days: int
+) -> datetime.date:
+    """
+    First day of the catalogue search for an incremental sync.
+
+    Starts `overlap_days` before the sync watermark (the last acquisition
+    processed), so products published late are still picked up, and never
+    reaches further back than the full `lookback_days` window.
+    """
+    full_window_start = today - datetime.timedelta(days=lookback_days)
+    if last_processed_date is None:
+        return full_window_start
+    return max(full_window_start, last_processed_date - datetime.timedelta(days=overlap_days))
@@ -0,0 +1,213 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Single-flight coalescing of identical satellite computations.
+
+Concurrent callers with the same key await one computation and share its
+result instead of each searching, downloading and computing (and racing on
+the same `{title}.zip` in OUTPUT_DIR). Joining callers see the computation's
+stage and download progress on their own job. Across processes, the
+computation is additionally serialized by a database advisory lock and its
+result is saved: a second process waits for the first to finish and then
+reuses the saved result, or runs against the files and records the first one
+left behind (downloaded .SAFE, saved observations) if it has none.
+"""
+import asyncio
+import datetime
+import logging
+from contextlib import suppress
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import select, delete
+
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.database import AsyncSessionLocal
+from app.infrastructure.database.models.flight_result_model import SatelliteFlightResultModel
+from app.infrastructure.pipeline.job_queue import JobProgress
+from app.infrastructure.pipeline.leader_lock import AdvisoryLock
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Lock lease; renewed every third of it while the computation runs
+FLIGHT_LOCK_TTL_SECONDS = 120
+FLIGHT_LOCK_POLL_SECONDS = 2.0
+# Saved results are only read by processes that waited for them; older ones are pruned
+FLIGHT_RESULT_TTL_SECONDS = 3600
+
+
+class FlightLockLostError(RuntimeError):
+    """Another process took the flight lock over while the computation was running."""
+
+
+def flight_key(index: str, platform: str, bbox: List[float], start_date: str, end_date: str) -> str:
+    """Normalized key: bbox rounded to ~0.1 m, dates without their time part."""
+    coords = ','.join(f"{round(float(v), 6):.6f}" for v in bbox)
+    return f"{index}:{platform}:{coords}:{start_date.split('T')[0]}:{end_date.split('T')[0]}"
+
+
+class FlightProgress(JobProgress):
+    """
+    Progress of a shared computation, forwarded to the progress of every caller.
+    Failures to record a joiner's progress are logged; only the leader's stop the computation.
+    """
+
+    def __init__(self, leader: Optional[JobProgress] = None):
+        super().__init__(priority=leader.priority if leader else None)
+        self.leader = leader
+        self.joiners: List[JobProgress] = []
+
+    async def join(self, progress: JobProgress):
+        """Follow the computation from its current stage on."""
+        self.joiners.append(progress)
+        if self.stage != progress.stage:
+            await self._forward(progress, progress.checkpoint(self.stage))
+
+    async def report_download(self, downloaded: int, total: int):
+        self.state['download'] = {'bytes': downloaded, 'total': total}
+        if self.leader is not None:
+            await self.leader.report_download(downloaded, total)
+        for progress in list(self.joiners):
+            await self._forward(progress, progress.report_download(downloaded, total))
+
+    async def checkpoint(self, stage: Optional[str] = None):
+        if stage:
+            self.stage = stage
+        if self.leader is not None:
+            await self.leader.checkpoint(stage)
+        for progress in list(self.joiners):
+            await self._forward(progress, progress.checkpoint(stage))
+
+    async def _forward(self, progress: JobProgress, update: Awaitable):
+        try:
+            await update
+        except Exception as e:
+            logger.warning(f"Could not record progress of job {progress.job_id}: {e}")
+            self.joiners.remove(progress)
+
+
+class SingleFlight:
+    """Group of in-flight computations, keyed by a normalized request key."""
+
+    def __init__(self, use_db_lock: bool = True, lock_factory=AdvisoryLock,
+                 session_factory=AsyncSessionLocal):
+        self.use_db_lock = use_db_lock
+        self.lock_factory = lock_factory
+        self.session_factory = session_factory
+        self._flights: Dict[str, asyncio.Future] = {}
+        self._progress: Dict[str, FlightProgress] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def do(self, key: str, fn: Callable[[JobProgress], Awaitable[Any]],
+                 progress: Optional[JobProgress] = None) -> Any:
+        """
+        Run `fn` once for all concurrent callers with the same key. `fn` reports
+        to the progress it is given, which forwards to every caller's `progress`.
+        With the database lock, results must be JSON-serializable to be saved.
+        """
+        flight = self._flights.get(key)
+        if flight is not None:
+            logger.info(f"Joining in-flight computation {key}")
+            if progress is not None:
+                await self._progress[key].join(progress)
+            return await asyncio.shield(flight)
+
+        flight = asyncio.get_running_loop().create_future()
+        # Mark the exception as retrieved when nobody else is waiting
+        flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._flights[key] = flight
+        self._progress[key] = flight_progress = FlightProgress(progress)
+        try:
+            if self.use_db_lock:
+                result = await self._run_locked(key, fn, flight_progress)
+            else:
+                result = await fn(flight_progress)
+        except asyncio.CancelledError:
+            flight.set_exception(RuntimeError(f"Computation {key} was cancelled"))
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+            del self._progress[key]
+
+    async def _run_locked(self, key: str, fn: Callable[[JobProgress], Awaitable[Any]],
+                          progress: JobProgress) -> Any:
+        lock = self.lock_factory(f"flight:{key}", ttl_seconds=FLIGHT_LOCK_TTL_SECONDS)
+        waited_since = None
+        while not await lock.acquire():
+            if waited_since is None:
+                logger.info(f"Waiting for computation {key} running in another process")
+                waited_since = datetime.datetime.utcnow()
+            await asyncio.sleep(FLIGHT_LOCK_POLL_SECONDS)
+
+        async def renew():
+            while True:
+                await asyncio.sleep(FLIGHT_LOCK_TTL_SECONDS / 3)
+                if not await lock.acquire():
+                    raise FlightLockLostError(f"Lost the lock of computation {key}")
+
+        renewal = asyncio.create_task(renew())
+        work = None
+        try:
+            if waited_since is not None:
+                saved = await self._saved_result(key, waited_since)
+                if saved is not None:
+                    logger.info(f"Reusing the result of computation {key} from another process")
+                    return saved
+
+            work = asyncio.ensure_future(fn(progress))
+            await asyncio.wait({work, renewal}, return_when=asyncio.FIRST_COMPLETED)
+            if not work.done():
+                # Someone else holds the lock now: stop before both compute the same thing
+                work.cancel()
+                with suppress(asyncio.CancelledError):
+                    await work
+                renewal.result()
+            result = work.result()
+            await self._save_result(key, result)
+            return result
+        finally:
+            renewal.cancel()
+            if work is not None:
+                work.cancel()
+            await lock.release()
+
+    async def _saved_result(self, key: str, since: datetime.datetime) -> Any:
+        """Result saved for `key` by a computation that finished after `since`, if any."""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(SatelliteFlightResultModel.result).where(
+                    SatelliteFlightResultModel.key == key,
+                    SatelliteFlightResultModel.completed_at >= since
+                )
+            )
+            return result.scalar_one_or_none()
+
+    async def _save_result(self, key: str, result: Any):
+        """Save the result for processes waiting on the lock; a failure only costs them a recompute."""
+        now = datetime.datetime.utcnow()
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    delete(SatelliteFlightResultModel).where(
+                        (SatelliteFlightResultModel.key == key)
+                        | (SatelliteFlightResultModel.completed_at
+                           < now - datetime.timedelta(seconds=FLIGHT_RESULT_TTL_SECONDS))
+                    )
+                )
+                session.add(SatelliteFlightResultModel(key=key, result=result, completed_at=now))
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Could not save the result of computation {key}: {e}")
+
+
+# Shared by the calculate use cases
+satellite_flights = SingleFlight(use_db_lock=settings.SINGLE_FLIGHT_DB_LOCK)
@@ -0,0 +1,142 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Priority-aware admission for heavy satellite work (download + compute).
+
+Interactive calculations, user-triggered farm resyncs and the nightly batch
+share CDSE bandwidth, disk and CPU. Work enters through `slot(priority)`:
+at most `total_slots` pieces run at once, each class has its own cap, and
+when a slot frees up the most urgent waiter gets it. A waiter's effective
+priority improves by one class every `aging_seconds`, so a batch farm that
+keeps losing to interactive requests still runs eventually.
+"""
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from app.infrastructure.config.settings import get_settings
+
+settings = get_settings()
+
+# Priority classes, most urgent first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_RESYNC = 1
+PRIORITY_BATCH = 2
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_RESYNC: 'resync',
+    PRIORITY_BATCH: 'batch',
+}
+
+
+def effective_priority(priority: int, waited_seconds: float, aging_seconds: float) -> float:
+    """Priority after aging: one class better per `aging_seconds` of waiting."""
+    if aging_seconds <= 0:
+        return float(priority)
+    return priority - waited_seconds / aging_seconds
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'enqueued_at', 'future')
+
+    def __init__(self, priority: int, seq: int, enqueued_at: float, future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = enqueued_at
+        self.future = future
+
+
+class WorkScheduler:
+    """Priority semaphore with per-class caps and aging."""
+
+    def __init__(self, total_slots: int, class_caps: Optional[Dict[int, int]] = None,
+                 aging_seconds: float = 300.0, clock=time.monotonic):
+        self.total_slots = total_slots
+        self.class_caps = class_caps or {}
+        self.aging_seconds = aging_seconds
+        self.clock = clock
+        self._running: Dict[int, int] = {}
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    def stats(self) -> dict:
+        """Running and waiting counts per class name."""
+        return {
+            name: {
+                'running': self._running.get(priority, 0),
+                'waiting': sum(1 for w in self._waiters if w.priority == priority),
+                'cap': self.class_caps.get(priority, self.total_slots),
+            }
+            for priority, name in PRIORITY_NAMES.items()
+        }
+
+    def _has_room(self, priority: int) -> bool:
+        cap = self.class_caps.get(priority, self.total_slots)
+        return self.running < self.total_slots and self._running.get(priority, 0) < cap
+
+    def _take(self, priority: int):
+        self._running[priority] = self._running.get(priority, 0) + 1
+
+    def _dispatch(self):
+        """Hand free slots to the most urgent waiters whose class has room."""
+        now = self.clock()
+        while self._waiters and self.running < self.total_slots:
+            eligible = [w for w in self._waiters if self._has_room(w.priority)]
+            if not eligible:
+                return
+            best = min(eligible, key=lambda w: (
+                effective_priority(w.priority, now - w.enqueued_at, self.aging_seconds), w.seq
+            ))
+            self._waiters.remove(best)
+            self._take(best.priority)
+            best.future.set_result(None)
+
+    async def acquire(self, priority: int):
+        if not self._waiters and self._has_room(priority):
+            self._take(priority)
+            return
+
+        waiter = _Waiter(priority, next(self._seq), self.clock(), asyncio.get_running_loop().create_future())
+        self._waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted just before cancellation: give it back
+                self.release(priority)
+            raise
+
+    def release(self, priority: int):
+        self._running[priority] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE):
+        """Hold a work slot of the given priority class for the duration of the block."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+
+# Shared by the calculate use cases and the sync jobs of this process
+work_scheduler = WorkScheduler(
+    total_slots=settings.WORK_SLOTS,
+    class_caps={
+        PRIORITY_INTERACTIVE: settings.WORK_SLOTS_INTERACTIVE,
+        PRIORITY_RESYNC: settings.WORK_SLOTS_RESYNC,
+        PRIORITY_BATCH: settings.WORK_SLOTS_BATCH,
+    },
+    aging_seconds=settings.WORK_PRIORITY_AGING_SECONDS
+)
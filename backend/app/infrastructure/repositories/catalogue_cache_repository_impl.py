@@ -0,0 +1,40 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from typing import Dict, List
+from datetime import date, datetime
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.repositories.catalogue_cache_repository import CatalogueCacheRepository
+from app.infrastructure.database.models.catalogue_cache_model import CatalogueCacheModel
+
+class CatalogueCacheRepositoryImpl(CatalogueCacheRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_entries(self, data_type: str, farm_ids: List[int]) -> Dict[int, CatalogueCacheModel]:
+        result = await self.session.execute(
+            select(CatalogueCacheModel).where(
+                and_(
+                    CatalogueCacheModel.data_type == data_type,
+                    CatalogueCacheModel.farm_id.in_(farm_ids)
+                )
+            )
+        )
+        return {entry.farm_id: entry for entry in result.scalars().all()}
+
+    async def put(self, farm_id: int, data_type: str, platform: str, search_start: date,
+                  search_end: date, products: List[dict], fetched_at: datetime) -> CatalogueCacheModel:
+        entry = (await self.get_entries(data_type, [farm_id])).get(farm_id)
+        if entry is None:
+            entry = CatalogueCacheModel(farm_id=farm_id, data_type=data_type)
+            self.session.add(entry)
+
+        entry.satellite_platform = platform
+        entry.search_start = search_start
+        entry.search_end = search_end
+        entry.products = products
+        entry.fetched_at = fetched_at
+
+        await self.session.commit()
+        return entry
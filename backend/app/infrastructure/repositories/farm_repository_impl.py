@@ -156,6 +156,8 @@ class SQLAlchemyFarmRepository(FarmRepository):
             farm.area_size = area_size
         if crop_type is not None:
             farm.crop_type = crop_type
+        # Published to FIWARE on commit if the AgriParcel content changed
+        farm.mark_fiware_dirty()
         
         await self.db.commit()
         await self.db.refresh(farm)
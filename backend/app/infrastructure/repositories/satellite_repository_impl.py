@@ -1,7 +1,7 @@
 # Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import date
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -18,6 +18,38 @@ class SatelliteRepositoryImpl(SatelliteRepository):
         await self.session.refresh(data)
         return data
 
+    async def save_many(self, records: List[SatelliteDataModel]) -> List[SatelliteDataModel]:
+        """Save records in one transaction: all of them or none."""
+        self.session.add_all(records)
+        try:
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return records
+
+    async def upsert_many(self, records: List[SatelliteDataModel]) -> List[SatelliteDataModel]:
+        """
+        Save records in one transaction; a row already stored for the same farm,
+        data type and date is updated in place (e.g. recomputed for a new polygon).
+        """
+        saved = []
+        try:
+            for record in records:
+                existing = await self.get_existing_record(record.farm_id, record.data_type, record.acquisition_date)
+                if existing is None:
+                    self.session.add(record)
+                    saved.append(record)
+                    continue
+                for column in ('satellite_platform', 'mean_value', 'min_value', 'max_value', 'cloud_cover'):
+                    setattr(existing, column, getattr(record, column))
+                saved.append(existing)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return saved
+
     async def get_data_by_farm(self, farm_id: int, data_type: str, start_date: date, end_date: date) -> List[SatelliteDataModel]:
         query = select(SatelliteDataModel).where(
             and_(
@@ -41,3 +73,31 @@ class SatelliteRepositoryImpl(SatelliteRepository):
         )
         result = await self.session.execute(query)
         return result.scalars().first()
+
+    async def get_existing_dates(self, farm_id: int, data_type: str, start_date: date, end_date: date) -> Set[date]:
+        query = select(SatelliteDataModel.acquisition_date).where(
+            and_(
+                SatelliteDataModel.farm_id == farm_id,
+                SatelliteDataModel.data_type == data_type,
+                SatelliteDataModel.acquisition_date >= start_date,
+                SatelliteDataModel.acquisition_date <= end_date
+            )
+        )
+        result = await self.session.execute(query)
+        return set(result.scalars().all())
+
+    async def get_existing_dates_for_farms(self, farm_ids: List[int], data_type: str,
+                                           start_date: date, end_date: date) -> Dict[int, Set[date]]:
+        query = select(SatelliteDataModel.farm_id, SatelliteDataModel.acquisition_date).where(
+            and_(
+                SatelliteDataModel.farm_id.in_(farm_ids),
+                SatelliteDataModel.data_type == data_type,
+                SatelliteDataModel.acquisition_date >= start_date,
+                SatelliteDataModel.acquisition_date <= end_date
+            )
+        )
+        result = await self.session.execute(query)
+        dates: Dict[int, Set[date]] = {}
+        for farm_id, acquisition_date in result.all():
+            dates.setdefault(farm_id, set()).add(acquisition_date)
+        return dates
@@ -0,0 +1,69 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+from typing import Dict, List, Optional
+from datetime import date, datetime
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.repositories.sync_state_repository import SyncStateRepository
+from app.infrastructure.database.models.sync_state_model import SatelliteSyncStateModel
+from app.infrastructure.pipeline.overpass import estimate_cadence
+
+class SyncStateRepositoryImpl(SyncStateRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_states(self, data_type: str,
+                         farm_ids: Optional[List[int]] = None) -> Dict[int, SatelliteSyncStateModel]:
+        query = select(SatelliteSyncStateModel).where(SatelliteSyncStateModel.data_type == data_type)
+        if farm_ids is not None:
+            query = query.where(SatelliteSyncStateModel.farm_id.in_(farm_ids))
+        result = await self.session.execute(query)
+        return {state.farm_id: state for state in result.scalars().all()}
+
+    async def get_state(self, farm_id: int, data_type: str) -> Optional[SatelliteSyncStateModel]:
+        result = await self.session.execute(
+            select(SatelliteSyncStateModel).where(
+                and_(
+                    SatelliteSyncStateModel.farm_id == farm_id,
+                    SatelliteSyncStateModel.data_type == data_type
+                )
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def _get_or_create(self, farm_id: int, data_type: str) -> SatelliteSyncStateModel:
+        state = await self.get_state(farm_id, data_type)
+        if state is None:
+            state = SatelliteSyncStateModel(farm_id=farm_id, data_type=data_type)
+            self.session.add(state)
+        return state
+
+    async def record_check(self, farm_id: int, data_type: str, platform: str,
+                           acquisition_dates: List[date], checked_at: datetime) -> SatelliteSyncStateModel:
+        state = await self._get_or_create(farm_id, data_type)
+
+        known_dates = list(acquisition_dates)
+        if state.last_acquisition_date:
+            known_dates.append(state.last_acquisition_date)
+
+        state.satellite_platform = platform
+        state.cadence_days = estimate_cadence(known_dates, platform, previous=state.cadence_days)
+        if known_dates:
+            state.last_acquisition_date = max(known_dates)
+        state.last_checked_at = checked_at
+
+        await self.session.commit()
+        await self.session.refresh(state)
+        return state
+
+    async def advance_watermark(self, farm_id: int, data_type: str, platform: str,
+                                processed_date: date) -> SatelliteSyncStateModel:
+        state = await self._get_or_create(farm_id, data_type)
+        state.satellite_platform = platform
+        if state.last_processed_date is None or processed_date > state.last_processed_date:
+            state.last_processed_date = processed_date
+
+        await self.session.commit()
+        await self.session.refresh(state)
+        return state
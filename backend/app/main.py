@@ -4,6 +4,7 @@
 """
 Main FastAPI application entry point.
 """
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -18,7 +19,7 @@ from app.infrastructure.database import models
 from app.infrastructure.database.models.user_model import UserModel
 from app.infrastructure.security.jwt import get_password_hash
 from sqlalchemy.future import select
-from app.scheduler import start_scheduler
+from app.worker import run_worker
 
 settings = get_settings()
 
@@ -45,8 +46,11 @@ async def startup_event():
     # Startup: Initialize database
     await init_db()
     
-    # Start Scheduler
-    start_scheduler()
+    # Satellite jobs run in `python -m app.worker`; API processes only enqueue.
+    # Single-process setups can run the worker inside the API instead.
+    if settings.RUN_EMBEDDED_WORKER:
+        app.state.worker_stop = asyncio.Event()
+        app.state.worker_task = asyncio.create_task(run_worker(app.state.worker_stop))
     
     # Create admin user if not exists
     async with AsyncSessionLocal() as session:
@@ -77,6 +81,14 @@ async def startup_event():
         except Exception as e:
             logger.error(f"Error creating admin user: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the embedded worker, waiting for in-flight jobs to release their leases."""
+    worker_task = getattr(app.state, 'worker_task', None)
+    if worker_task is not None:
+        app.state.worker_stop.set()
+        await worker_task
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -5,7 +5,7 @@
 Admin API router.
 """
 from fastapi import APIRouter
-from app.presentation.api.admin.endpoints import admin_users, admin_farms
+from app.presentation.api.admin.endpoints import admin_users, admin_farms, admin_pipeline
 
 admin_router = APIRouter()
 
@@ -14,3 +14,6 @@ admin_router.include_router(admin_users.router, tags=["admin-users"])
 
 # Include admin farm management endpoints
 admin_router.include_router(admin_farms.router, tags=["admin-farms"])
+
+# Include satellite pipeline metrics endpoints
+admin_router.include_router(admin_pipeline.router, tags=["admin-pipeline"])
@@ -0,0 +1,110 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Admin satellite pipeline endpoints.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+
+from app.application.dto.job_dto import FiwareBackfillRequest, JobSubmissionResponse
+from app.application.dto.pipeline_metrics_dto import PipelineRunListDTO, PipelineRunReportDTO, SyncPlanDTO
+from app.application.use_cases.fiware_backfill_use_cases import SubmitFiwareBackfillUseCase
+from app.application.use_cases.pipeline_metrics_use_cases import (
+    ListPipelineRunsUseCase,
+    GetPipelineRunReportUseCase
+)
+from app.application.use_cases.sync_planner_use_cases import PlanSyncUseCase
+from app.presentation.deps import get_current_superuser
+from app.domain.entities.user import User
+
+router = APIRouter()
+
+
+@router.get("/pipeline/runs", response_model=PipelineRunListDTO)
+async def list_pipeline_runs(
+    limit: int = Query(20, ge=1, le=100, description="Number of runs"),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Per-stage metrics (time, bytes, memory) of the most recent satellite sync runs.
+    
+    Requires authentication.
+    """
+    use_case = ListPipelineRunsUseCase()
+    try:
+        return await use_case.execute(limit=limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve pipeline runs: {str(e)}"
+        )
+
+
+@router.get("/pipeline/runs/{run_id}", response_model=PipelineRunReportDTO)
+async def get_pipeline_run(
+    run_id: str,
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Per-stage report of one run, e.g. 'ndvi_sync:2025-01-31'.
+    
+    Requires authentication.
+    """
+    use_case = GetPipelineRunReportUseCase()
+    try:
+        return await use_case.execute(run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve pipeline run: {str(e)}"
+        )
+
+
+@router.get("/pipeline/plan", response_model=SyncPlanDTO)
+async def plan_sync(
+    data_type: str = Query("NDVI", description="NDVI or SOIL_MOISTURE"),
+    catch_up: bool = Query(False, description="Plan every farm, not only those with a pass due"),
+    backfill: bool = Query(False, description="Ignore sync watermarks (full look-back)"),
+    live: bool = Query(False, description="Search CDSE for farms without a cached catalogue search"),
+    workers: int = Query(1, ge=1, le=64, description="Worker processes sharing the batch"),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Dry-run plan of a sync: deduplicated products, download bytes,
+    estimated download/CPU time and completion time. Nothing is enqueued.
+    
+    Requires authentication.
+    """
+    use_case = PlanSyncUseCase()
+    try:
+        return await use_case.execute(
+            data_type=data_type, catch_up=catch_up, backfill=backfill, live=live, workers=workers
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to plan sync: {str(e)}"
+        )
+
+
+@router.post("/pipeline/fiware-backfill", response_model=JobSubmissionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_fiware_backfill(
+    request: Optional[FiwareBackfillRequest] = None,
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    Publish historical farms and satellite data to Orion and QuantumLeap.
+    Runs as a worker job that checkpoints its progress; follow it at
+    status_url (rows done, rows/s, ETA). A backfill already in progress is
+    returned instead of starting another.
+    
+    Requires admin privileges.
+    """
+    use_case = SubmitFiwareBackfillUseCase()
+    return await use_case.execute(request or FiwareBackfillRequest())
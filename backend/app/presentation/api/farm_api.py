@@ -2,13 +2,14 @@
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
 from app.application.dto.farm_dto import FarmAreaCreateDTO, FarmAreaUpdateDTO, FarmAreaResponseDTO
 from app.application.use_cases.farm_use_cases import (
     CreateFarmAreaUseCase, 
     GetUserFarmsUseCase,
     UpdateFarmAreaUseCase,
-    DeleteFarmAreaUseCase
+    DeleteFarmAreaUseCase,
+    ResyncFarmUseCase
 )
 from app.infrastructure.repositories.farm_repository_impl import SQLAlchemyFarmRepository
 from app.presentation.deps import get_current_user, get_farm_repository
@@ -36,6 +37,11 @@ def get_delete_farm_use_case(
 ) -> DeleteFarmAreaUseCase:
     return DeleteFarmAreaUseCase(farm_repository)
 
+def get_resync_farm_use_case(
+    farm_repository: SQLAlchemyFarmRepository = Depends(get_farm_repository)
+) -> ResyncFarmUseCase:
+    return ResyncFarmUseCase(farm_repository)
+
 @router.post("/", response_model=FarmAreaResponseDTO)
 async def create_farm_area(
     farm_data: FarmAreaCreateDTO,
@@ -75,3 +81,18 @@ async def delete_farm_area(
     if not success:
         raise HTTPException(status_code=404, detail="Không tìm thấy vùng trồng hoặc bạn không có quyền xóa")
     return {"message": "Xóa vùng trồng thành công"}
+
+@router.post("/{farm_id}/sync", status_code=status.HTTP_202_ACCEPTED)
+async def resync_farm_area(
+    farm_id: int,
+    use_case: ResyncFarmUseCase = Depends(get_resync_farm_use_case),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Queue an NDVI and Soil Moisture sync for a farm, ahead of the nightly batch.
+    Follow the jobs with GET /jobs/{job_id}. Only the owner can trigger a sync.
+    """
+    job_ids = await use_case.execute(farm_id, current_user.id)
+    if job_ids is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy vùng trồng hoặc bạn không có quyền đồng bộ")
+    return {"message": "Đã xếp lịch đồng bộ dữ liệu vệ tinh", "job_ids": job_ids}
@@ -4,15 +4,30 @@
 """
 FIWARE API endpoints for managing NGSI-LD entities.
 """
+import base64
+import hmac
+import json
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, status, Query, Header, Response
 from pydantic import BaseModel, Field
 from datetime import datetime, timezone
 
 from app.infrastructure.config.settings import get_settings
+from app.infrastructure.external_services.quantumleap_client import (
+    QuantumLeapClient,
+    AGGREGATION_METHODS,
+    AGGREGATION_PERIODS
+)
+from app.infrastructure.external_services.entity_cache import (
+    CachedEntityReader,
+    entity_cache
+)
 from app.infrastructure.external_services.fiware_client import (
     FiwareClient,
     FiwareClientError,
+    QUANTUMLEAP_ATTRIBUTES,
+    NOTIFICATION_TOKEN_HEADER,
+    ensure_quantumleap_subscription,
     create_agriparcel_entity,
     create_agriparcel_record,
     create_weather_observed,
@@ -31,11 +46,34 @@ class CoordinateModel(BaseModel):
     lng: float = Field(..., description="Longitude")
 
 
+class CircuitBreakerResponse(BaseModel):
+    state: str = Field(..., description="closed, open or half_open")
+    consecutive_failures: int
+    failure_threshold: int
+    reset_timeout_seconds: float
+    retry_after_seconds: float
+    successes: int
+    failures: int
+    rejected: int = Field(..., description="Calls failed fast while the circuit was open")
+    times_opened: int
+    last_error: Optional[str] = None
+
+
+class EntityCacheResponse(BaseModel):
+    entities: int
+    parcels_indexed: int = Field(..., description="Parcels whose complete record list is cached")
+    hits: int
+    misses: int
+    persisted: bool
+
+
 class FiwareHealthResponse(BaseModel):
     status: str
     orion_url: str
     orion_available: bool
     fiware_enabled: bool
+    circuit: CircuitBreakerResponse
+    entity_cache: EntityCacheResponse
 
 
 class FiwareEntityResponse(BaseModel):
@@ -47,7 +85,19 @@ class FiwareEntityResponse(BaseModel):
 class FiwareQueryResponse(BaseModel):
     success: bool
     entities: List[dict]
-    count: int
+    count: int = Field(..., description="Number of entities in this page")
+    total: Optional[int] = Field(None, description="Total number of matches, when requested with count=true")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; absent on the last page")
+
+
+class FarmEntitiesResponse(BaseModel):
+    farm_id: int
+    fiware_entity_id: str
+    farm_entity: Optional[dict] = None
+    observations: List[dict]
+    observation_count: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class SyncFarmRequest(BaseModel):
@@ -75,21 +125,73 @@ class WeatherObservationRequest(BaseModel):
     observed_at: Optional[datetime] = None
 
 
+class FarmHistoryResponse(BaseModel):
+    farm_id: int
+    entity_id: str
+    attribute: str
+    aggr_method: Optional[str] = None
+    aggr_period: Optional[str] = None
+    index: List[str] = Field(..., description="Timestamps (start of each period when aggregated)")
+    values: List[Optional[float]]
+
+
+class SubscriptionResponse(BaseModel):
+    success: bool
+    subscription_id: Optional[str] = None
+    message: str
+
+
+# ==================== Pagination ====================
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded))["offset"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(offset)
+        return offset
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _next_cursor(page, limit: int) -> Optional[str]:
+    """Cursor of the page after `page`, or None if it was the last one."""
+    end = page.offset + len(page.entities)
+    if len(page.entities) < limit or (page.total is not None and end >= page.total):
+        return None
+    return _encode_cursor(end)
+
+
+def _split_attrs(attrs: Optional[str]) -> Optional[List[str]]:
+    return [a.strip() for a in attrs.split(",") if a.strip()] if attrs else None
+
+
 # ==================== Endpoints ====================
 
 @router.get("/health", response_model=FiwareHealthResponse)
-async def check_fiware_health():
+async def check_fiware_health(
+    refresh: bool = Query(False, description="Bypass the cached health check result")
+):
     """
-    Check FIWARE Orion Context Broker health status.
+    Check FIWARE Orion Context Broker health status, with the state and
+    counters of the Orion circuit breaker and of the entity cache.
     """
     fiware = FiwareClient()
-    is_available = await fiware.health_check()
+    is_available = await fiware.health_check(use_cache=not refresh)
     
     return FiwareHealthResponse(
         status="healthy" if is_available else "unavailable",
         orion_url=settings.ORION_URL,
         orion_available=is_available,
-        fiware_enabled=settings.FIWARE_ENABLED
+        fiware_enabled=settings.FIWARE_ENABLED,
+        circuit=CircuitBreakerResponse(**fiware.breaker.stats()),
+        entity_cache=EntityCacheResponse(**entity_cache.stats())
     )
 
 
@@ -245,7 +347,8 @@ async def create_weather_entity(request: WeatherObservationRequest):
 @router.get("/entities/{entity_id}")
 async def get_entity(entity_id: str):
     """
-    Get an entity from FIWARE by its ID.
+    Get an entity from FIWARE by its ID. AgriParcel and AgriParcelRecord
+    entities are served from the entity cache when present.
     """
     if not settings.FIWARE_ENABLED:
         raise HTTPException(
@@ -253,6 +356,10 @@ async def get_entity(entity_id: str):
             detail="FIWARE integration is disabled"
         )
     
+    entity = await entity_cache.get(entity_id)
+    if entity is not None:
+        return entity
+    
     fiware = FiwareClient()
     
     if not await fiware.health_check():
@@ -262,7 +369,7 @@ async def get_entity(entity_id: str):
         )
     
     try:
-        entity = await fiware.get_entity(entity_id)
+        entity = await CachedEntityReader(fiware).get_entity(entity_id)
     except FiwareClientError as e:
         raise HTTPException(status_code=e.status_code, detail=f"FIWARE error: {e}") from e
     
@@ -298,6 +405,7 @@ async def delete_entity(entity_id: str):
         success = await fiware.delete_entity(entity_id)
     except FiwareClientError as e:
         raise HTTPException(status_code=e.status_code, detail=f"FIWARE error: {e}") from e
+    await entity_cache.remove(entity_id)
     
     if success:
         return FiwareEntityResponse(
@@ -316,10 +424,14 @@ async def delete_entity(entity_id: str):
 async def query_entities(
     entity_type: str = Query(..., description="Entity type to query (AgriParcel, AgriParcelRecord, WeatherObserved)"),
     q: Optional[str] = Query(None, description="NGSI-LD query filter"),
-    limit: int = Query(100, description="Maximum number of results", ge=1, le=1000)
+    limit: int = Query(100, description="Maximum number of results per page", ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    attrs: Optional[str] = Query(None, description="Comma-separated attributes to return"),
+    key_values: bool = Query(False, description="Return simplified keyValues entities"),
+    count: bool = Query(False, description="Include the total number of matches")
 ):
     """
-    Query entities from FIWARE by type.
+    Query entities from FIWARE by type, one page at a time.
     
     Example entity types:
     - AgriParcel: Farm/parcel entities
@@ -331,6 +443,7 @@ async def query_entities(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="FIWARE integration is disabled"
         )
+    offset = _decode_cursor(cursor)
     
     fiware = FiwareClient()
     
@@ -341,55 +454,188 @@ async def query_entities(
         )
     
     try:
-        entities = await fiware.query_entities(entity_type, q=q, limit=limit)
+        page = await fiware.query_page(
+            entity_type, q=q, limit=limit, offset=offset,
+            attrs=_split_attrs(attrs), key_values=key_values, count=count
+        )
     except FiwareClientError as e:
         raise HTTPException(status_code=e.status_code, detail=f"FIWARE error: {e}") from e
     
     return FiwareQueryResponse(
         success=True,
-        entities=entities,
-        count=len(entities)
+        entities=page.entities,
+        count=len(page.entities),
+        total=page.total,
+        next_cursor=_next_cursor(page, limit)
     )
 
 
-@router.get("/farms/{farm_id}/entities")
-async def get_farm_entities(farm_id: int):
+@router.get("/farms/{farm_id}/entities", response_model=FarmEntitiesResponse)
+async def get_farm_entities(
+    farm_id: int,
+    limit: int = Query(100, description="Maximum number of observations per page", ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    attrs: Optional[str] = Query(None, description="Comma-separated observation attributes to return"),
+    key_values: bool = Query(False, description="Return simplified keyValues entities"),
+    count: bool = Query(False, description="Include the total number of observations")
+):
     """
     Get all FIWARE entities related to a specific farm.
-    Returns the AgriParcel entity and all associated AgriParcelRecord observations.
+    Returns the AgriParcel entity and one page of its AgriParcelRecord
+    observations; follow next_cursor for the rest of the history. Both come
+    from the entity cache when it holds them, Orion is only read on a miss.
     """
     if not settings.FIWARE_ENABLED:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="FIWARE integration is disabled"
         )
+    offset = _decode_cursor(cursor)
     
+    farm_entity_id = f"urn:ngsi-ld:AgriParcel:OpenAgri:{farm_id}"
     fiware = FiwareClient()
+    reader = CachedEntityReader(fiware)
     
-    if not await fiware.health_check():
+    if (entity_cache.peek(farm_entity_id) is None or entity_cache.parcel_records(farm_entity_id) is None) \
+            and not await fiware.health_check():
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="FIWARE Orion is not available"
         )
     
-    # Get the farm entity
-    farm_entity_id = f"urn:ngsi-ld:AgriParcel:OpenAgri:{farm_id}"
     try:
-        farm_entity = await fiware.get_entity(farm_entity_id)
-        
-        # Query related observation records
-        observations = await fiware.query_entities(
-            "AgriParcelRecord",
-            q=f'hasAgriParcel=={farm_entity_id}',
-            limit=100
+        farm_entity = await reader.get_entity(farm_entity_id)
+        page = await reader.parcel_records_page(
+            farm_entity_id, offset, limit, _split_attrs(attrs), key_values
         )
     except FiwareClientError as e:
         raise HTTPException(status_code=e.status_code, detail=f"FIWARE error: {e}") from e
     
-    return {
-        "farm_id": farm_id,
-        "fiware_entity_id": farm_entity_id,
-        "farm_entity": farm_entity,
-        "observations": observations,
-        "observation_count": len(observations)
-    }
+    return FarmEntitiesResponse(
+        farm_id=farm_id,
+        fiware_entity_id=farm_entity_id,
+        farm_entity=farm_entity,
+        observations=page.entities,
+        observation_count=len(page.entities),
+        total=page.total if count else None,
+        next_cursor=_next_cursor(page, limit)
+    )
+
+
+@router.get("/farms/{farm_id}/history/{attribute}", response_model=FarmHistoryResponse)
+async def get_farm_history(
+    farm_id: int,
+    attribute: str,
+    from_date: Optional[datetime] = Query(None, description="Start of the range (ISO 8601)"),
+    to_date: Optional[datetime] = Query(None, description="End of the range (ISO 8601)"),
+    last_n: Optional[int] = Query(None, description="Only the last N values", ge=1, le=10000),
+    aggr_method: Optional[str] = Query(None, description=f"Aggregation: {', '.join(AGGREGATION_METHODS)}"),
+    aggr_period: Optional[str] = Query(None, description=f"Aggregation period: {', '.join(AGGREGATION_PERIODS)}")
+):
+    """
+    Observation history (ndvi, soilMoisture) of a farm from QuantumLeap.
+    Long ranges can be aggregated server side, e.g. aggr_method=avg&aggr_period=month.
+    """
+    if not settings.FIWARE_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="FIWARE integration is disabled"
+        )
+    if attribute not in QUANTUMLEAP_ATTRIBUTES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"attribute must be one of {', '.join(QUANTUMLEAP_ATTRIBUTES)}"
+        )
+    if aggr_method is not None and aggr_method not in AGGREGATION_METHODS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"aggr_method must be one of {', '.join(AGGREGATION_METHODS)}"
+        )
+    if aggr_period is not None and (aggr_method is None or aggr_period not in AGGREGATION_PERIODS):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"aggr_period requires aggr_method and must be one of {', '.join(AGGREGATION_PERIODS)}"
+        )
+    
+    try:
+        series = await QuantumLeapClient().get_parcel_series(
+            farm_id, attribute,
+            from_date=from_date,
+            to_date=to_date,
+            last_n=last_n,
+            aggr_method=aggr_method,
+            aggr_period=aggr_period
+        )
+    except FiwareClientError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"QuantumLeap error: {e}") from e
+    
+    return FarmHistoryResponse(
+        farm_id=farm_id,
+        entity_id=series.entity_id,
+        attribute=attribute,
+        aggr_method=aggr_method,
+        aggr_period=aggr_period,
+        index=series.index,
+        values=series.values
+    )
+
+
+@router.post("/subscriptions/quantumleap", response_model=SubscriptionResponse)
+async def subscribe_quantumleap():
+    """
+    Subscribe QuantumLeap to the observation attributes of AgriParcel
+    entities (no-op if the subscription exists).
+    """
+    if not settings.FIWARE_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="FIWARE integration is disabled"
+        )
+    
+    fiware = FiwareClient()
+    
+    if not await fiware.health_check():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="FIWARE Orion is not available"
+        )
+    
+    try:
+        subscription_id = await ensure_quantumleap_subscription(fiware)
+    except FiwareClientError as e:
+        raise HTTPException(status_code=e.status_code, detail=f"FIWARE error: {e}") from e
+    
+    if subscription_id:
+        return SubscriptionResponse(
+            success=True,
+            subscription_id=subscription_id,
+            message="QuantumLeap subscription is active"
+        )
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create QuantumLeap subscription"
+        )
+
+
+@router.post("/notifications", status_code=status.HTTP_204_NO_CONTENT)
+async def receive_notification(
+    notification: dict,
+    token: Optional[str] = Header(None, alias=NOTIFICATION_TOKEN_HEADER)
+):
+    """
+    Receiver of Orion notifications (see ensure_notification_subscription):
+    the changed AgriParcel / AgriParcelRecord entities are merged into the
+    entity cache. Requires the FIWARE_NOTIFICATION_TOKEN header; without a
+    configured token every notification is rejected.
+    """
+    if not settings.FIWARE_NOTIFICATION_TOKEN or not token or not hmac.compare_digest(
+        token.encode(), settings.FIWARE_NOTIFICATION_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid notification token"
+        )
+    
+    await entity_cache.put_many(notification.get("data", []), merge=True)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
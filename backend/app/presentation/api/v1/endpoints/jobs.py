@@ -0,0 +1,66 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+import asyncio
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from app.application.dto.job_dto import JobStatusResponse
+from app.application.use_cases.calculation_job_use_cases import GetJobStatusUseCase
+from app.domain.entities.user import User
+from app.infrastructure.pipeline.job_queue import JobQueue, STATUS_DONE, STATUS_FAILED
+from app.presentation.deps import get_current_user, get_job_queue
+
+router = APIRouter()
+
+# Interval between job status polls in the event stream
+EVENTS_POLL_SECONDS = 1.0
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: int,
+    queue: JobQueue = Depends(get_job_queue),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get status, progress (stage, bytes downloaded) and result of a satellite job.
+    Requires authentication; only the submitter (or the farm's owner, for syncs) can read a job.
+    """
+    use_case = GetJobStatusUseCase(queue)
+    return await use_case.execute(job_id, current_user)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: int,
+    request: Request,
+    queue: JobQueue = Depends(get_job_queue),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events stream of a job's status.
+    An event is sent whenever the status changes; the stream ends when the job is done or failed.
+    Requires authentication; only the submitter (or the farm's owner, for syncs) can read a job.
+    """
+    use_case = GetJobStatusUseCase(queue)
+    # Fail with 404 before the stream starts
+    status = await use_case.execute(job_id, current_user)
+
+    async def events():
+        nonlocal status
+        last = None
+        while True:
+            data = status.model_dump_json()
+            if data != last:
+                yield f"event: {status.status}\ndata: {data}\n\n"
+                last = data
+            if status.status in (STATUS_DONE, STATUS_FAILED) or await request.is_disconnected():
+                return
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+            status = await use_case.execute(job_id, current_user)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
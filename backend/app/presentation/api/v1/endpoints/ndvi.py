@@ -1,12 +1,15 @@
 # Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.application.dto.ndvi_dto import NDVIRequest, NDVIResponse
+from app.application.dto.job_dto import JobSubmissionResponse
 from app.application.use_cases.ndvi_use_cases import CalculateNDVIUseCase
+from app.application.use_cases.calculation_job_use_cases import SubmitCalculationJobUseCase, NDVI_CALCULATE_JOB
 from app.domain.entities.user import User
-from app.presentation.deps import get_current_user
+from app.infrastructure.pipeline.job_queue import JobQueue
+from app.presentation.deps import get_current_user, get_job_queue
 from app.infrastructure.database.database import get_db
 
 router = APIRouter()
@@ -24,3 +27,19 @@ async def calculate_ndvi(
     Requires authentication.
     """
     return await use_case.execute(request, db)
+
+
+@router.post("/calculate/jobs", response_model=JobSubmissionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_ndvi_job(
+    request: NDVIRequest,
+    queue: JobQueue = Depends(get_job_queue),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Submit an NDVI calculation as a background job and return immediately.
+    Identical pending requests of a user share one job. Follow it with
+    GET /jobs/{job_id} or the /jobs/{job_id}/events stream.
+    Requires authentication.
+    """
+    use_case = SubmitCalculationJobUseCase(queue)
+    return await use_case.execute(NDVI_CALCULATE_JOB, request, user_id=current_user.id)
@@ -1,15 +1,21 @@
 # Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
 # Licensed under the MIT License. See LICENSE file in the project root for full license information.
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.application.dto.soil_moisture_dto import (
     SoilMoistureRequest, SoilMoistureResponse,
     SoilMoistureQueryRequest, SoilMoistureQueryResponse
 )
+from app.application.dto.job_dto import JobSubmissionResponse
 from app.application.use_cases.soil_moisture_use_cases import CalculateSoilMoistureUseCase, GetSoilMoistureUseCase
+from app.application.use_cases.calculation_job_use_cases import (
+    SubmitCalculationJobUseCase,
+    SOIL_MOISTURE_CALCULATE_JOB
+)
 from app.domain.entities.user import User
-from app.presentation.deps import get_current_user, get_db
+from app.infrastructure.pipeline.job_queue import JobQueue
+from app.presentation.deps import get_current_user, get_db, get_job_queue
 
 router = APIRouter()
 
@@ -42,3 +48,19 @@ async def calculate_soil_moisture(
     Requires authentication.
     """
     return await use_case.execute(request)
+
+
+@router.post("/calculate/jobs", response_model=JobSubmissionResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_soil_moisture_job(
+    request: SoilMoistureRequest,
+    queue: JobQueue = Depends(get_job_queue),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Submit a Soil Moisture calculation as a background job and return immediately.
+    Identical pending requests of a user share one job. Follow it with
+    GET /jobs/{job_id} or the /jobs/{job_id}/events stream.
+    Requires authentication.
+    """
+    use_case = SubmitCalculationJobUseCase(queue)
+    return await use_case.execute(SOIL_MOISTURE_CALCULATE_JOB, request, user_id=current_user.id)
@@ -37,6 +37,10 @@ api_router.include_router(weather.router, prefix="/weather", tags=["weather"])
 from app.presentation.api.v1.endpoints import chatbot
 api_router.include_router(chatbot.router, prefix="/chatbot", tags=["chatbot"])
 
+# Satellite job status router
+from app.presentation.api.v1.endpoints import jobs
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+
 # FIWARE router
 from app.presentation.api.v1.endpoints import fiware
 api_router.include_router(fiware.router, prefix="/fiware", tags=["fiware"])
@@ -12,6 +12,7 @@ from app.infrastructure.config.settings import get_settings
 from app.infrastructure.database.database import get_db
 from app.infrastructure.repositories.user_repository_impl import SQLAlchemyUserRepository
 from app.infrastructure.repositories.farm_repository_impl import SQLAlchemyFarmRepository
+from app.infrastructure.pipeline.job_queue import JobQueue
 from app.domain.entities.user import User
 
 settings = get_settings()
@@ -26,6 +27,10 @@ def get_farm_repository(db: AsyncSession = Depends(get_db)) -> SQLAlchemyFarmRep
     """Dependency to get farm repository."""
     return SQLAlchemyFarmRepository(db)
 
+def get_job_queue() -> JobQueue:
+    """Dependency to get the satellite job queue."""
+    return JobQueue()
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     repository: SQLAlchemyUserRepository = Depends(get_user_repository)
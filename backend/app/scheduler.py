@@ -4,289 +4,440 @@
 import logging
 import asyncio
 import datetime
+import os
+import uuid
+from typing import Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 logger = logging.getLogger(__name__)
-from sqlalchemy import select
 from app.infrastructure.database.database import AsyncSessionLocal
 from app.infrastructure.database.models.farm_model import FarmModel
 from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
 from app.application.use_cases.ndvi_use_cases import CalculateNDVIUseCase
+from app.application.use_cases.calculation_job_use_cases import CALCULATION_JOB_HANDLERS
+from app.application.use_cases.soil_moisture_use_cases import (
+    SOIL_MOISTURE_LOOKBACK_DAYS,
+    select_soil_moisture_products
+)
 from app.infrastructure.external_services.sentinel_client import search_sentinel_products, download_product
-from app.infrastructure.image_processing.soil_moisture_processing import find_s1_band_path, compute_soil_moisture_proxy
+from app.infrastructure.image_processing.soil_moisture_processing import (
+    find_s1_band_path,
+    compute_sar_indices,
+    SOIL_MOISTURE,
+    SAR_VH,
+    SAR_VH_VV_RATIO
+)
+from app.infrastructure.image_processing.sar_access import release_sar_products
 from app.infrastructure.repositories.satellite_repository_impl import SatelliteRepositoryImpl
+from app.infrastructure.repositories.sync_state_repository_impl import SyncStateRepositoryImpl
+from app.infrastructure.repositories.catalogue_cache_repository_impl import CatalogueCacheRepositoryImpl
+from app.infrastructure.pipeline.overpass import is_farm_due, search_start_date
+from app.infrastructure.pipeline.farm_stream import backfill_farm_geometry, iter_farm_batches
+from app.infrastructure.pipeline.disk_budget import disk_budget, clean_orphaned_files, remove_product_files
+from app.infrastructure.pipeline.metrics import (
+    PipelineMetricsStore,
+    collect,
+    stage,
+    STAGE_ENQUEUE,
+    STAGE_DB_WRITE
+)
+from app.infrastructure.pipeline.job_queue import (
+    NDVI_SYNC_JOB,
+    SOIL_MOISTURE_SYNC_JOB,
+    JobProgress,
+    JobQueue,
+    JobWorker,
+    stage_reached,
+    STAGE_SEARCHED,
+    STAGE_DOWNLOADED,
+    STAGE_PROCESSED,
+    STAGE_SAVED,
+    STAGE_SYNCED
+)
+from app.infrastructure.pipeline.work_scheduler import (
+    work_scheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_RESYNC,
+    PRIORITY_BATCH
+)
 from app.domain.entities.farm import Coordinate
 from app.infrastructure.config.settings import get_settings
+from app.infrastructure.pipeline.fiware_outbox import FiwareOutboxDrainer
+from app.infrastructure.pipeline.fiware_backfill import FIWARE_BACKFILL_JOB, run_fiware_backfill_job
 from app.infrastructure.external_services.fiware_client import (
     FiwareClient,
-    sync_farm_to_fiware,
-    sync_observation_to_fiware
+    ensure_notification_subscription,
+    ensure_quantumleap_subscription
 )
+from app.infrastructure.external_services.entity_cache import entity_cache
 
 scheduler = AsyncIOScheduler()
 settings = get_settings()
 
-# Retry configuration
+# Retry configuration (applied by the job queue; the delay grows with each attempt)
 MAX_RETRIES = 3
 RETRY_DELAY_SECONDS = 60  # Wait 1 minute between retries
 
 
-async def sync_to_fiware_if_enabled(
-    farm,
-    data_type: str,
-    value: float,
-    acquisition_date: datetime.date
-):
+async def sync_soil_moisture_for_farm(farm_id: int, bbox: list, db, progress: Optional[JobProgress] = None,
+                                      backfill: bool = False):
     """
-    Sync observation data to FIWARE if enabled in settings.
-    
-    Args:
-        farm: Farm model instance
-        data_type: Type of data ('ndvi' or 'soilMoisture')
-        value: Measured value
-        acquisition_date: Date of observation
+    Sync Soil Moisture data for a single farm using Sentinel-1.
+    Stage-aware like CalculateNDVIUseCase.sync_latest_data_for_farm: a resumed
+    job continues from the stage recorded in `progress`, and the search starts
+    from the farm's sync watermark unless `backfill` is set, which also
+    recomputes the product and replaces data already saved for its date.
     """
-    if not settings.FIWARE_ENABLED:
-        return
-    
-    try:
-        fiware = FiwareClient()
-        
-        # Check FIWARE health first
-        if not await fiware.health_check():
-            logger.warning("FIWARE Orion is not available, skipping sync")
-            return
-        
-        # Sync farm entity
-        coords = farm.coordinates if hasattr(farm, 'coordinates') else []
-        await sync_farm_to_fiware(
-            fiware_client=fiware,
-            farm_id=farm.id,
-            farm_name=farm.name,
-            coordinates=coords,
-            crop_type=getattr(farm, 'crop_type', None)
-        )
-        
-        # Sync observation
-        observation_datetime = datetime.datetime.combine(
-            acquisition_date,
-            datetime.time(12, 0, 0)  # Default to noon
+    progress = progress or JobProgress()
+    state = progress.state
+    priority = progress.priority if progress.priority is not None else PRIORITY_BATCH
+
+    sync_states = SyncStateRepositoryImpl(db)
+    if 'products' not in state:
+        today = datetime.date.today()
+        sync_state = None if backfill else await sync_states.get_state(farm_id, 'SOIL_MOISTURE')
+        start_date = search_start_date(
+            sync_state.last_processed_date if sync_state else None,
+            today, SOIL_MOISTURE_LOOKBACK_DAYS, settings.SYNC_WATERMARK_OVERLAP_DAYS
+        ).strftime('%Y-%m-%d')
+        end_date = today.strftime('%Y-%m-%d')
+
+        logger.info(f"Syncing Soil Moisture for farm {farm_id} from {start_date} to {end_date}")
+
+        # Search Sentinel-1 products
+        _, products = await search_sentinel_products(bbox, start_date, end_date, platformname='SENTINEL-1')
+        checked_at = datetime.datetime.utcnow()
+        await sync_states.record_check(
+            farm_id, 'SOIL_MOISTURE', 'SENTINEL-1',
+            [datetime.date.fromisoformat(p['ingestiondate'][:10]) for p in products.values()],
+            checked_at
         )
-        await sync_observation_to_fiware(
-            fiware_client=fiware,
-            farm_id=farm.id,
-            observation_type=data_type,
-            value=value,
-            observed_at=observation_datetime
+        await CatalogueCacheRepositoryImpl(db).put(
+            farm_id, 'SOIL_MOISTURE', 'SENTINEL-1', datetime.date.fromisoformat(start_date), today,
+            list(products.values()), checked_at
         )
-        
-        logger.info(f"Synced {data_type} to FIWARE for farm {farm.id}")
-    except Exception as e:
-        logger.warning(f"Failed to sync to FIWARE for farm {farm.id}: {e}")
 
+        # Keep only the most recent product
+        state['products'] = select_soil_moisture_products(products)
+        state['stages'] = {p['uuid']: STAGE_SEARCHED for p in state['products']}
+        state['results'] = {}
+        await progress.checkpoint(STAGE_SEARCHED)
 
-async def sync_farm_with_retry(use_case: CalculateNDVIUseCase, farm_id: int, bbox: list, db, farm=None):
-    """
-    Sync NDVI data for a single farm with retry mechanism.
-    """
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            result = await use_case.sync_latest_data_for_farm(farm_id, bbox, db)
-            
-            # Sync to FIWARE if we have the farm and valid result
-            if farm and result and hasattr(result, 'mean_value'):
-                await sync_to_fiware_if_enabled(
-                    farm=farm,
-                    data_type='ndvi',
-                    value=result.mean_value,
-                    acquisition_date=result.acquisition_date
-                )
-            
-            return True
-        except Exception as e:
-            logger.warning(f"Attempt {attempt}/{MAX_RETRIES} failed for farm {farm_id}: {e}")
-            if attempt < MAX_RETRIES:
-                await asyncio.sleep(RETRY_DELAY_SECONDS)
-            else:
-                logger.error(f"All {MAX_RETRIES} attempts failed for farm {farm_id}")
-                return False
-
-
-async def sync_soil_moisture_for_farm(farm_id: int, bbox: list, db, farm=None):
-    """
-    Sync Soil Moisture data for a single farm using Sentinel-1.
-    """
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            today = datetime.date.today()
-            # Sentinel-1 revisit is 6-12 days, search last 14 days
-            start_date = (today - datetime.timedelta(days=14)).strftime('%Y-%m-%d')
-            end_date = today.strftime('%Y-%m-%d')
-            
-            logger.info(f"Syncing Soil Moisture for farm {farm_id} from {start_date} to {end_date}")
-            
-            # Search Sentinel-1 products
-            api, products = await search_sentinel_products(bbox, start_date, end_date, platformname='SENTINEL-1')
-            if not products:
-                logger.info(f"No Sentinel-1 products found for farm {farm_id}")
-                return True  # Not a failure, just no data
-            
-            # Get the most recent product
-            sorted_products = sorted(products.values(), key=lambda x: x['ingestiondate'], reverse=True)
-            prod = sorted_products[0]
-            
-            acquisition_date_str = prod['ingestiondate'].split('T')[0]
-            acquisition_date = datetime.datetime.strptime(acquisition_date_str, '%Y-%m-%d').date()
-            
-            # Check if already exists
-            repo = SatelliteRepositoryImpl(db)
-            existing = await repo.get_existing_record(farm_id, 'SOIL_MOISTURE', acquisition_date)
-            if existing:
-                logger.info(f"Soil Moisture data for farm {farm_id} on {acquisition_date} already exists")
-                return True
-            
+    if not state['products']:
+        logger.info(f"No Sentinel-1 products found for farm {farm_id}")
+        return
+
+    prod = state['products'][0]
+    product_id = prod['uuid']
+    if stage_reached(state['stages'][product_id], STAGE_SYNCED):
+        return
+
+    acquisition_date_str = prod['ingestiondate'].split('T')[0]
+    acquisition_date = datetime.datetime.strptime(acquisition_date_str, '%Y-%m-%d').date()
+    result = state['results'].get(product_id)
+
+    if state['stages'][product_id] == STAGE_SAVED:
+        # Saved by an earlier attempt that stopped before cleaning up
+        await sync_states.advance_watermark(farm_id, 'SOIL_MOISTURE', 'SENTINEL-1', acquisition_date)
+        await _finish_sar_product(prod, result, state, progress)
+        return
+
+    # Check if already exists (the product's indices are saved together, possibly
+    # without SOIL_MOISTURE if VV had no valid pixel)
+    repo = SatelliteRepositoryImpl(db)
+    existing = [
+        data_type for data_type in (SOIL_MOISTURE, SAR_VH, SAR_VH_VV_RATIO)
+        if await repo.get_existing_record(farm_id, data_type, acquisition_date)
+    ] if not backfill else []
+    if existing:
+        logger.info(f"Soil Moisture data for farm {farm_id} on {acquisition_date} already exists")
+        await _finish_sar_product(prod, result, state, progress)
+        await sync_states.advance_watermark(farm_id, 'SOIL_MOISTURE', 'SENTINEL-1', acquisition_date)
+        return
+
+    if result is None:
+        # Heavy work waits for a slot of this job's priority class
+        async with work_scheduler.slot(priority):
             logger.info(f"Downloading Sentinel-1 product for farm {farm_id}: {prod['title']}")
-            
-            # Download
-            from app.infrastructure.config.settings import get_settings
-            settings = get_settings()
-            out = await download_product(api, prod, out_dir=settings.OUTPUT_DIR)
-            
-            # Find VV band and compute
-            import os
-            import uuid as uuid_lib
-            vv_path = find_s1_band_path(out, polarization='vv')
-            out_tif = os.path.join(settings.OUTPUT_DIR, f'soil_moisture_{uuid_lib.uuid4().hex}.tif')
-            _, mean_val = compute_soil_moisture_proxy(vv_path, out_tif, bbox=bbox)
-            
-            # Save to DB
-            new_record = SatelliteDataModel(
-                farm_id=farm_id,
-                acquisition_date=acquisition_date,
-                data_type='SOIL_MOISTURE',
-                satellite_platform='SENTINEL-1',
-                mean_value=mean_val,
-                min_value=0.0,
-                max_value=1.0,
-                cloud_cover=0.0  # Sentinel-1 is all-weather
+
+            # Download (an extracted .SAFE from an interrupted attempt is reused)
+            out = await download_product(
+                None, prod, out_dir=settings.OUTPUT_DIR, on_progress=progress.report_download
             )
-            await repo.save_data(new_record)
-            logger.info(f"Saved Soil Moisture data for farm {farm_id} on {acquisition_date}")
-            
-            # Sync to FIWARE
-            if farm:
-                await sync_to_fiware_if_enabled(
-                    farm=farm,
-                    data_type='soilMoisture',
-                    value=mean_val,
-                    acquisition_date=acquisition_date
-                )
-            
-            # Cleanup
-            import shutil
+            state['stages'][product_id] = STAGE_DOWNLOADED
+            await progress.checkpoint(STAGE_DOWNLOADED)
+
+            # Find VV (and VH, for dual-pol products) and compute all indices in one pass
+            vv_path = find_s1_band_path(out, polarization='vv')
             try:
-                if os.path.exists(out) and os.path.isdir(out):
-                    shutil.rmtree(out)
-                zip_path = os.path.join(settings.OUTPUT_DIR, f"{prod['title']}.zip")
-                if os.path.exists(zip_path):
-                    os.remove(zip_path)
-                if os.path.exists(out_tif):
-                    os.remove(out_tif)
-            except Exception as cleanup_error:
-                logger.warning(f"Error cleaning up files for farm {farm_id}: {cleanup_error}")
-            
-            return True
-            
-        except Exception as e:
-            logger.warning(f"Soil Moisture attempt {attempt}/{MAX_RETRIES} failed for farm {farm_id}: {e}")
-            if attempt < MAX_RETRIES:
-                await asyncio.sleep(RETRY_DELAY_SECONDS)
-            else:
-                logger.error(f"All {MAX_RETRIES} Soil Moisture attempts failed for farm {farm_id}")
-                return False
-
-
-async def update_all_farms_ndvi():
+                vh_path = find_s1_band_path(out, polarization='vh')
+            except FileNotFoundError:
+                vh_path = None
+                logger.info(f"No VH band in {prod['title']}, computing VV products only")
+
+            data_types = [SOIL_MOISTURE, SAR_VH, SAR_VH_VV_RATIO] if vh_path else [SOIL_MOISTURE]
+            out_tifs = {
+                data_type: os.path.join(settings.OUTPUT_DIR, f'{data_type.lower()}_{uuid.uuid4().hex}.tif')
+                for data_type in data_types
+            }
+            indices = compute_sar_indices(
+                vv_path, out_tifs, vh_path=vh_path, bbox=bbox,
+                speckle_filter=settings.SAR_SPECKLE_FILTER or None,
+                speckle_size=settings.SAR_SPECKLE_FILTER_SIZE
+            )
+            _, mean_val, _, _ = indices[SOIL_MOISTURE]
+            result = {
+                'acquisition_date': acquisition_date_str,
+                'safe_path': out,
+                'out_paths': list(out_tifs.values()),
+                'mean': mean_val,
+                'indices': {
+                    data_type: [type_mean, type_min, type_max]
+                    for data_type, (_, type_mean, type_min, type_max) in indices.items()
+                }
+            }
+            state['results'][product_id] = result
+            state['stages'][product_id] = STAGE_PROCESSED
+            await progress.checkpoint(STAGE_PROCESSED)
+
+    # Save to DB: all indices of the product in one transaction, so the existence
+    # check above never sees a partly saved product.
+    records = []
+    for data_type, (type_mean, type_min, type_max) in result['indices'].items():
+        if type_mean is None:
+            # No valid pixel in the farm window: no reading, not a 0.0 one
+            logger.info(f"No valid {data_type} pixels for farm {farm_id} on {acquisition_date}, not saved")
+            continue
+        records.append(SatelliteDataModel(
+            farm_id=farm_id,
+            acquisition_date=acquisition_date,
+            data_type=data_type,
+            satellite_platform='SENTINEL-1',
+            mean_value=type_mean,
+            min_value=type_min,
+            max_value=type_max,
+            cloud_cover=0.0  # Sentinel-1 is all-weather
+        ))
+    with stage(STAGE_DB_WRITE, items=len(records)):
+        if backfill:
+            await repo.upsert_many(records)
+        else:
+            await repo.save_many(records)
+    state['stages'][product_id] = STAGE_SAVED
+    await progress.checkpoint(STAGE_SAVED)
+    await sync_states.advance_watermark(farm_id, 'SOIL_MOISTURE', 'SENTINEL-1', acquisition_date)
+    logger.info(f"Saved {', '.join(result['indices'])} data for farm {farm_id} on {acquisition_date}")
+
+    await _finish_sar_product(prod, result, state, progress)
+
+
+async def _finish_sar_product(prod: dict, result: Optional[dict], state: dict, progress: JobProgress):
     """
-    Scheduled job to update NDVI data for all farms.
+    Mark a saved (or already stored) product synced, first removing the files
+    this job produced for it, in this or an earlier attempt.
     """
-    logger.info("Starting scheduled NDVI update job...")
-    success_count = 0
-    fail_count = 0
-    
+    if result is not None:
+        release_sar_products(result['safe_path'])
+        remove_product_files(
+            settings.OUTPUT_DIR, prod['title'], result['safe_path'], result.get('out_paths', [])
+        )
+    state['stages'][prod['uuid']] = STAGE_SYNCED
+    await progress.checkpoint()
+
+
+async def run_ndvi_sync_job(job, progress: JobProgress):
+    """Job handler: sync NDVI for one farm (new observations reach FIWARE through the outbox)."""
     async with AsyncSessionLocal() as db:
-        try:
-            # Fetch all farms
-            result = await db.execute(select(FarmModel))
-            farms = result.scalars().all()
-            
-            use_case = CalculateNDVIUseCase()
-            
+        farm = await db.get(FarmModel, job.farm_id)
+        if farm is None:
+            logger.info(f"Farm {job.farm_id} no longer exists, dropping job {job.id}")
+            return
+        await CalculateNDVIUseCase().sync_latest_data_for_farm(
+            farm.id, job.payload['bbox'], db, progress=progress, backfill=job.payload.get('backfill', False)
+        )
+
+
+async def run_soil_moisture_sync_job(job, progress: JobProgress):
+    """Job handler: sync Soil Moisture for one farm (new observations reach FIWARE through the outbox)."""
+    async with AsyncSessionLocal() as db:
+        farm = await db.get(FarmModel, job.farm_id)
+        if farm is None:
+            logger.info(f"Farm {job.farm_id} no longer exists, dropping job {job.id}")
+            return
+        await sync_soil_moisture_for_farm(
+            farm.id, job.payload['bbox'], db, progress=progress, backfill=job.payload.get('backfill', False)
+        )
+
+
+JOB_HANDLERS = {
+    NDVI_SYNC_JOB: run_ndvi_sync_job,
+    SOIL_MOISTURE_SYNC_JOB: run_soil_moisture_sync_job,
+    **CALCULATION_JOB_HANDLERS,
+    FIWARE_BACKFILL_JOB: run_fiware_backfill_job,
+}
+
+job_queue = JobQueue(
+    lease_seconds=settings.JOB_LEASE_SECONDS,
+    retry_delay_seconds=RETRY_DELAY_SECONDS,
+    aging_seconds=settings.WORK_PRIORITY_AGING_SECONDS
+)
+job_worker = JobWorker(
+    job_queue,
+    JOB_HANDLERS,
+    concurrency=settings.SYNC_WORKER_CONCURRENCY,
+    class_caps={
+        PRIORITY_INTERACTIVE: settings.SYNC_WORKER_CONCURRENCY,
+        PRIORITY_RESYNC: settings.WORK_SLOTS_RESYNC,
+        PRIORITY_BATCH: settings.WORK_SLOTS_BATCH,
+    }
+)
+
+
+async def enqueue_farm_syncs(kind: str, data_type: str, platform: str, catch_up: bool = False):
+    """
+    Enqueue one sync job per farm that is due. A farm that still has a
+    pending or running job of the same kind is not enqueued twice.
+    Farms are streamed in batches with their precomputed bbox, each batch
+    read in its own short session.
+    """
+    enqueued_count = 0
+    skipped_count = 0
+    today = datetime.date.today()
+    run_id = f"{kind}:{today.isoformat()}"
+
+    # Farms saved before the geometry columns existed
+    await backfill_farm_geometry()
+
+    # Reported with the stage metrics of the jobs of this run
+    with collect(run_id) as run_metrics, stage(STAGE_ENQUEUE) as timed:
+        async for farms in iter_farm_batches():
+            async with AsyncSessionLocal() as db:
+                states = await SyncStateRepositoryImpl(db).get_states(data_type, farm_ids=[f.id for f in farms])
+
             for farm in farms:
-                # Convert farm coordinates to bbox [minx, miny, maxx, maxy]
-                # Assuming coordinates is a list of dicts or objects
-                coords = farm.coordinates
-                if not coords:
+                if farm.bbox is None:
+                    continue
+
+                if not catch_up and not is_farm_due(states.get(farm.id), platform, today):
+                    skipped_count += 1
                     continue
-                
-                # Simple bbox calculation
-                lats = [c['lat'] for c in coords]
-                lngs = [c['lng'] for c in coords]
-                bbox = [min(lngs), min(lats), max(lngs), max(lats)]
-                
-                success = await sync_farm_with_retry(use_case, farm.id, bbox, db, farm=farm)
-                if success:
-                    success_count += 1
-                else:
-                    fail_count += 1
-                
-        except Exception as e:
-            logger.error(f"Error in scheduled job: {e}")
-            
-    logger.info(f"Scheduled NDVI update job finished. Success: {success_count}, Failed: {fail_count}")
-
-
-async def update_all_farms_soil_moisture():
+
+                await job_queue.enqueue(
+                    kind,
+                    farm_id=farm.id,
+                    payload={'bbox': farm.bbox},
+                    run_id=run_id,
+                    dedupe_key=f"{kind}:{farm.id}",
+                    max_attempts=MAX_RETRIES,
+                    priority=PRIORITY_BATCH
+                )
+                enqueued_count += 1
+        timed.items = enqueued_count
+    await PipelineMetricsStore().save(run_metrics)
+
+    return enqueued_count, skipped_count
+
+
+async def update_all_farms_ndvi(catch_up: bool = False):
+    """
+    Scheduled job to update NDVI data for all farms.
+    Farms are only searched when a new Sentinel-2 pass is plausible,
+    unless catch_up is set (weekly sweep for missed acquisitions).
+    The work itself runs in the job worker.
+    """
+    logger.info(f"Starting scheduled NDVI update job (catch_up={catch_up})...")
+    try:
+        enqueued, skipped = await enqueue_farm_syncs(NDVI_SYNC_JOB, 'NDVI', 'SENTINEL-2', catch_up)
+        logger.info(f"Enqueued NDVI sync for {enqueued} farms, skipped (no pass expected): {skipped}")
+    except Exception as e:
+        logger.error(f"Error in scheduled job: {e}")
+
+
+async def update_all_farms_soil_moisture(catch_up: bool = False):
     """
     Scheduled job to update Soil Moisture data for all farms using Sentinel-1.
+    Farms are only searched when a new Sentinel-1 pass is plausible,
+    unless catch_up is set (weekly sweep for missed acquisitions).
+    The work itself runs in the job worker.
     """
-    logger.info("Starting scheduled Soil Moisture update job...")
-    success_count = 0
-    fail_count = 0
-    
-    async with AsyncSessionLocal() as db:
-        try:
-            # Fetch all farms
-            result = await db.execute(select(FarmModel))
-            farms = result.scalars().all()
-            
-            for farm in farms:
-                coords = farm.coordinates
-                if not coords:
-                    continue
-                
-                # Simple bbox calculation
-                lats = [c['lat'] for c in coords]
-                lngs = [c['lng'] for c in coords]
-                bbox = [min(lngs), min(lats), max(lngs), max(lats)]
-                
-                success = await sync_soil_moisture_for_farm(farm.id, bbox, db, farm=farm)
-                if success:
-                    success_count += 1
-                else:
-                    fail_count += 1
-                
-        except Exception as e:
-            logger.error(f"Error in Soil Moisture scheduled job: {e}")
-            
-    logger.info(f"Scheduled Soil Moisture update job finished. Success: {success_count}, Failed: {fail_count}")
-
-
-def start_scheduler():
+    logger.info(f"Starting scheduled Soil Moisture update job (catch_up={catch_up})...")
+    try:
+        enqueued, skipped = await enqueue_farm_syncs(
+            SOIL_MOISTURE_SYNC_JOB, 'SOIL_MOISTURE', 'SENTINEL-1', catch_up
+        )
+        logger.info(f"Enqueued Soil Moisture sync for {enqueued} farms, skipped (no pass expected): {skipped}")
+    except Exception as e:
+        logger.error(f"Error in Soil Moisture scheduled job: {e}")
+
+
+async def clean_output_dir():
     """
-    Start the background scheduler.
+    Scheduled janitor: reclaim .zip/.SAFE/GeoTIFF files left in OUTPUT_DIR
+    by failed cleanups or interrupted jobs. Files of pending and running jobs
+    (of any worker process, from their state in the database) and of this
+    process' downloads in progress are kept.
     """
-    # NDVI (Sentinel-2): Run every day at 00:00
+    try:
+        active_keys = await job_queue.active_file_keys() + disk_budget.active_keys()
+        loop = asyncio.get_event_loop()
+        reclaimed = await loop.run_in_executor(
+            None, clean_orphaned_files, settings.OUTPUT_DIR,
+            settings.JANITOR_MAX_AGE_HOURS * 3600, active_keys
+        )
+        if reclaimed:
+            logger.info(f"Janitor reclaimed {reclaimed // (1024 * 1024)} MB in {settings.OUTPUT_DIR}")
+    except Exception as e:
+        logger.error(f"Error in OUTPUT_DIR janitor: {e}")
+
+
+_quantumleap_subscribed = False
+_notifications_subscribed = False
+
+
+async def drain_fiware_outbox():
+    """
+    Scheduled job: publish pending FIWARE outbox rows (farm and observation
+    changes) to Orion in batches, so satellite jobs never wait on Orion.
+    """
+    global _quantumleap_subscribed, _notifications_subscribed
+    if not settings.FIWARE_ENABLED:
+        return
+    try:
+        fiware = FiwareClient()
+        if not _quantumleap_subscribed and await fiware.health_check():
+            # Parcel observations become QuantumLeap history only once it is subscribed
+            _quantumleap_subscribed = await ensure_quantumleap_subscription(fiware) is not None
+        if settings.FIWARE_NOTIFICATION_URL and settings.FIWARE_NOTIFICATION_TOKEN \
+                and not _notifications_subscribed and await fiware.health_check():
+            # Orion notifications keep the API's entity cache fresh
+            _notifications_subscribed = bool(await ensure_notification_subscription(fiware))
+        await FiwareOutboxDrainer(client=fiware).drain()
+    except Exception as e:
+        logger.error(f"Error draining FIWARE outbox: {e}")
+
+
+async def purge_fiware_outbox():
+    """
+    Scheduled job: delete outbox rows published more than FIWARE_OUTBOX_RETENTION_DAYS
+    ago, and expired entries of the persisted entity cache.
+    """
+    try:
+        purged = await FiwareOutboxDrainer().purge_published(
+            datetime.timedelta(days=settings.FIWARE_OUTBOX_RETENTION_DAYS)
+        )
+        if purged:
+            logger.info(f"Purged {purged} published FIWARE outbox rows")
+        await entity_cache.purge_expired()
+    except Exception as e:
+        logger.error(f"Error purging FIWARE outbox: {e}")
+
+
+def configure_scheduler():
+    """
+    Register the cron jobs. Only the leader worker (see app.worker) runs them;
+    they only enqueue per-farm jobs, which any worker may execute.
+    """
+    # NDVI (Sentinel-2): Run every day at 00:00, only farms with a plausible new pass are searched
     scheduler.add_job(
         update_all_farms_ndvi, 
         'cron', 
@@ -295,10 +446,11 @@ def start_scheduler():
         misfire_grace_time=3600,
         coalesce=True,
         max_instances=1,
-        id='ndvi_daily_sync'
+        id='ndvi_daily_sync',
+        replace_existing=True
     )
     
-    # Soil Moisture (Sentinel-1): Run every day at 02:00 (offset to avoid overlap)
+    # Soil Moisture (Sentinel-1): Run every day at 02:00 (offset to avoid overlap), same cadence filter
     scheduler.add_job(
         update_all_farms_soil_moisture,
         'cron',
@@ -307,8 +459,70 @@ def start_scheduler():
         misfire_grace_time=3600,
         coalesce=True,
         max_instances=1,
-        id='soil_moisture_daily_sync'
+        id='soil_moisture_daily_sync',
+        replace_existing=True
+    )
+    
+    # Weekly catch-up sweep (Sunday 04:00) for acquisitions missed by the cadence filter
+    scheduler.add_job(
+        update_all_farms_ndvi,
+        'cron',
+        day_of_week='sun',
+        hour=4,
+        minute=0,
+        kwargs={'catch_up': True},
+        misfire_grace_time=3600,
+        coalesce=True,
+        max_instances=1,
+        id='ndvi_weekly_catch_up',
+        replace_existing=True
+    )
+    scheduler.add_job(
+        update_all_farms_soil_moisture,
+        'cron',
+        day_of_week='sun',
+        hour=6,
+        minute=0,
+        kwargs={'catch_up': True},
+        misfire_grace_time=3600,
+        coalesce=True,
+        max_instances=1,
+        id='soil_moisture_weekly_catch_up',
+        replace_existing=True
+    )
+    
+    # Janitor for orphaned downloads and outputs, every hour
+    scheduler.add_job(
+        clean_output_dir,
+        'interval',
+        hours=1,
+        coalesce=True,
+        max_instances=1,
+        id='output_dir_janitor',
+        replace_existing=True
+    )
+    
+    # FIWARE outbox: publish pending entities, and purge old published rows (and expired cached entities) hourly
+    scheduler.add_job(
+        drain_fiware_outbox,
+        'interval',
+        seconds=settings.FIWARE_OUTBOX_INTERVAL_SECONDS,
+        coalesce=True,
+        max_instances=1,
+        id='fiware_outbox_drainer',
+        replace_existing=True
+    )
+    scheduler.add_job(
+        purge_fiware_outbox,
+        'interval',
+        hours=1,
+        coalesce=True,
+        max_instances=1,
+        id='fiware_outbox_purge',
+        replace_existing=True
     )
     
-    scheduler.start()
-    logger.info("Scheduler started. Jobs: NDVI at 00:00, Soil Moisture at 02:00")
+    logger.info(
+        "Scheduler configured. Jobs: NDVI at 00:00, Soil Moisture at 02:00, catch-up sweeps on Sunday, "
+        "hourly janitor, FIWARE outbox drainer"
+    )
@@ -0,0 +1,94 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Satellite worker entry point.
+
+    python -m app.worker
+
+Every worker process executes queued sync jobs. Through a database advisory
+lock exactly one of them is the leader and runs the cron schedule that
+enqueues the nightly syncs, so API processes and worker replicas can be
+scaled independently without running the schedule more than once.
+"""
+import asyncio
+import logging
+import signal
+from typing import Optional
+
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.database import init_db
+# Import models to register them with Base
+from app.infrastructure.database import models
+from app.infrastructure.pipeline.leader_lock import AdvisoryLock
+from app.scheduler import scheduler, configure_scheduler, job_queue, job_worker
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+LEADER_LOCK_NAME = 'scheduler_leader'
+
+
+async def run_worker(stop_event: Optional[asyncio.Event] = None):
+    """
+    Run queued jobs and take part in leader election until `stop_event` is set.
+    The cron schedule is resumed while this process holds the leader lock
+    and paused as soon as it loses it.
+    """
+    stop_event = stop_event or asyncio.Event()
+    lock = AdvisoryLock(
+        LEADER_LOCK_NAME,
+        owner=job_queue.worker_id,
+        ttl_seconds=settings.LEADER_LOCK_TTL_SECONDS
+    )
+    renew_interval = max(1.0, settings.LEADER_LOCK_TTL_SECONDS / 3)
+
+    configure_scheduler()
+    scheduler.start(paused=True)
+    worker_task = asyncio.create_task(job_worker.run())
+    is_leader = False
+
+    try:
+        while not stop_event.is_set():
+            try:
+                leader = await lock.acquire()
+            except Exception as e:
+                logger.error(f"Leader election failed: {e}")
+                leader = False
+
+            if leader and not is_leader:
+                scheduler.resume()
+                logger.info(f"Worker {lock.owner} is now the scheduler leader")
+            elif not leader and is_leader:
+                scheduler.pause()
+                logger.warning(f"Worker {lock.owner} lost scheduler leadership")
+            is_leader = leader
+
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=renew_interval)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        # In-flight jobs are cancelled and hand their leases back instead of letting them expire
+        worker_task.cancel()
+        await job_worker.shutdown()
+        scheduler.shutdown(wait=False)
+        if is_leader:
+            await lock.release()
+        logger.info(f"Worker {lock.owner} stopped")
+
+
+async def _main():
+    await init_db()
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    await run_worker(stop_event)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_main())
@@ -0,0 +1,131 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Benchmark: end-to-end FIWARE sync throughput against the in-process NGSI-LD broker.
+
+Farms and NDVI observations are saved to a temporary SQLite database (which
+fills the FIWARE outbox), then the outbox is drained through the real
+FiwareClient into tests.fakes.ngsi_ld_broker. Retries are made due at once,
+so injected errors cost requests, not backoff time.
+
+Usage (from the backend folder):
+    python -m benchmarks.bench_fiware_sync [--farms 50] [--observations 20]
+        [--batch-sizes 10 100 500] [--latency 0.005] [--error-rate 0.05]
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.database import Base
+from app.infrastructure.database import models  # noqa: F401  (register tables)
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.fiware_outbox_model import FiwareOutboxModel, OUTBOX_PENDING
+from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.external_services.circuit_breaker import CircuitBreaker
+from app.infrastructure.external_services.fiware_client import FiwareClient
+from app.infrastructure.pipeline.fiware_outbox import FiwareOutboxDrainer
+from tests.fakes.ngsi_ld_broker import FakeNgsiLdBroker
+
+
+def square(n: int):
+    lat, lng = 20.0 + (n % 100) * 0.01, 105.0 + (n // 100) * 0.01
+    return [{'lat': lat, 'lng': lng}, {'lat': lat, 'lng': lng + 0.005},
+            {'lat': lat + 0.005, 'lng': lng + 0.005}, {'lat': lat + 0.005, 'lng': lng}]
+
+
+async def fill_outbox(session_factory, farms: int, observations: int) -> float:
+    start = time.perf_counter()
+    async with session_factory() as session:
+        for n in range(farms):
+            farm = FarmModel(name=f"farm {n}", coordinates=square(n), user_id=1)
+            session.add(farm)
+            await session.flush()
+            session.add_all([
+                SatelliteDataModel(
+                    farm_id=farm.id, data_type='NDVI', satellite_platform='SENTINEL-2', mean_value=0.5,
+                    acquisition_date=datetime.date(2025, 1, 1) + datetime.timedelta(days=5 * day)
+                )
+                for day in range(observations)
+            ])
+        await session.commit()
+    return time.perf_counter() - start
+
+
+async def run(farms: int, observations: int, batch_size: int, latency: float, error_rate: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        enqueue_seconds = await fill_outbox(session_factory, farms, observations)
+
+        broker = FakeNgsiLdBroker(latency=latency, error_rate=error_rate)
+        # Threshold above any streak of random errors: the breaker must not stop the drain
+        client = FiwareClient(f"http://orion-bench-{batch_size}",
+                              breaker=CircuitBreaker("bench", failure_threshold=10 ** 6),
+                              transport=httpx.ASGITransport(app=broker))
+        drainer = FiwareOutboxDrainer(session_factory, client=client, batch_size=batch_size, max_attempts=100)
+
+        start = time.perf_counter()
+        published, rounds = 0, 0
+        while True:
+            published += (await drainer.drain())['published']
+            rounds += 1
+            if not (await drainer.backlog()).get(OUTBOX_PENDING):
+                break
+            async with session_factory() as session:
+                await session.execute(
+                    update(FiwareOutboxModel).where(FiwareOutboxModel.status == OUTBOX_PENDING)
+                    .values(next_attempt_at=datetime.datetime.utcnow())
+                )
+                await session.commit()
+        drain_seconds = time.perf_counter() - start
+        await engine.dispose()
+
+    return {
+        'rows': published,
+        'entities': len(broker.entities),
+        'requests': broker.request_count,
+        'rounds': rounds,
+        'enqueue_seconds': enqueue_seconds,
+        'drain_seconds': drain_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--farms', type=int, default=50)
+    parser.add_argument('--observations', type=int, default=20, help='NDVI observations per farm')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--latency', type=float, default=0.005, help='Broker latency per request, seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests failing with 500')
+    args = parser.parse_args()
+
+    # Injected errors are expected: keep their log lines out of the table
+    logging.getLogger('app').setLevel(logging.CRITICAL)
+    if not get_settings().FIWARE_ENABLED:
+        parser.error("FIWARE_ENABLED is off: nothing is written to the outbox")
+
+    print(f"{args.farms} farms x {args.observations} observations, "
+          f"latency {args.latency * 1e3:.1f}ms, error rate {args.error_rate:.0%}")
+    print(f"{'batch':>6} {'rows':>7} {'entities':>9} {'requests':>9} {'rounds':>7} "
+          f"{'enqueue':>9} {'drain':>9} {'rows/s':>9}")
+    for batch_size in args.batch_sizes:
+        r = asyncio.run(run(args.farms, args.observations, batch_size, args.latency, args.error_rate))
+        print(f"{batch_size:>6} {r['rows']:>7} {r['entities']:>9} {r['requests']:>9} {r['rounds']:>7} "
+              f"{r['enqueue_seconds']:>8.2f}s {r['drain_seconds']:>8.2f}s "
+              f"{r['rows'] / r['drain_seconds']:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
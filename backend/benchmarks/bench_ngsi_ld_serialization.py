@@ -0,0 +1,96 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Benchmark: building and encoding a batch of AgriParcelRecords, as sent to
+entityOperations/upsert.
+
+baseline  previous factory (timestamps formatted per attribute) and the stdlib
+          json encoding httpx applies to `json=`, @context inline in every entity
+compact   current factory (cached observation times) and encode_entities:
+          @context sent once as a Link header, orjson when installed
+
+Usage (from the backend folder):
+    python -m benchmarks.bench_ngsi_ld_serialization [--farms 1000] [--dates 50]
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+
+from app.infrastructure.external_services import fiware_client
+from app.infrastructure.external_services.fiware_client import (
+    CONTEXT,
+    _ensure_utc,
+    _format_datetime,
+    _observation_time,
+    create_agriparcel_record,
+    encode_entities
+)
+
+
+def baseline_record(farm_id: int, record_type: str, value: float, observed_at: datetime) -> dict:
+    """create_agriparcel_record before the compact path."""
+    observed_at_utc = _ensure_utc(observed_at)
+    timestamp_str = observed_at_utc.strftime('%Y%m%dT%H%M%S')
+    return {
+        "@context": CONTEXT,
+        "id": f"urn:ngsi-ld:AgriParcelRecord:OpenAgri:{farm_id}:{record_type}:{timestamp_str}",
+        "type": "AgriParcelRecord",
+        "hasAgriParcel": {"type": "Relationship", "object": f"urn:ngsi-ld:AgriParcel:OpenAgri:{farm_id}"},
+        record_type: {"type": "Property", "value": value, "observedAt": _format_datetime(observed_at_utc)},
+        "dateObserved": {"type": "Property", "value": _format_datetime(observed_at_utc)},
+    }
+
+
+def baseline_encode(entities) -> bytes:
+    """What httpx does with `json=`."""
+    return json.dumps(entities).encode()
+
+
+def _time(fn, repeat: int):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--farms', type=int, default=1000)
+    parser.add_argument('--dates', type=int, default=50, help='Acquisition dates per farm')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    observations = [
+        (farm_id, 0.5, datetime.combine(date(2024, 1, 1) + timedelta(days=5 * n), dt_time(12)))
+        for farm_id in range(1, args.farms + 1) for n in range(args.dates)
+    ]
+
+    def build(factory):
+        _observation_time.cache_clear()
+        return [factory(farm_id, "ndvi", value, observed_at) for farm_id, value, observed_at in observations]
+
+    build_base, base_entities = _time(lambda: build(baseline_record), args.repeat)
+    build_fast, fast_entities = _time(lambda: build(create_agriparcel_record), args.repeat)
+    encode_base, base_body = _time(lambda: baseline_encode(base_entities), args.repeat)
+    encode_fast, (fast_body, linked) = _time(lambda: encode_entities(fast_entities), args.repeat)
+    assert linked and json.loads(fast_body)[0]["id"] == base_entities[0]["id"]
+
+    encoder = "orjson" if fiware_client.orjson is not None else "json (orjson not installed)"
+    print(f"{len(observations)} records ({args.farms} farms x {args.dates} dates), best of {args.repeat}, "
+          f"encoder: {encoder}")
+    print(f"{'path':>9} {'build':>9} {'encode':>9} {'total':>9} {'bytes':>12} {'rec/s':>10}")
+    for name, build_s, encode_s, body in (('baseline', build_base, encode_base, base_body),
+                                           ('compact', build_fast, encode_fast, fast_body)):
+        total = build_s + encode_s
+        print(f"{name:>9} {build_s * 1e3:>7.0f}ms {encode_s * 1e3:>7.0f}ms {total * 1e3:>7.0f}ms "
+              f"{len(body):>12,} {len(observations) / total:>10,.0f}")
+    print(f"speedup {(build_base + encode_base) / (build_fast + encode_fast):.1f}x, "
+          f"payload {len(fast_body) / len(base_body):.0%} of baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+Benchmark: summed-area-table speckle filters vs a naive sliding-window convolution.
+
+Usage (from the backend folder):
+    python -m benchmarks.bench_speckle_filter [--size 256] [--kernels 3 7 15]
+"""
+import argparse
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.infrastructure.image_processing.speckle_filter import apply_speckle_filter
+
+
+def naive_boxcar(img: np.ndarray, size: int) -> np.ndarray:
+    """Window mean via an explicit (rows, cols, size, size) view: O(pixels * size^2)."""
+    half = size // 2
+    padded = np.pad(img, half, mode='constant', constant_values=np.nan)
+    windows = sliding_window_view(padded, (size, size))
+    return np.nanmean(windows, axis=(2, 3))
+
+
+def _time(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=256, help='Window side in pixels (farm window)')
+    parser.add_argument('--kernels', type=int, nargs='+', default=[3, 7, 15])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    img = (0.05 * rng.gamma(4.4, 1 / 4.4, (args.size, args.size))).astype(np.float32)
+
+    print(f"{args.size}x{args.size} window, best of {args.repeat}")
+    print(f"{'kernel':>6} {'naive':>10} {'boxcar':>10} {'lee':>10} {'refined':>10} {'speedup':>8}")
+    for k in args.kernels:
+        naive = _time(lambda: naive_boxcar(img, k), args.repeat)
+        box = _time(lambda: apply_speckle_filter(img, 'boxcar', size=k), args.repeat)
+        lee = _time(lambda: apply_speckle_filter(img, 'lee', size=k), args.repeat)
+        refined = _time(lambda: apply_speckle_filter(img, 'refined_lee', size=k), args.repeat)
+        print(f"{k:>6} {naive * 1e3:>8.1f}ms {box * 1e3:>8.1f}ms {lee * 1e3:>8.1f}ms "
+              f"{refined * 1e3:>8.1f}ms {naive / box:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""
+Shared test fixtures.
+"""
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.infrastructure.database.database import Base
+from app.infrastructure.database import models  # noqa: F401  (register tables)
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """Session factory of a fresh SQLite database holding every table."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
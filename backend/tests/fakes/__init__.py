@@ -0,0 +1,3 @@
+"""
+In-process stand-ins for external services, shared by tests and benchmarks.
+"""
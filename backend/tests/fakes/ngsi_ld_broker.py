@@ -0,0 +1,348 @@
+# Copyright (c) 2025 CuongKenn and ICTU-OpenAgri Contributors
+# Licensed under the MIT License. See LICENSE file in the project root for full license information.
+
+"""
+In-process fake of the NGSI-LD subset of Orion-LD used by FiwareClient.
+
+An ASGI app, so the real client runs against it without a network:
+
+    broker = FakeNgsiLdBroker()
+    client = FiwareClient("http://orion", transport=httpx.ASGITransport(app=broker.app))
+
+Supported: GET /version, entity CRUD (POST/GET/DELETE /entities, PATCH
+/entities/{id}/attrs), batch entityOperations (create, upsert with or
+without options=update, update, delete, with 207 multi-status), queries by
+type with q (`;`-joined ==, !=, <, <=, >, >= terms), id lists, attrs,
+keyValues, limit/offset and count, and subscriptions, whose notifications
+are recorded (and passed to `on_notify`, if given). A context sent in the Link
+header is stored as the entity's @context. Not emulated: tenants
+(FIWARE-Service), JSON-LD context expansion, temporal API.
+
+Faults: `latency` seconds per request, `error_rate` (random 500s, seeded),
+`fail_next(n, status)` for the next n requests, and `reject` entity IDs
+that batch operations report as failed.
+"""
+import asyncio
+import itertools
+import random
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+CORE_KEYS = ("@context", "id", "type")
+MAX_LIMIT = 1000
+
+_TERM = re.compile(r'^\s*([\w.]+)\s*(==|!=|>=|<=|>|<)\s*(.+?)\s*$')
+
+
+def _problem(status: int, title: str, detail: str = "") -> JSONResponse:
+    return JSONResponse({"type": "https://uri.etsi.org/ngsi-ld/errors/" + title, "title": title,
+                         "detail": detail}, status_code=status)
+
+
+def _value_of(attribute: Any) -> Any:
+    """Plain value of a normalized attribute (Property value, Relationship object)."""
+    if isinstance(attribute, dict):
+        if attribute.get("type") == "Relationship":
+            return attribute.get("object")
+        value = attribute.get("value")
+        if isinstance(value, dict) and "@value" in value:
+            return value["@value"]
+        return value
+    return attribute
+
+
+def _literal(text: str) -> Any:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return text[1:-1]
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _matches(entity: Dict[str, Any], q: Optional[str]) -> bool:
+    if not q:
+        return True
+    for term in q.split(";"):
+        match = _TERM.match(term)
+        if match is None:
+            raise ValueError(f"Unsupported q term: {term}")
+        name, op, raw = match.groups()
+        if name not in entity:
+            return False
+        actual, expected = _value_of(entity[name]), _literal(raw)
+        if isinstance(expected, float) != isinstance(actual, (int, float)):
+            # Number against text (URNs, dates): compare as text
+            actual, expected = str(actual), raw.strip().strip('"')
+        try:
+            ok = {
+                "==": actual == expected, "!=": actual != expected,
+                ">": actual > expected, "<": actual < expected,
+                ">=": actual >= expected, "<=": actual <= expected,
+            }[op]
+        except TypeError:
+            return False
+        if not ok:
+            return False
+    return True
+
+
+def _linked_context(request: Request) -> Optional[str]:
+    """Context of an application/json body, from its Link header."""
+    link = request.headers.get("link", "")
+    return link[link.index("<") + 1:link.index(">")] if "<" in link and ">" in link else None
+
+
+def _project(entity: Dict[str, Any], attrs: Optional[List[str]], key_values: bool) -> Dict[str, Any]:
+    if attrs:
+        entity = {k: v for k, v in entity.items() if k in CORE_KEYS or k in attrs}
+    if key_values:
+        entity = {k: v if k in CORE_KEYS else _value_of(v) for k, v in entity.items()}
+    return entity
+
+
+class FakeNgsiLdBroker:
+    """Entity store plus the Starlette app serving it."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0,
+                 on_notify: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[None]]] = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.reject: set = set()
+        self.on_notify = on_notify
+        self.entities: Dict[str, Dict[str, Any]] = {}
+        self.subscriptions: Dict[str, Dict[str, Any]] = {}
+        self.notifications: List[Dict[str, Any]] = []
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._failures: List[int] = []
+        self._ids = itertools.count(1)
+        self.app = Starlette(routes=[
+            Route("/version", self.version, methods=["GET"]),
+            Route("/ngsi-ld/v1/entities", self.query_entities, methods=["GET"]),
+            Route("/ngsi-ld/v1/entities", self.create_entity, methods=["POST"]),
+            Route("/ngsi-ld/v1/entities/{entity_id:path}/attrs", self.update_attrs, methods=["PATCH"]),
+            Route("/ngsi-ld/v1/entities/{entity_id:path}", self.get_entity, methods=["GET"]),
+            Route("/ngsi-ld/v1/entities/{entity_id:path}", self.delete_entity, methods=["DELETE"]),
+            Route("/ngsi-ld/v1/entityOperations/{operation}", self.entity_operation, methods=["POST"]),
+            Route("/ngsi-ld/v1/subscriptions", self.list_subscriptions, methods=["GET"]),
+            Route("/ngsi-ld/v1/subscriptions", self.create_subscription, methods=["POST"]),
+            Route("/ngsi-ld/v1/subscriptions/{subscription_id:path}", self.delete_subscription,
+                  methods=["DELETE"]),
+        ])
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+
+    def fail_next(self, count: int = 1, status: int = 503):
+        """Answer the next `count` requests with `status`."""
+        self._failures.extend([status] * count)
+
+    async def _fault(self) -> Optional[Response]:
+        """Apply latency, then an injected failure if one is due."""
+        self.request_count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._failures:
+            return _problem(self._failures.pop(0), "InternalError", "injected failure")
+        if self.error_rate and self._random.random() < self.error_rate:
+            return _problem(500, "InternalError", "injected random failure")
+        return None
+
+    # ----- notifications -----
+
+    async def _changed(self, entities: List[Dict[str, Any]], attrs: Optional[List[str]] = None):
+        """Notify the subscriptions watching these entities (and, if given, attributes)."""
+        for subscription in list(self.subscriptions.values()):
+            types = {selector.get("type") for selector in subscription.get("entities", [])}
+            watched = subscription.get("watchedAttributes")
+            data = [
+                entity for entity in entities
+                if entity.get("type") in types
+                and (not watched or attrs is None or set(watched) & set(attrs))
+            ]
+            if not data:
+                continue
+            notification = {
+                "id": f"urn:ngsi-ld:Notification:{next(self._ids)}",
+                "type": "Notification",
+                "subscriptionId": subscription["id"],
+                "data": [_project(entity, subscription.get("notification", {}).get("attributes"), False)
+                         for entity in data],
+            }
+            self.notifications.append(notification)
+            if self.on_notify is not None:
+                await self.on_notify(subscription, notification)
+
+    def _store(self, entity: Dict[str, Any], merge: bool) -> Dict[str, Any]:
+        current = self.entities.get(entity["id"])
+        if merge and current is not None:
+            entity = {**current, **{k: v for k, v in entity.items() if k != "@context"}}
+        self.entities[entity["id"]] = entity
+        return entity
+
+    # ----- endpoints -----
+
+    async def version(self, request: Request) -> Response:
+        fault = await self._fault()
+        return fault or JSONResponse({"orionld version": "fake"})
+
+    async def create_entity(self, request: Request) -> Response:
+        fault = await self._fault()
+        if fault:
+            return fault
+        entity = await request.json()
+        context = _linked_context(request)
+        if context and "@context" not in entity:
+            entity["@context"] = context
+        if "id" not in entity or "type" not in entity:
+            return _problem(400, "BadRequestData", "id and type are required")
+        if entity["id"] in self.entities:
+            return _problem(409, "AlreadyExists", entity["id"])
+        stored = self._store(entity, merge=False)
+        await self._changed([stored])
+        return Response(status_code=201, headers={"Location": f"/ngsi-ld/v1/entities/{entity['id']}"})
+
+    async def get_entity(self, request: Request) -> Response:
+        fault = await self._fault()
+        if fault:
+            return fault
+        entity = self.entities.get(request.path_params["entity_id"])
+        if entity is None:
+            return _problem(404, "ResourceNotFound", request.path_params["entity_id"])
+        attrs = request.query_params.get("attrs")
+        return JSONResponse(_project(entity, attrs.split(",") if attrs else None,
+                                     "keyValues" in request.query_params.get("options", "")))
+
+    async def update_attrs(self, request: Request) -> Response:
+        fault = await self._fault()
+        if fault:
+            return fault
+        entity_id = request.path_params["entity_id"]
+        if entity_id not in self.entities:
+            return _problem(404, "ResourceNotFound", entity_id)
+        attrs = await request.json()
+        stored = self._store({"id": entity_id, **attrs}, merge=True)
+        await self._changed([stored], list(attrs))
+        return Response(status_code=204)
+
+    async def delete_entity(self, request: Request) -> Response:
+        fault = await self._fault()
+        if fault:
+            return fault
+        if self.entities.pop(request.path_params["entity_id"], None) is None:
+            return _problem(404, "ResourceNotFound", request.path_params["entity_id"])
+        return Response(status_code=204)
+
+    async def query_entities(self, request: Request) -> Response:
+        fault = await self._fault()
+        if fault:
+            return fault
+        params = request.query_params
+        entity_type = params.get("type")
+        if not entity_type and not params.get("q"):
+            return _problem(400, "BadRequestData", "type or q is required")
+        try:
+            limit = int(params.get("limit", 20))
+            offset = int(params.get("offset", 0))
+        except ValueError:
+            return _problem(400, "BadRequestData", "limit and offset must be integers")
+        if limit > MAX_LIMIT:
+            return _problem(400, "BadRequestData", f"limit above {MAX_LIMIT}")
+
+        ids = set(params["id"].split(",")) if params.get("id") else None
+        try:
+            matches = [
+                entity for entity in self.entities.values()
+                if (not entity_type or entity.get("type") in entity_type.split(","))
+                and (ids is None or entity["id"] in ids)
+                and _matches(entity, params.get("q"))
+            ]
+        except ValueError as e:
+            return _problem(400, "InvalidRequest", str(e))
+
+        attrs = params.get("attrs")
+        key_values = "keyValues" in params.get("options", "")
+        body = [_project(entity, attrs.split(",") if attrs else None, key_values)
+                for entity in matches[offset:offset + limit]]
+        headers = {"NGSILD-Results-Count": str(len(matches))} if params.get("count") == "true" else None
+        return JSONResponse(body, headers=headers)
+
+    async def entity_operation(self, request: Request) -> Response:
+        fault = await self._fault()
+        if fault:
+            return fault
+        operation = request.path_params["operation"]
+        payload = await request.json()
+        context = _linked_context(request)
+        if context and operation != "delete":
+            for item in payload:
+                item.setdefault("@context", context)
+        merge = "update" in request.query_params.get("options", "")
+        succeeded: List[str] = []
+        errors: List[Dict[str, Any]] = []
+        changed: List[Dict[str, Any]] = []
+        created = False
+
+        for item in payload:
+            entity_id = item if operation == "delete" else item.get("id")
+            if entity_id in self.reject:
+                errors.append({"entityId": entity_id, "error": {"title": "BadRequestData", "detail": "rejected"}})
+                continue
+            exists = entity_id in self.entities
+            if operation == "delete":
+                if exists:
+                    del self.entities[entity_id]
+                    succeeded.append(entity_id)
+                else:
+                    errors.append({"entityId": entity_id, "error": {"title": "ResourceNotFound"}})
+            elif operation == "create" and exists:
+                errors.append({"entityId": entity_id, "error": {"title": "AlreadyExists"}})
+            elif operation == "update" and not exists:
+                errors.append({"entityId": entity_id, "error": {"title": "ResourceNotFound"}})
+            elif operation in ("create", "upsert", "update"):
+                created = created or not exists
+                changed.append(self._store(item, merge=merge or operation == "update"))
+                succeeded.append(entity_id)
+            else:
+                return _problem(400, "BadRequestData", f"Unknown operation {operation}")
+
+        if changed:
+            await self._changed(changed)
+        if errors:
+            return JSONResponse({"success": succeeded, "errors": errors}, status_code=207)
+        if operation in ("create", "upsert") and created:
+            return JSONResponse(succeeded, status_code=201)
+        return Response(status_code=204)
+
+    async def list_subscriptions(self, request: Request) -> Response:
+        fault = await self._fault()
+        if fault:
+            return fault
+        limit = int(request.query_params.get("limit", 20))
+        return JSONResponse(list(self.subscriptions.values())[:limit])
+
+    async def create_subscription(self, request: Request) -> Response:
+        fault = await self._fault()
+        if fault:
+            return fault
+        subscription = await request.json()
+        if not subscription.get("entities") or not subscription.get("notification", {}).get("endpoint"):
+            return _problem(400, "BadRequestData", "entities and notification.endpoint are required")
+        subscription_id = subscription.get("id") or f"urn:ngsi-ld:Subscription:{next(self._ids)}"
+        self.subscriptions[subscription_id] = {**subscription, "id": subscription_id}
+        return Response(status_code=201, headers={"Location": f"/ngsi-ld/v1/subscriptions/{subscription_id}"})
+
+    async def delete_subscription(self, request: Request) -> Response:
+        fault = await self._fault()
+        if fault:
+            return fault
+        if self.subscriptions.pop(request.path_params["subscription_id"], None) is None:
+            return _problem(404, "ResourceNotFound", request.path_params["subscription_id"])
+        return Response(status_code=204)
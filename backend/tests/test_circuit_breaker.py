@@ -0,0 +1,95 @@
+"""
+Tests for the circuit breaker guarding FIWARE Orion calls.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.infrastructure.external_services.circuit_breaker import (
+    CircuitBreaker,
+    STATE_CLOSED,
+    STATE_OPEN,
+    STATE_HALF_OPEN
+)
+from app.infrastructure.external_services.fiware_client import FiwareClient, FiwareUnavailableError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_after_threshold_and_probes_after_timeout():
+    clock = Clock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure("down")
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure("down")
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+    assert breaker.rejected == 1
+
+    clock.now += 30
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request()
+    # Only one probe at a time
+    assert not breaker.allow_request()
+
+    breaker.record_failure("still down")
+    assert breaker.state == STATE_OPEN
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.stats()['times_opened'] == 2
+
+
+@pytest.mark.asyncio
+async def test_client_fails_fast_while_open():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503, text="unavailable")
+
+    breaker = CircuitBreaker("orion", failure_threshold=2, reset_timeout=30, clock=Clock())
+    client = FiwareClient("http://orion", breaker=breaker)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        for _ in range(2):
+            response = await client._send(http, "GET", "http://orion/version")
+            assert response.status_code == 503
+        with pytest.raises(FiwareUnavailableError):
+            await client._send(http, "GET", "http://orion/version")
+
+    assert len(calls) == 2
+    assert not await client.health_check()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_lets_the_next_call_probe():
+    started = asyncio.Event()
+
+    async def handler(request):
+        started.set()
+        await asyncio.sleep(30)
+        return httpx.Response(200)
+
+    clock = Clock()
+    breaker = CircuitBreaker("orion", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure("down")
+    clock.now += 30
+    client = FiwareClient("http://orion", breaker=breaker)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        probe = asyncio.create_task(client._send(http, "GET", "http://orion/version"))
+        await started.wait()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request()
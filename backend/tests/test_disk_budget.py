@@ -0,0 +1,63 @@
+"""
+Tests for disk-space admission control and the OUTPUT_DIR janitor.
+"""
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.infrastructure.pipeline.disk_budget import DiskBudget, DiskSpaceError, clean_orphaned_files
+
+MB = 1024 * 1024
+
+
+def make_budget(free_mb=10_000, budget_mb=100, floor_mb=50, timeout=1.0):
+    return DiskBudget('/tmp', budget_bytes=budget_mb * MB, free_floor_bytes=floor_mb * MB,
+                      timeout_seconds=timeout, free_bytes=lambda path: free_mb * MB)
+
+
+@pytest.mark.asyncio
+async def test_oversized_request_is_rejected_at_once():
+    with pytest.raises(DiskSpaceError):
+        await make_budget().acquire(200 * MB)
+
+
+@pytest.mark.asyncio
+async def test_waits_for_budget_then_admits():
+    budget = make_budget()
+    first = await budget.acquire(80 * MB)
+    waiter = asyncio.create_task(budget.acquire(40 * MB))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    await budget.release(first)
+    await asyncio.wait_for(waiter, 1.0)
+    assert budget.reserved_bytes == 40 * MB
+
+
+@pytest.mark.asyncio
+async def test_free_space_floor_times_out():
+    budget = make_budget(free_mb=100, floor_mb=80, timeout=0.1)
+    with pytest.raises(DiskSpaceError):
+        await budget.acquire(30 * MB)
+    async with budget.reserve(10 * MB, key='S2A_PRODUCT'):
+        assert budget.active_keys() == ['S2A_PRODUCT']
+    assert budget.reserved_bytes == 0
+
+
+def test_janitor_removes_old_artifacts_only(tmp_path):
+    old = time.time() - 10 * 3600
+    for name in ('old.zip', 'ndvi_old.tif', 'ACTIVE.zip', 'notes.txt'):
+        (tmp_path / name).write_bytes(b'x' * 10)
+        os.utime(tmp_path / name, (old, old))
+    safe = tmp_path / 'old.SAFE'
+    (safe / 'GRANULE').mkdir(parents=True)
+    (safe / 'GRANULE' / 'B04.jp2').write_bytes(b'x' * 100)
+    os.utime(safe, (old, old))
+    (tmp_path / 'new.zip').write_bytes(b'x')
+
+    reclaimed = clean_orphaned_files(str(tmp_path), 6 * 3600, active_keys=['ACTIVE'])
+
+    assert reclaimed == 120
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['ACTIVE.zip', 'new.zip', 'notes.txt']
@@ -0,0 +1,176 @@
+"""
+Tests for the local cache of AgriParcel / AgriParcelRecord entities.
+"""
+import pytest
+
+from app.infrastructure.external_services.entity_cache import CachedEntityReader, EntityCache, project
+from app.infrastructure.external_services.fiware_client import EntityPage
+
+PARCEL = "urn:ngsi-ld:AgriParcel:OpenAgri:1"
+
+
+def record(day, ndvi=0.5):
+    return {
+        "id": f"urn:ngsi-ld:AgriParcelRecord:OpenAgri:1:{day}",
+        "type": "AgriParcelRecord",
+        "hasAgriParcel": {"type": "Relationship", "object": PARCEL},
+        "ndvi": {"type": "Property", "value": ndvi},
+        "dateObserved": {"type": "Property", "value": f"2025-01-{day:02d}T00:00:00Z"},
+    }
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeOrion:
+    def __init__(self, entities):
+        self.entities = {entity["id"]: entity for entity in entities}
+        self.reads = 0
+
+    async def get_entity(self, entity_id):
+        self.reads += 1
+        return self.entities.get(entity_id)
+
+    async def query_page(self, entity_type, q=None, limit=100, offset=0, count=False, ids=None, **kwargs):
+        self.reads += 1
+        matches = [entity for entity in self.entities.values()
+                   if entity["type"] == entity_type and (ids is None or entity["id"] in ids)]
+        return EntityPage(matches[offset:offset + limit], offset, len(matches) if count else None)
+
+    async def iter_entities(self, entity_type, q=None, attrs=None, key_values=False, **kwargs):
+        self.reads += 1
+        for entity in self.entities.values():
+            if entity["type"] == entity_type:
+                yield project(entity, attrs, key_values)
+
+
+@pytest.mark.asyncio
+async def test_notifications_merge_and_entries_expire():
+    clock = Clock()
+    cache = EntityCache(ttl_seconds=60, clock=clock)
+    await cache.put_many([record(1), {"id": "urn:x", "type": "WeatherObserved"}])
+
+    # A notification with only the changed attribute keeps the others
+    await cache.put_many([{"id": record(1)["id"], "type": "AgriParcelRecord",
+                           "ndvi": {"type": "Property", "value": 0.9}}], merge=True)
+    entity = await cache.get(record(1)["id"])
+    assert entity["ndvi"]["value"] == 0.9
+    assert entity["dateObserved"] == record(1)["dateObserved"]
+    assert await cache.get("urn:x") is None
+
+    clock.now = 61
+    assert await cache.get(record(1)["id"]) is None
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reader_serves_parcel_records_from_cache():
+    orion = FakeOrion([record(2), record(1)])
+    cache = EntityCache(ttl_seconds=60, clock=Clock())
+    reader = CachedEntityReader(orion, cache)
+
+    first = await reader.parcel_records_page(PARCEL)
+    assert [r["id"] for r in first.entities] == [record(1)["id"], record(2)["id"]]
+    assert first.total == 2
+    assert orion.reads == 1
+
+    # New records notified after the load join the parcel's index
+    await cache.put_many([record(3)], merge=True)
+    again = await reader.parcel_records_page(PARCEL, attrs=["ndvi"], key_values=True)
+    assert again.total == 3 and again.entities[0]["ndvi"] == 0.5
+    assert orion.reads == 1
+
+    await cache.remove(record(3)["id"])
+    assert (await reader.parcel_records_page(PARCEL)).total == 2
+    assert orion.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_long_history_is_paged_from_orion_on_a_miss():
+    # Orion's order is unspecified: here, newest first
+    orion = FakeOrion([record(day) for day in range(10, 0, -1)])
+    cache = EntityCache(ttl_seconds=60, clock=Clock())
+    reader = CachedEntityReader(orion, cache)
+
+    page = await reader.parcel_records_page(PARCEL, offset=4, limit=3)
+    assert [r["id"] for r in page.entities] == [record(day)["id"] for day in (5, 6, 7)]
+    assert page.offset == 4 and page.total == 10
+    # The records' dates, then that page's records, were read; the history is not indexed from part of it
+    assert orion.reads == 2
+    assert cache.parcel_records(PARCEL) is None
+    assert await cache.get(record(5)["id"]) is not None
+
+    first = await reader.parcel_records_page(PARCEL, offset=0, limit=3)
+    assert [r["id"] for r in first.entities] == [record(day)["id"] for day in (1, 2, 3)]
+
+
+@pytest.mark.asyncio
+async def test_pages_keep_their_order_across_hits_and_misses():
+    orion = FakeOrion([record(day) for day in (3, 1, 4, 2)])
+    clock = Clock()
+    cache = EntityCache(ttl_seconds=60, clock=clock)
+    reader = CachedEntityReader(orion, cache)
+
+    # The whole history fits in the first page: indexed, the next page is a hit
+    first = await reader.parcel_records_page(PARCEL, offset=0, limit=4)
+    assert first.total == 4
+    hit = await reader.parcel_records_page(PARCEL, offset=0, limit=2)
+    # The index expires before the client follows its cursor: the next page is a miss
+    clock.now = 61
+    miss = await reader.parcel_records_page(PARCEL, offset=2, limit=2)
+    assert [r["id"] for r in hit.entities + miss.entities] == [record(day)["id"] for day in (1, 2, 3, 4)]
+
+
+def test_projection_matches_orion_options():
+    simplified = project(record(1), attrs=["ndvi"], key_values=True)
+    assert simplified == {"id": record(1)["id"], "type": "AgriParcelRecord", "ndvi": 0.5}
+    assert project(record(1), key_values=True)["hasAgriParcel"] == PARCEL
+
+
+@pytest.mark.asyncio
+async def test_persisted_cache_is_shared(session_factory):
+    writer = EntityCache(ttl_seconds=60, session_factory=session_factory)
+    await writer.put_many([record(1)])
+
+    reader = EntityCache(ttl_seconds=60, session_factory=session_factory)
+    assert (await reader.get(record(1)["id"]))["ndvi"]["value"] == 0.5
+
+    await writer.remove(record(1)["id"])
+    assert await EntityCache(ttl_seconds=60, session_factory=session_factory).get(record(1)["id"]) is None
+    assert await EntityCache(ttl_seconds=0, session_factory=session_factory).purge_expired() == 0
+
+
+@pytest.mark.asyncio
+async def test_notifications_require_the_configured_token(monkeypatch):
+    import httpx
+    from fastapi import FastAPI
+    from app.presentation.api.v1.endpoints import fiware
+
+    cache = EntityCache(ttl_seconds=60)
+    monkeypatch.setattr(fiware, 'entity_cache', cache)
+    app = FastAPI()
+    app.include_router(fiware.router, prefix="/fiware")
+    notification = {"data": [record(1)]}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        async def notify(token=None):
+            headers = {fiware.NOTIFICATION_TOKEN_HEADER: token} if token is not None else {}
+            return (await client.post("/fiware/notifications", json=notification, headers=headers)).status_code
+
+        # No token configured: nothing is accepted
+        monkeypatch.setattr(fiware.settings, 'FIWARE_NOTIFICATION_TOKEN', "")
+        assert await notify() == 401
+        assert await notify("") == 401
+
+        monkeypatch.setattr(fiware.settings, 'FIWARE_NOTIFICATION_TOKEN', "secret")
+        assert await notify() == 401
+        assert await notify("wrong") == 401
+        assert await cache.get(record(1)["id"]) is None
+        assert await notify("secret") == 204
+
+    assert (await cache.get(record(1)["id"]))["ndvi"]["value"] == 0.5
@@ -0,0 +1,55 @@
+"""
+Tests for streaming farm iteration in scheduled jobs.
+"""
+import pytest
+from sqlalchemy import update
+
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.pipeline.farm_stream import backfill_farm_geometry, iter_farm_batches
+
+SQUARE = [{'lat': 21.0, 'lng': 105.0}, {'lat': 21.0, 'lng': 105.2},
+          {'lat': 21.2, 'lng': 105.2}, {'lat': 21.2, 'lng': 105.0}]
+
+
+async def add_farms(session_factory, count):
+    async with session_factory() as session:
+        session.add_all([
+            FarmModel(name=f"farm {i}", coordinates=SQUARE, user_id=1) for i in range(count)
+        ])
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_geometry_is_computed_on_save(session_factory):
+    await add_farms(session_factory, 1)
+    async with session_factory() as session:
+        farm = await session.get(FarmModel, 1)
+        assert farm.bbox == [105.0, 21.0, 105.2, 21.2]
+        assert farm.centroid_lat == pytest.approx(21.1)
+
+        farm.coordinates = [{'lat': c['lat'] + 1, 'lng': c['lng']} for c in SQUARE]
+        await session.commit()
+        assert farm.bbox == [105.0, 22.0, 105.2, 22.2]
+
+
+@pytest.mark.asyncio
+async def test_batches_cover_all_farms_in_id_order(session_factory):
+    await add_farms(session_factory, 5)
+    batches = [batch async for batch in iter_farm_batches(session_factory, batch_size=2)]
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert [f.id for b in batches for f in b] == [1, 2, 3, 4, 5]
+    assert batches[0][0].bbox == [105.0, 21.0, 105.2, 21.2]
+
+
+@pytest.mark.asyncio
+async def test_backfill_fills_missing_geometry(session_factory):
+    await add_farms(session_factory, 3)
+    async with session_factory() as session:
+        # Rows saved before the geometry columns existed
+        await session.execute(update(FarmModel).values(bbox_min_lng=None, centroid_lat=None))
+        await session.commit()
+
+    assert await backfill_farm_geometry(session_factory, batch_size=2) == 3
+    assert await backfill_farm_geometry(session_factory, batch_size=2) == 0
+    farms = [f async for batch in iter_farm_batches(session_factory) for f in batch]
+    assert all(f.bbox == [105.0, 21.0, 105.2, 21.2] for f in farms)
@@ -0,0 +1,126 @@
+"""
+Tests for the bulk backfill of historical data to FIWARE.
+"""
+import datetime
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.fiware_outbox_model import FiwareOutboxModel
+from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.external_services.circuit_breaker import CircuitBreaker
+from app.infrastructure.external_services.fiware_client import FiwareClient
+from app.infrastructure.external_services.quantumleap_client import QuantumLeapClient
+from app.infrastructure.pipeline import fiware_backfill
+from app.infrastructure.pipeline.fiware_backfill import FiwareBackfill
+from app.infrastructure.pipeline.job_queue import JobProgress
+from tests.fakes.ngsi_ld_broker import FakeNgsiLdBroker
+
+SQUARE = [{'lat': 21.0, 'lng': 105.0}, {'lat': 21.0, 'lng': 105.2},
+          {'lat': 21.2, 'lng': 105.2}, {'lat': 21.2, 'lng': 105.0}]
+
+
+@pytest_asyncio.fixture
+async def session_factory(session_factory, monkeypatch):
+    # History saved before FIWARE was enabled: nothing in the outbox
+    monkeypatch.setattr(get_settings(), 'FIWARE_ENABLED', False)
+    async with session_factory() as session:
+        for n in range(2):
+            farm = FarmModel(name=f"farm {n}", coordinates=SQUARE, user_id=1)
+            session.add(farm)
+            await session.flush()
+            session.add_all([
+                SatelliteDataModel(farm_id=farm.id, acquisition_date=datetime.date(2024, 6, day),
+                                   data_type='NDVI', satellite_platform='SENTINEL-2', mean_value=0.1 * day)
+                for day in (1, 2, 3)
+            ] + [SatelliteDataModel(farm_id=farm.id, acquisition_date=datetime.date(2024, 6, 1),
+                                    data_type='SAR_VH', satellite_platform='SENTINEL-1', mean_value=-15.0)])
+        await session.commit()
+    monkeypatch.setattr(get_settings(), 'FIWARE_ENABLED', True)
+    monkeypatch.setattr(fiware_backfill, 'RETRY_BASE_SECONDS', 0)
+    return session_factory
+
+
+def backfill_for(session_factory, broker, name, history_points):
+    def quantumleap(request):
+        history_points.extend(json.loads(request.content)["data"])
+        return httpx.Response(200)
+
+    return FiwareBackfill(
+        session_factory,
+        client=FiwareClient(f"http://{name}", breaker=CircuitBreaker(name),
+                            transport=httpx.ASGITransport(app=broker)),
+        quantumleap=QuantumLeapClient("http://quantumleap", transport=httpx.MockTransport(quantumleap)),
+        batch_size=2,
+        concurrency=2
+    )
+
+
+@pytest.mark.asyncio
+async def test_backfill_publishes_parcels_records_and_history(session_factory):
+    broker = FakeNgsiLdBroker()
+    history = []
+    progress = JobProgress()
+    counters = await backfill_for(session_factory, broker, "orion-backfill", history).run(progress)
+
+    assert counters['parcels'] == 2 and counters['records'] == 6 and counters['history_points'] == 6
+    assert counters['rows'] == counters['total_rows'] == 6 and counters['requeued'] == 0
+    assert progress.state['result']['finished'] is True
+    assert sorted(e["type"] for e in broker.entities.values()).count("AgriParcelRecord") == 6
+    # History points carry their observation time, and no parcel's current value was rewound
+    assert history[0]["ndvi"]["observedAt"] == "2024-06-01T12:00:00Z"
+    assert "ndvi" not in broker.entities["urn:ngsi-ld:AgriParcel:OpenAgri:1"]
+
+    async with session_factory() as session:
+        farms = (await session.execute(select(FarmModel))).scalars().all()
+        assert all(farm.fiware_hash for farm in farms)
+        assert (await session.execute(select(FiwareOutboxModel))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_from_checkpoint_and_requeues_rejections(session_factory):
+    broker = FakeNgsiLdBroker()
+    rejected = "urn:ngsi-ld:AgriParcelRecord:OpenAgri:2:ndvi:20240603T120000"
+    broker.reject.add(rejected)
+    # Rows 1-4 (farm 1, with its SAR row) were done before a restart
+    progress = JobProgress(state={'progress': {
+        'last_id': 4, 'parcels': 2, 'rows': 3, 'records': 3, 'history_points': 3, 'requeued': 0,
+        'parcels_done': True,
+    }})
+    history = []
+    counters = await backfill_for(session_factory, broker, "orion-resume", history).run(progress)
+
+    assert counters['rows'] == counters['total_rows'] == 6
+    assert counters['records'] == 5 and counters['requeued'] == 1
+    assert len(history) == 3
+    assert not any(e["type"] == "AgriParcel" for e in broker.entities.values())
+
+    async with session_factory() as session:
+        requeued = (await session.execute(select(FiwareOutboxModel))).scalars().all()
+    assert [row.entity_id for row in requeued] == [rejected]
+
+
+@pytest.mark.asyncio
+async def test_later_backfill_skips_rows_already_loaded_or_queued(session_factory):
+    broker = FakeNgsiLdBroker()
+    history = []
+    await backfill_for(session_factory, broker, "orion-first", history).run(JobProgress())
+    assert len(history) == 6
+
+    # Saved with FIWARE enabled: published by the outbox, not the backfill
+    async with session_factory() as session:
+        session.add(SatelliteDataModel(farm_id=1, acquisition_date=datetime.date(2024, 6, 4), data_type='NDVI',
+                                       satellite_platform='SENTINEL-2', mean_value=0.4))
+        await session.commit()
+
+    # A new job, after the first one finished, loads no history point twice
+    history.clear()
+    counters = await backfill_for(session_factory, broker, "orion-second", history).run(JobProgress())
+    assert counters['rows'] == counters['total_rows'] == 0
+    assert counters['records'] == counters['history_points'] == 0
+    assert history == []
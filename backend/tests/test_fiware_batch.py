@@ -0,0 +1,96 @@
+"""
+Tests for NGSI-LD batch entity operations of the FIWARE client.
+"""
+import json
+
+import httpx
+import pytest
+
+from app.infrastructure.external_services.fiware_client import (
+    CONTEXT,
+    CONTEXT_LINK,
+    BatchResult,
+    FiwareBatchWriter,
+    FiwareClient
+)
+
+
+def entity(n):
+    return {"id": f"urn:ngsi-ld:AgriParcel:OpenAgri:{n}", "type": "AgriParcel"}
+
+
+@pytest.mark.asyncio
+async def test_multi_status_reports_errors_per_entity():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(207, json={
+            "success": [entity(1)["id"]],
+            "errors": [{"entityId": entity(2)["id"], "error": {"title": "Bad Request", "detail": "invalid attribute"}}]
+        })
+
+    client = FiwareClient("http://orion")
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        result = await client._send_batch(http, "upsert", [entity(1), entity(2)], {"options": "update"})
+
+    assert result.succeeded == [entity(1)["id"]]
+    assert result.errors == {entity(2)["id"]: "invalid attribute"}
+    assert requests[0].url.path == "/ngsi-ld/v1/entityOperations/upsert"
+    assert requests[0].url.params["options"] == "update"
+    assert len(json.loads(requests[0].content)) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_request_marks_whole_chunk_failed():
+    client = FiwareClient("http://orion")
+    transport = httpx.MockTransport(lambda request: httpx.Response(500, text="boom"))
+    async with httpx.AsyncClient(transport=transport) as http:
+        result = await client._send_batch(http, "update", [entity(1), entity(2)], None)
+
+    assert result.succeeded == []
+    assert set(result.errors) == {entity(1)["id"], entity(2)["id"]}
+
+
+class RecordingClient:
+    def __init__(self):
+        self.batches = []
+
+    async def upsert_entities(self, entities, chunk_size=None):
+        self.batches.append([e["id"] for e in entities])
+        result = BatchResult()
+        result.succeeded = [e["id"] for e in entities]
+        return result
+
+
+@pytest.mark.asyncio
+async def test_batch_writer_flushes_in_chunks_and_dedupes():
+    client = RecordingClient()
+    writer = FiwareBatchWriter(client, batch_size=2)
+    for n in (1, 1, 2, 3):
+        await writer.add(entity(n))
+    result = await writer.flush()
+
+    assert client.batches == [[entity(1)["id"], entity(2)["id"]], [entity(3)["id"]]]
+    assert result.ok and len(result.succeeded) == 3
+
+
+@pytest.mark.asyncio
+async def test_default_context_is_sent_once_as_link_header():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(204)
+
+    client = FiwareClient("http://orion")
+    custom = {**entity(3), "@context": ["https://example.org/context.jsonld"]}
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        await client._send_batch(http, "upsert", [{**entity(1), "@context": CONTEXT}, entity(2)], None)
+        await client._send_batch(http, "upsert", [entity(1), custom], None)
+
+    linked, inline = requests
+    assert linked.headers["Content-Type"] == "application/json" and linked.headers["Link"] == CONTEXT_LINK
+    assert json.loads(linked.content) == [entity(1), entity(2)]
+    assert inline.headers["Content-Type"] == "application/ld+json" and "Link" not in inline.headers
+    assert [e["@context"] for e in json.loads(inline.content)] == [CONTEXT, custom["@context"]]
@@ -0,0 +1,238 @@
+"""
+Tests for the transactional FIWARE outbox and its drainer.
+"""
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.database.models.fiware_outbox_model import (
+    FiwareOutboxModel,
+    OPERATION_APPEND,
+    OPERATION_UPSERT,
+    OUTBOX_PENDING,
+    OUTBOX_PUBLISHED,
+    OUTBOX_FAILED,
+    OUTBOX_SUPERSEDED
+)
+from app.infrastructure.external_services.fiware_client import BatchResult
+from app.infrastructure.pipeline.fiware_outbox import FiwareOutboxDrainer
+
+SQUARE = [{'lat': 21.0, 'lng': 105.0}, {'lat': 21.0, 'lng': 105.2},
+          {'lat': 21.2, 'lng': 105.2}, {'lat': 21.2, 'lng': 105.0}]
+
+
+class FakeOrion:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.upserted = []
+        self.requests = []
+        self.entities = {}
+
+    async def health_check(self):
+        return True
+
+    async def upsert_entities(self, entities, chunk_size=None):
+        self.requests.append([entity["id"] for entity in entities])
+        result = BatchResult()
+        for entity in entities:
+            if entity["id"] in self.failing:
+                result.errors[entity["id"]] = "rejected"
+            else:
+                self.upserted.append(entity["id"])
+                self.entities.setdefault(entity["id"], {}).update(entity)
+                result.succeeded.append(entity["id"])
+        return result
+
+
+class FakeQuantumLeap:
+    def __init__(self):
+        self.points = []
+
+    async def notify(self, entities):
+        self.points.extend(entities)
+
+
+async def save_farm_with_observation(session_factory, commit=True, days=(1,)):
+    async with session_factory() as session:
+        farm = FarmModel(name="farm", coordinates=SQUARE, user_id=1)
+        session.add(farm)
+        await session.flush()
+        session.add_all([
+            SatelliteDataModel(
+                farm_id=farm.id, acquisition_date=datetime.date(2025, 6, day), data_type='NDVI',
+                satellite_platform='SENTINEL-2', mean_value=0.6
+            )
+            for day in days
+        ])
+        if commit:
+            await session.commit()
+        else:
+            await session.rollback()
+
+
+async def outbox_rows(session_factory):
+    async with session_factory() as session:
+        result = await session.execute(select(FiwareOutboxModel).order_by(FiwareOutboxModel.id))
+        return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_rows_are_written_in_the_data_transaction(session_factory):
+    await save_farm_with_observation(session_factory, commit=False)
+    assert await outbox_rows(session_factory) == []
+
+    await save_farm_with_observation(session_factory)
+    rows = await outbox_rows(session_factory)
+    assert [(row.entity_type, row.operation) for row in rows] == [
+        ("AgriParcel", OPERATION_UPSERT), ("AgriParcelRecord", OPERATION_UPSERT), ("AgriParcel", OPERATION_APPEND)
+    ]
+    assert rows[1].entity_id == "urn:ngsi-ld:AgriParcelRecord:OpenAgri:1:ndvi:20250601T120000"
+    assert rows[2].payload["ndvi"]["value"] == 0.6
+    assert all(row.status == OUTBOX_PENDING for row in rows)
+
+
+@pytest.mark.asyncio
+async def test_unchanged_farm_update_is_not_published(session_factory):
+    await save_farm_with_observation(session_factory)
+    async with session_factory() as session:
+        farm = await session.get(FarmModel, 1)
+        assert farm.fiware_hash is not None
+        farm.description = "not part of the entity"
+        farm.mark_fiware_dirty()
+        await session.commit()
+        # Same content after a round trip through another value: hash unchanged
+        farm.coordinates = list(reversed(SQUARE))
+        farm.coordinates = list(SQUARE)
+        await session.commit()
+        farm.name = "renamed"
+        await session.commit()
+
+    rows = await outbox_rows(session_factory)
+    assert len(rows) == 4
+    assert rows[-1].operation == OPERATION_UPSERT and rows[-1].payload["name"]["value"] == "renamed"
+
+
+@pytest.mark.asyncio
+async def test_drain_collapses_upserts_but_sends_every_append(session_factory):
+    await save_farm_with_observation(session_factory, days=(1, 6))
+    async with session_factory() as session:
+        farm = await session.get(FarmModel, 1)
+        farm.name = "renamed"
+        await session.commit()
+
+    orion, quantumleap = FakeOrion(), FakeQuantumLeap()
+    totals = await FiwareOutboxDrainer(session_factory, client=orion, quantumleap=quantumleap,
+                                       batch_size=10).drain()
+
+    parcel = "urn:ngsi-ld:AgriParcel:OpenAgri:1"
+    assert totals == {'published': 6, 'retried': 0, 'failed': 0}
+    # One upsert batch (parcel once, two records), then the newest observation as the parcel's value;
+    # the older one goes straight to its history
+    assert orion.requests[0].count(parcel) == 1 and len(orion.requests[0]) == 3
+    assert orion.requests[1:] == [[parcel]]
+    assert orion.entities[parcel]["ndvi"]["observedAt"] == "2025-06-06T12:00:00Z"
+    assert [point["ndvi"]["observedAt"] for point in quantumleap.points] == ["2025-06-01T12:00:00Z"]
+    assert all(row.status == OUTBOX_PUBLISHED for row in await outbox_rows(session_factory))
+
+
+@pytest.mark.asyncio
+async def test_observations_saved_out_of_order_never_rewind_the_parcel(session_factory):
+    # Syncs save the newest product first
+    await save_farm_with_observation(session_factory, days=(20, 10, 1))
+    orion, quantumleap = FakeOrion(), FakeQuantumLeap()
+    drainer = FiwareOutboxDrainer(session_factory, client=orion, quantumleap=quantumleap, batch_size=3)
+    await drainer.drain()
+
+    async with session_factory() as session:
+        # A backfill re-saves an older date later on
+        session.add(SatelliteDataModel(farm_id=1, acquisition_date=datetime.date(2025, 6, 5), data_type='NDVI',
+                                       satellite_platform='SENTINEL-2', mean_value=0.2))
+        await session.commit()
+    await drainer.drain()
+
+    parcel = orion.entities["urn:ngsi-ld:AgriParcel:OpenAgri:1"]
+    assert parcel["ndvi"]["observedAt"] == "2025-06-20T12:00:00Z"
+    assert sorted(point["ndvi"]["observedAt"][:10] for point in quantumleap.points) == [
+        "2025-06-01", "2025-06-05", "2025-06-10"
+    ]
+    async with session_factory() as session:
+        farm = await session.get(FarmModel, 1)
+        assert farm.fiware_observed == {"ndvi": "2025-06-20T12:00:00Z"}
+    assert all(row.status == OUTBOX_PUBLISHED for row in await outbox_rows(session_factory))
+
+
+@pytest.mark.asyncio
+async def test_failed_entities_back_off_then_give_up(session_factory):
+    await save_farm_with_observation(session_factory)
+    orion = FakeOrion(failing={"urn:ngsi-ld:AgriParcel:OpenAgri:1"})
+    drainer = FiwareOutboxDrainer(session_factory, client=orion, quantumleap=FakeQuantumLeap(), batch_size=10,
+                                  max_attempts=2)
+
+    assert await drainer.drain_batch() == {'published': 1, 'retried': 2, 'failed': 0}
+    # Not due again until their backoff has passed
+    assert await drainer.drain_batch() == {'published': 0, 'retried': 0, 'failed': 0}
+
+    async with session_factory() as session:
+        for row_id in (1, 3):
+            row = await session.get(FiwareOutboxModel, row_id)
+            row.next_attempt_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        await session.commit()
+    assert await drainer.drain_batch() == {'published': 0, 'retried': 0, 'failed': 2}
+
+    rows = await outbox_rows(session_factory)
+    assert [row.status for row in rows] == [OUTBOX_FAILED, OUTBOX_PUBLISHED, OUTBOX_FAILED]
+    assert rows[0].last_error == "rejected"
+
+
+@pytest.mark.asyncio
+async def test_newer_change_supersedes_an_older_one_in_backoff(session_factory):
+    await save_farm_with_observation(session_factory)
+    parcel = "urn:ngsi-ld:AgriParcel:OpenAgri:1"
+    orion = FakeOrion(failing={parcel})
+    drainer = FiwareOutboxDrainer(session_factory, client=orion, quantumleap=FakeQuantumLeap(), batch_size=10)
+    # The parcel upsert fails and waits for its retry
+    assert await drainer.drain_batch() == {'published': 1, 'retried': 2, 'failed': 0}
+
+    async with session_factory() as session:
+        farm = await session.get(FarmModel, 1)
+        farm.name = "renamed"
+        await session.commit()
+    orion.failing.clear()
+    assert await drainer.drain_batch() == {'published': 1, 'retried': 0, 'failed': 0}
+
+    # Once its backoff has passed, the stale version is not sent over the new one
+    async with session_factory() as session:
+        row = await session.get(FiwareOutboxModel, 1)
+        row.next_attempt_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        await session.commit()
+    orion.requests.clear()
+    assert await drainer.drain_batch() == {'published': 0, 'retried': 0, 'failed': 0}
+    assert orion.requests == []
+
+    rows = await outbox_rows(session_factory)
+    assert rows[0].status == OUTBOX_SUPERSEDED
+    assert rows[-1].status == OUTBOX_PUBLISHED and rows[-1].payload["name"]["value"] == "renamed"
+
+
+@pytest.mark.asyncio
+async def test_given_up_parcel_is_queued_again_on_next_save(session_factory):
+    await save_farm_with_observation(session_factory)
+    orion = FakeOrion(failing={"urn:ngsi-ld:AgriParcel:OpenAgri:1"})
+    drainer = FiwareOutboxDrainer(session_factory, client=orion, quantumleap=FakeQuantumLeap(), batch_size=10,
+                                  max_attempts=1)
+    assert (await drainer.drain_batch())['failed'] == 2
+
+    async with session_factory() as session:
+        farm = await session.get(FarmModel, 1)
+        assert farm.fiware_hash is None and farm.fiware_dirty
+        # A save that does not touch the parcel's attributes republishes it
+        farm.description = "irrigated"
+        await session.commit()
+        assert farm.fiware_hash is not None
+
+    rows = await outbox_rows(session_factory)
+    assert rows[-1].entity_type == "AgriParcel" and rows[-1].operation == OPERATION_UPSERT
+    assert rows[-1].status == OUTBOX_PENDING
@@ -0,0 +1,44 @@
+"""
+Tests for paginated NGSI-LD entity queries and the cursors of the FIWARE endpoints.
+"""
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.infrastructure.external_services.circuit_breaker import CircuitBreaker
+from app.infrastructure.external_services.fiware_client import EntityPage, FiwareClient
+from app.presentation.api.v1.endpoints.fiware import _decode_cursor, _encode_cursor, _next_cursor
+
+
+@pytest.mark.asyncio
+async def test_query_page_sends_projection_and_reads_count():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[{"id": "urn:1"}], headers={"NGSILD-Results-Count": "42"})
+
+    client = FiwareClient("http://orion", breaker=CircuitBreaker("test"))
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+        page = await client._query_page(http, "AgriParcelRecord", "hasAgriParcel==urn:x", 5000, 200,
+                                        ["ndvi", "dateObserved"], True, True)
+
+    params = requests[0].url.params
+    assert params["limit"] == "1000"
+    assert params["offset"] == "200"
+    assert params["attrs"] == "ndvi,dateObserved"
+    assert params["options"] == "keyValues"
+    assert params["count"] == "true"
+    assert page == EntityPage([{"id": "urn:1"}], 200, 42)
+
+
+def test_cursor_round_trip_and_last_page():
+    assert _decode_cursor(_encode_cursor(300)) == 300
+    assert _decode_cursor(None) == 0
+    with pytest.raises(HTTPException):
+        _decode_cursor("not-a-cursor")
+
+    full = EntityPage([{}] * 100, 200)
+    assert _decode_cursor(_next_cursor(full, 100)) == 300
+    assert _next_cursor(EntityPage([{}] * 40, 200), 100) is None
+    assert _next_cursor(EntityPage([{}] * 100, 200, total=300), 100) is None
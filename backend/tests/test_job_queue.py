@@ -0,0 +1,262 @@
+"""
+Tests for the durable satellite sync job queue.
+"""
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import update
+
+from app.application.use_cases import ndvi_use_cases
+from app.application.use_cases.ndvi_use_cases import CalculateNDVIUseCase
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.job_model import SatelliteJobModel
+from app.infrastructure.pipeline.job_queue import (
+    JobProgress,
+    JobQueue,
+    JobWorker,
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_RUNNING,
+    STAGE_PROCESSED,
+    STAGE_SAVED,
+    STAGE_SYNCED,
+)
+
+
+@pytest.mark.asyncio
+async def test_enqueue_dedupes_pending_jobs(session_factory):
+    queue = JobQueue(session_factory)
+    first = await queue.enqueue('ndvi_sync', dedupe_key='ndvi_sync:1')
+    second = await queue.enqueue('ndvi_sync', dedupe_key='ndvi_sync:1')
+    other = await queue.enqueue('ndvi_sync', dedupe_key='ndvi_sync:2')
+    assert first == second
+    assert other != first
+
+
+@pytest.mark.asyncio
+async def test_concurrent_enqueue_of_the_same_key_creates_one_job(session_factory, monkeypatch):
+    queue = JobQueue(session_factory)
+    first = await queue.enqueue('fiware_backfill', dedupe_key='fiware_backfill')
+
+    # A second caller whose check ran before the first job was committed
+    checks = []
+    promote_existing = JobQueue._promote_existing
+
+    async def racing_check(session, dedupe_key, priority):
+        checks.append(dedupe_key)
+        return None if len(checks) == 1 else await promote_existing(session, dedupe_key, priority)
+
+    monkeypatch.setattr(JobQueue, '_promote_existing', staticmethod(racing_check))
+    assert await queue.enqueue('fiware_backfill', dedupe_key='fiware_backfill') == first
+    assert len(checks) == 2
+
+    # Finished jobs do not hold their key
+    await queue.claim()
+    await queue.complete(first)
+    assert await queue.enqueue('fiware_backfill', dedupe_key='fiware_backfill') != first
+
+
+@pytest.mark.asyncio
+async def test_only_one_worker_claims_a_job(session_factory):
+    job_id = await JobQueue(session_factory).enqueue('ndvi_sync')
+    a = JobQueue(session_factory, worker_id='a')
+    b = JobQueue(session_factory, worker_id='b')
+    claimed = await a.claim()
+    assert claimed.id == job_id
+    assert await b.claim() is None
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_resumes_from_checkpoint(session_factory):
+    job_id = await JobQueue(session_factory).enqueue('ndvi_sync')
+
+    # Worker "a" reaches 'processed' and dies; its lease is already expired
+    crashed = JobQueue(session_factory, worker_id='a', lease_seconds=-1)
+    await crashed.claim()
+    await crashed.checkpoint(job_id, STAGE_PROCESSED, {'results': {'p1': 0.5}})
+
+    seen = {}
+
+    async def handler(job, progress):
+        seen['stage'] = progress.stage
+        seen['state'] = dict(progress.state)
+        await progress.checkpoint(STAGE_SAVED)
+
+    queue = JobQueue(session_factory, worker_id='b')
+    await JobWorker(queue, {'ndvi_sync': handler}).run_until_idle()
+
+    job = await queue.get(job_id)
+    assert seen == {'stage': STAGE_PROCESSED, 'state': {'results': {'p1': 0.5}}}
+    assert job.status == STATUS_DONE
+    assert job.stage == STAGE_SAVED
+    assert job.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_until_max_attempts(session_factory):
+    queue = JobQueue(session_factory, retry_delay_seconds=0)
+    job_id = await queue.enqueue('ndvi_sync', max_attempts=2)
+
+    async def handler(job, progress):
+        raise RuntimeError('download failed')
+
+    worker = JobWorker(queue, {'ndvi_sync': handler})
+    await worker.run_until_idle()
+
+    job = await queue.get(job_id)
+    assert job.status == STATUS_FAILED
+    assert job.attempts == 2
+    assert job.last_error == 'download failed'
+
+
+@pytest.mark.asyncio
+async def test_identical_calculations_share_a_job(session_factory):
+    from app.application.dto.ndvi_dto import NDVIRequest
+    from app.application.use_cases.calculation_job_use_cases import (
+        SubmitCalculationJobUseCase,
+        NDVI_CALCULATE_JOB,
+    )
+
+    use_case = SubmitCalculationJobUseCase(JobQueue(session_factory))
+    bbox = [105.8, 21.0, 105.81, 21.01]
+    first = await use_case.execute(
+        NDVI_CALCULATE_JOB, NDVIRequest(bbox=bbox, start_date='2025-01-01', end_date='2025-01-31')
+    )
+    same = await use_case.execute(
+        NDVI_CALCULATE_JOB,
+        NDVIRequest(bbox=[v + 1e-9 for v in bbox], start_date='2025-01-01T08:00:00', end_date='2025-01-31')
+    )
+    other = await use_case.execute(
+        NDVI_CALCULATE_JOB, NDVIRequest(bbox=bbox, start_date='2025-02-01', end_date='2025-02-28')
+    )
+    assert first.job_id == same.job_id
+    assert other.job_id != first.job_id
+    assert first.status == 'pending'
+    assert first.status_url.endswith(f"/jobs/{first.job_id}")
+
+
+@pytest.mark.asyncio
+async def test_claim_prefers_urgent_jobs_and_promotes_duplicates(session_factory):
+    from app.infrastructure.pipeline.work_scheduler import PRIORITY_INTERACTIVE, PRIORITY_RESYNC
+
+    queue = JobQueue(session_factory)
+    batch = await queue.enqueue('ndvi_sync', dedupe_key='ndvi_sync:1')
+    other_batch = await queue.enqueue('ndvi_sync', dedupe_key='ndvi_sync:2')
+    interactive = await queue.enqueue('ndvi_calculate', priority=PRIORITY_INTERACTIVE)
+
+    # A user-triggered resync of farm 2 promotes its pending nightly job
+    assert await queue.enqueue('ndvi_sync', dedupe_key='ndvi_sync:2', priority=PRIORITY_RESYNC) == other_batch
+
+    claimed = [(await queue.claim()).id for _ in range(3)]
+    assert claimed == [interactive, other_batch, batch]
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_cancels_the_handler(session_factory):
+    queue = JobQueue(session_factory, worker_id='a', lease_seconds=3)
+    job_id = await queue.enqueue('ndvi_sync')
+    events = []
+
+    async def handler(job, progress):
+        # Worker "b" takes the job over (e.g. "a" stalled past its lease)
+        async with session_factory() as session:
+            await session.execute(
+                update(SatelliteJobModel).where(SatelliteJobModel.id == job.id).values(
+                    lease_owner='b', lease_expires_at=datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+                )
+            )
+            await session.commit()
+        try:
+            await asyncio.sleep(30)
+            events.append('finished')
+        except asyncio.CancelledError:
+            events.append('cancelled')
+            raise
+
+    await asyncio.wait_for(JobWorker(queue, {'ndvi_sync': handler}).run_until_idle(), timeout=10)
+
+    job = await queue.get(job_id)
+    assert events == ['cancelled']
+    assert job.status == STATUS_RUNNING and job.lease_owner == 'b'
+
+
+@pytest.mark.asyncio
+async def test_resumed_sync_removes_files_of_earlier_attempts(session_factory, tmp_path, monkeypatch):
+    output = tmp_path / 'output'
+    output.mkdir()
+    monkeypatch.setattr(ndvi_use_cases.settings, 'OUTPUT_DIR', str(output))
+    async with session_factory() as session:
+        farm = FarmModel(name="farm", coordinates=[], user_id=1)
+        session.add(farm)
+        await session.commit()
+
+        # Product p1 was saved, p2 processed, before the worker died: their files are still there
+        files = {}
+        for name in ('p1', 'p2'):
+            safe = output / f'{name}.SAFE'
+            safe.mkdir()
+            (output / f'{name}.zip').write_bytes(b'zip')
+            (output / f'ndvi_{name}.tif').write_bytes(b'tif')
+            files[name] = {'acquisition_date': '2025-06-0' + name[1], 'safe_path': str(safe),
+                           'out_paths': [str(output / f'ndvi_{name}.tif')], 'mean': 0.5, 'min': 0.1, 'max': 0.9}
+        state = {
+            'products': [
+                {'uuid': name, 'title': name, 'ingestiondate': f'2025-06-0{name[1]}T10:00:00', 'cloud_cover': 5.0}
+                for name in ('p1', 'p2')
+            ],
+            'stages': {'p1': STAGE_SAVED, 'p2': STAGE_PROCESSED},
+            'results': files,
+        }
+        progress = JobProgress(state=state)
+        await CalculateNDVIUseCase().sync_latest_data_for_farm(farm.id, [105.0, 21.0, 105.1, 21.1], session,
+                                                              progress=progress)
+
+    assert state['stages'] == {'p1': STAGE_SYNCED, 'p2': STAGE_SYNCED}
+    assert list(output.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_in_flight_jobs_and_releases_them(session_factory):
+    queue = JobQueue(session_factory, worker_id='a')
+    job_id = await queue.enqueue('ndvi_sync')
+    started = asyncio.Event()
+
+    async def handler(job, progress):
+        await progress.checkpoint(STAGE_PROCESSED)
+        started.set()
+        await asyncio.sleep(30)
+
+    worker = JobWorker(queue, {'ndvi_sync': handler}, poll_interval=0.01)
+    run = asyncio.create_task(worker.run())
+    await asyncio.wait_for(started.wait(), timeout=5)
+    run.cancel()
+    await asyncio.wait_for(worker.shutdown(), timeout=5)
+
+    # Claimable again at once, from its checkpoint, without using up an attempt
+    job = await queue.get(job_id)
+    assert job.status == STATUS_PENDING and job.lease_owner is None
+    assert job.stage == STAGE_PROCESSED and job.attempts == 0
+    assert (await JobQueue(session_factory, worker_id='b').claim()).id == job_id
+
+
+@pytest.mark.asyncio
+async def test_active_file_keys_come_from_unfinished_jobs(session_factory):
+    queue = JobQueue(session_factory, worker_id='a')
+    state = {
+        'products': [{'uuid': 'p1', 'title': 'S2A_p1'}],
+        'results': {'p1': {'safe_path': '/out/S2A_p1.SAFE', 'out_paths': ['/out/ndvi_1.tif']}},
+    }
+    running = await queue.enqueue('ndvi_sync', dedupe_key='ndvi_sync:1')
+    await queue.claim()
+    await queue.checkpoint(running, STAGE_PROCESSED, state)
+    await queue.complete(running)
+    assert await queue.active_file_keys() == []
+
+    # A job waiting for its retry resumes from its files
+    pending = await queue.enqueue('ndvi_sync', dedupe_key='ndvi_sync:2')
+    async with session_factory() as session:
+        await session.execute(update(SatelliteJobModel).where(SatelliteJobModel.id == pending).values(state=state))
+        await session.commit()
+    assert await queue.active_file_keys() == ['S2A_p1', 'S2A_p1.SAFE', 'ndvi_1.tif']
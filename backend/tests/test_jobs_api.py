@@ -0,0 +1,95 @@
+"""
+Tests for job ownership on the job submission and status endpoints.
+"""
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from app.domain.entities.user import User
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.user_model import UserModel
+from app.infrastructure.pipeline.job_queue import JobQueue
+from app.presentation.api.v1.endpoints import jobs, ndvi, soil_moisture
+from app.presentation.deps import get_current_user, get_job_queue
+
+NDVI_REQUEST = {'bbox': [105.8, 21.0, 105.81, 21.01], 'start_date': '2025-01-01', 'end_date': '2025-01-31'}
+SOIL_MOISTURE_REQUEST = {'bbox': [105.8, 21.0, 105.81, 21.01], 'date': '2025-01-15'}
+
+
+def make_user(user_id, is_superuser=False):
+    return User(id=user_id, email=f"user{user_id}@example.com", username=f"user{user_id}",
+                hashed_password='x', is_superuser=is_superuser)
+
+
+@pytest_asyncio.fixture
+async def session_factory(session_factory):
+    async with session_factory() as session:
+        session.add_all([
+            UserModel(id=user_id, email=f"user{user_id}@example.com", username=f"user{user_id}",
+                      hashed_password='x')
+            for user_id in (1, 2, 3)
+        ])
+        await session.commit()
+    return session_factory
+
+
+@pytest_asyncio.fixture
+async def client(session_factory):
+    app = FastAPI()
+    app.include_router(jobs.router, prefix="/jobs")
+    app.include_router(ndvi.router, prefix="/ndvi")
+    app.include_router(soil_moisture.router, prefix="/soil-moisture")
+    app.state.user = make_user(1)
+    app.dependency_overrides[get_job_queue] = lambda: JobQueue(session_factory)
+    app.dependency_overrides[get_current_user] = lambda: app.state.user
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        client.app = app
+        yield client
+
+
+def act_as(client, user):
+    client.app.state.user = user
+
+
+@pytest.mark.asyncio
+async def test_only_the_submitter_can_read_a_job(client):
+    response = await client.post("/ndvi/calculate/jobs", json=NDVI_REQUEST)
+    assert response.status_code == 202
+    job_id = response.json()['job_id']
+    assert (await client.get(f"/jobs/{job_id}")).status_code == 200
+
+    act_as(client, make_user(2))
+    assert (await client.get(f"/jobs/{job_id}")).status_code == 404
+    assert (await client.get(f"/jobs/{job_id}/events")).status_code == 404
+    # Indistinguishable from a job that does not exist
+    assert (await client.get(f"/jobs/{job_id}")).json() == (await client.get("/jobs/9999")).json()
+
+    act_as(client, make_user(3, is_superuser=True))
+    assert (await client.get(f"/jobs/{job_id}")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_of_different_users_get_their_own_jobs(client, session_factory):
+    first = (await client.post("/soil-moisture/calculate/jobs", json=SOIL_MOISTURE_REQUEST)).json()['job_id']
+    again = (await client.post("/soil-moisture/calculate/jobs", json=SOIL_MOISTURE_REQUEST)).json()['job_id']
+    act_as(client, make_user(2))
+    other = (await client.post("/soil-moisture/calculate/jobs", json=SOIL_MOISTURE_REQUEST)).json()['job_id']
+
+    assert first == again
+    assert other != first
+    job = await JobQueue(session_factory).get(other)
+    assert job.user_id == 2
+
+
+@pytest.mark.asyncio
+async def test_farm_syncs_are_readable_by_the_farm_owner(client, session_factory):
+    async with session_factory() as session:
+        farm = FarmModel(name="paddy", coordinates=[], user_id=1)
+        session.add(farm)
+        await session.commit()
+    job_id = await JobQueue(session_factory).enqueue('ndvi_sync', farm_id=farm.id, dedupe_key=f"ndvi_sync:{farm.id}")
+
+    assert (await client.get(f"/jobs/{job_id}")).status_code == 200
+    act_as(client, make_user(2))
+    assert (await client.get(f"/jobs/{job_id}")).status_code == 404
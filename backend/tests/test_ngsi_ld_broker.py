@@ -0,0 +1,128 @@
+"""
+FIWARE client, outbox drainer and entity cache against the in-process NGSI-LD broker.
+"""
+import datetime
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.fiware_outbox_model import FiwareOutboxModel, OUTBOX_PUBLISHED
+from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.external_services.circuit_breaker import CircuitBreaker
+from app.infrastructure.external_services.entity_cache import EntityCache
+from app.infrastructure.external_services.fiware_client import (
+    FiwareClient,
+    create_agriparcel_record,
+    ensure_notification_subscription
+)
+from app.infrastructure.external_services.quantumleap_client import QuantumLeapClient
+from app.infrastructure.pipeline.fiware_outbox import FiwareOutboxDrainer
+from tests.fakes.ngsi_ld_broker import FakeNgsiLdBroker
+
+PARCEL = "urn:ngsi-ld:AgriParcel:OpenAgri:1"
+SQUARE = [{'lat': 21.0, 'lng': 105.0}, {'lat': 21.0, 'lng': 105.2},
+          {'lat': 21.2, 'lng': 105.2}, {'lat': 21.2, 'lng': 105.0}]
+
+
+def client_for(broker, name):
+    # Own breaker and URL: no state shared with other tests through the module-level breaker and health cache
+    return FiwareClient(f"http://{name}", breaker=CircuitBreaker(name),
+                        transport=httpx.ASGITransport(app=broker))
+
+
+def records(farm_id, days):
+    start = datetime.datetime(2025, 1, 1, 12)
+    return [create_agriparcel_record(farm_id, "ndvi", 0.5, start + datetime.timedelta(days=day))
+            for day in range(days)]
+
+
+@pytest.mark.asyncio
+async def test_batch_upsert_query_and_paging():
+    broker = FakeNgsiLdBroker()
+    client = client_for(broker, "orion-query")
+
+    result = await client.upsert_entities(records(1, 250) + records(2, 5), chunk_size=100)
+    assert result.ok and len(result.succeeded) == 255
+
+    page = await client.query_page("AgriParcelRecord", q=f"hasAgriParcel=={PARCEL}", limit=100,
+                                   offset=200, attrs=["ndvi"], key_values=True, count=True)
+    assert page.total == 250 and len(page.entities) == 50
+    assert set(page.entities[0]) == {"@context", "id", "type", "ndvi"} and page.entities[0]["ndvi"] == 0.5
+    ids = [entity["id"] for entity in page.entities[:3]]
+    by_id = await client.query_page("AgriParcelRecord", q=f"hasAgriParcel=={PARCEL}", ids=ids)
+    assert sorted(entity["id"] for entity in by_id.entities) == sorted(ids)
+
+    streamed = [entity async for entity in client.iter_entities(
+        "AgriParcelRecord", q=f"hasAgriParcel=={PARCEL}", page_size=64)]
+    assert len(streamed) == 250
+    assert await client.delete_entity(streamed[0]["id"]) is True
+    assert await client.get_entity(streamed[0]["id"]) is None
+
+
+@pytest.mark.asyncio
+async def test_outbox_drain_survives_injected_faults(session_factory):
+    async with session_factory() as session:
+        farm = FarmModel(name="farm", coordinates=SQUARE, user_id=1)
+        session.add(farm)
+        await session.flush()
+        session.add_all([
+            SatelliteDataModel(farm_id=farm.id, acquisition_date=datetime.date(2025, 6, day), data_type='NDVI',
+                               satellite_platform='SENTINEL-2', mean_value=0.6)
+            for day in (1, 2)
+        ])
+        await session.commit()
+
+    broker = FakeNgsiLdBroker()
+    broker.reject.add(PARCEL)
+    quantumleap = QuantumLeapClient("http://quantumleap", transport=httpx.MockTransport(lambda _: httpx.Response(200)))
+    drainer = FiwareOutboxDrainer(session_factory, client=client_for(broker, "orion-outbox"),
+                                  quantumleap=quantumleap, batch_size=10)
+    totals = await drainer.drain()
+    # Records and the older observation (history only) are published; the rejected parcel and its
+    # newest observation are retried
+    assert totals == {'published': 3, 'retried': 2, 'failed': 0}
+
+    broker.reject.clear()
+    broker.fail_next(1, status=500)
+    async with session_factory() as session:
+        for row in (await session.execute(select(FiwareOutboxModel))).scalars():
+            row.next_attempt_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        await session.commit()
+    # The parcel upsert hits the injected 500 and is retried later; the append goes through
+    assert await drainer.drain_batch() == {'published': 1, 'retried': 1, 'failed': 0}
+    async with session_factory() as session:
+        for row in (await session.execute(select(FiwareOutboxModel))).scalars():
+            row.next_attempt_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        await session.commit()
+    assert (await drainer.drain())['published'] == 1
+
+    async with session_factory() as session:
+        rows = (await session.execute(select(FiwareOutboxModel))).scalars().all()
+    assert all(row.status == OUTBOX_PUBLISHED for row in rows)
+    assert broker.entities[PARCEL]["ndvi"]["value"] == 0.6
+    assert len([e for e in broker.entities.values() if e["type"] == "AgriParcelRecord"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_notifications_keep_entity_cache_fresh():
+    cache = EntityCache(ttl_seconds=60)
+
+    async def deliver(subscription, notification):
+        await cache.put_many(notification["data"], merge=True)
+
+    broker = FakeNgsiLdBroker(on_notify=deliver)
+    client = client_for(broker, "orion-notify")
+    assert await ensure_notification_subscription(client, "http://backend/notifications", token="") == []
+    first = await ensure_notification_subscription(client, "http://backend/notifications", token="secret")
+    again = await ensure_notification_subscription(client, "http://backend/notifications", token="secret")
+    assert len(first) == 2 and again == first
+
+    entity = records(1, 1)[0]
+    await client.upsert_entities([entity])
+    await client.update_entity(entity["id"], {"ndvi": {"type": "Property", "value": 0.8}})
+
+    cached = await cache.get(entity["id"])
+    assert cached["ndvi"]["value"] == 0.8 and cached["hasAgriParcel"]["object"] == PARCEL
+    assert len(broker.notifications) == 2
@@ -0,0 +1,63 @@
+"""
+Tests for overpass-aware sync scheduling.
+"""
+import datetime
+
+from app.infrastructure.pipeline.overpass import estimate_cadence, is_sync_due, search_start_date
+
+
+def test_estimate_cadence_uses_median_gap():
+    """Median gap between unique acquisition dates is used as cadence."""
+    base = datetime.date(2025, 1, 1)
+    dates = [base, base, base + datetime.timedelta(days=5), base + datetime.timedelta(days=10),
+             base + datetime.timedelta(days=20)]
+    assert estimate_cadence(dates, 'SENTINEL-2') == 5.0
+
+
+def test_estimate_cadence_falls_back_to_nominal():
+    """Without at least two dates the previous or nominal cadence is kept."""
+    assert estimate_cadence([], 'SENTINEL-1') == 12.0
+    assert estimate_cadence([datetime.date(2025, 1, 1)], 'SENTINEL-1', previous=6.0) == 6.0
+
+
+def test_never_checked_farm_is_due():
+    """Farms without sync state are always searched."""
+    assert is_sync_due(None, None, None, 'SENTINEL-2')
+
+
+def test_due_only_in_publication_window():
+    """A farm is due in the days following each expected pass."""
+    last = datetime.date(2025, 1, 1)
+    checked = datetime.datetime(2025, 1, 2, 0, 30)
+
+    def due(day_offset):
+        today = last + datetime.timedelta(days=day_offset)
+        return is_sync_due(last, 5.0, checked, 'SENTINEL-2', today=today)
+
+    assert not due(3)
+    assert due(5)
+    assert due(7)
+    assert not due(8)
+    assert due(10)
+
+
+def test_not_due_twice_on_same_day():
+    """A farm already searched today is not searched again."""
+    last = datetime.date(2025, 1, 1)
+    today = datetime.date(2025, 1, 6)
+    checked = datetime.datetime(2025, 1, 6, 0, 5)
+    assert not is_sync_due(last, 5.0, checked, 'SENTINEL-2', today=today)
+
+
+def test_search_starts_before_watermark():
+    """Incremental searches start a few days before the last processed acquisition."""
+    today = datetime.date(2025, 3, 1)
+    watermark = datetime.date(2025, 2, 25)
+    assert search_start_date(watermark, today, 60, 3) == datetime.date(2025, 2, 22)
+
+
+def test_search_without_watermark_uses_full_lookback():
+    """Farms never synced (or a stale watermark) use the full look-back window."""
+    today = datetime.date(2025, 3, 1)
+    assert search_start_date(None, today, 14, 3) == datetime.date(2025, 2, 15)
+    assert search_start_date(datetime.date(2024, 1, 1), today, 14, 3) == datetime.date(2025, 2, 15)
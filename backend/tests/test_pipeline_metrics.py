@@ -0,0 +1,76 @@
+"""
+Tests for per-stage pipeline metrics.
+"""
+import asyncio
+
+import pytest
+
+from app.infrastructure.pipeline.job_queue import JobQueue, JobWorker
+from app.infrastructure.pipeline.metrics import (
+    PipelineMetricsStore,
+    collect,
+    stage,
+    STAGE_DOWNLOAD,
+    STAGE_COMPUTE,
+)
+from app.application.use_cases.pipeline_metrics_use_cases import build_run_report
+
+
+def test_stages_are_collected_into_current_run():
+    with collect('run') as run:
+        with stage(STAGE_DOWNLOAD) as timed:
+            timed.bytes = 1024
+        with stage(STAGE_DOWNLOAD, nbytes=2048):
+            pass
+        with pytest.raises(ValueError):
+            with stage(STAGE_COMPUTE):
+                raise ValueError('boom')
+
+    download = run.stages[STAGE_DOWNLOAD]
+    assert download.count == 2
+    assert download.bytes == 3072
+    assert run.stages[STAGE_COMPUTE].errors == 1
+
+    # Outside a run, stages are only logged
+    with stage(STAGE_DOWNLOAD):
+        pass
+    assert run.stages[STAGE_DOWNLOAD].count == 2
+
+
+@pytest.mark.asyncio
+async def test_store_merges_jobs_of_a_run(session_factory):
+    store = PipelineMetricsStore(session_factory)
+    for seconds in (1.0, 3.0):
+        with collect('ndvi_sync:2025-01-31') as run:
+            pass
+        run.record(STAGE_DOWNLOAD, seconds, nbytes=1024 * 1024, rss_mb=100 * seconds)
+        await store.save(run)
+
+    rows = await store.get_run('ndvi_sync:2025-01-31')
+    assert len(rows) == 1
+    assert rows[0].count == 2
+    assert rows[0].total_seconds == 4.0
+    assert rows[0].max_seconds == 3.0
+    assert rows[0].peak_rss_mb == 300.0
+
+    report = build_run_report('ndvi_sync:2025-01-31', rows)
+    assert report.slowest_stage == STAGE_DOWNLOAD
+    assert report.stages[0].throughput_mb_per_second == 0.5
+
+
+@pytest.mark.asyncio
+async def test_worker_records_stages_per_job_run(session_factory):
+    queue = JobQueue(session_factory)
+    await queue.enqueue('ndvi_sync', run_id='ndvi_sync:2025-01-31')
+    await queue.enqueue('ndvi_sync', run_id='ndvi_sync:2025-01-31')
+
+    async def handler(job, progress):
+        with stage(STAGE_COMPUTE, items=1):
+            await asyncio.sleep(0)
+
+    await JobWorker(queue, {'ndvi_sync': handler}).run_until_idle()
+
+    runs = await PipelineMetricsStore(session_factory).list_runs()
+    assert [rows[0].run_id for rows in runs] == ['ndvi_sync:2025-01-31']
+    assert runs[0][0].stage == STAGE_COMPUTE
+    assert runs[0][0].items == 2
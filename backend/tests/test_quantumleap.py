@@ -0,0 +1,101 @@
+"""
+Tests for the QuantumLeap client and transport injection of the FIWARE client,
+against local stand-ins served through httpx.MockTransport.
+"""
+import datetime
+import json
+from collections import defaultdict
+
+import httpx
+import pytest
+
+from app.infrastructure.external_services.circuit_breaker import CircuitBreaker
+from app.infrastructure.external_services.fiware_client import FiwareClient
+from app.infrastructure.external_services.quantumleap_client import QuantumLeapClient
+
+PARCEL = "urn:ngsi-ld:AgriParcel:OpenAgri:7"
+
+
+class FakeQuantumLeap:
+    """Serves /v2/entities/{id}/attrs/{attr} with lastN and per-month/day avg/min/max/count/sum."""
+
+    def __init__(self, points):
+        self.points = points  # {(entity_id, attr): [(iso timestamp, value)]}
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        _, _, _, entity_id, _, attr = request.url.path.split("/")
+        series = sorted(self.points.get((entity_id, attr), []))
+        if not series:
+            return httpx.Response(404, json={"error": "Not Found"})
+        params = request.url.params
+        if "fromDate" in params:
+            series = [p for p in series if p[0] >= params["fromDate"]]
+        if "toDate" in params:
+            series = [p for p in series if p[0] <= params["toDate"]]
+        if "lastN" in params:
+            series = series[-int(params["lastN"]):]
+        if "aggrMethod" in params:
+            width = {"year": 4, "month": 7, "day": 10}[params.get("aggrPeriod", "year")]
+            buckets = defaultdict(list)
+            for timestamp, value in series:
+                buckets[timestamp[:width]].append(value)
+            reduce = {"avg": lambda v: sum(v) / len(v), "min": min, "max": max, "count": len, "sum": sum}
+            series = [(key, reduce[params["aggrMethod"]](values)) for key, values in sorted(buckets.items())]
+        return httpx.Response(200, json={
+            "entityId": entity_id, "attrName": attr,
+            "index": [p[0] for p in series], "values": [p[1] for p in series]
+        })
+
+
+@pytest.fixture
+def quantumleap():
+    points = [(f"2025-{month:02d}-{day:02d}T12:00:00.000+00:00", month / 10 + day / 1000)
+              for month in (5, 6, 7) for day in (1, 11, 21)]
+    return FakeQuantumLeap({(PARCEL, "ndvi"): points})
+
+
+@pytest.mark.asyncio
+async def test_parcel_series_aggregated_by_month(quantumleap):
+    client = QuantumLeapClient("http://ql", transport=httpx.MockTransport(quantumleap))
+    series = await client.get_parcel_series(
+        7, "ndvi", from_date=datetime.datetime(2025, 6, 1), aggr_method="avg", aggr_period="month"
+    )
+
+    assert series.index == ["2025-06", "2025-07"]
+    assert series.values == pytest.approx([0.611, 0.711])
+    params = quantumleap.requests[0].url.params
+    assert params["type"] == "AgriParcel"
+    assert params["fromDate"] == "2025-06-01T00:00:00Z"
+    assert quantumleap.requests[0].headers["Fiware-Service"]
+
+
+@pytest.mark.asyncio
+async def test_last_n_and_missing_entity(quantumleap):
+    client = QuantumLeapClient("http://ql", transport=httpx.MockTransport(quantumleap))
+    series = await client.get_parcel_series(7, "ndvi", last_n=2)
+    assert series.index == ["2025-07-11T12:00:00.000+00:00", "2025-07-21T12:00:00.000+00:00"]
+
+    empty = await client.get_parcel_series(8, "ndvi")
+    assert empty.index == [] and empty.values == []
+
+    with pytest.raises(ValueError):
+        await client.get_parcel_series(7, "ndvi", aggr_method="median")
+
+
+@pytest.mark.asyncio
+async def test_iter_entities_follows_pages_through_injected_transport():
+    entities = [{"id": f"urn:ngsi-ld:AgriParcelRecord:OpenAgri:7:ndvi:{n}"} for n in range(25)]
+    offsets = []
+
+    def orion(request):
+        offset, limit = int(request.url.params["offset"]), int(request.url.params["limit"])
+        offsets.append(offset)
+        return httpx.Response(200, content=json.dumps(entities[offset:offset + limit]))
+
+    client = FiwareClient("http://orion", breaker=CircuitBreaker("test"), transport=httpx.MockTransport(orion))
+    found = [entity async for entity in client.iter_entities("AgriParcelRecord", page_size=10)]
+
+    assert found == entities
+    assert offsets == [0, 10, 20]
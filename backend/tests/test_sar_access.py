@@ -0,0 +1,74 @@
+"""
+Tests for the Sentinel-1 GRD access layer.
+"""
+import numpy as np
+import pytest
+import rasterio
+from rasterio.control import GroundControlPoint
+from rasterio.crs import CRS
+
+from app.infrastructure.image_processing import sar_access
+from app.infrastructure.image_processing.sar_access import open_sar_product, release_sar_products
+from app.infrastructure.image_processing.soil_moisture_processing import compute_soil_moisture_proxy
+
+# Scene of 0.2 x 0.2 degrees, georeferenced by its corners only (like a GRD measurement)
+WIDTH, HEIGHT = 200, 200
+WEST, SOUTH, EAST, NORTH = 105.0, 21.0, 105.2, 21.2
+FARM_BBOX = [105.05, 21.05, 105.06, 21.06]
+
+
+def write_grd(path, value=130):
+    gcps = [
+        GroundControlPoint(row=0, col=0, x=WEST, y=NORTH, z=0),
+        GroundControlPoint(row=0, col=WIDTH, x=EAST, y=NORTH, z=0),
+        GroundControlPoint(row=HEIGHT, col=0, x=WEST, y=SOUTH, z=0),
+        GroundControlPoint(row=HEIGHT, col=WIDTH, x=EAST, y=SOUTH, z=0),
+    ]
+    with rasterio.open(path, 'w', driver='GTiff', width=WIDTH, height=HEIGHT, count=1, dtype='uint16',
+                       gcps=gcps, crs=CRS.from_epsg(4326)) as dst:
+        dst.write(np.full((HEIGHT, WIDTH), value, dtype=np.uint16), 1)
+    return str(path)
+
+
+@pytest.fixture
+def grd(tmp_path):
+    path = write_grd(tmp_path / 's1a-iw-grd-vv-test.tiff')
+    yield path
+    release_sar_products(str(tmp_path))
+
+
+def test_reads_farm_footprint_through_gcp_warp(grd):
+    with open_sar_product(grd) as product:
+        assert product.vrt is not None and product.dataset.crs.to_epsg() == 32648
+        window = product.window_for_bbox(FARM_BBOX)
+        data, _ = product.read(window=window)
+
+    # About 1 km square at ~10 m pixels, not the whole scene
+    assert data.shape == (int(window.height), int(window.width))
+    assert 0 < data.size < WIDTH * HEIGHT / 50
+    assert np.all(data[1:-1, 1:-1] == 130)
+
+
+def test_warp_is_solved_once_and_readers_get_their_own_handles(grd, monkeypatch):
+    solved = []
+    plan = sar_access.plan_gcp_warp
+    monkeypatch.setattr(sar_access, 'plan_gcp_warp', lambda *args: solved.append(1) or plan(*args))
+    monkeypatch.setattr(sar_access, 'MAX_CACHED_WARPS', 1)
+
+    first = open_sar_product(grd)
+    second = open_sar_product(grd)
+    assert len(solved) == 1 and second.warp == first.warp
+    assert second.src is not first.src
+
+    # Neither another reader closing, nor eviction or release of the cached warp closes a dataset in use
+    second.close()
+    open_sar_product(write_grd(grd.replace('-vv-', '-vh-'))).close()
+    release_sar_products(grd)
+    data, _ = first.read(bbox=FARM_BBOX)
+    assert data.size > 0
+    first.close()
+
+
+def test_bbox_outside_product_raises_instead_of_reading_full_scene(grd, tmp_path):
+    with pytest.raises(ValueError):
+        compute_soil_moisture_proxy(grd, str(tmp_path / 'out.tif'), bbox=[100.0, 10.0, 100.1, 10.1])
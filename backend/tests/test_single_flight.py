@@ -0,0 +1,165 @@
+"""
+Tests for single-flight coalescing of satellite computations.
+"""
+import asyncio
+import functools
+
+import pytest
+
+from app.infrastructure.pipeline.job_queue import JobProgress, STAGE_DOWNLOADED, STAGE_SEARCHED
+from app.infrastructure.pipeline.leader_lock import AdvisoryLock
+from app.infrastructure.pipeline.single_flight import FlightLockLostError, SingleFlight, flight_key
+
+
+@pytest.fixture
+def lock_factory(session_factory):
+    return functools.partial(AdvisoryLock, session_factory=session_factory)
+
+
+class RecordingProgress(JobProgress):
+    def __init__(self):
+        super().__init__()
+        self.stages = []
+
+    async def checkpoint(self, stage=None):
+        await super().checkpoint(stage)
+        self.stages.append(self.stage)
+
+
+def test_flight_key_normalizes_bbox_and_dates():
+    a = flight_key('NDVI', 'SENTINEL-2', [105.8, 21.0, 105.81, 21.01], '2025-01-01T08:00:00', '2025-01-31')
+    b = flight_key('NDVI', 'SENTINEL-2', [105.8000000001, 21, 105.81, 21.01], '2025-01-01', '2025-01-31')
+    assert a == b
+    assert a != flight_key('NDVI', 'SENTINEL-2', [105.8, 21.0, 105.81, 21.01], '2025-01-02', '2025-01-31')
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_computation():
+    flights = SingleFlight(use_db_lock=False)
+    calls = 0
+
+    async def compute(progress):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {'mean': 0.5}
+
+    results = await asyncio.gather(*[flights.do('k', compute) for _ in range(5)])
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+    assert not flights.in_flight('k')
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    flights = SingleFlight(use_db_lock=False)
+
+    async def fail(progress):
+        await asyncio.sleep(0.01)
+        raise RuntimeError('download failed')
+
+    results = await asyncio.gather(*[flights.do('k', fail) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok(progress):
+        return 1
+    assert await flights.do('k', ok) == 1
+
+
+@pytest.mark.asyncio
+async def test_db_lock_serializes_separate_groups(session_factory, lock_factory, monkeypatch):
+    monkeypatch.setattr('app.infrastructure.pipeline.single_flight.FLIGHT_LOCK_POLL_SECONDS', 0.01)
+    # Two groups stand in for two worker processes
+    first = SingleFlight(lock_factory=lock_factory, session_factory=session_factory)
+    second = SingleFlight(lock_factory=lock_factory, session_factory=session_factory)
+    running = 0
+    overlap = False
+
+    async def compute(progress):
+        nonlocal running, overlap
+        running += 1
+        overlap = overlap or running > 1
+        await asyncio.sleep(0.05)
+        running -= 1
+        return True
+
+    await asyncio.gather(first.do('k', compute), second.do('k', compute))
+    assert not overlap
+
+
+@pytest.mark.asyncio
+async def test_waiting_process_reuses_the_saved_result(session_factory, lock_factory, monkeypatch):
+    monkeypatch.setattr('app.infrastructure.pipeline.single_flight.FLIGHT_LOCK_POLL_SECONDS', 0.01)
+    first = SingleFlight(lock_factory=lock_factory, session_factory=session_factory)
+    second = SingleFlight(lock_factory=lock_factory, session_factory=session_factory)
+    calls = 0
+
+    async def compute(progress):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {'mean': 0.5}
+
+    results = await asyncio.gather(first.do('k', compute), second.do('k', compute))
+    assert calls == 1
+    assert results == [{'mean': 0.5}, {'mean': 0.5}]
+
+    # A later request (nobody was waiting) computes again
+    await second.do('k', compute)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_lost_lock_stops_the_computation(monkeypatch):
+    monkeypatch.setattr('app.infrastructure.pipeline.single_flight.FLIGHT_LOCK_TTL_SECONDS', 0.03)
+
+    class StolenLock:
+        def __init__(self, name, ttl_seconds):
+            self.acquired = 0
+
+        async def acquire(self):
+            self.acquired += 1
+            return self.acquired == 1
+
+        async def release(self):
+            pass
+
+    flights = SingleFlight(lock_factory=StolenLock)
+    cancelled = False
+
+    async def compute(progress):
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    with pytest.raises(FlightLockLostError):
+        await flights.do('k', compute)
+    assert cancelled
+
+
+@pytest.mark.asyncio
+async def test_joiners_follow_the_progress_of_the_computation():
+    flights = SingleFlight(use_db_lock=False)
+    leader, joiner = RecordingProgress(), RecordingProgress()
+    searched = asyncio.Event()
+
+    async def compute(progress):
+        await progress.checkpoint(STAGE_SEARCHED)
+        searched.set()
+        await asyncio.sleep(0.02)
+        await progress.report_download(5, 10)
+        await progress.checkpoint(STAGE_DOWNLOADED)
+        return True
+
+    async def join():
+        await searched.wait()
+        return await flights.do('k', compute, joiner)
+
+    await asyncio.gather(flights.do('k', compute, leader), join())
+    assert leader.stages == [STAGE_SEARCHED, STAGE_SEARCHED, STAGE_DOWNLOADED]
+    # Caught up with the stage reached before joining, then followed it
+    assert joiner.stages == [STAGE_SEARCHED, STAGE_SEARCHED, STAGE_DOWNLOADED]
+    assert joiner.state['download'] == {'bytes': 5, 'total': 10}
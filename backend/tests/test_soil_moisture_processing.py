@@ -0,0 +1,128 @@
+"""
+Tests for the block-streamed Sentinel-1 indices and how they are saved.
+"""
+import datetime
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from sqlalchemy import select
+
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.image_processing import soil_moisture_processing
+from app.infrastructure.image_processing.soil_moisture_processing import (
+    compute_sar_indices,
+    compute_soil_moisture_proxy,
+    SOIL_MOISTURE,
+    SAR_VH,
+    SAR_VH_VV_RATIO
+)
+from app.infrastructure.repositories.satellite_repository_impl import SatelliteRepositoryImpl
+
+SHAPE = (37, 23)
+
+
+def write_measurement(path, dn):
+    with rasterio.open(path, 'w', driver='GTiff', width=dn.shape[1], height=dn.shape[0], count=1,
+                       dtype='uint16', crs='EPSG:32648', transform=from_origin(500000, 2300000, 10, 10)) as dst:
+        dst.write(dn, 1)
+    return str(path)
+
+
+def random_dn(seed, zeros=0.1):
+    rng = np.random.default_rng(seed)
+    dn = rng.integers(1, 2000, SHAPE).astype(np.uint16)
+    dn[rng.random(SHAPE) < zeros] = 0
+    return dn
+
+
+def reference_db(dn):
+    dn = np.where(dn > 0, dn.astype('float64'), np.nan)
+    return 10 * np.log10((dn ** 2) / 3e5 + 1e-10)
+
+
+def reference_moisture(dn):
+    """The float64 formula the streamed version replaced."""
+    dn = np.where(dn > 0, dn.astype('float64'), np.nan)
+    sigma0_db = 10 * np.log10((dn ** 2) / 3e5 + 1e-10)
+    return np.clip((sigma0_db + 20.0) / 15.0, 0, 1)
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Several blocks, the last one partial
+    monkeypatch.setattr(soil_moisture_processing, 'BLOCK_ROWS', 8)
+
+
+def test_float32_blocks_match_float64_formula(tmp_path):
+    dn = random_dn(0)
+    out, mean, low, high = compute_soil_moisture_proxy(write_measurement(tmp_path / 'vv.tif', dn),
+                                                       str(tmp_path / 'out.tif'))
+
+    expected = reference_moisture(dn)
+    assert mean == pytest.approx(np.nanmean(expected), abs=1e-6)
+    assert low == pytest.approx(np.nanmin(expected), abs=1e-6)
+    assert high == pytest.approx(np.nanmax(expected), abs=1e-6)
+    with rasterio.open(out) as src:
+        written = src.read(1)
+    assert written.dtype == np.float32
+    np.testing.assert_allclose(written, expected, atol=1e-6, equal_nan=True)
+
+
+def test_window_without_valid_pixels_has_no_statistics(tmp_path):
+    dn = np.zeros(SHAPE, dtype=np.uint16)
+    _, mean, low, high = compute_soil_moisture_proxy(write_measurement(tmp_path / 'vv.tif', dn),
+                                                     str(tmp_path / 'out.tif'))
+    assert (mean, low, high) == (None, None, None)
+
+
+def test_vh_and_ratio_from_one_pass(tmp_path):
+    vv, vh = random_dn(1), random_dn(2)
+    out_paths = {data_type: str(tmp_path / f'{data_type}.tif')
+                 for data_type in (SOIL_MOISTURE, SAR_VH, SAR_VH_VV_RATIO)}
+    results = compute_sar_indices(write_measurement(tmp_path / 'vv.tif', vv), out_paths,
+                                  vh_path=write_measurement(tmp_path / 'vh.tif', vh))
+
+    with rasterio.open(out_paths[SAR_VH]) as src:
+        vh_db = src.read(1)
+    with rasterio.open(out_paths[SAR_VH_VV_RATIO]) as src:
+        ratio = src.read(1)
+
+    # VH in dB; the ratio is linear VH/VV, invalid where either polarization is
+    expected_db = reference_db(vh)
+    np.testing.assert_allclose(vh_db, expected_db, atol=1e-4, equal_nan=True)
+    valid = (vv > 0) & (vh > 0)
+    expected_ratio = np.full(SHAPE, np.nan)
+    expected_ratio[valid] = vh[valid].astype('float64') ** 2 / vv[valid].astype('float64') ** 2
+    np.testing.assert_allclose(ratio, expected_ratio, rtol=1e-5, equal_nan=True)
+    assert results[SAR_VH][1] == pytest.approx(np.nanmean(expected_db), abs=1e-4)
+    assert results[SAR_VH_VV_RATIO][1] == pytest.approx(np.nanmean(expected_ratio), rel=1e-5)
+    assert results[SOIL_MOISTURE][1] == pytest.approx(np.nanmean(reference_moisture(vv)), abs=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_product_indices_are_saved_all_or_nothing(session_factory):
+    async with session_factory() as session:
+        farm = FarmModel(name="paddy", coordinates=[], user_id=1)
+        session.add(farm)
+        await session.commit()
+        farm_id = farm.id
+
+        def record(data_type, mean):
+            return SatelliteDataModel(farm_id=farm_id, acquisition_date=datetime.date(2025, 6, 1),
+                                      data_type=data_type, satellite_platform='SENTINEL-1', mean_value=mean)
+
+        # mean_value is NOT NULL: the last insert fails, and takes the others with it
+        with pytest.raises(Exception):
+            await SatelliteRepositoryImpl(session).save_many(
+                [record(SOIL_MOISTURE, 0.4), record(SAR_VH, -17.0), record(SAR_VH_VV_RATIO, None)]
+            )
+        assert (await session.execute(select(SatelliteDataModel))).scalars().all() == []
+
+        await SatelliteRepositoryImpl(session).save_many(
+            [record(SOIL_MOISTURE, 0.4), record(SAR_VH, -17.0), record(SAR_VH_VV_RATIO, 0.2)]
+        )
+        saved = (await session.execute(select(SatelliteDataModel.data_type))).scalars().all()
+        assert sorted(saved) == [SAR_VH, SAR_VH_VV_RATIO, SOIL_MOISTURE]
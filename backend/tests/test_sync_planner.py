@@ -0,0 +1,76 @@
+"""
+Tests for the dry-run sync planner.
+"""
+import datetime
+
+import pytest
+
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.pipeline.metrics import PipelineMetricsStore, RunMetrics
+from app.infrastructure.repositories.catalogue_cache_repository_impl import CatalogueCacheRepositoryImpl
+from app.application.use_cases.sync_planner_use_cases import PlanSyncUseCase
+
+SQUARE = [{'lat': 21.0, 'lng': 105.0}, {'lat': 21.0, 'lng': 105.2},
+          {'lat': 21.2, 'lng': 105.2}, {'lat': 21.2, 'lng': 105.0}]
+MB = 1024 * 1024
+
+
+def product(uuid, days_ago, cloud=5.0, size=800 * MB):
+    day = datetime.date.today() - datetime.timedelta(days=days_ago)
+    return {'uuid': uuid, 'title': f"S2_{uuid}", 'ingestiondate': f"{day.isoformat()}T03:30:00.000Z",
+            'cloud_cover': cloud, 'size': size}
+
+
+async def seed(session_factory):
+    today = datetime.date.today()
+    now = datetime.datetime.utcnow()
+    async with session_factory() as db:
+        db.add_all([FarmModel(name=f"farm {i}", coordinates=SQUARE, user_id=1) for i in range(3)])
+        # Farm 2 already has the NDVI of product 'a'
+        db.add(SatelliteDataModel(farm_id=2, data_type='NDVI', satellite_platform='SENTINEL-2',
+                                  acquisition_date=today - datetime.timedelta(days=5), mean_value=0.5))
+        await db.commit()
+        cache = CatalogueCacheRepositoryImpl(db)
+        shared = [product('a', 5), product('b', 10), product('cloudy', 15, cloud=90.0)]
+        for farm_id in (1, 2):
+            await cache.put(farm_id, 'NDVI', 'SENTINEL-2', today - datetime.timedelta(days=60), today, shared, now)
+
+
+@pytest.mark.asyncio
+async def test_plan_deduplicates_products_across_farms(session_factory):
+    await seed(session_factory)
+    plan = await PlanSyncUseCase(session_factory, search=None).execute('NDVI', backfill=True)
+
+    assert plan.farms_total == 3
+    assert plan.farms_planned == 3
+    assert plan.farms_without_catalogue == 1
+    assert [p.uuid for p in plan.products] == ['b', 'a']
+    assert {p.uuid: p.farms for p in plan.products} == {'a': 1, 'b': 2}
+    assert plan.product_jobs == 3
+    # Farm 3 has no cached search: up to 10 products estimated from the 5-day revisit
+    assert plan.estimated_uncatalogued_products == 10
+    assert plan.unique_download_bytes < plan.download_bytes
+    assert plan.history_source == 'defaults'
+
+
+@pytest.mark.asyncio
+async def test_plan_uses_stage_history(session_factory):
+    await seed(session_factory)
+    run = RunMetrics('ndvi_sync:2025-01-31')
+    run.record('download', 100.0, nbytes=1000 * MB)
+    for stage_name in ('unzip', 'decode', 'compute'):
+        run.record(stage_name, 10.0)
+    await PipelineMetricsStore(session_factory).save(run)
+
+    plan = await PlanSyncUseCase(session_factory, search=None).execute('NDVI', backfill=True)
+    assert plan.history_source == 'metrics'
+    products = plan.product_jobs + plan.estimated_uncatalogued_products
+    assert plan.estimated_cpu_seconds == pytest.approx(products * 30.0)
+    assert plan.estimated_download_seconds == pytest.approx(plan.download_bytes / (10 * MB), abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_unknown_data_type_is_rejected(session_factory):
+    with pytest.raises(ValueError):
+        await PlanSyncUseCase(session_factory, search=None).execute('LST')
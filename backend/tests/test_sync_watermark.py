@@ -0,0 +1,101 @@
+"""
+Tests for per-farm sync watermarks and the backfill of new or edited farms.
+"""
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.application.use_cases import ndvi_use_cases
+from app.application.use_cases.farm_use_cases import enqueue_farm_backfill
+from app.application.use_cases.ndvi_use_cases import CalculateNDVIUseCase
+from app.domain.entities.farm import Coordinate, FarmArea
+from app.infrastructure.database.models.farm_model import FarmModel
+from app.infrastructure.database.models.satellite_data_model import SatelliteDataModel
+from app.infrastructure.pipeline.job_queue import JobQueue, NDVI_SYNC_JOB, SOIL_MOISTURE_SYNC_JOB
+from app.infrastructure.repositories.sync_state_repository_impl import SyncStateRepositoryImpl
+
+SQUARE = [{'lat': 21.0, 'lng': 105.0}, {'lat': 21.0, 'lng': 105.1},
+          {'lat': 21.1, 'lng': 105.1}, {'lat': 21.1, 'lng': 105.0}]
+
+
+async def add_farm(session_factory):
+    async with session_factory() as session:
+        farm = FarmModel(name="paddy", coordinates=SQUARE, user_id=1)
+        session.add(farm)
+        await session.commit()
+        return farm.id
+
+
+@pytest.mark.asyncio
+async def test_watermark_only_moves_forward(session_factory):
+    farm_id = await add_farm(session_factory)
+    async with session_factory() as session:
+        states = SyncStateRepositoryImpl(session)
+        assert await states.get_state(farm_id, 'NDVI') is None
+
+        await states.advance_watermark(farm_id, 'NDVI', 'SENTINEL-2', datetime.date(2025, 6, 10))
+        await states.advance_watermark(farm_id, 'NDVI', 'SENTINEL-2', datetime.date(2025, 6, 5))
+        state = await states.get_state(farm_id, 'NDVI')
+        assert state.last_processed_date == datetime.date(2025, 6, 10)
+
+        # The catalogue check is kept next to the watermark, which it does not move
+        await states.record_check(farm_id, 'NDVI', 'SENTINEL-2', [datetime.date(2025, 6, 15)],
+                                  datetime.datetime(2025, 6, 16))
+        state = await states.get_state(farm_id, 'NDVI')
+        assert state.last_acquisition_date == datetime.date(2025, 6, 15)
+        assert state.last_processed_date == datetime.date(2025, 6, 10)
+        assert await states.get_state(farm_id, 'SOIL_MOISTURE') is None
+
+
+@pytest.mark.asyncio
+async def test_backfill_enqueues_one_job_per_sync_kind(session_factory):
+    farm_id = await add_farm(session_factory)
+    queue = JobQueue(session_factory)
+    farm = FarmArea(id=farm_id, name="paddy", user_id=1,
+                    coordinates=[Coordinate(lat=c['lat'], lng=c['lng']) for c in SQUARE])
+
+    job_ids = await enqueue_farm_backfill(queue, farm)
+    jobs = [await queue.get(job_id) for job_id in job_ids]
+    assert [job.kind for job in jobs] == [NDVI_SYNC_JOB, SOIL_MOISTURE_SYNC_JOB]
+    assert all(job.payload == {'bbox': [105.0, 21.0, 105.1, 21.1], 'backfill': True} for job in jobs)
+
+    # Editing the polygon again before the backfill ran does not queue it twice
+    assert await enqueue_farm_backfill(queue, farm) == job_ids
+    assert await enqueue_farm_backfill(queue, farm.model_copy(update={'coordinates': []})) == []
+
+
+@pytest.mark.asyncio
+async def test_backfill_replaces_data_computed_on_the_old_polygon(session_factory, tmp_path, monkeypatch):
+    farm_id = await add_farm(session_factory)
+    acquisition_date = datetime.date(2025, 6, 1)
+    async with session_factory() as session:
+        session.add(SatelliteDataModel(farm_id=farm_id, acquisition_date=acquisition_date, data_type='NDVI',
+                                       satellite_platform='SENTINEL-2', mean_value=0.2))
+        await session.commit()
+
+    product = {'uuid': 'p1', 'title': 'p1', 'ingestiondate': '2025-06-01T10:00:00', 'cloud_cover': 5.0}
+
+    async def search(bbox, start_date, end_date):
+        return None, {'p1': product}
+
+    async def download(api, product_info, out_dir, on_progress=None):
+        return str(tmp_path / 'p1.SAFE')
+
+    monkeypatch.setattr(ndvi_use_cases.settings, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(ndvi_use_cases, 'search_sentinel_products', search)
+    monkeypatch.setattr(ndvi_use_cases, 'download_product', download)
+    monkeypatch.setattr(ndvi_use_cases, 'find_band_paths', lambda safe: ('red', 'nir'))
+    monkeypatch.setattr(ndvi_use_cases, 'compute_ndvi', lambda red, nir, out, bbox: (out, 0.7, 0.1, 0.9))
+
+    bbox = [105.0, 21.0, 105.1, 21.1]
+    async with session_factory() as session:
+        # A regular sync keeps the stored value
+        await CalculateNDVIUseCase().sync_latest_data_for_farm(farm_id, bbox, session)
+        assert (await session.execute(select(SatelliteDataModel.mean_value))).scalars().all() == [0.2]
+
+        await CalculateNDVIUseCase().sync_latest_data_for_farm(farm_id, bbox, session, backfill=True)
+        rows = (await session.execute(select(SatelliteDataModel))).scalars().all()
+        assert [(row.acquisition_date, row.mean_value, row.max_value) for row in rows] == [
+            (acquisition_date, 0.7, 0.9)
+        ]
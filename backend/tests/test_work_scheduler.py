@@ -0,0 +1,93 @@
+"""
+Tests for the priority-aware work scheduler.
+"""
+import asyncio
+
+import pytest
+
+from app.infrastructure.pipeline.work_scheduler import (
+    WorkScheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_RESYNC,
+    PRIORITY_BATCH,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def _queue_up(scheduler, order, name, priority):
+    async with scheduler.slot(priority):
+        order.append(name)
+
+
+@pytest.mark.asyncio
+async def test_most_urgent_waiter_runs_first():
+    scheduler = WorkScheduler(total_slots=1)
+    order = []
+    await scheduler.acquire(PRIORITY_BATCH)
+
+    tasks = [
+        asyncio.create_task(_queue_up(scheduler, order, 'batch', PRIORITY_BATCH)),
+        asyncio.create_task(_queue_up(scheduler, order, 'resync', PRIORITY_RESYNC)),
+        asyncio.create_task(_queue_up(scheduler, order, 'interactive', PRIORITY_INTERACTIVE)),
+    ]
+    await asyncio.sleep(0)
+    scheduler.release(PRIORITY_BATCH)
+    await asyncio.gather(*tasks)
+    assert order == ['interactive', 'resync', 'batch']
+
+
+@pytest.mark.asyncio
+async def test_class_cap_leaves_room_for_other_classes():
+    scheduler = WorkScheduler(total_slots=2, class_caps={PRIORITY_BATCH: 1})
+    await scheduler.acquire(PRIORITY_BATCH)
+
+    second_batch = asyncio.create_task(scheduler.acquire(PRIORITY_BATCH))
+    await asyncio.sleep(0)
+    assert not second_batch.done()
+
+    # The free slot goes to an interactive request despite the older batch waiter
+    await asyncio.wait_for(scheduler.acquire(PRIORITY_INTERACTIVE), timeout=1)
+    assert scheduler.stats()['batch'] == {'running': 1, 'waiting': 1, 'cap': 1}
+
+    scheduler.release(PRIORITY_BATCH)
+    await asyncio.wait_for(second_batch, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_aging_prevents_starvation():
+    clock = FakeClock()
+    scheduler = WorkScheduler(total_slots=1, aging_seconds=60, clock=clock)
+    order = []
+    await scheduler.acquire(PRIORITY_INTERACTIVE)
+
+    batch = asyncio.create_task(_queue_up(scheduler, order, 'batch', PRIORITY_BATCH))
+    await asyncio.sleep(0)
+    # Batch has waited more than two aging periods: it now outranks a fresh interactive request
+    clock.now = 150
+    interactive = asyncio.create_task(_queue_up(scheduler, order, 'interactive', PRIORITY_INTERACTIVE))
+    await asyncio.sleep(0)
+
+    scheduler.release(PRIORITY_INTERACTIVE)
+    await asyncio.gather(batch, interactive)
+    assert order == ['batch', 'interactive']
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = WorkScheduler(total_slots=1)
+    await scheduler.acquire(PRIORITY_BATCH)
+    waiter = asyncio.create_task(scheduler.acquire(PRIORITY_BATCH))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    scheduler.release(PRIORITY_BATCH)
+    assert scheduler.running == 0
+    await asyncio.wait_for(scheduler.acquire(PRIORITY_INTERACTIVE), timeout=1)